@@ -6,24 +6,53 @@ Usage:
     omnivo stop      Stop the daemon
     omnivo restart   Restart the daemon
     omnivo status    Show daemon status
-    omnivo log       Tail daemon logs (Ctrl+C to stop)
+    omnivo meeting   Start/stop meeting recording in the running daemon
+    omnivo reload    Reload ~/.omnivo/config.json without restarting
+    omnivo memory    Show daemon memory: RSS history, per-job peaks, snapshots
+                     trace on|off       start/stop tracemalloc in the daemon
+                     snapshot [LABEL]   top allocation sites right now
+                     diff A [B]         allocation growth from snapshot A to B (or now)
+                     -n LIMIT           sites to show (default 15)
+                     --by lineno|filename
+    omnivo profile   Sample the daemon's CPU use and write a flamegraph profile
+                     -s SECONDS         how long to profile (default 30; Ctrl+C stops early)
+                     --interval MS      milliseconds between samples (default 10)
+                     --stop             collect a profile left running
+    omnivo log       Follow daemon logs (Ctrl+C to stop)
+                     --level LEVEL      minimum level (debug/info/warning/error)
+                     --component NAME   only these components (comma-separated)
+                     -n LINES           history lines to show first (default 10)
+    omnivo search    Search meeting notes (e.g. omnivo search budget review)
+                     -n LIMIT           results to show (default 10)
+                     --rebuild          re-index every note first
+    omnivo seek      Find where a phrase was said in recorded meetings
+                     --meeting NAME     only this meeting (e.g. 2026-03-02-0930)
+    omnivo serve     Run the local transcription HTTP server (foreground)
+                     --host HOST        address to listen on (default 127.0.0.1)
+                     --port PORT        port to listen on (default 8765)
+                     --jobs N           jobs transcribed concurrently (default 2)
     omnivo help      Show this help
 """
 
 import argparse
+import json
 import os
-import subprocess
+import socket
 import sys
 import time
+from collections import deque
 
+from services import control
 from services.launchd import (
     DATA_DIR,
-    STDOUT_LOG,
     install,
     uninstall,
     is_loaded,
     get_status,
 )
+from utils.config import LOG_PATH, SERVE_HOST, SERVE_PORT, SERVE_MAX_JOBS
+
+LOG_LEVELS = ["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"]
 
 
 def snapshot_env():
@@ -59,9 +88,9 @@ def snapshot_env():
 
 
 def cmd_start():
-    if is_loaded():
+    status = get_status()
+    if status["loaded"]:
         print("Omnivo daemon is already running.")
-        status = get_status()
         if status["pid"]:
             print(f"  PID: {status['pid']}")
         return
@@ -93,7 +122,114 @@ def cmd_restart():
     print("Omnivo daemon started.")
 
 
+def _format_bytes(n):
+    if n is None:
+        return "n/a"
+    return f"{n / (1024 * 1024):.1f}MB"
+
+
+def _format_latency(summary):
+    if not summary or not summary.get("count"):
+        return "no samples yet"
+    return (
+        f"p50 {summary['p50']:.2f}s  p95 {summary['p95']:.2f}s  "
+        f"p99 {summary['p99']:.2f}s  (n={summary['count']})"
+    )
+
+
+def _print_live_status(state):
+    dictation = state["dictation"]
+    meeting = state["meeting"]
+    api = state["api"]
+
+    if meeting["recording"]:
+        meeting_state = "recording"
+    elif meeting["transcribing"]:
+        meeting_state = "transcribing"
+    else:
+        meeting_state = "idle"
+
+    print("Omnivo daemon: running")
+    print(f"  PID:       {state['pid']}")
+    print(f"  Uptime:    {state['uptime_seconds'] / 60:.0f} min")
+    print(
+        f"  Dictation: {'recording' if dictation['recording'] else 'idle'}, "
+        f"{dictation['in_progress']} processing"
+    )
+    print(f"  Meeting:   {meeting_state}")
+    if api:
+        print(
+            f"  API:       in flight {api['in_flight']['interactive']} interactive / "
+            f"{api['in_flight']['background']} background, queued "
+            f"{api['queue_depth']['interactive']} / {api['queue_depth']['background']}"
+        )
+    else:
+        print("  API:       not loaded yet")
+    requests = dictation["requests"]
+    print(f"  Latency:   {_format_latency(requests and requests['latency'])}")
+    routing = requests and requests.get("routing")
+    if routing and routing["models"]:
+        models = ", ".join(
+            f"{name} {model['requests']}"
+            + (f" (p95 {model['p95']:.2f}s)" if model["p95"] is not None else "")
+            + (" failing" if model["degraded"] else "")
+            for name, model in routing["models"].items()
+        )
+        print(f"  Models:    {models}")
+    if dictation.get("cancelled"):
+        print(
+            f"  Cancelled: {dictation['cancelled']} "
+            f"({dictation['superseded']} superseded), "
+            f"{dictation['requests_avoided']} requests avoided, "
+            f"{dictation['requests_aborted']} aborted in flight"
+        )
+    response_cache = dictation.get("response_cache")
+    if response_cache and response_cache["hit_rate"] is not None:
+        hits = response_cache["memory_hits"] + response_cache["disk_hits"]
+        print(
+            f"  Replies:   {response_cache['hit_rate']:.0%} from cache "
+            f"({hits} of {hits + response_cache['misses']}, {response_cache['disk_hits']} from disk)"
+        )
+    vocabulary = dictation.get("vocabulary")
+    if vocabulary and vocabulary["rules"]:
+        print(
+            f"  Vocab:     {vocabulary['rules']} rules, "
+            f"{vocabulary['replacements']} replacements in {vocabulary['applied']} dictations"
+        )
+    clipboard = dictation.get("clipboard")
+    if clipboard and clipboard["pastes"]:
+        print(
+            f"  Paste:     {clipboard['backend']}, p50 {clipboard['latency']['p50'] * 1000:.0f}ms, "
+            f"{clipboard['restored']} restored, {clipboard['unconfirmed']} unconfirmed"
+        )
+    worker = state.get("worker")
+    if worker and worker["started"]:
+        restarts = worker["started"] - 1
+        print(
+            f"  Worker:    {'pid ' + str(worker['pid']) if worker['pid'] else 'stopped'}, "
+            f"{worker['jobs']} jobs ({worker['failed']} failed, {worker['in_flight']} running)"
+            + (f", {restarts} restarts" if restarts else "")
+        )
+    print(
+        f"  Memory:    RSS {_format_bytes(state['memory']['rss_bytes'])} "
+        f"(peak {_format_bytes(state['memory']['peak_rss_bytes'])})"
+    )
+    print(f"  Logs:      {LOG_PATH}")
+
+
 def cmd_status():
+    try:
+        _print_live_status(control.request("status"))
+        return
+    except control.ControlUnavailable:
+        pass  # daemon down or predates the control socket — ask launchd
+    except socket.timeout:
+        print("Omnivo daemon did not respond.")
+        sys.exit(1)
+    except control.ControlError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
     status = get_status()
     if not status["loaded"]:
         print("Omnivo daemon: not running")
@@ -104,21 +240,336 @@ def cmd_status():
         print(f"  PID:   {status['pid']}")
     if status["state"]:
         print(f"  State: {status['state']}")
-    print(f"  Logs:  {STDOUT_LOG}")
+    print(f"  Logs:  {LOG_PATH}")
+
+
+def cmd_meeting():
+    try:
+        recording = control.request("meeting.toggle")
+    except control.ControlUnavailable:
+        print("Omnivo daemon is not running.")
+        sys.exit(1)
+    except socket.timeout:
+        print("Omnivo daemon did not respond.")
+        sys.exit(1)
+    except control.ControlError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    print("Meeting recording started." if recording else "Meeting recording stopped.")
+
+
+def _print_memory_report(report):
+    print(
+        f"RSS {_format_bytes(report['rss_bytes'])} "
+        f"(peak {_format_bytes(report['peak_rss_bytes'])}, "
+        f"budget {_format_bytes(report['budget_bytes']) if report['budget_bytes'] else 'none'})"
+    )
+    for window, summary in report["history"].items():
+        if summary:
+            print(
+                f"  last {window:<4} min {_format_bytes(summary['min'])}  "
+                f"max {_format_bytes(summary['max'])}  ({summary['count']} samples)"
+            )
+    for kind, peak in sorted(report["job_peaks"].items()):
+        print(f"  {kind + ' peak':<16} {_format_bytes(peak)}")
+    if report["recent_jobs"]:
+        print("Recent jobs:")
+        for job in report["recent_jobs"][-5:]:
+            started = time.strftime("%H:%M:%S", time.localtime(job["started_at"]))
+            traced = f", traced peak {_format_bytes(job['traced_peak'])}" if job["traced_peak"] else ""
+            print(
+                f"  {started}  {job['kind']:<10} {job['seconds']:>7.1f}s  "
+                f"RSS {_format_bytes(job['rss_start'])} → peak "
+                f"{_format_bytes(job['rss_peak'])}{traced}"
+            )
+    if report["tracing"]:
+        snapshots = ", ".join(report["snapshots"]) or "none"
+        print(f"Tracing: on ({_format_bytes(report['traced_bytes'])} traced; snapshots: {snapshots})")
+    else:
+        print("Tracing: off (omnivo memory trace on)")
+
+
+def cmd_memory(action=None, names=(), limit=15, group_by="lineno"):
+    names = list(names)
+    try:
+        if action == "trace":
+            if names not in (["on"], ["off"]):
+                print("Usage: omnivo memory trace on|off")
+                sys.exit(1)
+            tracing = control.request("memory.trace", on=names[0] == "on")
+            print(f"Memory tracing {'on' if tracing else 'off'}.")
+        elif action == "snapshot":
+            result = control.request(
+                "memory.snapshot", label=names[0] if names else None,
+                limit=limit, group_by=group_by,
+            )
+            print(f"Snapshot '{result['label']}': {_format_bytes(result['traced_bytes'])} traced")
+            for stat in result["top"]:
+                print(f"  {_format_bytes(stat['size_bytes']):>9}  {stat['count']:>8}  {stat['location']}")
+        elif action == "diff":
+            if not names:
+                print("Usage: omnivo memory diff A [B]")
+                sys.exit(1)
+            result = control.request(
+                "memory.diff", first=names[0], second=names[1] if len(names) > 1 else None,
+                limit=limit, group_by=group_by,
+            )
+            growth = result["size_diff_bytes"] / (1024 * 1024)
+            print(
+                f"{result['from']} → {result['to']} ({result['seconds']:.0f}s): "
+                f"{growth:+.1f}MB"
+            )
+            for stat in result["top"]:
+                print(
+                    f"  {stat['size_diff_bytes'] / (1024 * 1024):>+8.2f}MB  "
+                    f"{stat['count_diff']:>+8}  {stat['location']}"
+                )
+        else:
+            _print_memory_report(control.request("memory.report"))
+    except control.ControlUnavailable:
+        print("Omnivo daemon is not running.")
+        sys.exit(1)
+    except socket.timeout:
+        print("Omnivo daemon did not respond.")
+        sys.exit(1)
+    except control.ControlError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+
+def _print_profile(result):
+    if not result:
+        print("No profile was written (see omnivo log).")
+        return
+    print(
+        f"Profiled {result['seconds']:.0f}s ({result['samples']} samples, "
+        f"{result['weighting']} time, {result['overhead']:.1%} overhead)"
+    )
+    if result["top"]:
+        print("Top functions (self time):")
+        for label, seconds in result["top"]:
+            print(f"  {seconds:>8.3f}s  {label}")
+    print(f"Speedscope: {result['speedscope']}  (open at https://www.speedscope.app)")
+    print(f"Collapsed:  {result['collapsed']}")
+
+
+def cmd_profile(seconds=30, interval=None, stop=False):
+    try:
+        if not stop:
+            control.request(
+                "profile.start", seconds=seconds,
+                interval=interval / 1000 if interval else None,
+            )
+            print(f"Profiling the daemon for {seconds:.0f}s (Ctrl+C to stop early)...")
+            try:
+                time.sleep(seconds)
+            except KeyboardInterrupt:
+                print()
+        _print_profile(control.request("profile.stop", timeout=30))
+    except control.ControlUnavailable:
+        print("Omnivo daemon is not running.")
+        sys.exit(1)
+    except socket.timeout:
+        print("Omnivo daemon did not respond.")
+        sys.exit(1)
+    except control.ControlError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+
+def _log_filter(level, components):
+    """Build a predicate over parsed log entries."""
+    min_level = LOG_LEVELS.index(level.upper()) if level else 0
+    wanted = [c.strip() for c in components.split(",")] if components else []
+
+    def matches(entry):
+        if entry is None:  # not a JSON line
+            return not level and not wanted
+        entry_level = entry.get("level", "INFO")
+        if entry_level in LOG_LEVELS and LOG_LEVELS.index(entry_level) < min_level:
+            return False
+        if wanted:
+            component = entry.get("component", "")
+            return any(component == c or component.startswith(c + ".") for c in wanted)
+        return True
+
+    return matches
+
+
+def _format_log_line(line):
+    """Parse a JSON log line. Returns (entry or None, display text)."""
+    try:
+        entry = json.loads(line)
+    except ValueError:
+        return None, line.rstrip("\n")
+    if not isinstance(entry, dict):
+        return None, line.rstrip("\n")
+    text = (
+        f"{entry.get('ts', '')[11:23]} {entry.get('level', ''):<7} "
+        f"{entry.get('component', ''):<12} {entry.get('msg', '')}"
+    )
+    if entry.get("exc"):
+        text += "\n" + entry["exc"]
+    return entry, text
+
+
+def follow_log(path, matches, history=10, follow=True, poll_interval=0.25):
+    """Print the last ``history`` matching lines, then follow new ones.
+
+    Reopens the file when it is rotated or truncated.
+    """
+    with open(path, encoding="utf-8", errors="replace") as f:
+        recent = deque(maxlen=history or None)
+        for line in f:
+            entry, text = _format_log_line(line)
+            if matches(entry):
+                recent.append(text)
+        if history:
+            for text in recent:
+                print(text)
+        sys.stdout.flush()
+        if not follow:
+            return
+        inode = os.fstat(f.fileno()).st_ino
+
+        while True:
+            line = f.readline()
+            if line:
+                entry, text = _format_log_line(line)
+                if matches(entry):
+                    print(text, flush=True)
+                continue
+            time.sleep(poll_interval)
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            if st.st_ino != inode or st.st_size < f.tell():
+                f.close()
+                f = open(path, encoding="utf-8", errors="replace")
+                inode = os.fstat(f.fileno()).st_ino
+
+
+def cmd_reload():
+    try:
+        changed = control.request("config.reload")
+    except control.ControlUnavailable:
+        print("Omnivo daemon is not running.")
+        sys.exit(1)
+    except socket.timeout:
+        print("Omnivo daemon did not respond.")
+        sys.exit(1)
+    except control.ControlError as e:
+        print(f"Config not reloaded: {e}")
+        sys.exit(1)
+    if changed:
+        print(f"Config reloaded. Changed: {', '.join(changed)}")
+    else:
+        print("Config reloaded. No changes.")
 
 
-def cmd_log():
-    if not os.path.exists(STDOUT_LOG):
-        print(f"No log file yet at {STDOUT_LOG}")
+def cmd_log(level=None, component=None, lines=10, follow=True):
+    if level and level.upper() not in LOG_LEVELS:
+        print(f"Unknown level '{level}'. Choose from: {', '.join(LOG_LEVELS).lower()}")
+        sys.exit(1)
+    if not os.path.exists(LOG_PATH):
+        print(f"No log file yet at {LOG_PATH}")
         print("Start the daemon first: omnivo start")
         return
 
     try:
-        subprocess.run(["tail", "-f", STDOUT_LOG])
+        follow_log(LOG_PATH, _log_filter(level, component), history=lines, follow=follow)
     except KeyboardInterrupt:
         pass
 
 
+def cmd_search(words, limit=10, rebuild=False):
+    from datetime import datetime
+    from services.search_index import SearchIndex
+
+    query = " ".join(words)
+    with SearchIndex() as index:
+        if not os.path.isdir(index.notes_dir):
+            print(f"No meeting notes at {index.notes_dir}")
+            return
+        if rebuild:
+            counts = index.rebuild()
+            print(f"Indexed {counts['added']} notes in {counts['seconds']:.2f}s")
+        started = time.perf_counter()
+        try:
+            results = index.search(query, limit=limit)
+        except Exception as e:  # sqlite3.OperationalError on odd FTS input
+            print(f"Search failed: {e}")
+            sys.exit(1)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        notes = index.stats()["notes"]
+
+    for result in results:
+        when = datetime.fromtimestamp(result["meeting_time"]).strftime("%Y-%m-%d %H:%M")
+        snippet = " ".join(result["snippet"].split())
+        print(f"{when}  {result['path']}")
+        print(f"    {snippet}")
+    print(f"{len(results)} result(s) from {notes} notes in {elapsed_ms:.1f} ms")
+
+
+def cmd_seek(words, meeting=None):
+    from core.word_timeline import SUFFIX, WordTimeline
+    from services.audio_archive import AudioArchive
+    from utils.settings import get_settings
+
+    phrase = " ".join(words)
+    notes_dir = get_settings().meeting_notes_path
+    if not os.path.isdir(notes_dir):
+        print(f"No meeting notes at {notes_dir}")
+        return
+    names = sorted(
+        name for name in os.listdir(notes_dir)
+        if name.endswith(SUFFIX) and (meeting is None or name[:-len(SUFFIX)] == meeting)
+    )
+    if not names:
+        print("No word timings found (enable meeting_timestamps in config.json)")
+        return
+
+    archive = AudioArchive(root=notes_dir)
+    found = 0
+    for name in names:
+        timeline = WordTimeline.load(os.path.join(notes_dir, name))
+        hits = timeline.find(phrase)
+        # Duplicate recordings share one archived file
+        audio = (archive.resolve(name[:-len(SUFFIX)]) or timeline.audio) if hits else None
+        for start, end in hits:
+            found += 1
+            minutes, seconds = divmod(start, 60)
+            context = timeline.text_between(max(0.0, start - 3), end + 3)
+            print(f"{name[:-len(SUFFIX)]}  {int(minutes):02d}:{seconds:04.1f}  "
+                  f"{audio or '(no audio saved)'}")
+            print(f"    …{context}…")
+    print(f"{found} match(es) in {len(names)} meeting(s)")
+
+
+def cmd_serve(host=SERVE_HOST, port=SERVE_PORT, jobs=SERVE_MAX_JOBS):
+    if not os.getenv("OPENAI_API_KEY"):
+        print("OPENAI_API_KEY is not set. Add it to .env or the environment.")
+        sys.exit(1)
+
+    from services.transcription_server import TranscriptionServer
+    from utils.log import setup_logging
+
+    setup_logging()
+    server = TranscriptionServer(host=host, port=port, max_jobs=jobs)
+    server.start()
+    print(f"Serving transcription on {server.address} (Ctrl+C to stop)")
+    print(
+        f"  curl --data-binary @meeting.wav -H 'Content-Type: audio/wav' "
+        f"{server.address}/v1/jobs"
+    )
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()
+
+
 def cmd_help():
     print(__doc__.strip())
 
@@ -134,7 +585,39 @@ def main():
     sub.add_parser("stop", help="Stop the daemon")
     sub.add_parser("restart", help="Restart the daemon")
     sub.add_parser("status", help="Show daemon status")
-    sub.add_parser("log", help="Tail daemon logs (Ctrl+C to stop)")
+    sub.add_parser("meeting", help="Start/stop meeting recording in the running daemon")
+    sub.add_parser("reload", help="Reload ~/.omnivo/config.json without restarting")
+    memory_parser = sub.add_parser("memory", help="Show daemon memory usage")
+    memory_parser.add_argument("action", nargs="?", choices=["trace", "snapshot", "diff"])
+    memory_parser.add_argument("names", nargs="*", help="on|off, or snapshot labels")
+    memory_parser.add_argument("-n", "--limit", type=int, default=15, help="Sites to show")
+    memory_parser.add_argument("--by", dest="group_by", choices=["lineno", "filename"],
+                               default="lineno", help="Group allocations by line or file")
+    profile_parser = sub.add_parser("profile", help="Profile the daemon's CPU use")
+    profile_parser.add_argument("-s", "--seconds", type=float, default=30,
+                                help="How long to profile")
+    profile_parser.add_argument("--interval", type=float, help="Milliseconds between samples")
+    profile_parser.add_argument("--stop", action="store_true",
+                                help="Collect a profile left running")
+    log_parser = sub.add_parser("log", help="Follow daemon logs (Ctrl+C to stop)")
+    log_parser.add_argument("--level", help="Minimum level (debug/info/warning/error)")
+    log_parser.add_argument("--component", help="Only these components (comma-separated)")
+    log_parser.add_argument("-n", "--lines", type=int, default=10, help="History lines to show")
+    log_parser.add_argument("--no-follow", dest="follow", action="store_false",
+                            help="Print matching history and exit")
+    search_parser = sub.add_parser("search", help="Search meeting notes")
+    search_parser.add_argument("words", nargs="+", help="Words that must all appear")
+    search_parser.add_argument("-n", "--limit", type=int, default=10, help="Results to show")
+    search_parser.add_argument("--rebuild", action="store_true",
+                               help="Re-index every note before searching")
+    seek_parser = sub.add_parser("seek", help="Find where a phrase was said in meetings")
+    seek_parser.add_argument("words", nargs="+", help="Phrase to look for")
+    seek_parser.add_argument("--meeting", help="Only this meeting (e.g. 2026-03-02-0930)")
+    serve_parser = sub.add_parser("serve", help="Run the local transcription HTTP server")
+    serve_parser.add_argument("--host", default=SERVE_HOST, help="Address to listen on")
+    serve_parser.add_argument("--port", type=int, default=SERVE_PORT, help="Port to listen on")
+    serve_parser.add_argument("--jobs", type=int, default=SERVE_MAX_JOBS,
+                              help="Jobs transcribed concurrently")
     sub.add_parser("help", help="Show help")
 
     args = parser.parse_args()
@@ -147,7 +630,14 @@ def main():
         "stop": cmd_stop,
         "restart": cmd_restart,
         "status": cmd_status,
-        "log": cmd_log,
+        "meeting": cmd_meeting,
+        "reload": cmd_reload,
+        "memory": lambda: cmd_memory(args.action, args.names, args.limit, args.group_by),
+        "profile": lambda: cmd_profile(args.seconds, args.interval, args.stop),
+        "log": lambda: cmd_log(args.level, args.component, args.lines, args.follow),
+        "search": lambda: cmd_search(args.words, args.limit, args.rebuild),
+        "seek": lambda: cmd_seek(args.words, args.meeting),
+        "serve": lambda: cmd_serve(args.host, args.port, args.jobs),
         "help": cmd_help,
     }
     commands[args.command]()
@@ -0,0 +1,221 @@
+"""Capture sources for the dictation and meeting recorders.
+
+``AudioRecorder`` opens its input through a stream factory called as
+``factory(samplerate, channels, callback)``; the default is the microphone
+via sounddevice. ``MeetingRecorder`` reads raw 48 kHz mono 16-bit PCM from a
+capture object (``start()``, ``read(n)``, ``stop()``); the default is the
+Swift ScreenCaptureKit helper.
+
+The replay sources play a WAV file through the same interfaces, at real-time
+speed or faster, so the whole pipeline can run headless (e.g. the soak test
+on Linux).
+"""
+
+import subprocess
+import threading
+import time
+import wave
+
+from utils.config import AUDIO_CAPTURE_BINARY
+
+# PCM format of the meeting capture (matches the Swift helper)
+MEETING_SAMPLE_RATE = 48000
+MEETING_CHANNELS = 1
+MEETING_SAMPLE_WIDTH = 2
+
+
+def read_wav(path, sample_rate, channels):
+    """Load a 16-bit WAV as int16 ``(frames, channels)``, converted to the
+    requested rate and channel count."""
+    # numpy is only needed for replay; the meeting recorder imports this
+    # module at daemon startup for HelperCapture
+    import numpy as np
+
+    with wave.open(path, "rb") as wf:
+        if wf.getsampwidth() != 2:
+            raise ValueError(f"{path}: only 16-bit WAV files can be replayed")
+        source_rate = wf.getframerate()
+        source_channels = wf.getnchannels()
+        data = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+    data = data.reshape(-1, source_channels)
+
+    if source_channels != channels:
+        mono = data.mean(axis=1, keepdims=True)
+        data = np.repeat(mono, channels, axis=1)
+    if source_rate != sample_rate and len(data):
+        frames = int(round(len(data) * sample_rate / source_rate))
+        positions = np.linspace(0, len(data) - 1, frames)
+        data = np.stack(
+            [np.interp(positions, np.arange(len(data)), data[:, c]) for c in range(channels)],
+            axis=1,
+        )
+    return np.ascontiguousarray(data, dtype=np.int16)
+
+
+class _Pacer:
+    """Sleeps so that audio is produced at ``speed`` times real time
+    (``speed=0`` means as fast as possible)."""
+
+    def __init__(self, sample_rate, speed, stopped):
+        self.sample_rate = sample_rate
+        self.speed = speed
+        self.stopped = stopped
+        self.started = None
+
+    def wait_until(self, frames):
+        if self.started is None:
+            self.started = time.monotonic()
+        if not self.speed:
+            return not self.stopped.is_set()
+        due = self.started + frames / self.sample_rate / self.speed
+        delay = due - time.monotonic()
+        if delay > 0:
+            return not self.stopped.wait(delay)
+        return not self.stopped.is_set()
+
+
+# Dictation input streams
+
+
+def device_input(samplerate, channels, callback):
+    """The default microphone stream."""
+    import sounddevice as sd
+
+    return sd.InputStream(samplerate=samplerate, channels=channels, callback=callback)
+
+
+class ReplayInputStream:
+    """Plays a WAV file into an ``sd.InputStream``-style callback.
+
+    Blocks are float32 in [-1, 1), like sounddevice's default dtype. Once
+    the file is exhausted the stream goes quiet (or starts over with
+    ``loop``) and ``finished`` is set.
+    """
+
+    def __init__(self, path, samplerate, channels, callback, speed=1.0,
+                 blocksize=1024, loop=False):
+        import numpy as np
+
+        self.samples = read_wav(path, samplerate, channels).astype(np.float32) / 32768.0
+        self.samplerate = samplerate
+        self.callback = callback
+        self.blocksize = blocksize
+        self.loop = loop
+        self.frames_delivered = 0
+        self.finished = threading.Event()
+        self._stopped = threading.Event()
+        self._pacer = _Pacer(samplerate, speed, self._stopped)
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="replay-input", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        position = 0
+        while self._pacer.wait_until(self.frames_delivered + self.blocksize):
+            if position >= len(self.samples):
+                if not self.loop or not len(self.samples):
+                    break
+                position = 0
+            block = self.samples[position:position + self.blocksize]
+            position += len(block)
+            self.callback(block, len(block), None, None)
+            self.frames_delivered += len(block)
+        self.finished.set()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+
+    def close(self):
+        self.stop()
+
+
+def replay_input(path, speed=1.0, loop=False, on_open=None):
+    """Stream factory for ``AudioRecorder`` that replays ``path``.
+
+    ``on_open(stream)`` receives each stream as it is created, e.g. to wait
+    for ``stream.finished``.
+    """
+
+    def open_stream(samplerate, channels, callback):
+        stream = ReplayInputStream(path, samplerate, channels, callback, speed=speed, loop=loop)
+        if on_open:
+            on_open(stream)
+        return stream
+
+    return open_stream
+
+
+# Meeting captures
+
+
+class HelperCapture:
+    """System audio from the Swift ScreenCaptureKit helper."""
+
+    def __init__(self, binary=AUDIO_CAPTURE_BINARY):
+        self.binary = binary
+        self._process = None
+
+    def start(self):
+        self._process = subprocess.Popen(
+            [self.binary],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+
+    def read(self, size):
+        process = self._process  # cleared by stop() on another thread
+        return process.stdout.read(size) if process else b""
+
+    def stop(self):
+        if self._process:
+            self._process.terminate()
+            try:
+                self._process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self._process.kill()
+            self._process = None
+
+
+class ReplayCapture:
+    """Meeting capture that replays a WAV file as 48 kHz mono PCM.
+
+    ``read`` returns b"" once the file is exhausted, like the helper
+    exiting. ``bytes_delivered`` counts what was handed to the recorder, to
+    check that nothing was dropped.
+    """
+
+    def __init__(self, path, speed=1.0):
+        self.path = path
+        self.speed = speed
+        self.bytes_delivered = 0
+        self._pcm = b""
+        self._stopped = threading.Event()
+        self._pacer = None
+
+    def start(self):
+        self._pcm = read_wav(self.path, MEETING_SAMPLE_RATE, MEETING_CHANNELS).tobytes()
+        self._stopped.clear()
+        self._pacer = _Pacer(MEETING_SAMPLE_RATE, self.speed, self._stopped)
+
+    def read(self, size):
+        frame_bytes = MEETING_CHANNELS * MEETING_SAMPLE_WIDTH
+        size -= size % frame_bytes
+        chunk = self._pcm[self.bytes_delivered:self.bytes_delivered + size]
+        if not chunk:
+            return b""
+        end = (self.bytes_delivered + len(chunk)) // frame_bytes
+        if not self._pacer.wait_until(end):
+            return b""
+        self.bytes_delivered += len(chunk)
+        return chunk
+
+    def stop(self):
+        self._stopped.set()
+
+    @property
+    def finished(self):
+        return self.bytes_delivered >= len(self._pcm)
@@ -1,25 +1,83 @@
-import pyperclip
+import threading
+import time
+
 from pynput import keyboard
 
+from services.pasteboard import create_pasteboard
+from services.request_policy import LatencyTracker
+from utils.log import get_logger
+from utils.settings import get_settings
+
+log = get_logger("clipboard")
+
+WRITE_ATTEMPTS = 3  # writes tried before giving up on a paste
+
+
 class ClipboardManager:
-    def __init__(self):
-        """Initialize the clipboard manager."""
-        self.keyboard_controller = keyboard.Controller()
-    
-    def copy_to_clipboard(self, text):
+    def __init__(self, pasteboard=None, send_paste=None, settings=None):
+        """Initialize the clipboard manager.
+
+        Args:
+            pasteboard: Pasteboard backend (defaults to the
+                clipboard_backend setting; see services.pasteboard)
+            send_paste: Sends the paste keystroke (defaults to Cmd+V)
+            settings: Fixed settings snapshot instead of the live settings
+        """
+        self.pasteboard = pasteboard or create_pasteboard()
+        self._send_paste = send_paste or self.paste_from_clipboard
+        self._settings = settings
+        self.keyboard_controller = keyboard.Controller() if send_paste is None else None
+
+        self._lock = threading.Lock()
+        self._paste_lock = threading.Lock()  # one paste at a time
+        # Contents from before the first of the pastes awaiting a restore,
+        # and the change count the restore expects to find
+        self._saved = None
+        self._restore_count = None
+        self._restore_timer = None
+        self.latency = LatencyTracker()  # copy_and_paste up to the keystroke
+        self._stats = {
+            "pastes": 0,
+            "write_retries": 0,
+            "unconfirmed": 0,
+            "restored": 0,
+            "restore_skipped": 0,
+        }
+
+    @property
+    def settings(self):
+        return self._settings or get_settings()
+
+    def copy_to_clipboard(self, text, transient=False):
         """
         Copy text to clipboard.
-        
+
+        The write is confirmed by the pasteboard's change count, and retried
+        if another app wrote in between.
+
         Args:
             text (str): Text to copy to clipboard
+            transient (bool): Mark it for clipboard history tools to skip
+
+        Returns:
+            int: The change count of the write, or None if it failed
         """
-        try:
-            pyperclip.copy(text)
-            #print("Text copied to clipboard")
-        except Exception as e:
-            #print(f"Error copying to clipboard: {e}")
-            pass
-    
+        pasteboard = self.pasteboard
+        for attempt in range(WRITE_ATTEMPTS):
+            if attempt:
+                with self._lock:
+                    self._stats["write_retries"] += 1
+            try:
+                before = pasteboard.change_count()
+                count = pasteboard.write_text(text, transient)
+                if count != before and pasteboard.change_count() == count:
+                    return count
+            except Exception as e:
+                log.warning(f"[yellow]Clipboard write failed: {e}[/yellow]")
+        with self._lock:
+            self._stats["unconfirmed"] += 1
+        return None
+
     def paste_from_clipboard(self):
         """
         Simulate Command+V to paste from clipboard.
@@ -32,13 +90,92 @@ class ClipboardManager:
         except Exception as e:
             #print(f"Error pasting from clipboard: {e}")
             pass
-    
+
     def copy_and_paste(self, text):
         """
         Copy text to clipboard and paste it.
-        
+
+        With ``clipboard_restore`` on, what the user had copied is put back
+        ``clipboard_restore_delay`` seconds later on a background thread,
+        unless the clipboard has changed again since.
+
         Args:
             text (str): Text to copy and paste
+
+        Returns:
+            bool: False if the text could not be written to the clipboard
         """
-        self.copy_to_clipboard(text + " ")
-        self.paste_from_clipboard() 
\ No newline at end of file
+        with self._paste_lock:
+            return self._copy_and_paste(text)
+
+    def _copy_and_paste(self, text):
+        settings = self.settings
+        started = time.perf_counter()
+        with self._lock:
+            restore = settings.clipboard_restore
+            if restore:
+                if self._restore_count is not None:
+                    # A restore is pending: the clipboard holds the previous
+                    # dictation, keep the user's contents from before it
+                    self._restore_count = None
+                    self._restore_timer.cancel()
+                else:
+                    self._saved = self._save()
+                restore = self._saved is not None
+
+        count = self.copy_to_clipboard(text + " ", transient=restore)
+        if count is None:
+            log.error("[bold red]Could not write the clipboard — nothing was pasted.[/bold red]")
+            return False
+        self._send_paste()
+        self.latency.record(time.perf_counter() - started)
+
+        with self._lock:
+            self._stats["pastes"] += 1
+            if restore:
+                self._restore_count = count
+                self._restore_timer = threading.Timer(
+                    settings.clipboard_restore_delay, self._restore, args=(count,)
+                )
+                self._restore_timer.daemon = True
+                self._restore_timer.start()
+        return True
+
+    def _save(self):
+        try:
+            return self.pasteboard.save()
+        except Exception as e:
+            log.warning(f"[yellow]Could not save the clipboard: {e}[/yellow]")
+            return None
+
+    def _restore(self, count):
+        with self._lock:
+            if self._restore_count != count:
+                return  # superseded by a later paste
+            self._restore_count = None
+            self._restore_timer = None
+            saved, self._saved = self._saved, None
+            try:
+                if self.pasteboard.change_count() != count:
+                    # Copied to since the paste: that is what the user wants now
+                    self._stats["restore_skipped"] += 1
+                    return
+                self.pasteboard.restore(saved)
+                self._stats["restored"] += 1
+            except Exception as e:
+                log.warning(f"[yellow]Could not restore the clipboard: {e}[/yellow]")
+
+    def flush(self):
+        """Restore the clipboard now if a restore is pending."""
+        with self._lock:
+            count, timer = self._restore_count, self._restore_timer
+        if timer is not None:
+            timer.cancel()
+            self._restore(count)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats["backend"] = self.pasteboard.name
+        stats["latency"] = self.latency.summary()
+        return stats
@@ -1,45 +1,68 @@
+import functools
 import os
-import shutil
-import subprocess
 import tempfile
 import threading
 import wave
 from datetime import datetime
 
-from rich.console import Console
-
-from core.meeting_transcriber import MeetingTranscriber
-from utils.config import (
-    AUDIO_CAPTURE_BINARY,
-    MEETING_NOTES_PATH,
-    MEETING_TEST_MODE,
+from core.audio_sources import (
+    MEETING_CHANNELS as PCM_CHANNELS,
+    MEETING_SAMPLE_RATE as PCM_SAMPLE_RATE,
+    MEETING_SAMPLE_WIDTH as PCM_SAMPLE_WIDTH,
+    HelperCapture,
 )
+from utils.config import AUDIO_CAPTURE_BINARY
+from utils.log import get_logger
+from utils.settings import get_settings
 
-console = Console()
-
-# PCM format from Swift helper
-PCM_SAMPLE_RATE = 48000
-PCM_CHANNELS = 1
-PCM_SAMPLE_WIDTH = 2  # 16-bit = 2 bytes
+log = get_logger("meeting")
 
 
 class MeetingRecorder:
-    def __init__(self):
+    def __init__(self, capture=None, transcriber=None, settings=None):
+        """
+        Args:
+            capture: Factory for the PCM capture (defaults to the Swift
+                helper; see core.audio_sources for replay captures)
+            transcriber: MeetingTranscriber to use instead of a default one
+            settings: Fixed settings snapshot instead of the live settings
+        """
         self.is_recording = False
-        self._process = None
+        self.is_transcribing = False
+        self._capture_factory = capture
+        self._capture = None
+        self._settings = settings
         self._wav_path = None
         self._wav_file = None
         self._reader_thread = None
-        self._transcriber = MeetingTranscriber()
+        self._transcriber = transcriber  # created on first transcription
+        self._summarizer = None
+        self.last_recording_seconds = None  # audio captured by the last meeting
+
+    def _get_transcriber(self):
+        # Imported here so the daemon doesn't load pydub and the OpenAI
+        # client until the first meeting is transcribed.
+        if self._transcriber is None:
+            from core.meeting_transcriber import MeetingTranscriber
+
+            self._transcriber = MeetingTranscriber()
+        return self._transcriber
+
+    def _get_summarizer(self):
+        if self._summarizer is None:
+            from core.meeting_summarizer import MeetingSummarizer
+
+            self._summarizer = MeetingSummarizer()
+        return self._summarizer
 
     def start(self):
         """Start recording meeting audio."""
         if self.is_recording:
-            console.print("[yellow]Already recording a meeting.[/yellow]")
+            log.warning("[yellow]Already recording a meeting.[/yellow]")
             return
 
-        if not os.path.isfile(AUDIO_CAPTURE_BINARY):
-            console.print(
+        if self._capture_factory is None and not os.path.isfile(AUDIO_CAPTURE_BINARY):
+            log.error(
                 f"[bold red]Audio capture binary not found at "
                 f"{AUDIO_CAPTURE_BINARY}[/bold red]\n"
                 f"[yellow]Run: ./scripts/build-audio-capture.sh[/yellow]"
@@ -47,10 +70,11 @@ class MeetingRecorder:
             return
 
         # Create temp WAV file
-        self._wav_path = os.path.join(
-            tempfile.gettempdir(),
-            f"omnivo_meeting_{datetime.now().strftime('%Y%m%d_%H%M%S')}.wav",
+        fd, self._wav_path = tempfile.mkstemp(
+            prefix=f"omnivo_meeting_{datetime.now().strftime('%Y%m%d_%H%M%S')}_",
+            suffix=".wav",
         )
+        os.close(fd)
 
         # Open WAV for writing
         self._wav_file = wave.open(self._wav_path, "wb")
@@ -58,12 +82,9 @@ class MeetingRecorder:
         self._wav_file.setsampwidth(PCM_SAMPLE_WIDTH)
         self._wav_file.setframerate(PCM_SAMPLE_RATE)
 
-        # Start the Swift helper subprocess
-        self._process = subprocess.Popen(
-            [AUDIO_CAPTURE_BINARY],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-        )
+        # Start the Swift helper (or replay source)
+        self._capture = (self._capture_factory or HelperCapture)()
+        self._capture.start()
 
         self.is_recording = True
 
@@ -71,7 +92,7 @@ class MeetingRecorder:
         self._reader_thread = threading.Thread(target=self._read_pcm, daemon=True)
         self._reader_thread.start()
 
-        console.print("[bold magenta]MEETING RECORDING STARTED[/bold magenta]")
+        log.info("[bold magenta]MEETING RECORDING STARTED[/bold magenta]")
 
     def stop(self):
         """Stop recording and trigger transcription."""
@@ -79,21 +100,17 @@ class MeetingRecorder:
             return
 
         self.is_recording = False
-        console.print("[yellow]Stopping meeting recording...[/yellow]")
+        log.info("[yellow]Stopping meeting recording...[/yellow]")
 
         # Terminate the Swift helper
-        if self._process:
-            self._process.terminate()
-            try:
-                self._process.wait(timeout=5)
-            except subprocess.TimeoutExpired:
-                self._process.kill()
-            self._process = None
+        if self._capture:
+            self._capture.stop()
 
         # Wait for reader thread to finish
         if self._reader_thread:
             self._reader_thread.join(timeout=5)
             self._reader_thread = None
+        self._capture = None
 
         # Close WAV file
         if self._wav_file:
@@ -101,61 +118,135 @@ class MeetingRecorder:
             self._wav_file = None
 
         if not self._wav_path or not os.path.exists(self._wav_path):
-            console.print("[bold red]No audio was captured.[/bold red]")
+            log.error("[bold red]No audio was captured.[/bold red]")
             return
 
+        with wave.open(self._wav_path, "rb") as wf:
+            self.last_recording_seconds = wf.getnframes() / wf.getframerate()
+
         file_size = os.path.getsize(self._wav_path)
         if file_size < 1000:
-            console.print("[bold red]Recording too short, no audio captured.[/bold red]")
+            log.error("[bold red]Recording too short, no audio captured.[/bold red]")
             os.remove(self._wav_path)
             return
 
+        settings = self._settings or get_settings()
+        notes_path = settings.meeting_notes_path
+
         # Ensure output directory exists
-        os.makedirs(MEETING_NOTES_PATH, exist_ok=True)
+        os.makedirs(notes_path, exist_ok=True)
 
         timestamp = datetime.now().strftime("%Y-%m-%d-%H%M")
 
-        # In test mode, save the raw audio file
-        if MEETING_TEST_MODE:
-            audio_save_path = os.path.join(
-                MEETING_NOTES_PATH, f"{timestamp}.wav"
-            )
-            shutil.copy2(self._wav_path, audio_save_path)
-            console.print(f"[dim]Audio saved to {audio_save_path}[/dim]")
+        # In test mode the raw audio is archived after transcription, in the
+        # background, so a large copy doesn't hold up the transcript
+        audio_name = None
+        if settings.meeting_test_mode:
+            audio_name = f"{timestamp}.{settings.archive_format}"
 
         # Transcribe
-        console.print("[yellow]Transcribing meeting...[/yellow]")
+        log.info("[yellow]Transcribing meeting...[/yellow]")
+        self.is_transcribing = True
+        summary = None
+        words = [] if settings.meeting_timestamps else None
+        timeline_path = None
         try:
-            transcription = self._transcriber.transcribe_meeting(self._wav_path)
+            if settings.meeting_summary:
+                # Chunks are summarized while later ones are still transcribing
+                summary = self._get_summarizer().session(
+                    os.path.join(notes_path, f"{timestamp}.summary.md"),
+                    title=timestamp,
+                    settings=settings,
+                )
+            transcription = self._get_transcriber().transcribe_meeting(
+                self._wav_path,
+                on_chunk=summary.add_chunk if summary else None,
+                on_words=words.extend if words is not None else None,
+                settings=settings,
+            )
 
             # Save transcription
-            md_path = os.path.join(MEETING_NOTES_PATH, f"{timestamp}.md")
+            md_path = os.path.join(notes_path, f"{timestamp}.md")
             with open(md_path, "w", encoding="utf-8") as f:
                 f.write(transcription)
 
-            console.print(
+            log.info(
                 f"[bold green]Meeting transcription saved to {md_path}[/bold green]"
             )
+            self._index_note(md_path)
+            if words is not None:
+                timeline_path = self._save_timeline(md_path, words, audio_name)
+
+            if summary:
+                log.info("[yellow]Writing meeting summary...[/yellow]")
+                summary.finish()
+                self._index_note(summary.path)
         except Exception as e:
-            console.print(f"[bold red]Transcription failed: {e}[/bold red]")
-            if MEETING_TEST_MODE:
-                console.print(
-                    "[yellow]Raw audio was saved — you can reprocess it later.[/yellow]"
+            log.error(f"[bold red]Transcription failed: {e}[/bold red]")
+            if summary:
+                summary.cancel()  # don't leave a "Summarizing…" placeholder behind
+            if settings.meeting_test_mode:
+                log.info(
+                    "[yellow]Raw audio is being archived — you can reprocess it later.[/yellow]"
                 )
         finally:
-            # Clean up temp file
+            self.is_transcribing = False
             if self._wav_path and os.path.exists(self._wav_path):
-                os.remove(self._wav_path)
+                if settings.meeting_test_mode:
+                    # The archive takes over the temp file and removes it
+                    from services.audio_archive import get_archive
+
+                    on_done = None
+                    if timeline_path:
+                        # The archive may store it under another name (e.g.
+                        # an earlier file with the same audio)
+                        on_done = functools.partial(self._set_timeline_audio, timeline_path)
+                    get_archive().submit(self._wav_path, timestamp, on_done=on_done)
+                else:
+                    os.remove(self._wav_path)
             self._wav_path = None
 
+    def _save_timeline(self, md_path, words, audio_name):
+        """Write the ``.words`` seek index beside the transcript."""
+        from core.word_timeline import WordTimeline, sidecar_path
+
+        try:
+            timeline = WordTimeline.from_words(words, audio=audio_name)
+            path = sidecar_path(md_path)
+            timeline.save(path)
+            log.info(f"[dim]Word timings ({len(timeline)} words) saved to {path}[/dim]")
+            return path
+        except Exception as e:
+            log.warning(f"[yellow]Word timings not saved: {e}[/yellow]")
+            return None
+
+    def _set_timeline_audio(self, path, audio_name):
+        """Point the ``.words`` index at the file the audio was archived as."""
+        from core.word_timeline import WordTimeline
+
+        timeline = WordTimeline.load(path)
+        if timeline.audio != audio_name:
+            timeline.audio = audio_name
+            timeline.save(path)
+
+    def _index_note(self, path):
+        """Add a saved note to the `omnivo search` index (best effort)."""
+        try:
+            from services.search_index import SearchIndex
+
+            with SearchIndex() as index:
+                index.index_file(path)
+        except Exception as e:
+            log.warning(f"[yellow]Search index not updated: {e}[/yellow]")
+
     def _read_pcm(self):
         """Read raw PCM data from subprocess stdout and write to WAV."""
         try:
-            while self.is_recording and self._process:
-                data = self._process.stdout.read(4096)
+            while self.is_recording and self._capture:
+                data = self._capture.read(4096)
                 if not data:
                     break
                 if self._wav_file:
                     self._wav_file.writeframes(data)
         except Exception as e:
-            console.print(f"[bold red]Error reading audio: {e}[/bold red]")
+            log.error(f"[bold red]Error reading audio: {e}[/bold red]")
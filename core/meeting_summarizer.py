@@ -0,0 +1,289 @@
+"""Map-reduce summaries of meeting transcripts.
+
+Each transcript chunk is summarized as soon as its transcription arrives,
+while later chunks are still being transcribed. Consecutive partial summaries
+are merged in groups of ``summary_reduce_fanin`` as soon as a group is
+complete. Once the last chunk is in, only a single final reduce is left:
+it turns the remaining partials into the summary and action items.
+
+Part summaries are streamed into ``<timestamp>.summary.md`` in meeting order
+as they finish. When the final summary is ready, the file is rewritten with
+the summary first.
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import openai
+
+from services.api_scheduler import BACKGROUND, get_scheduler
+from services.openai_service import is_retryable_error
+from services.request_policy import RequestPolicy
+from utils.config import OPENAI_API_KEY, SUMMARY_REQUEST_TIMEOUT
+from utils.log import get_logger
+from utils.settings import get_settings
+
+log = get_logger("summary")
+
+MAP_PROMPT = (
+    "You summarize one part of a meeting transcript. Write concise markdown "
+    "bullet points covering topics discussed, decisions made and action items "
+    "(with owners and dates when mentioned). Do not add a heading."
+)
+REDUCE_PROMPT = (
+    "You merge consecutive partial summaries of one meeting into a single "
+    "summary. Keep chronological order, decisions and every action item. "
+    "Remove repetition. Answer with markdown bullet points and no heading."
+)
+FINAL_PROMPT = (
+    "You write the final notes for a meeting from partial summaries given in "
+    "chronological order. Answer in markdown with exactly two sections: "
+    "'## Summary' (a short paragraph followed by key points) and "
+    "'## Action items' (a checklist '- [ ] owner: task', or 'None' if there "
+    "are none)."
+)
+
+
+class MeetingSummarizer:
+    def __init__(self, api_key=None, base_url=None, scheduler=None):
+        # Same arrangement as MeetingTranscriber: retries via the policy so
+        # 429s reach the scheduler, no hedging for background work.
+        self.client = openai.OpenAI(
+            api_key=api_key or OPENAI_API_KEY, base_url=base_url, max_retries=0
+        )
+        self.policy = RequestPolicy(
+            hedge_percentile=None,
+            min_timeout=SUMMARY_REQUEST_TIMEOUT,
+            max_timeout=SUMMARY_REQUEST_TIMEOUT,
+            is_retryable=is_retryable_error,
+        )
+        self.scheduler = scheduler or get_scheduler()
+
+    def session(self, path, title, settings=None):
+        """Start summarizing one meeting into ``path``.
+
+        Feed it with ``session.add_chunk`` (matches the ``on_chunk`` callback
+        of ``MeetingTranscriber.transcribe_meeting``) and call
+        ``session.finish()`` once transcription is done.
+        """
+        settings = settings or get_settings()
+        return SummarySession(self, path, title, settings)
+
+    def complete(self, system, content, model, token=None, policy=None):
+        """One chat completion through the policy (``policy``, e.g. a
+        session's, or the summarizer's own) and scheduler."""
+        return (policy or self.policy).execute(
+            lambda attempt_token, timeout: self.scheduler.run(
+                lambda: self._complete_once(system, content, model, timeout),
+                priority=BACKGROUND,
+                nbytes=len(content.encode("utf-8")),
+                token=attempt_token,
+            ),
+            token=token,
+        )
+
+    def _complete_once(self, system, content, model, timeout):
+        response = self.client.with_options(timeout=timeout).chat.completions.create(
+            model=model,
+            messages=[
+                {"role": "system", "content": system},
+                {"role": "user", "content": content},
+            ],
+        )
+        return (response.choices[0].message.content or "").strip()
+
+
+class SummarySession:
+    """Summary of one meeting, built while the meeting is transcribed."""
+
+    def __init__(self, summarizer, path, title, settings):
+        self.summarizer = summarizer
+        self.path = path
+        self.title = title
+        self.model = settings.summary_model
+        self.fanin = max(2, settings.summary_reduce_fanin)
+        # This meeting's retry values; other sessions share summarizer.policy
+        self.policy = summarizer.policy.derive(
+            max_retries=settings.request_max_retries,
+            retry_backoff=settings.request_retry_backoff,
+        )
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, settings.summary_max_workers),
+            thread_name_prefix="summary",
+        )
+        self._cond = threading.Condition()
+        self._pending = 0
+        self._total = None
+        self._direct = None  # single-chunk meeting: summarized in one step
+        # _levels[0] holds part summaries; _levels[n] merges of level n-1
+        # groups. Each level maps position -> text.
+        self._levels = [{}]
+        self._reduced = [set()]  # group numbers already submitted per level
+        self._sections = []  # part summaries written so far, in order
+        self._finishing = False
+        self._cancelled = False
+
+        self._write(self._render())
+
+    # Feeding
+
+    def add_chunk(self, index, total, text):
+        """Summarize transcript chunk ``index`` of ``total`` in the background."""
+        with self._cond:
+            if self._cancelled:
+                return
+            self._total = total
+            self._pending += 1
+        if total == 1:
+            # Nothing to merge: go straight to the final notes
+            self._executor.submit(self._run, self._summarize_direct, text)
+        else:
+            self._executor.submit(self._run, self._map, index, total, text)
+
+    def _run(self, fn, *args):
+        try:
+            if not self._cancelled:
+                fn(*args)
+        finally:
+            with self._cond:
+                self._pending -= 1
+                self._cond.notify_all()
+
+    def _call(self, prompt, content, fallback):
+        try:
+            return self.summarizer.complete(prompt, content, self.model, policy=self.policy)
+        except Exception as e:
+            log.error(f"[bold red]Summary request failed: {e}[/bold red]")
+            return fallback
+
+    def _summarize_direct(self, text):
+        notes = self._call(FINAL_PROMPT, f"Meeting transcript:\n\n{text}", None)
+        with self._cond:
+            self._direct = notes
+
+    def _map(self, index, total, text):
+        summary = self._call(
+            MAP_PROMPT,
+            f"Part {index + 1} of {total} of the transcript:\n\n{text}",
+            f"_Part {index + 1} could not be summarized._",
+        )
+        self._store(0, index, summary)
+        self._stream_sections()
+
+    def _reduce(self, level, group, texts):
+        merged = self._call(
+            REDUCE_PROMPT,
+            "\n\n---\n\n".join(texts),
+            "\n".join(texts),  # keep the partials if the merge fails
+        )
+        self._store(level + 1, group, merged)
+
+    def _store(self, level, position, text):
+        """Record a result and start the reduce for its group once complete."""
+        with self._cond:
+            if self._cancelled:
+                return
+            while len(self._levels) <= level + 1:
+                self._levels.append({})
+                self._reduced.append(set())
+            self._levels[level][position] = text
+
+            group = position // self.fanin
+            if level == 0 and group == (self._total - 1) // self.fanin:
+                # The group holding the last chunk goes straight into the
+                # final reduce instead of adding a merge step after it.
+                return
+            members = range(group * self.fanin, (group + 1) * self.fanin)
+            items = self._levels[level]
+            if group in self._reduced[level] or not all(p in items for p in members):
+                return
+            self._reduced[level].add(group)
+            texts = [items[p] for p in members]
+            self._pending += 1
+        self._executor.submit(self._run, self._reduce, level, group, texts)
+
+    # Output
+
+    def _stream_sections(self):
+        """Append part summaries to the file in meeting order."""
+        with self._cond:
+            parts = self._levels[0]
+            added = False
+            while len(self._sections) in parts:
+                self._sections.append(parts[len(self._sections)])
+                added = True
+            if added:
+                self._write(self._render())
+
+    def _render(self, notes=None):
+        lines = [f"# Meeting notes {self.title}", ""]
+        lines += [notes or "_Summarizing…_", ""]
+        if self._sections:
+            lines += ["## Parts", ""]
+            for i, section in enumerate(self._sections):
+                lines += [f"### Part {i + 1}", "", section, ""]
+        return "\n".join(lines)
+
+    def _write(self, content):
+        if self._cancelled:
+            return
+        # Replace atomically so readers never see a half-written file
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(content)
+        os.replace(tmp_path, self.path)
+
+    def _final_inputs(self):
+        """Partials not yet merged, in meeting order.
+
+        Merged groups always form a prefix of their level, so the highest
+        level comes first, followed by each lower level's unmerged tail.
+        """
+        inputs = []
+        for level in range(len(self._levels) - 1, -1, -1):
+            items = self._levels[level]
+            for position in sorted(items):
+                if position // self.fanin not in self._reduced[level]:
+                    inputs.append(items[position])
+        return inputs
+
+    def finish(self):
+        """Wait for outstanding work, write the final notes and return them."""
+        try:
+            with self._cond:
+                self._finishing = True
+                self._cond.wait_for(lambda: self._pending == 0)
+                direct = self._direct
+                inputs = self._final_inputs()
+
+            if direct is not None:
+                notes = direct
+            elif not inputs:
+                return None
+            else:
+                notes = self._call(
+                    FINAL_PROMPT,
+                    "\n\n---\n\n".join(inputs),
+                    None,
+                )
+            with self._cond:
+                self._write(self._render(notes or "_Summary unavailable._"))
+            log.info(f"[bold green]Meeting summary saved to {self.path}[/bold green]")
+            return notes
+        finally:
+            self._executor.shutdown(wait=False)
+
+    def cancel(self):
+        """Abandon an unfinished summary: skip queued work and remove the
+        placeholder file. Does nothing once ``finish`` has been called."""
+        with self._cond:
+            if self._finishing:
+                return
+            self._cancelled = True
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+        self._executor.shutdown(wait=False)
@@ -2,165 +2,446 @@ import os
 import shutil
 import subprocess
 import tempfile
+import wave
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
 
 import openai
 from pydub import AudioSegment
-from rich.console import Console
 
-from utils.config import (
-    OPENAI_API_KEY,
-    TRANSCRIBE_MODEL,
-    MAX_FILE_SIZE_BYTES,
-    MAX_DURATION_SECONDS,
-    COMPRESSED_BITRATE,
-    SAFETY_MARGIN,
-)
+from core.stitching import TranscriptStitcher, window_for
+from services.api_scheduler import BACKGROUND, get_scheduler
+from services.openai_service import is_retryable_error
+from services.request_policy import RequestPolicy
+from utils.config import OPENAI_API_KEY, MEETING_REQUEST_TIMEOUT
+from utils.log import get_logger
+from utils.settings import get_settings
 
-console = Console()
+log = get_logger("transcriber")
+
+MAX_SPEEDUP = 2.0
+
+
+def encode_chunk(source_path, start, length, chunk_path, bitrate):
+    """Encode ``length`` seconds of ``source_path`` from ``start`` to a mono
+    MP3 with ffmpeg (seeking, so the source is never loaded into memory)."""
+    result = subprocess.run(
+        [
+            "ffmpeg", "-nostdin", "-v", "error", "-y",
+            "-ss", f"{start:.3f}", "-t", f"{length:.3f}", "-i", source_path,
+            "-ac", "1", "-b:a", bitrate, chunk_path,
+        ],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(
+            f"ffmpeg failed on chunk at {start:.0f}s: {result.stderr.decode(errors='replace').strip()}"
+        )
+    return chunk_path
+
+
+def speed_up(source_path, factor, output_path, bitrate):
+    """Time-compress ``source_path`` by ``factor`` with ffmpeg's atempo
+    filter (pitch is preserved) and encode it to a mono MP3."""
+    result = subprocess.run(
+        [
+            "ffmpeg", "-nostdin", "-v", "error", "-y", "-i", source_path,
+            "-filter:a", f"atempo={factor:.4f}", "-ac", "1", "-b:a", bitrate, output_path,
+        ],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(
+            f"ffmpeg failed to speed up audio: {result.stderr.decode(errors='replace').strip()}"
+        )
+    return output_path
+
+
+def speedup_factor(settings):
+    """``meeting_speedup`` clamped to what atempo does in one pass (1-2x)."""
+    return min(MAX_SPEEDUP, max(1.0, settings.meeting_speedup))
+
+
+def _scale_words(on_words, factor):
+    """Wrap ``on_words`` to map timings in sped-up audio back to the original."""
+    return lambda words: on_words([(word, start * factor, end * factor) for word, start, end in words])
 
 
 class MeetingTranscriber:
-    def __init__(self):
-        self.client = openai.OpenAI(api_key=OPENAI_API_KEY)
+    def __init__(self, api_key=None, base_url=None, scheduler=None):
+        # Retries go through the policy (not the client) so 429s reach the
+        # scheduler. Large chunk uploads are never hedged.
+        self.client = openai.OpenAI(
+            api_key=api_key or OPENAI_API_KEY, base_url=base_url, max_retries=0
+        )
+        self.policy = RequestPolicy(
+            hedge_percentile=None,
+            min_timeout=MEETING_REQUEST_TIMEOUT,
+            max_timeout=MEETING_REQUEST_TIMEOUT,
+            is_retryable=is_retryable_error,
+        )
+        self.scheduler = scheduler or get_scheduler()
 
-    def transcribe_meeting(self, audio_file_path, language=None):
+    def transcribe_meeting(self, audio_file_path, language=None, on_chunk=None, token=None,
+                           on_words=None, settings=None):
         """Transcribe a meeting audio file. Handles compression and chunking
-        for long recordings.
+        for long recordings, and time compression (``meeting_speedup``).
 
         Args:
             audio_file_path: Path to the WAV/MP3 file
             language: Optional language code (e.g. 'en', 'sv')
+            on_chunk: Optional ``on_chunk(index, total, text)`` called as each
+                chunk's transcription arrives
+            token: Optional CancelToken that abandons the job
+            on_words: Optional ``on_words(words)`` called with each chunk's
+                ``(word, start, end)`` tuples, offsets in seconds into
+                ``audio_file_path``. Requests word timestamps (verbose_json
+                with ``timestamp_model``) instead of plain text.
+            settings: Settings snapshot (defaults to the current settings)
 
         Returns:
             str: Full transcription text
         """
         self._check_ffmpeg()
 
+        # One settings snapshot for the whole job, so a config reload
+        # mid-meeting doesn't mix chunk sizes or models.
+        settings = settings or get_settings()
+
         file_size = os.path.getsize(audio_file_path)
         duration = self._get_duration(audio_file_path)
 
-        console.print(
+        log.info(
             f"[dim]Audio: {duration / 60:.1f} min, "
             f"{file_size / (1024 * 1024):.1f}MB[/dim]"
         )
 
         # Fast path: small and short enough for single API call
-        if file_size <= MAX_FILE_SIZE_BYTES and duration <= MAX_DURATION_SECONDS:
-            console.print("[dim]Transcribing (single chunk)...[/dim]")
-            return self._transcribe_file(audio_file_path, language=language)
+        if (
+            speedup_factor(settings) == 1.0
+            and file_size <= settings.max_file_size_bytes
+            and duration <= settings.max_duration_seconds
+        ):
+            log.info("[dim]Transcribing (single chunk)...[/dim]")
+            return self._transcribe_chunk(
+                audio_file_path, 0, 1, 0.0, language, settings, on_chunk, token, on_words
+            )
 
         # Need compression and/or chunking
         return self._preprocess_and_transcribe(
-            audio_file_path, file_size, duration, language
+            audio_file_path, file_size, duration, language, settings, on_chunk, token,
+            on_words,
         )
 
-    def _preprocess_and_transcribe(self, file_path, file_size, duration, language):
-        """Compress if needed, chunk, and transcribe."""
+    def _transcribe_chunk(self, file_path, index, total, offset, language, settings,
+                          on_chunk=None, token=None, on_words=None):
+        """Transcribe one chunk starting ``offset`` seconds into the meeting."""
+        if on_words is None:
+            text = self._transcribe_file(
+                file_path, language=language, settings=settings, token=token
+            )
+        else:
+            text, words = self._transcribe_file(
+                file_path, language=language, settings=settings, token=token, timed=True
+            )
+            on_words([(word, start + offset, end + offset) for word, start, end in words])
+        if on_chunk:
+            on_chunk(index, total, text)
+        return text
+
+    def _preprocess_and_transcribe(self, file_path, file_size, duration, language,
+                                   settings, on_chunk=None, token=None, on_words=None):
+        """Speed up or compress if needed, chunk, and transcribe."""
         bitrate = file_size / duration
-        target_chunk_duration = min(MAX_DURATION_SECONDS, duration) * SAFETY_MARGIN
+        target_chunk_duration = (
+            min(settings.max_duration_seconds, duration) * settings.safety_margin
+        )
         estimated_chunk_size = bitrate * target_chunk_duration
-        needs_compression = estimated_chunk_size > MAX_FILE_SIZE_BYTES
+        needs_compression = estimated_chunk_size > settings.max_file_size_bytes
 
         temp_dir = tempfile.mkdtemp(prefix="omnivo_transcribe_")
         try:
             current_file = file_path
 
-            # Step 1: Compress if per-chunk size would exceed 25MB
-            if needs_compression:
-                console.print(
+            # Step 1: Time-compress if configured (this also compresses:
+            # mono MP3), or compress if per-chunk size would exceed 25MB
+            speedup = speedup_factor(settings)
+            if speedup > 1.0:
+                log.info(f"[dim]Speeding up {speedup:g}x...[/dim]")
+                current_file = speed_up(
+                    file_path, speedup, os.path.join(temp_dir, "speedup.mp3"),
+                    settings.compressed_bitrate,
+                )
+                file_size = os.path.getsize(current_file)
+                duration = duration / speedup
+                if on_words is not None:
+                    on_words = _scale_words(on_words, speedup)
+            elif needs_compression:
+                log.info(
                     f"[dim]Compressing ({file_size / (1024 * 1024):.1f}MB)...[/dim]"
                 )
-                current_file = self._compress_audio(file_path, temp_dir)
+                current_file = self._compress_audio(file_path, temp_dir, settings)
                 file_size = os.path.getsize(current_file)
                 duration = self._get_duration(current_file)
-                console.print(
+                log.info(
                     f"[dim]Compressed to {file_size / (1024 * 1024):.1f}MB, "
                     f"{duration:.0f}s[/dim]"
                 )
 
             # Step 2: Check if we still need chunking
             needs_chunking = (
-                file_size > MAX_FILE_SIZE_BYTES or duration > MAX_DURATION_SECONDS
+                file_size > settings.max_file_size_bytes
+                or duration > settings.max_duration_seconds
             )
 
             if not needs_chunking:
-                console.print("[dim]Transcribing compressed file...[/dim]")
-                return self._transcribe_file(current_file, language=language)
-
-            # Step 3: Split into chunks
-            console.print("[dim]Splitting into chunks...[/dim]")
-            chunks = self._split_audio(current_file, temp_dir)
-            console.print(f"[dim]Split into {len(chunks)} chunks[/dim]")
-
-            # Step 4: Transcribe each chunk
-            transcriptions = []
-            for i, chunk_path in enumerate(chunks):
-                console.print(
-                    f"[dim]Transcribing chunk {i + 1}/{len(chunks)}...[/dim]"
+                log.info("[dim]Transcribing preprocessed file...[/dim]")
+                return self._transcribe_chunk(
+                    current_file, 0, 1, 0.0, language, settings, on_chunk, token, on_words
                 )
-                text = self._transcribe_file(chunk_path, language=language)
-                transcriptions.append(text)
 
-            return " ".join(t for t in transcriptions if t)
+            # Step 3: Split into chunks, encoded in parallel ahead of the
+            # uploads so encoding and network time overlap
+            spans = self._plan_chunks(current_file, duration, settings)
+            log.info(f"[dim]Split into {len(spans)} chunks[/dim]")
+
+            # Step 4: Transcribe up to chunk_upload_workers chunks at once as
+            # they are encoded, stitching the overlapping transcripts in order
+            return self._transcribe_chunks(
+                current_file, spans, temp_dir, language, settings, on_chunk, token, on_words
+            )
 
         finally:
             shutil.rmtree(temp_dir, ignore_errors=True)
 
-    def _transcribe_file(self, file_path, language=None):
-        """Transcribe a single audio file via OpenAI API."""
+    def _transcribe_chunks(self, file_path, spans, temp_dir, language, settings,
+                           on_chunk=None, token=None, on_words=None):
+        """Transcribe overlapping chunks in parallel and stitch them together.
+
+        ``on_chunk`` gets each chunk's text without the part repeated from the
+        previous chunk; ``on_words`` gets the words that start between the
+        midpoints of the chunk's overlaps with its neighbours.
+        """
+        total = len(spans)
+        seams = [
+            (spans[i][0] + spans[i - 1][0] + spans[i - 1][1]) / 2 for i in range(1, total)
+        ]
+        stitcher = TranscriptStitcher(window_for(self._overlap(spans)))
+        timed = on_words is not None
+        transcriptions = []
+        workers = max(1, settings.chunk_upload_workers)
+        uploads = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="chunk-upload")
+        in_flight = deque()
+
+        def collect():
+            index, chunk_path, future = in_flight.popleft()
+            result = future.result()
+            os.remove(chunk_path)
+            text = result[0] if timed else result
+            if timed:
+                offset = spans[index][0]
+                low = seams[index - 1] if index else float("-inf")
+                high = seams[index] if index < len(seams) else float("inf")
+                on_words([
+                    (word, start + offset, end + offset)
+                    for word, start, end in result[1]
+                    if low <= start + offset < high
+                ])
+            final = stitcher.add(text)
+            if index == total - 1:
+                final = " ".join(t for t in (final, stitcher.finish()) if t)
+            transcriptions.append(final)
+            if on_chunk:
+                on_chunk(index, total, final)
+
+        try:
+            with closing(self._encode_chunks(file_path, spans, temp_dir, settings)) as chunks:
+                for i, (chunk_path, _) in enumerate(chunks):
+                    log.info(f"[dim]Transcribing chunk {i + 1}/{total}...[/dim]")
+                    in_flight.append((i, chunk_path, uploads.submit(
+                        self._transcribe_file, chunk_path, language, settings, token, timed
+                    )))
+                    if len(in_flight) >= workers:
+                        collect()
+            while in_flight:
+                collect()
+        finally:
+            for _, _, future in in_flight:
+                future.cancel()
+            uploads.shutdown(wait=False)
+
+        return " ".join(t for t in transcriptions if t)
+
+    @staticmethod
+    def _overlap(spans):
+        if len(spans) < 2:
+            return 0.0
+        return spans[0][0] + spans[0][1] - spans[1][0]
+
+    def _transcribe_file(self, file_path, language=None, settings=None, token=None,
+                         timed=False):
+        """Transcribe a single audio file via OpenAI API.
+
+        Returns the text, or ``(text, words)`` with word timings relative to
+        the start of the file when ``timed``.
+        """
+        settings = settings or get_settings()
+        model = settings.timestamp_model if timed else settings.transcribe_model
+        # The job's own retry and timeout values, on a copy: other jobs
+        # share self.policy
+        policy = self.policy.derive(
+            max_retries=settings.request_max_retries,
+            retry_backoff=settings.request_retry_backoff,
+            min_timeout=settings.meeting_request_timeout,
+            max_timeout=settings.meeting_request_timeout,
+        )
+        return policy.execute(
+            lambda attempt_token, timeout: self.scheduler.run(
+                lambda: self._transcribe_once(file_path, language, timeout, model, timed),
+                priority=BACKGROUND,
+                nbytes=os.path.getsize(file_path),
+                token=attempt_token,
+            ),
+            token=token,
+        )
+
+    def _transcribe_once(self, file_path, language, timeout, model, timed=False):
         kwargs = {
-            "model": TRANSCRIBE_MODEL,
+            "model": model,
             "file": open(file_path, "rb"),
-            "response_format": "text",
+            "response_format": "verbose_json" if timed else "text",
         }
+        if timed:
+            kwargs["timestamp_granularities"] = ["word", "segment"]
         if language:
             kwargs["language"] = language
 
         try:
-            return self.client.audio.transcriptions.create(**kwargs)
+            response = self.client.with_options(timeout=timeout).audio.transcriptions.create(
+                **kwargs
+            )
         finally:
             kwargs["file"].close()
+        if not timed:
+            return response
+        return response.text.strip(), self._word_timings(response)
+
+    def _word_timings(self, response):
+        """``(word, start, end)`` tuples from a verbose_json response.
 
-    def _compress_audio(self, file_path, temp_dir):
-        """Compress to mono MP3 at 64kbps."""
+        Falls back to segment timings (every word of a segment gets the
+        segment's span) when the model returned no word timestamps.
+        """
+        if response.words:
+            return [(w.word, w.start, w.end) for w in response.words]
+        return [
+            (word, segment.start, segment.end)
+            for segment in response.segments or []
+            for word in segment.text.split()
+        ]
+
+    def _compress_audio(self, file_path, temp_dir, settings=None):
+        """Compress to mono MP3 at the configured bitrate (64kbps by default)."""
+        settings = settings or get_settings()
         audio = AudioSegment.from_file(file_path)
         audio = audio.set_channels(1)
         compressed_path = os.path.join(temp_dir, "compressed.mp3")
-        audio.export(compressed_path, format="mp3", bitrate=COMPRESSED_BITRATE)
+        audio.export(compressed_path, format="mp3", bitrate=settings.compressed_bitrate)
         return compressed_path
 
-    def _split_audio(self, file_path, temp_dir):
-        """Split into contiguous chunks under size/duration limits."""
-        audio = AudioSegment.from_file(file_path)
-        file_size = os.path.getsize(file_path)
-        duration_s = audio.duration_seconds
+    def _plan_chunks(self, file_path, duration, settings=None):
+        """Split ``duration`` seconds into chunks under the size/duration
+        limits, each overlapping the previous one by ``chunk_overlap_seconds``
+        (at most half a chunk) so no word is lost at a cut.
 
-        bitrate_bps = file_size / duration_s
-        max_duration_by_size = MAX_FILE_SIZE_BYTES / bitrate_bps
+        Returns:
+            list[tuple]: (start, length) in seconds
+
+        Raises:
+            ValueError: The limits leave chunks shorter than a second
+        """
+        settings = settings or get_settings()
+        bitrate_bps = os.path.getsize(file_path) / duration
+        max_duration_by_size = settings.max_file_size_bytes / bitrate_bps
         chunk_duration_s = (
-            min(max_duration_by_size, MAX_DURATION_SECONDS) * SAFETY_MARGIN
+            min(max_duration_by_size, settings.max_duration_seconds)
+            * settings.safety_margin
         )
         chunk_duration_ms = int(chunk_duration_s * 1000)
+        if chunk_duration_ms < 1000:
+            raise ValueError(
+                f"Chunks would be {chunk_duration_s:.3f}s long; check max_file_size_bytes, "
+                "max_duration_seconds and safety_margin"
+            )
+        overlap_ms = min(int(settings.chunk_overlap_seconds * 1000), chunk_duration_ms // 2)
+        total_ms = int(duration * 1000)
 
-        chunks = []
+        spans = []
         start_ms = 0
-        i = 0
-
-        while start_ms < len(audio):
-            end_ms = min(start_ms + chunk_duration_ms, len(audio))
-            if i > 0 and (end_ms - start_ms) < 1000:
+        end_ms = 0
+        while end_ms < total_ms:
+            previous_end_ms = end_ms
+            end_ms = min(start_ms + chunk_duration_ms, total_ms)
+            if spans and end_ms == total_ms and end_ms - previous_end_ms < 1000:
+                # Less than a second of new audio: the last chunk takes it
+                last_start = spans[-1][0]
+                spans[-1] = (last_start, (total_ms - int(last_start * 1000)) / 1000)
                 break
-            chunk = audio[start_ms:end_ms]
-            chunk_path = os.path.join(temp_dir, f"chunk_{i:03d}.mp3")
-            chunk.export(chunk_path, format="mp3", bitrate=COMPRESSED_BITRATE)
-            chunks.append(chunk_path)
-            start_ms += chunk_duration_ms
-            i += 1
+            spans.append((start_ms / 1000, (end_ms - start_ms) / 1000))
+            start_ms = end_ms - overlap_ms
+        return spans
+
+    def _encode_chunks(self, file_path, spans, temp_dir, settings=None):
+        """Encode ``spans`` of ``file_path`` to MP3 chunks.
 
-        return chunks
+        Up to ``chunk_encode_workers`` ffmpeg processes run at once, at most
+        ``chunk_encode_ahead`` chunks ahead of the consumer, which bounds the
+        temporary files. Chunks are yielded in order as each is ready.
+
+        Yields:
+            tuple: (chunk_path, start offset in seconds)
+        """
+        settings = settings or get_settings()
+        ahead = max(1, settings.chunk_encode_ahead)
+        workers = min(ahead, settings.chunk_encode_workers or os.cpu_count() or 1)
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="chunk-encode")
+        pending = deque()
+        submitted = 0
+
+        def fill():
+            nonlocal submitted
+            while submitted < len(spans) and len(pending) < ahead:
+                start, length = spans[submitted]
+                chunk_path = os.path.join(temp_dir, f"chunk_{submitted:03d}.mp3")
+                pending.append((executor.submit(
+                    encode_chunk, file_path, start, length, chunk_path,
+                    settings.compressed_bitrate,
+                ), start))
+                submitted += 1
+
+        try:
+            fill()
+            while pending:
+                future, start = pending.popleft()
+                chunk_path = future.result()
+                fill()  # keep encoding while this chunk uploads
+                yield chunk_path, start
+        finally:
+            for future, _ in pending:
+                future.cancel()
+            executor.shutdown(wait=True)
 
     def _get_duration(self, file_path):
         """Return audio duration in seconds."""
+        try:
+            # WAV headers give the length without loading the audio
+            with wave.open(file_path, "rb") as f:
+                return f.getnframes() / f.getframerate()
+        except (wave.Error, EOFError, ZeroDivisionError):
+            pass
         audio = AudioSegment.from_file(file_path)
         return audio.duration_seconds
 
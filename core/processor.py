@@ -1,21 +1,131 @@
-from rich.console import Console
+from utils.log import get_logger
+from utils.settings import get_settings
+
+log = get_logger("processor")
+
+# Dictation modes
+TRANSCRIPTION = "transcription"  # paste what was said
+CONTEXT = "context"              # treat it as a request, answered with the screen as context
+EXPLANATION = "explanation"      # explain what is on screen
+MODES = (TRANSCRIPTION, CONTEXT, EXPLANATION)
+
+PROMPTS = {
+    CONTEXT: (
+        "The user dictated a request while looking at the attached screenshot "
+        "of their screen. Use the screenshot as context and reply with only the "
+        "text to insert at their cursor: no preamble, no quotes, no markdown "
+        "unless the request asks for it."
+    ),
+    EXPLANATION: (
+        "The user dictated a question about what is on the attached screenshot "
+        "of their screen. Answer it concisely in plain text that can be pasted."
+    ),
+}
+
+
+def uses_screen(mode):
+    return mode in PROMPTS
 
-# Use the same console instance
-console = Console()
 
 class TextProcessor:
-    def __init__(self):
-        """Initialize the text processor."""
-        pass
+    def __init__(self, openai_service=None, cache=None, vocabulary=None):
+        """Initialize the text processor.
 
-    def process_transcription(self, transcription):
+        Args:
+            openai_service (OpenAIService): For the chat modes (created on
+                first use, with its own policy: replies are never hedged)
+            cache (ResponseCache): Reply cache (created on first use unless
+                the response_cache setting is off)
+            vocabulary (Vocabulary): Custom vocabulary applied to every
+                dictation (created on first use unless the vocabulary
+                setting is off)
         """
-        Process transcription (passthrough).
+        self._openai_service = openai_service
+        self._cache = cache
+        self._vocabulary = vocabulary
+
+    @property
+    def openai_service(self):
+        if self._openai_service is None:
+            from services.openai_service import OpenAIService, is_retryable_error
+            from services.request_policy import RequestPolicy
+
+            # Replies vary in length with the question, so neither a hedge
+            # nor a timeout from past latencies fits: one request at a time,
+            # each given context_request_timeout.
+            self._openai_service = OpenAIService(
+                policy=RequestPolicy(hedge_percentile=None, is_retryable=is_retryable_error)
+            )
+        return self._openai_service
+
+    @property
+    def cache(self):
+        if self._cache is None:
+            from core.response_cache import ResponseCache
+
+            self._cache = ResponseCache()
+        return self._cache
+
+    @property
+    def vocabulary(self):
+        if self._vocabulary is None:
+            from core.vocabulary import Vocabulary
+
+            self._vocabulary = Vocabulary()
+        return self._vocabulary
+
+    def cache_stats(self):
+        """Hit counts of the reply cache, or None before it was used."""
+        return self._cache.stats() if self._cache is not None else None
+
+    def vocabulary_stats(self):
+        """Rule and replacement counts of the vocabulary, or None before it was used."""
+        return self._vocabulary.stats() if self._vocabulary is not None else None
+
+    def process_transcription(self, transcription, mode=TRANSCRIPTION, screen=None, token=None):
+        """
+        Process transcription according to the dictation mode, after
+        applying the custom vocabulary.
 
         Args:
             transcription (str): Transcribed text
+            mode (str): One of MODES
+            screen (ScreenImage): Screenshot for the chat modes, if one was taken
+            token (CancelToken): Cancelling it aborts the chat request
 
         Returns:
-            str: The transcription as-is
+            str: The text to paste
         """
-        return transcription
+        settings = get_settings()
+        if settings.vocabulary:
+            transcription = self.vocabulary.apply(transcription)
+        if mode not in PROMPTS:
+            return transcription
+
+        model = settings.context_model
+        key = None
+        if settings.response_cache:
+            from core.response_cache import cache_key
+
+            image = screen.png_sha256 if screen is not None else ""
+            key = cache_key(transcription, mode, model, image)
+            cached = self.cache.get(key)
+            if cached is not None:
+                log.info("[dim]Answered from the response cache[/dim]")
+                return cached
+
+        content = [{"type": "text", "text": transcription}]
+        if screen is not None:
+            content.append({"type": "image_url", "image_url": {"url": screen.image_url}})
+        else:
+            log.info("[yellow]No screenshot available — answering from the dictation only[/yellow]")
+        messages = [
+            {"role": "system", "content": PROMPTS[mode]},
+            {"role": "user", "content": content},
+        ]
+        reply = self.openai_service.complete(
+            messages, model, token, timeout=settings.context_request_timeout
+        )
+        if key is not None and reply:
+            self.cache.put(key, reply)
+        return reply
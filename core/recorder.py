@@ -1,15 +1,34 @@
-import sounddevice as sd
-import numpy as np
-from utils.config import SAMPLE_RATE, CHANNELS
+from core.audio_sources import device_input
 from utils.audio_utils import play_click_sound, save_audio_to_file
+from utils.log import get_logger
+from utils.settings import get_settings
+
+log = get_logger("dictation")
 
 class AudioRecorder:
-    def __init__(self):
-        """Initialize the audio recorder."""
+    def __init__(self, input_stream=None, sounds=True, encoder=None):
+        """
+        Initialize the audio recorder.
+        
+        Args:
+            input_stream: Stream factory ``(samplerate, channels, callback)``;
+                defaults to the microphone (see core.audio_sources)
+            sounds (bool): Play the start/stop click
+            encoder: WorkerProcess that encodes recordings off the audio
+                threads while ``worker_process`` is on; None encodes in
+                this process
+        """
+        self._open_stream = input_stream or device_input
+        self._sounds = sounds
+        self._encoder = encoder
         self.is_recording = False
         self.recorded_frames = []
         self.stream = None
         self._last_audio_path = None
+        # Format of the current recording, fixed at start so a config
+        # reload never changes a recording in progress
+        self._sample_rate = None
+        self._channels = None
     
     def audio_callback(self, indata, frames, time, status):
         """
@@ -35,33 +54,33 @@ class AudioRecorder:
             sd.InputStream: The active audio stream
         """
         # Play click sound to indicate recording started
-        play_click_sound()
+        if self._sounds:
+            play_click_sound()
         
         # Clear previous recording if any
         self.recorded_frames = []
         self.is_recording = True
         
         # Start the audio stream
-        self.stream = sd.InputStream(
-            samplerate=SAMPLE_RATE,
-            channels=CHANNELS,
-            callback=self.audio_callback
-        )
+        settings = get_settings()
+        self._sample_rate = settings.sample_rate
+        self._channels = settings.channels
+        self.stream = self._open_stream(self._sample_rate, self._channels, self.audio_callback)
         self.stream.start()
         
-        print("Recording started...")
+        log.info("Recording started...")
         return self.stream
     
     def clear_buffer(self):
         """Discard all recorded audio frames. Recording continues."""
         self.recorded_frames = []
 
-    def stop_recording(self):
+    def stop_stream(self):
         """
-        Stop recording audio.
+        Stop capturing audio without encoding it.
         
         Returns:
-            str: Path to the saved audio file, or None if no audio was recorded
+            tuple: (frames, sample_rate, channels), or None if not recording
         """
         if not self.is_recording or self.stream is None:
             return None
@@ -72,13 +91,46 @@ class AudioRecorder:
         self.stream = None
         
         # Play click sound to indicate recording stopped
-        play_click_sound()
-        
-        # Save audio to a temporary file
-        audio_file_path = save_audio_to_file(self.recorded_frames)
-        self._last_audio_path = audio_file_path
+        if self._sounds:
+            play_click_sound()
         
-        # Clear recorded frames to free memory
+        recording = (self.recorded_frames, self._sample_rate, self._channels)
         self.recorded_frames = []
+        return recording
+
+    def save_recording(self, recording, token=None):
+        """
+        Encode a recording from stop_stream() to a WAV file.
         
-        return audio_file_path 
\ No newline at end of file
+        Args:
+            recording (tuple): (frames, sample_rate, channels)
+            token (CancelToken): Skips or discards the file if cancelled
+            
+        Returns:
+            str: Path to the saved audio file, or None if nothing was saved
+        """
+        frames, sample_rate, channels = recording
+        if self._encoder is not None and get_settings().worker_process:
+            from services.worker import WorkerError
+
+            try:
+                audio_file_path = self._encoder.encode(frames, sample_rate, channels, token=token)
+            except (WorkerError, OSError) as e:
+                log.warning(f"[yellow]Worker encode failed, encoding in-process: {e}[/yellow]")
+                audio_file_path = save_audio_to_file(frames, sample_rate, channels, token=token)
+        else:
+            audio_file_path = save_audio_to_file(frames, sample_rate, channels, token=token)
+        self._last_audio_path = audio_file_path
+        return audio_file_path
+
+    def stop_recording(self):
+        """
+        Stop recording audio.
+        
+        Returns:
+            str: Path to the saved audio file, or None if no audio was recorded
+        """
+        recording = self.stop_stream()
+        if recording is None:
+            return None
+        return self.save_recording(recording)
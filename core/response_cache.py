@@ -0,0 +1,169 @@
+"""Cache of chat replies for the context and explanation dictation modes.
+
+Replies are keyed by the normalized dictation, the mode, the model and a
+SHA-256 of the screenshot sent with it. Asking "explain this" again on
+an unchanged screen therefore pastes the earlier answer at once.
+
+There are two tiers. The memory tier is an LRU of ``response_cache_entries``
+replies. Behind it is an SQLite table under ~/.omnivo/ (only key hashes and
+replies are stored, not the dictation) that survives restarts and keeps
+``response_cache_disk_entries`` replies, least recently used evicted first.
+Both tiers expire entries after ``response_cache_ttl`` seconds.
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from utils.config import RESPONSE_CACHE_PATH
+from utils.log import get_logger
+from utils.settings import get_settings
+
+log = get_logger("processor")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    reply TEXT NOT NULL,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used);
+"""
+
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize_prompt(text):
+    """Case, spacing and trailing punctuation don't change the request."""
+    return _SPACE_RE.sub(" ", text).strip().rstrip(".!?,;: ").lower()
+
+
+def cache_key(prompt, mode, model, context=""):
+    """Key for one request. ``context`` fingerprints what was sent with it
+    (e.g. a SHA-256 of the screenshot)."""
+    payload = json.dumps([normalize_prompt(prompt), mode, model, context])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, path=None, settings=None):
+        """
+        Args:
+            path: SQLite database file (defaults to ~/.omnivo/responses.db;
+                ``":memory:"`` keeps no disk tier)
+            settings: Fixed settings snapshot (defaults to the live settings)
+        """
+        self.path = path or RESPONSE_CACHE_PATH
+        self._settings = settings
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()  # key -> (reply, created)
+        self._conn = None
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0}
+
+    @property
+    def settings(self):
+        return self._settings or get_settings()
+
+    def _connection(self):
+        if self._conn is None:
+            if self.path != ":memory:":
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def get(self, key):
+        """The cached reply for ``key``, or None."""
+        settings = self.settings
+        now = time.time()
+        oldest = now - settings.response_cache_ttl
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[1] >= oldest:
+                    self._memory.move_to_end(key)
+                    self._stats["memory_hits"] += 1
+                    return entry[0]
+                del self._memory[key]
+
+            try:
+                conn = self._connection()
+                row = conn.execute(
+                    "SELECT reply, created FROM responses WHERE key = ? AND created >= ?",
+                    (key, oldest),
+                ).fetchone()
+                if row is not None:
+                    with conn:
+                        conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            except sqlite3.Error as e:
+                log.warning(f"[yellow]Response cache unreadable: {e}[/yellow]")
+                row = None
+            if row is None:
+                self._stats["misses"] += 1
+                return None
+            self._stats["disk_hits"] += 1
+            self._remember(key, row[0], row[1], settings)
+            return row[0]
+
+    def put(self, key, reply):
+        settings = self.settings
+        now = time.time()
+        with self._lock:
+            self._stats["stores"] += 1
+            self._remember(key, reply, now, settings)
+            try:
+                conn = self._connection()
+                with conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO responses (key, reply, created, last_used) "
+                        "VALUES (?, ?, ?, ?)",
+                        (key, reply, now, now),
+                    )
+                    conn.execute(
+                        "DELETE FROM responses WHERE created < ?",
+                        (now - settings.response_cache_ttl,),
+                    )
+                    conn.execute(
+                        "DELETE FROM responses WHERE key NOT IN "
+                        "(SELECT key FROM responses ORDER BY last_used DESC LIMIT ?)",
+                        (settings.response_cache_disk_entries,),
+                    )
+            except sqlite3.Error as e:
+                log.warning(f"[yellow]Response not cached on disk: {e}[/yellow]")
+
+    def _remember(self, key, reply, created, settings):
+        self._memory[key] = (reply, created)
+        self._memory.move_to_end(key)
+        while len(self._memory) > settings.response_cache_entries:
+            self._memory.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            conn = self._connection()
+            with conn:
+                conn.execute("DELETE FROM responses")
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._memory)
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        hits = stats["memory_hits"] + stats["disk_hits"]
+        stats["hit_rate"] = round(hits / lookups, 3) if lookups else None
+        return stats
@@ -0,0 +1,212 @@
+"""Screenshots for the context-aware and explanation dictation modes.
+
+A capture is started when such a dictation starts, so the screenshot is
+grabbed, downscaled and encoded on a worker thread while the user is still
+speaking. When Caps Lock goes off only the transcription is left to wait for.
+
+The previous encoded image is reused when the downscaled pixels are
+exactly the same as last time (same SHA-256), so nothing is encoded again.
+A difference hash (dHash) of the image serves as a cheap prefilter: when it
+is more than ``screen_hash_threshold`` bits away from the previous capture
+the screen has changed and the pixels aren't hashed. A perceptual hash
+alone can't decide reuse, as one changed line of text moves it by only a
+few bits. Identical image bytes across requests also let the API reuse its
+prompt cache.
+"""
+
+import base64
+import hashlib
+import platform
+import struct
+import time
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from utils.log import get_logger
+from utils.settings import get_settings
+
+log = get_logger("screen")
+
+HASH_SIZE = 16  # dHash grid: HASH_SIZE rows x HASH_SIZE + 1 columns -> 256 bits
+HASH_MARGIN = 1.0  # gray levels a cell must exceed its neighbour by (flat areas hash as 0)
+PNG_COMPRESSION = 6
+
+
+class QuartzScreenSource:
+    """The main display through CoreGraphics (needs Screen Recording permission)."""
+
+    def __init__(self):
+        import Quartz
+
+        self._q = Quartz
+
+    def grab(self):
+        """RGB uint8 array of shape (height, width, 3)."""
+        q = self._q
+        image = q.CGDisplayCreateImage(q.CGMainDisplayID())
+        if image is None:
+            raise RuntimeError("screen capture failed (Screen Recording permission?)")
+        width = q.CGImageGetWidth(image)
+        height = q.CGImageGetHeight(image)
+        row_bytes = q.CGImageGetBytesPerRow(image)
+        data = q.CGDataProviderCopyData(q.CGImageGetDataProvider(image))
+        pixels = np.frombuffer(bytes(data), dtype=np.uint8).reshape(height, row_bytes // 4, 4)
+        return pixels[:, :width, [2, 1, 0]]  # BGRA -> RGB
+
+
+def default_screen_source():
+    """The platform's screen source, or None where screenshots aren't supported."""
+    if platform.system() != "Darwin":
+        return None
+    try:
+        return QuartzScreenSource()
+    except ImportError:
+        return None
+
+
+def downscale(pixels, max_width):
+    """Shrink by an integer factor (averaging blocks) to at most ``max_width``."""
+    height, width = pixels.shape[:2]
+    factor = -(-width // max_width)  # ceil
+    if factor <= 1:
+        return np.ascontiguousarray(pixels[:, :, :3])
+    h, w = height // factor, width // factor
+    blocks = pixels[:h * factor, :w * factor, :3].reshape(h, factor, w, factor, 3)
+    return blocks.mean(axis=(1, 3)).astype(np.uint8)
+
+
+def dhash(pixels, size=HASH_SIZE):
+    """Difference hash: is each cell of a size x (size + 1) grayscale grid
+    brighter than its left neighbour.
+
+    Screens are mostly flat; without a margin, equal neighbours would flip
+    on the slightest noise.
+    """
+    gray = pixels[:, :, :3].mean(axis=2)
+    rows = np.linspace(0, gray.shape[0], size + 1).astype(int)[:-1]
+    cols = np.linspace(0, gray.shape[1], size + 2).astype(int)[:-1]
+    cells = np.add.reduceat(np.add.reduceat(gray, rows, axis=0), cols, axis=1)
+    counts = np.outer(np.diff(np.append(rows, gray.shape[0])), np.diff(np.append(cols, gray.shape[1])))
+    cells = cells / np.maximum(counts, 1)
+    bits = (cells[:, 1:] - cells[:, :-1] > HASH_MARGIN).flatten()
+    return int("".join("1" if b else "0" for b in bits), 2)
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+def pixel_digest(pixels):
+    """SHA-256 of the pixels and their shape: equal only for identical images."""
+    digest = hashlib.sha256(repr(pixels.shape).encode())
+    digest.update(np.ascontiguousarray(pixels).data)
+    return digest.digest()
+
+
+def encode_png(pixels, level=PNG_COMPRESSION):
+    """RGB uint8 array -> PNG bytes (Sub filter on every row)."""
+    height, width = pixels.shape[:2]
+    flat = np.ascontiguousarray(pixels[:, :, :3]).reshape(height, width * 3)
+    rows = np.empty((height, width * 3 + 1), dtype=np.uint8)
+    rows[:, 0] = 1  # filter type Sub: each byte minus the byte one pixel left
+    rows[:, 1:4] = flat[:, :3]
+    rows[:, 4:] = flat[:, 3:] - flat[:, :-3]  # wraps mod 256, as PNG expects
+
+    def chunk(kind, data):
+        return (
+            struct.pack(">I", len(data)) + kind + data
+            + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+        )
+
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(rows.tobytes(), level))
+        + chunk(b"IEND", b"")
+    )
+
+
+class ScreenImage:
+    """One encoded screenshot, ready to attach to a chat request."""
+
+    def __init__(self, png, width, height, fingerprint, digest=None):
+        self.png = png
+        self.width = width
+        self.height = height
+        self.fingerprint = fingerprint  # dHash
+        self.digest = digest  # pixel_digest() of the downscaled pixels
+        self.png_sha256 = hashlib.sha256(png).hexdigest()
+        self.image_url = "data:image/png;base64," + base64.b64encode(png).decode("ascii")
+
+
+class ScreenContext:
+    def __init__(self, source=None, settings=None):
+        """
+        Args:
+            source: Object whose ``grab()`` returns an RGB array (defaults to
+                the main display on macOS; None elsewhere)
+            settings: Fixed settings snapshot (defaults to the live settings)
+        """
+        self.source = source if source is not None else default_screen_source()
+        self._settings = settings
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="screen-context")
+        self._lock = threading.Lock()
+        self._last = None  # ScreenImage of the previous capture
+        self._stats = {"captures": 0, "reused": 0, "failed": 0, "encode_seconds": 0.0}
+
+    @property
+    def available(self):
+        return self.source is not None
+
+    def capture(self):
+        """Start capturing the screen in the background.
+
+        Returns:
+            Future of a ScreenImage, or None if screenshots aren't available
+        """
+        if self.source is None:
+            return None
+        return self._executor.submit(self._capture)
+
+    def _capture(self):
+        settings = self._settings or get_settings()
+        try:
+            pixels = downscale(self.source.grab(), settings.screen_max_width)
+            fingerprint = dhash(pixels)
+        except Exception:
+            with self._lock:
+                self._stats["failed"] += 1
+            raise
+
+        with self._lock:
+            self._stats["captures"] += 1
+            last = self._last
+
+        # The dHash rules out most changed screens without hashing the pixels
+        digest = None
+        if last is not None and hamming(last.fingerprint, fingerprint) <= settings.screen_hash_threshold:
+            digest = pixel_digest(pixels)
+            if digest == last.digest:
+                with self._lock:
+                    self._stats["reused"] += 1
+                log.debug("Screen unchanged; reusing the previous screenshot")
+                return last
+
+        started = time.perf_counter()
+        image = ScreenImage(
+            encode_png(pixels), pixels.shape[1], pixels.shape[0], fingerprint,
+            digest or pixel_digest(pixels),
+        )
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._stats["encode_seconds"] += elapsed
+            self._last = image
+        log.debug(f"Screenshot {image.width}x{image.height}, {len(image.png) / 1024:.0f}KB in {elapsed * 1000:.0f}ms")
+        return image
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
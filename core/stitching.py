@@ -0,0 +1,112 @@
+"""Merging the transcripts of overlapping meeting chunks.
+
+Consecutive chunks share ``chunk_overlap_seconds`` of audio, so the end of
+one transcript is repeated at the start of the next. The words at either
+cut may be garbled. The seam is found by aligning the tail of the text so
+far with the head of the next transcript. A run of identical (normalized)
+words in the two windows is where they agree: the earlier text is kept up to
+the end of that run, and the next transcript continues after it.
+
+The overlap is at the cut, so the run must lie there: the words of the
+earlier text after it and the words of the next transcript before it are
+the part of the overlap it doesn't explain. Runs are scored by that
+distance from the cut, so a phrase repeated earlier in the window can't beat
+the real overlap, and a run that would put more than a window of words in
+the overlap is not considered. If two different alignments score the same,
+both sides are kept: repeating a few words is better than losing speech.
+The windows are bounded by the overlap, so stitching a whole meeting takes
+time linear in its length.
+
+Word timings don't need aligning: every chunk keeps the words that start
+between the midpoints of its overlaps with its neighbours.
+"""
+
+from core.word_timeline import normalize
+
+MIN_RUN = 2  # matching words needed to trust a seam
+WORDS_PER_SECOND = 4  # generous speech rate, to size the alignment window
+MIN_WINDOW = 8
+
+
+def window_for(overlap_seconds):
+    """Words on each side of a seam that are compared (0: no overlap)."""
+    if overlap_seconds <= 0:
+        return 0
+    return max(MIN_WINDOW, int(overlap_seconds * WORDS_PER_SECOND * 2))
+
+
+def _key(token):
+    return " ".join(normalize(token)) or None
+
+
+def find_seam(prev_tokens, next_tokens, window):
+    """Where two overlapping transcripts join.
+
+    Returns:
+        tuple: (tokens of ``prev_tokens`` to keep, tokens of ``next_tokens``
+        to drop); ``(len(prev_tokens), 0)`` if no overlap was found or
+        the seam is ambiguous
+    """
+    tail_start = max(0, len(prev_tokens) - window)
+    tail = [_key(t) for t in prev_tokens[tail_start:]]
+    head = [_key(t) for t in next_tokens[:window]]
+
+    # Runs of matching words (dynamic programming over the windows), scored
+    # by the words of the overlap on either side of the cut they leave out
+    best, seam, alignments = None, None, set()
+    previous = [0] * (len(head) + 1)
+    for i, word in enumerate(tail, 1):
+        row = [0] * (len(head) + 1)
+        if word is not None:
+            for j, other in enumerate(head, 1):
+                if other != word:
+                    continue
+                run = row[j] = previous[j - 1] + 1
+                if run < MIN_RUN:
+                    continue
+                distance = (len(tail) - i) + (j - run)
+                if distance + run > window:
+                    continue  # more words in the overlap than it can hold
+                if best is None or distance < best:
+                    best, seam, alignments = distance, (i, j), {i - j}
+                elif distance == best:
+                    alignments.add(i - j)
+        previous = row
+
+    if best is None or len(alignments) > 1:
+        return len(prev_tokens), 0
+    return tail_start + seam[0], seam[1]
+
+
+class TranscriptStitcher:
+    """Joins chunk transcripts one at a time, in order.
+
+    The last ``window`` words are held back until the next chunk has been
+    stitched on, so text that has been returned never changes.
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self._pending = []  # tail words that the next seam may still cut
+
+    def add(self, text):
+        """Stitch on the next chunk's transcript.
+
+        Returns:
+            str: Text that is now final
+        """
+        tokens = text.split()
+        if self._pending and tokens:
+            keep, drop = find_seam(self._pending, tokens, self.window)
+            tokens = self._pending[:keep] + tokens[drop:]
+        else:
+            tokens = self._pending + tokens
+        split = max(0, len(tokens) - self.window)
+        self._pending = tokens[split:]
+        return " ".join(tokens[:split])
+
+    def finish(self):
+        """The held-back tail, once the last chunk has been added."""
+        text = " ".join(self._pending)
+        self._pending = []
+        return text
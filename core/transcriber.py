@@ -1,24 +1,32 @@
 import os
 from services.openai_service import OpenAIService
+from utils.cancellation import CancelledError
+from utils.log import get_logger
+
+log = get_logger("dictation")
 
 class Transcriber:
-    def __init__(self):
+    def __init__(self, openai_service=None):
         """Initialize the transcriber with OpenAI service."""
-        self.openai_service = OpenAIService()
+        self.openai_service = openai_service or OpenAIService()
     
-    def transcribe_audio(self, audio_file_path):
+    def transcribe_audio(self, audio_file_path, token=None):
         """
         Transcribe audio file to text using OpenAI's Whisper API.
         
         Args:
             audio_file_path (str): Path to the audio file
+            token (CancelToken): Cancels the request and discards the audio
             
         Returns:
-            str: Transcribed text, or error message if transcription failed
+            str: Transcribed text, or None if transcription failed
+
+        Raises:
+            CancelledError: ``token`` was cancelled
         """
         try:
             #print("Transcribing audio...")
-            transcription = self.openai_service.transcribe_audio(audio_file_path)
+            transcription = self.openai_service.transcribe_audio(audio_file_path, token)
             #print(f"Transcription completed: {transcription}")
             
             # Clean up the temporary file
@@ -30,6 +38,12 @@ class Transcriber:
                 pass
                 
             return transcription
+        except CancelledError:
+            try:
+                os.remove(audio_file_path)
+            except OSError:
+                pass
+            raise
         except Exception as e:
-            print(f"Error during transcription: {e}")
-            return "Transcription failed. Please try again." 
\ No newline at end of file
+            log.error(f"Error during transcription: {e}")
+            return None 
\ No newline at end of file
@@ -0,0 +1,359 @@
+"""Custom vocabulary applied to every dictation before it is pasted.
+
+Rules live in ``*.txt`` files under ~/.omnivo/vocabulary/, one per line:
+
+    open ai<TAB>OpenAI            term correction
+    k8s<TAB>Kubernetes            acronym expansion
+    sig<TAB>Best,\\nEmil          snippet (\\n and \\t are unescaped)
+    um                            no replacement: the word is removed
+    # comment
+
+Phrases match whole words, case-insensitively. For the same phrase, later
+files (by name) and later lines win. All rules are compiled into one
+Aho-Corasick automaton, so a dictation is rewritten in a single scan however
+large the dictionary is; where matches overlap, the leftmost and then the
+longest wins.
+
+Compiling tens of thousands of rules takes a while, so the automaton is
+pickled to ~/.omnivo/vocabulary.cache along with the names, sizes and mtimes
+of the files it was built from. The files are re-checked every few seconds.
+When they change, the new automaton is built on a background thread while
+dictations keep using the previous one.
+"""
+
+import glob
+import os
+import pickle
+import re
+import threading
+import time
+from collections import deque
+
+from utils.config import VOCABULARY_CACHE_PATH, VOCABULARY_DIR
+from utils.log import get_logger
+
+log = get_logger("processor")
+
+CACHE_VERSION = 1
+CHECK_INTERVAL = 2.0  # seconds between checks of the dictionary files
+_SHIFT = 21  # transition key = state << _SHIFT | code point
+_CODE_MASK = (1 << _SHIFT) - 1
+_SENTENCE_END_RE = re.compile(r"(^|[.!?]\s+)$")
+_SPACE_BEFORE_PUNCT_RE = re.compile(r"[ \t]+(?=[.,!?;:])")
+
+
+def _unescape(value):
+    return value.replace("\\n", "\n").replace("\\t", "\t")
+
+
+def parse_rules(path, rules=None):
+    """Read one dictionary file into ``rules`` (lower-cased phrase -> replacement)."""
+    rules = {} if rules is None else rules
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\r\n")
+            if not line.strip() or line.lstrip().startswith("#"):
+                continue
+            phrase, _, replacement = line.partition("\t")
+            phrase = " ".join(phrase.split()).lower()
+            if phrase:
+                rules[phrase] = _unescape(replacement)
+    return rules
+
+
+def _lower(text):
+    """Lower-case ``text`` without changing its length, so match positions
+    map back onto the original."""
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    return "".join(c.lower() if len(c.lower()) == 1 else c for c in text)
+
+
+class Automaton:
+    """Aho-Corasick automaton over the rule phrases.
+
+    Transitions are kept in one dict keyed by ``state << 21 | code point``,
+    which is far smaller than a dict per state for large dictionaries.
+    """
+
+    def __init__(self, rules):
+        goto = {}
+        depth = [0]
+        output = [-1]  # rule index ending in each state, or -1
+        self.replacements = []
+        for phrase, replacement in rules.items():
+            state = 0
+            for ch in phrase:
+                key = state << _SHIFT | ord(ch)
+                nxt = goto.get(key)
+                if nxt is None:
+                    nxt = goto[key] = len(depth)
+                    depth.append(depth[state] + 1)
+                    output.append(-1)
+                state = nxt
+            output[state] = len(self.replacements)
+            self.replacements.append(replacement)
+
+        # Failure links, and output links to the longest proper suffix that
+        # is a whole phrase, breadth first
+        children = [[] for _ in depth]
+        for key, nxt in goto.items():
+            children[key >> _SHIFT].append((key & _CODE_MASK, nxt))
+        fail = [0] * len(depth)
+        out_link = [0] * len(depth)
+        queue = deque(nxt for _, nxt in children[0])
+        while queue:
+            state = queue.popleft()
+            for code, nxt in children[state]:
+                f = fail[state]
+                while f and (f << _SHIFT | code) not in goto:
+                    f = fail[f]
+                f = goto.get(f << _SHIFT | code, 0)
+                fail[nxt] = f
+                out_link[nxt] = f if output[f] >= 0 else out_link[f]
+                queue.append(nxt)
+
+        self.goto = goto
+        self.depth = depth
+        self.output = output
+        self.fail = fail
+        self.out_link = out_link
+
+    def __len__(self):
+        return len(self.replacements)
+
+    def matches(self, text):
+        """Longest whole-word match starting at each position.
+
+        Returns:
+            dict: start -> (end, rule index), ``end`` exclusive
+        """
+        lowered = _lower(text)
+        goto, fail, depth, output, out_link = self.goto, self.fail, self.depth, self.output, self.out_link
+        n = len(lowered)
+        found = {}
+        state = 0
+        for i, ch in enumerate(lowered):
+            code = ord(ch)
+            nxt = goto.get(state << _SHIFT | code)
+            while nxt is None and state:
+                state = fail[state]
+                nxt = goto.get(state << _SHIFT | code)
+            state = nxt or 0
+            if i + 1 < n and lowered[i + 1].isalnum():
+                continue  # no phrase can end mid-word
+            match = state if output[state] >= 0 else out_link[state]
+            while match:
+                start = i + 1 - depth[match]
+                if start == 0 or not lowered[start - 1].isalnum():
+                    found[start] = (i + 1, output[match])  # later ends are longer
+                match = out_link[match]
+        return found
+
+    def replace(self, text):
+        """Apply the rules to ``text``.
+
+        Returns:
+            tuple: (new text, number of replacements)
+        """
+        if not self.replacements:
+            return text, 0
+        found = self.matches(text)
+        if not found:
+            return text, 0
+
+        out = []
+        i = 0
+        count = 0
+        removed = False
+        capitalize = False
+        n = len(text)
+        while i < n:
+            match = found.get(i)
+            if match is None:
+                out.append(text[i].upper() if capitalize else text[i])
+                capitalize = False
+                i += 1
+                continue
+            end, index = match
+            replacement = self.replacements[index]
+            count += 1
+            if replacement:
+                out.append(replacement)
+                capitalize = False
+                i = end
+                continue
+            # Removed word: drop a trailing comma and the space after it,
+            # and keep a sentence capitalized
+            removed = True
+            while end < n and text[end] == ",":
+                end += 1
+            while end < n and text[end].isspace():
+                end += 1
+            if end >= n or text[end] in ".!?":
+                while out and out[-1] in (" ", ","):
+                    out.pop()  # "on it, um." -> "on it."
+                if not out or out[-1][-1:] in (".", "!", "?"):
+                    # Nothing for the punctuation to end: "Um. Hello" -> "Hello"
+                    while end < n and text[end] in ".!?":
+                        end += 1
+                    while end < n and text[end].isspace():
+                        end += 1
+                    if out and end < n:
+                        out.append(" ")
+                    capitalize = text[i].isupper()
+            elif text[i].isupper() and _SENTENCE_END_RE.search("".join(out[-3:])):
+                capitalize = True
+            i = end
+        result = "".join(out)
+        if removed:
+            result = _SPACE_BEFORE_PUNCT_RE.sub("", result).rstrip()
+        return result, count
+
+
+class Vocabulary:
+    def __init__(self, directory=None, cache_path=None):
+        """
+        Args:
+            directory: Folder of ``*.txt`` dictionaries (defaults to
+                ~/.omnivo/vocabulary)
+            cache_path: Compiled automaton cache (None with a custom
+                ``directory`` disables it)
+        """
+        self.directory = directory or VOCABULARY_DIR
+        if cache_path is None and directory is None:
+            cache_path = VOCABULARY_CACHE_PATH
+        self.cache_path = cache_path
+        self._lock = threading.Lock()
+        self._automaton = None
+        self._signature = None
+        self._checked_at = 0.0
+        self._reloading = False
+        self._stats = {
+            "applied": 0,
+            "replacements": 0,
+            "reloads": 0,
+            "cache_hits": 0,
+            "compile_seconds": None,
+            "apply_seconds": 0.0,
+        }
+
+    def _files(self):
+        return sorted(glob.glob(os.path.join(self.directory, "*.txt")))
+
+    def signature(self):
+        """Names, sizes and mtimes of the dictionary files."""
+        signature = []
+        for path in self._files():
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            signature.append((os.path.basename(path), st.st_size, st.st_mtime_ns))
+        return signature
+
+    def load(self):
+        """Build (or read from the cache) the automaton for the current files."""
+        signature = self.signature()
+        automaton = self._read_cache(signature)
+        if automaton is None:
+            started = time.perf_counter()
+            rules = {}
+            for path in self._files():
+                try:
+                    parse_rules(path, rules)
+                except (OSError, UnicodeDecodeError) as e:
+                    log.warning(f"[yellow]Skipping vocabulary file {path}: {e}[/yellow]")
+            automaton = Automaton(rules)
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self._stats["compile_seconds"] = round(elapsed, 3)
+            if rules:
+                log.info(f"[dim]Vocabulary: {len(rules)} rules compiled in {elapsed * 1000:.0f}ms[/dim]")
+            self._write_cache(signature, automaton)
+        with self._lock:
+            if self._automaton is not None:
+                self._stats["reloads"] += 1
+            self._automaton = automaton
+            self._signature = signature
+            self._checked_at = time.monotonic()
+        return automaton
+
+    def _read_cache(self, signature):
+        if not self.cache_path or not signature:
+            return None
+        try:
+            with open(self.cache_path, "rb") as f:
+                cached = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            log.warning(f"[yellow]Ignoring unreadable vocabulary cache: {e}[/yellow]")
+            return None
+        if cached.get("version") != CACHE_VERSION or cached.get("signature") != signature:
+            return None
+        with self._lock:
+            self._stats["cache_hits"] += 1
+        return cached["automaton"]
+
+    def _write_cache(self, signature, automaton):
+        if not self.cache_path or not signature:
+            return
+        tmp_path = f"{self.cache_path}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.cache_path) or ".", exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                pickle.dump(
+                    {"version": CACHE_VERSION, "signature": signature, "automaton": automaton},
+                    f, protocol=pickle.HIGHEST_PROTOCOL,
+                )
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            log.warning(f"[yellow]Vocabulary cache not written: {e}[/yellow]")
+
+    def _reload_if_changed(self):
+        now = time.monotonic()
+        with self._lock:
+            if self._reloading or now - self._checked_at < CHECK_INTERVAL:
+                return
+            self._checked_at = now
+            current = self._signature
+        if self.signature() == current:
+            return
+        with self._lock:
+            self._reloading = True
+
+        def reload():
+            try:
+                self.load()
+            except Exception as e:
+                log.error(f"[bold red]Vocabulary reload failed: {e}[/bold red]")
+            finally:
+                with self._lock:
+                    self._reloading = False
+
+        threading.Thread(target=reload, name="vocabulary-reload", daemon=True).start()
+
+    def apply(self, text):
+        """Rewrite ``text`` with the vocabulary rules."""
+        automaton = self._automaton
+        if automaton is None:
+            automaton = self.load()
+        else:
+            self._reload_if_changed()
+        started = time.perf_counter()
+        result, count = automaton.replace(text)
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._stats["applied"] += 1
+            self._stats["replacements"] += count
+            self._stats["apply_seconds"] += elapsed
+        return result
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["rules"] = len(self._automaton) if self._automaton is not None else 0
+        stats["apply_seconds"] = round(stats["apply_seconds"], 4)
+        return stats
@@ -0,0 +1,163 @@
+"""Word timings for a meeting, stored beside the transcript.
+
+A ``.words`` sidecar holds every transcribed word with its start/end offset
+into the archived recording. The words and offsets are packed into flat
+arrays, and a word-level suffix array makes phrase lookup a binary search:
+``timeline.find("budget review")`` returns every place it was said in
+O(m log n) for an m-word phrase, without rescanning the transcript.
+
+File layout (little-endian):
+    one JSON header line: version, counts, byte lengths, audio file name
+    vocabulary: UTF-8, newline-separated
+    word_ids, start_ms, end_ms, suffixes: uint32 arrays
+"""
+
+import array
+import json
+import os
+import re
+import sys
+from bisect import bisect_left, bisect_right
+
+VERSION = 1
+SUFFIX = ".words"
+SORT_DEPTH = 8  # words compared when sorting suffixes; longer phrases are verified
+
+_WORD_RE = re.compile(r"\w+(?:'\w+)*")
+
+
+def normalize(text):
+    """Lower-case word tokens of ``text`` without punctuation."""
+    return _WORD_RE.findall(text.lower())
+
+
+def sidecar_path(transcript_path):
+    """``2026-03-02-0930.md`` -> ``2026-03-02-0930.words``."""
+    return os.path.splitext(transcript_path)[0] + SUFFIX
+
+
+def _uint32s(values=()):
+    # 'I' is 4 bytes on every platform omnivo runs on; checked on load
+    return array.array("I", values)
+
+
+class WordTimeline:
+    def __init__(self, vocab, word_ids, start_ms, end_ms, suffixes=None, audio=None):
+        self.vocab = vocab
+        self.word_ids = word_ids
+        self.start_ms = start_ms
+        self.end_ms = end_ms
+        self.audio = audio
+        self.suffixes = suffixes if suffixes is not None else self._build_suffixes()
+
+    @classmethod
+    def from_words(cls, words, audio=None):
+        """Build from ``(text, start_seconds, end_seconds)`` tuples.
+
+        Words are split into normalized tokens that share the timing of the
+        word they came from.
+        """
+        vocab, ids = [], {}
+        word_ids, start_ms, end_ms = _uint32s(), _uint32s(), _uint32s()
+        for text, start, end in words:
+            for token in normalize(text):
+                if token not in ids:
+                    ids[token] = len(vocab)
+                    vocab.append(token)
+                word_ids.append(ids[token])
+                start_ms.append(max(0, int(round(start * 1000))))
+                end_ms.append(max(0, int(round(end * 1000))))
+        return cls(vocab, word_ids, start_ms, end_ms, audio=audio)
+
+    def __len__(self):
+        return len(self.word_ids)
+
+    def _key(self, position, depth=SORT_DEPTH):
+        vocab, ids = self.vocab, self.word_ids
+        return tuple(vocab[ids[i]] for i in range(position, min(position + depth, len(ids))))
+
+    def _build_suffixes(self):
+        positions = sorted(range(len(self.word_ids)), key=self._key)
+        return _uint32s(positions)
+
+    def find(self, phrase):
+        """Every occurrence of ``phrase``, in time order.
+
+        Returns:
+            list[tuple]: (start_seconds, end_seconds) of each occurrence
+        """
+        tokens = normalize(phrase)
+        if not tokens or not self.word_ids:
+            return []
+        depth = min(len(tokens), SORT_DEPTH)
+        target = tuple(tokens[:depth])
+        lo = self._bound(target, depth, 0, right=False)
+        hi = self._bound(target, depth, lo, right=True)
+
+        hits = []
+        for position in self.suffixes[lo:hi]:
+            if len(tokens) > depth and self._key(position, len(tokens)) != tuple(tokens):
+                continue
+            last = position + len(tokens) - 1
+            hits.append((self.start_ms[position] / 1000, self.end_ms[last] / 1000))
+        hits.sort()
+        return hits
+
+    def _bound(self, target, depth, lo, right):
+        """Binary search over the suffix array (bisect's ``key=`` needs 3.10)."""
+        hi = len(self.suffixes)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            key = self._key(self.suffixes[mid], depth)
+            if key < target or (right and key == target):
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def text_between(self, start, end):
+        """Words spoken between two offsets (seconds)."""
+        lo = bisect_left(self.start_ms, int(start * 1000))
+        hi = bisect_right(self.start_ms, int(end * 1000))
+        return " ".join(self.vocab[self.word_ids[i]] for i in range(lo, hi))
+
+    def save(self, path):
+        vocab = "\n".join(self.vocab).encode("utf-8")
+        arrays = [self.word_ids, self.start_ms, self.end_ms, self.suffixes]
+        if sys.byteorder == "big":
+            arrays = [array.array("I", a) for a in arrays]
+            for a in arrays:
+                a.byteswap()
+        header = {
+            "version": VERSION,
+            "words": len(self.word_ids),
+            "vocab_bytes": len(vocab),
+            "audio": self.audio,
+        }
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(json.dumps(header).encode("utf-8") + b"\n")
+            f.write(vocab)
+            for a in arrays:
+                a.tofile(f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            header = json.loads(f.readline())
+            if header.get("version") != VERSION:
+                raise ValueError(f"{path}: unsupported word timeline version")
+            raw_vocab = f.read(header["vocab_bytes"]).decode("utf-8")
+            vocab = raw_vocab.split("\n") if raw_vocab else []
+            arrays = []
+            for _ in range(4):
+                a = _uint32s()
+                if a.itemsize != 4:
+                    raise ValueError("uint32 arrays are not 4 bytes on this platform")
+                a.fromfile(f, header["words"])
+                if sys.byteorder == "big":
+                    a.byteswap()
+                arrays.append(a)
+        word_ids, start_ms, end_ms, suffixes = arrays
+        return cls(vocab, word_ids, start_ms, end_ms, suffixes, audio=header.get("audio"))
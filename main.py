@@ -1,41 +1,201 @@
 #!/usr/bin/env python3
+import time
+
+_PROCESS_START = time.perf_counter()
+
 import os
+import signal
 import sys
 import threading
-from core.recorder import AudioRecorder
-from core.transcriber import Transcriber
-from core.processor import TextProcessor
-from core.clipboard import ClipboardManager
-from core.meeting_recorder import MeetingRecorder
+
+PROFILE_STARTUP = "--profile-startup" in sys.argv
+if PROFILE_STARTUP:
+    from utils.startup_profile import profiler
+
+    profiler.started = _PROCESS_START
+    profiler.install()
+
+# Only what the keyboard listener and control socket need is imported here.
+# The audio, OpenAI and meeting stacks are imported when their component is
+# first used (see OmnivoApp._component), normally by the warm-up thread.
 from services.keyboard_service import KeyboardService
-from rich.console import Console
-from rich.panel import Panel
-from rich.table import Table
+from services.control import ControlServer
+from utils.cancellation import CancelledError, CancelToken
+from utils.log import get_logger, setup_logging
+from utils.memory import MemoryMonitor, current_rss_bytes, peak_rss_bytes
+from utils.profiler import ProfilerControl
+from utils.settings import SettingsWatcher, get_settings, reload_settings
+
+log = get_logger("app")
+
+# Dictation path in the order a Caps Lock press needs it.
+WARM_UP_ORDER = ("recorder", "clipboard", "transcriber", "processor")
+
+
+def _mark(phase):
+    if PROFILE_STARTUP:
+        profiler.mark(phase)
+
+
+def _console():
+    from rich.console import Console
+
+    return Console()
+
+
+def _worker():
+    """The worker process, started now so the first dictation doesn't wait."""
+    from services.worker import WorkerError, get_worker
+
+    worker = get_worker()
+    if get_settings().worker_process:
+        try:
+            worker.start()
+        except (WorkerError, OSError) as e:
+            # Retried by the first job, which falls back to this process
+            log.warning(f"[yellow]Worker process not started: {e}[/yellow]")
+    return worker
+
+
+def _create_recorder():
+    from core.recorder import AudioRecorder
+
+    return AudioRecorder(encoder=_worker())
+
+
+def _create_transcriber():
+    from core.transcriber import Transcriber
 
-console = Console()
+    return Transcriber()
+
+
+def _create_processor():
+    from core.processor import TextProcessor
+
+    processor = TextProcessor()
+    if get_settings().vocabulary:
+        processor.vocabulary.load()  # compile (or read the cache) before the first dictation
+    return processor
+
+
+def _create_clipboard():
+    from core.clipboard import ClipboardManager
+
+    return ClipboardManager()
+
+
+def _create_screen_context():
+    from core.screen_context import ScreenContext
+
+    return ScreenContext()
+
+
+def _create_meeting_recorder():
+    from core.meeting_recorder import MeetingRecorder
+    from services.worker import WorkerMeetingTranscriber
+
+    return MeetingRecorder(transcriber=WorkerMeetingTranscriber(_worker()))
+
+
+_FACTORIES = {
+    "recorder": _create_recorder,
+    "transcriber": _create_transcriber,
+    "processor": _create_processor,
+    "clipboard": _create_clipboard,
+    "screen_context": _create_screen_context,
+    "meeting_recorder": _create_meeting_recorder,
+}
+
+
+def _lazy_component(name):
+    return property(lambda self: self._component(name), doc=f"The {name}, created on first use.")
 
 
 class OmnivoApp:
-    def __init__(self):
-        # Dictation components
-        self.recorder = AudioRecorder()
-        self.transcriber = Transcriber()
-        self.processor = TextProcessor()
-        self.clipboard = ClipboardManager()
+    # Dictation components
+    recorder = _lazy_component("recorder")
+    transcriber = _lazy_component("transcriber")
+    processor = _lazy_component("processor")
+    clipboard = _lazy_component("clipboard")
+    screen_context = _lazy_component("screen_context")
 
-        # Meeting recording
-        self.meeting_recorder = MeetingRecorder()
+    # Meeting recording
+    meeting_recorder = _lazy_component("meeting_recorder")
+
+    def __init__(self):
+        self._components = {}
+        self._component_locks = {name: threading.Lock() for name in _FACTORIES}
 
         # State
         self.is_recording = False  # dictation recording state
+        self.dictations_in_progress = 0
+        self._state_lock = threading.Lock()
+        # (token, monotonic time Caps Lock went off) per unfinished dictation
+        self._dictation_jobs = []
+        self._cancel_stats = {"cancelled": 0, "superseded": 0, "encodes_skipped": 0}
+        # Mode of the dictation being recorded and its screenshot (a Future,
+        # started at Caps Lock ON so it is ready by Caps Lock OFF)
+        self._dictation_mode = "transcription"
+        self._screen_capture = None
+        self._started_at = time.time()
 
         # Keyboard service
         self.keyboard_service = KeyboardService(self)
 
-    def start(self):
+        # Control socket for the CLI
+        self.control_server = ControlServer()
+        self.control_server.register("status", self.status)
+        self.control_server.register("meeting.toggle", self.toggle_meeting_recording)
+        self.control_server.register("config.reload", self.reload_config)
+        self.control_server.register("config.show", lambda: get_settings().to_dict())
+
+        # RSS sampling, per-job peaks and tracemalloc snapshots (`omnivo memory`)
+        self.memory_monitor = MemoryMonitor()
+        self.control_server.register("memory.report", self.memory_monitor.report)
+        self.control_server.register("memory.trace", self.trace_memory)
+        self.control_server.register("memory.snapshot", self.memory_monitor.snapshot)
+        self.control_server.register("memory.diff", self.memory_monitor.diff)
+
+        # Sampling CPU profiler (`omnivo profile`)
+        self.profiler = ProfilerControl()
+        self.control_server.register("profile.start", self.profiler.start)
+        self.control_server.register("profile.stop", self.profiler.stop)
+        self.control_server.register("profile.status", self.profiler.status)
+
+        # Live config reload: on file change, SIGHUP or `omnivo reload`
+        self.settings_watcher = SettingsWatcher()
+
+    def _component(self, name):
+        """Return component ``name``, creating it on first use."""
+        component = self._components.get(name)
+        if component is None:
+            with self._component_locks[name]:
+                component = self._components.get(name)
+                if component is None:
+                    component = _FACTORIES[name]()
+                    self._components[name] = component
+                    _mark(f"{name} ready")
+        return component
+
+    def warm_up(self, names=WARM_UP_ORDER):
+        """Create the dictation components so the first Caps Lock isn't slow."""
+        for name in names:
+            try:
+                self._component(name)
+            except Exception as e:
+                # Retried on first use, where the error reaches the caller
+                log.error(f"[bold red]Failed to load {name}: {e}[/bold red]")
+        _mark("warm-up done")
+
+    def start(self, warm_up=True):
+        """Start listening; returns the warm-up thread (None if not warming up)."""
         is_tty = sys.stdout.isatty()
 
         if is_tty:
+            from rich.panel import Panel
+            from rich.table import Table
+
+            console = _console()
             console.clear()
             console.print(Panel.fit(
                 "[bold cyan]Omnivo Voice Assistant[/bold cyan]\n"
@@ -58,38 +218,169 @@ class OmnivoApp:
             target=self.keyboard_service.start_listening, daemon=True
         )
         keyboard_thread.start()
+        _mark("keyboard listener started")
+
+        warm_up_thread = None
+        if warm_up:
+            warm_up_thread = threading.Thread(target=self.warm_up, name="warm-up", daemon=True)
+            warm_up_thread.start()
+
+        self.settings_watcher.start()
+        self.memory_monitor.start()
+        if hasattr(signal, "SIGHUP"):
+            signal.signal(signal.SIGHUP, self._reload_on_signal)
+
+        try:
+            self.control_server.start()
+        except Exception as e:
+            log.warning(f"[yellow]Control socket unavailable: {e}[/yellow]")
+        _mark("control socket listening")
 
         if is_tty:
-            console.print("[dim]Omnivo is ready and waiting for commands...[/dim]")
+            log.info("[dim]Omnivo is ready and waiting for commands...[/dim]")
         else:
-            console.print("Omnivo daemon started and listening for commands.")
+            log.info("Omnivo daemon started and listening for commands.")
+        return warm_up_thread
 
     def start_recording(self):
-        """Start dictation recording."""
+        """Start dictation recording, superseding a dictation just stopped."""
+        if self.cancel_dictation(superseded=True):
+            log.info("[yellow]Previous dictation superseded[/yellow]")
         self.is_recording = True
         self.recorder.start_recording()
-        console.print("[bold red]RECORDING[/bold red]")
+        self._screen_capture = None
+        self.set_dictation_mode(get_settings().dictation_mode)
+        log.info("[bold red]RECORDING[/bold red]")
+
+    def set_dictation_mode(self, mode):
+        """Set the mode of the dictation being recorded. Modes that use the
+        screen start capturing it now, while the user is still speaking."""
+        from core.processor import MODES, uses_screen
+
+        if mode not in MODES:
+            log.warning(f"[yellow]Unknown dictation mode '{mode}'[/yellow]")
+            return
+        if mode != self._dictation_mode:
+            log.info(f"[dim]Dictation mode: {mode}[/dim]")
+        self._dictation_mode = mode
+        if uses_screen(mode) and self._screen_capture is None:
+            self._screen_capture = self.screen_context.capture()
 
     def stop_recording_and_process(self):
         """Stop dictation recording and process (legacy path for direct calls)."""
         if not self.is_recording:
             return
+        log.info("[yellow]Recording stopped. Processing...[/yellow]")
+        self.finish_dictation()
+
+    def finish_dictation(self):
+        """Stop recording and encode, transcribe and paste on a worker thread.
+
+        Returns:
+            threading.Thread: The worker, or None if nothing was recorded
+        """
+        if not self.is_recording:
+            return None
         self.is_recording = False
-        console.print("[yellow]Recording stopped. Processing...[/yellow]")
+        recording = self.recorder.stop_stream()
+        if recording is None:
+            return None
+
+        token = CancelToken()
+        with self._state_lock:
+            self._dictation_jobs.append((token, time.monotonic()))
+        mode, screen = self._dictation_mode, self._screen_capture
+        self._screen_capture = None
+        thread = threading.Thread(
+            target=self._run_dictation, args=(recording, token, mode, screen), daemon=True
+        )
+        thread.start()
+        return thread
+
+    def cancel_dictation(self, superseded=False):
+        """Cancel dictations stopped within the cancel window.
+
+        Reaches whichever step they are in: encoding, queued or in-flight
+        requests (their connections are closed), or the paste.
+
+        Returns:
+            int: Number of dictations cancelled
+        """
+        window = get_settings().dictation_cancel_window
+        now = time.monotonic()
+        with self._state_lock:
+            tokens = [
+                token for token, stopped_at in self._dictation_jobs
+                if now - stopped_at <= window and not token.cancelled
+            ]
+            self._cancel_stats["cancelled"] += len(tokens)
+            if superseded:
+                self._cancel_stats["superseded"] += len(tokens)
+        for token in tokens:
+            token.cancel()
+        return len(tokens)
+
+    def _run_dictation(self, recording, token, mode="transcription", screen=None):
+        with self.memory_monitor.job("dictation"):
+            self._run_dictation_job(recording, token, mode, screen)
 
-        audio_file_path = self.recorder.stop_recording()
-        if audio_file_path:
-            self._process_dictation(audio_file_path)
+    def _run_dictation_job(self, recording, token, mode="transcription", screen=None):
+        try:
+            try:
+                audio_file_path = self.recorder.save_recording(recording, token)
+            except CancelledError:
+                with self._state_lock:
+                    self._cancel_stats["encodes_skipped"] += 1
+                log.info("[yellow]Dictation cancelled — nothing was sent.[/yellow]")
+                return
+            finally:
+                recording[0].clear()  # free the raw frames as soon as possible
+            self._process_dictation(audio_file_path, token, mode, screen)
+        finally:
+            with self._state_lock:
+                self._dictation_jobs = [
+                    job for job in self._dictation_jobs if job[0] is not token
+                ]
 
-    def _process_dictation(self, audio_file_path):
-        """Process a dictation audio file: transcribe, process, paste."""
+    def _process_dictation(self, audio_file_path, token=None, mode="transcription", screen=None):
+        """Process a dictation audio file: transcribe, process, paste.
+
+        ``screen`` is the Future of the screenshot for the chat modes.
+        """
         if not audio_file_path:
             return
 
-        transcription = self.transcriber.transcribe_audio(audio_file_path)
-        result = self.processor.process_transcription(transcription)
-        self.clipboard.copy_and_paste(result)
-        console.print("[green]Result pasted![/green]")
+        with self._state_lock:
+            self.dictations_in_progress += 1
+        try:
+            transcription = self.transcriber.transcribe_audio(audio_file_path, token)
+            if transcription is None:
+                log.error("[bold red]Transcription failed — nothing was pasted.[/bold red]")
+                return
+            result = self.processor.process_transcription(
+                transcription, mode, self._screenshot(screen), token
+            )
+            if token is not None:
+                token.raise_if_cancelled()
+            if self.clipboard.copy_and_paste(result):
+                log.info("[green]Result pasted![/green]")
+        except CancelledError:
+            log.info("[yellow]Dictation cancelled — nothing was pasted.[/yellow]")
+        except Exception as e:
+            log.error(f"[bold red]Processing failed — nothing was pasted: {e}[/bold red]")
+        finally:
+            with self._state_lock:
+                self.dictations_in_progress -= 1
+
+    def _screenshot(self, screen):
+        """The finished screenshot, or None if there is none or it failed."""
+        if screen is None:
+            return None
+        try:
+            return screen.result(timeout=5)
+        except Exception as e:
+            log.warning(f"[yellow]Screenshot unavailable: {e}[/yellow]")
+            return None
 
     def start_meeting_recording(self):
         """Start meeting recording."""
@@ -97,13 +388,90 @@ class OmnivoApp:
 
     def stop_meeting_recording(self):
         """Stop meeting recording and transcribe in background."""
-        thread = threading.Thread(
-            target=self.meeting_recorder.stop, daemon=True
-        )
+        thread = threading.Thread(target=self._stop_meeting, daemon=True)
         thread.start()
 
+    def _stop_meeting(self):
+        with self.memory_monitor.job("meeting"):
+            self.meeting_recorder.stop()
+
+    def toggle_meeting_recording(self):
+        """Start or stop meeting recording. Returns the new recording state."""
+        if self.meeting_recorder.is_recording:
+            self.stop_meeting_recording()
+            return False
+        self.start_meeting_recording()
+        return self.meeting_recorder.is_recording
+
+    def trace_memory(self, on=True, frames=None):
+        """Start or stop tracemalloc. Returns whether tracing is on."""
+        if on:
+            return self.memory_monitor.start_tracing(frames)
+        return self.memory_monitor.stop_tracing()
+
+    def reload_config(self):
+        """Re-read ~/.omnivo/config.json. Returns the names of changed settings."""
+        try:
+            return reload_settings()
+        except (OSError, ValueError) as e:
+            log.error(f"[bold red]Config not reloaded, keeping previous values: {e}[/bold red]")
+            raise
+
+    def _reload_on_signal(self, signum, frame):
+        # Raising here would end the main loop, and the daemon with it
+        try:
+            self.reload_config()
+        except (OSError, ValueError):
+            pass  # logged by reload_config
+
+    def status(self):
+        """Live daemon state for the control socket.
+
+        Never creates components: request stats are None until the
+        transcriber has loaded, and the meeting stack reports idle.
+        """
+        transcriber = self._components.get("transcriber")
+        processor = self._components.get("processor")
+        clipboard = self._components.get("clipboard")
+        meeting_recorder = self._components.get("meeting_recorder")
+        scheduler = sys.modules.get("services.api_scheduler")
+        worker = sys.modules.get("services.worker")
+        requests = transcriber.openai_service.stats() if transcriber else None
+        with self._state_lock:
+            cancel_stats = dict(self._cancel_stats)
+        return {
+            "pid": os.getpid(),
+            "uptime_seconds": round(time.time() - self._started_at, 1),
+            "dictation": {
+                "recording": self.is_recording,
+                "in_progress": self.dictations_in_progress,
+                "requests": requests,
+                "cancelled": cancel_stats["cancelled"],
+                "superseded": cancel_stats["superseded"],
+                # Cancelled before any bytes reached the API
+                "requests_avoided": cancel_stats["encodes_skipped"]
+                + (requests["requests_avoided"] if requests else 0),
+                "requests_aborted": requests["requests_aborted"] if requests else 0,
+                "response_cache": processor.cache_stats() if processor else None,
+                "vocabulary": processor.vocabulary_stats() if processor else None,
+                "clipboard": clipboard.stats() if clipboard else None,
+            },
+            "meeting": {
+                "recording": bool(meeting_recorder and meeting_recorder.is_recording),
+                "transcribing": bool(meeting_recorder and meeting_recorder.is_transcribing),
+            },
+            "api": scheduler.get_scheduler().metrics() if scheduler else None,
+            "worker": worker.get_worker().stats() if worker else None,
+            "memory": {
+                "rss_bytes": current_rss_bytes(),
+                "peak_rss_bytes": peak_rss_bytes(),
+            },
+        }
+
 
 def main():
+    _mark("imports done")
+    console = _console()
     api_key = os.getenv("OPENAI_API_KEY")
     if not api_key:
         console.print("[bold red]Error: OPENAI_API_KEY environment variable not set.[/bold red]")
@@ -115,18 +483,44 @@ def main():
 
     console.print(f"[dim]Using OpenAI API key ending in: ...{api_key[-5:]}[/dim]")
 
+    setup_logging()
+
     app = OmnivoApp()
-    app.start()
+    warm_up_thread = app.start()
+
+    if PROFILE_STARTUP:
+        warm_up_thread.join()
+        profiler.uninstall()
+        print(profiler.report())
+        app.keyboard_service.stop_listening()
+        app.settings_watcher.stop()
+        app.control_server.stop()
+        return
 
     try:
         while True:
-            import time
             time.sleep(1)
     except KeyboardInterrupt:
-        console.print("\n[yellow]Exiting Omnivo...[/yellow]")
-        if app.meeting_recorder.is_recording:
-            app.meeting_recorder.stop()
+        log.info("[yellow]Exiting Omnivo...[/yellow]")
+        meeting_recorder = app._components.get("meeting_recorder")
+        if meeting_recorder and meeting_recorder.is_recording:
+            meeting_recorder.stop()
         app.keyboard_service.stop_listening()
+        clipboard = app._components.get("clipboard")
+        if clipboard:
+            # The restore timer is a daemon thread: put the user's clipboard
+            # back now rather than leave the last dictation on it
+            clipboard.flush()
+        app.settings_watcher.stop()
+        app.control_server.stop()
+        worker = sys.modules.get("services.worker")
+        if worker:
+            worker.get_worker().stop()
+        archive = sys.modules.get("services.audio_archive")
+        if archive and archive.get_archive().stats()["pending"]:
+            # The archive owns the meeting WAVs it was handed; finish them
+            log.info("[yellow]Finishing the audio archive...[/yellow]")
+            archive.get_archive().wait()
         sys.exit(0)
 
 
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""Benchmark paste latency of the clipboard backends.
+
+Pastes a dictation-sized text through ClipboardManager on each backend and
+reports the time from copy_and_paste() to the paste keystroke (which is not
+actually sent), including saving the clipboard and confirming the write.
+Backends that aren't available here (appkit off macOS, pyperclip without a
+clipboard tool) are skipped. The clipboard is restored after every paste.
+
+Usage:
+    python scripts/benchmark_paste.py --pastes 200
+    python scripts/benchmark_paste.py --backends memory,pyperclip --words 100
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("PYNPUT_BACKEND", "dummy")
+
+from core.clipboard import ClipboardManager
+from services.pasteboard import create_pasteboard
+from utils.settings import Settings
+
+
+def bench(backend, pastes, text, restore):
+    pasteboard = create_pasteboard(backend)
+    pasteboard.change_count()  # raises if the backend can't reach a clipboard
+    manager = ClipboardManager(
+        pasteboard=pasteboard,
+        send_paste=lambda: None,
+        settings=Settings(clipboard_restore=restore, clipboard_restore_delay=0.0),
+    )
+    started = time.perf_counter()
+    for _ in range(pastes):
+        manager.copy_and_paste(text)
+        manager.flush()  # restore before the next paste, as between dictations
+    elapsed = time.perf_counter() - started
+    return manager.stats(), elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--backends", default="memory,pyperclip,appkit",
+                        help="Comma-separated backends to compare")
+    parser.add_argument("--pastes", type=int, default=100, help="Pastes per backend")
+    parser.add_argument("--words", type=int, default=40, help="Words per pasted text")
+    parser.add_argument("--no-restore", action="store_true",
+                        help="Don't save and restore the clipboard")
+    args = parser.parse_args()
+
+    text = " ".join(["dictated"] * args.words)
+    print(f"pastes={args.pastes} words={args.words} restore={not args.no_restore}")
+    for backend in args.backends.split(","):
+        try:
+            stats, elapsed = bench(backend, args.pastes, text, not args.no_restore)
+        except Exception as e:
+            print(f"  {backend:<10} unavailable: {str(e).splitlines()[0]}")
+            continue
+        latency = stats["latency"]
+        print(
+            f"  {backend:<10} p50 {latency['p50'] * 1000:7.2f}ms  p95 {latency['p95'] * 1000:7.2f}ms  "
+            f"p99 {latency['p99'] * 1000:7.2f}ms  ({elapsed:.2f}s total, "
+            f"{stats['write_retries']} retries, {stats['unconfirmed']} unconfirmed)"
+        )
+
+
+if __name__ == "__main__":
+    main()
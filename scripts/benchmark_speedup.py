@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""Benchmark time-compressed meeting uploads (meeting_speedup) on recorded audio.
+
+Transcribes every recording of a local corpus at each speed-up factor and
+reports chunk count, bytes uploaded and wall-clock time against normal
+speed, plus how closely the words match the normal-speed transcript. Run it
+per model to choose the factor for that model.
+
+The corpus defaults to the meeting audio archived in ~/notes/meetings (see
+``meeting_test_mode``). Requests go to the OpenAI API, or to a local stand-in
+with --stand-in (only sizes and preprocessing time are meaningful then).
+
+Usage:
+    python scripts/benchmark_speedup.py --factors 1.0,1.25,1.5
+    python scripts/benchmark_speedup.py ~/corpus --model whisper-1 --json
+"""
+
+import argparse
+import difflib
+import glob
+import json
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.meeting_transcriber import MeetingTranscriber
+from core.word_timeline import normalize
+from services.api_scheduler import APIScheduler, BACKGROUND
+from utils.config import MEETING_NOTES_PATH
+from utils.settings import get_settings, parse_settings
+
+AUDIO_EXTENSIONS = (".wav", ".flac", ".opus", ".mp3", ".m4a")
+
+
+class CountingScheduler(APIScheduler):
+    """APIScheduler that counts the requests and bytes it lets through."""
+
+    def __init__(self):
+        super().__init__()
+        self._count_lock = threading.Lock()
+        self.requests = 0
+        self.bytes = 0
+
+    def run(self, fn, priority=BACKGROUND, nbytes=0, token=None):
+        with self._count_lock:
+            self.requests += 1
+            self.bytes += nbytes
+        return super().run(fn, priority=priority, nbytes=nbytes, token=token)
+
+
+def find_corpus(paths):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(
+                f for f in glob.glob(os.path.join(path, "*"))
+                if f.lower().endswith(AUDIO_EXTENSIONS)
+            )
+        else:
+            files.append(path)
+    return sorted(files)
+
+
+def word_agreement(reference, text):
+    """Fraction of the words of two transcripts that line up (1.0 = identical)."""
+    a = normalize(reference)
+    b = normalize(text)
+    if not a and not b:
+        return 1.0
+    return difflib.SequenceMatcher(None, a, b, autojunk=False).ratio()
+
+
+def run_one(path, factor, base_settings, base_url, api_key):
+    settings = parse_settings({"meeting_speedup": factor}, base=base_settings)
+    scheduler = CountingScheduler()
+    transcriber = MeetingTranscriber(api_key=api_key, base_url=base_url, scheduler=scheduler)
+    chunks = [0]
+
+    def on_chunk(index, total, text):
+        chunks[0] = total
+
+    started = time.monotonic()
+    text = transcriber.transcribe_meeting(path, on_chunk=on_chunk, settings=settings)
+    return {
+        "chunks": chunks[0],
+        "requests": scheduler.requests,
+        "bytes": scheduler.bytes,
+        "seconds": round(time.monotonic() - started, 2),
+        "text": text,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("corpus", nargs="*", default=[MEETING_NOTES_PATH],
+                        help="Audio files or folders of them")
+    parser.add_argument("--factors", default="1.0,1.25,1.5",
+                        help="Comma-separated speed-up factors (1.0 is the baseline)")
+    parser.add_argument("--model", help="Transcription model (defaults to transcribe_model)")
+    parser.add_argument("--stand-in", type=float, metavar="LATENCY", default=None,
+                        help="Use a local stand-in API answering after LATENCY seconds")
+    parser.add_argument("--json", action="store_true", help="Print the raw results as JSON")
+    args = parser.parse_args()
+
+    files = find_corpus(args.corpus)
+    if not files:
+        parser.error(f"no audio found in {', '.join(args.corpus)}")
+    factors = [float(f) for f in args.factors.split(",")]
+    if 1.0 not in factors:
+        factors.insert(0, 1.0)
+
+    base_settings = get_settings()
+    if args.model:
+        base_settings = parse_settings({"transcribe_model": args.model}, base=base_settings)
+
+    api = None
+    base_url = api_key = None
+    if args.stand_in is not None:
+        from tests.stand_in_api import StandInAPI
+
+        api = StandInAPI(latency=args.stand_in).start()
+        base_url, api_key = api.base_url, "benchmark"
+
+    results = {}
+    try:
+        for path in files:
+            runs = {}
+            for factor in factors:
+                print(f"{os.path.basename(path)} at {factor:g}x...", file=sys.stderr)
+                runs[factor] = run_one(path, factor, base_settings, base_url, api_key)
+            reference = runs[1.0]["text"]
+            for run in runs.values():
+                run["agreement"] = round(word_agreement(reference, run.pop("text")), 3)
+            results[path] = runs
+    finally:
+        if api is not None:
+            api.stop()
+
+    if args.json:
+        print(json.dumps(
+            {path: {str(f): r for f, r in runs.items()} for path, runs in results.items()},
+            indent=2,
+        ))
+        return
+
+    print(f"model={base_settings.transcribe_model} files={len(files)}")
+    print(f"  {'factor':>6}  {'chunks':>6}  {'MB up':>7}  {'seconds':>8}  {'vs 1x':>6}  {'match':>6}")
+    for factor in factors:
+        runs = [r[factor] for r in results.values()]
+        baseline = sum(r[1.0]["seconds"] for r in results.values())
+        seconds = sum(r["seconds"] for r in runs)
+        print(
+            f"  {factor:>5g}x  {sum(r['chunks'] for r in runs):>6}  "
+            f"{sum(r['bytes'] for r in runs) / (1024 * 1024):>7.1f}  {seconds:>8.1f}  "
+            f"{seconds / baseline if baseline else 0:>5.0%}  "
+            f"{sum(r['agreement'] for r in runs) / len(runs):>6.1%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
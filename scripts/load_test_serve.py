@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""Load test `omnivo serve` against a local stand-in for the OpenAI API.
+
+Starts a stand-in transcription endpoint and a TranscriptionServer wired to
+it, submits jobs from concurrent clients for a fixed time and reports the
+sustained jobs per minute and job latency percentiles.
+
+Usage:
+    python scripts/load_test_serve.py --clients 8 --workers 2 --seconds 30
+    python scripts/load_test_serve.py --api-latency 1.5 --repeat 0.5
+"""
+
+import argparse
+import io
+import json
+import os
+import random
+import sys
+import threading
+import time
+import urllib.request
+import wave
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.meeting_transcriber import MeetingTranscriber
+from services.api_scheduler import APIScheduler
+from services.request_policy import LatencyTracker
+from services.transcription_server import TranscriptionServer
+from tests.stand_in_api import StandInAPI
+
+
+def make_wav(seconds, seed):
+    buf = io.BytesIO()
+    rng = random.Random(seed)
+    with wave.open(buf, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(16000)
+        wf.writeframes(bytes(rng.getrandbits(8) for _ in range(int(16000 * seconds) * 2)))
+    return buf.getvalue()
+
+
+def run_job(address, body):
+    req = urllib.request.Request(
+        f"{address}/v1/jobs", data=body, method="POST", headers={"Content-Type": "audio/wav"}
+    )
+    with urllib.request.urlopen(req, timeout=30) as resp:
+        job = json.loads(resp.read())
+    while job["status"] not in ("done", "failed", "cancelled"):
+        with urllib.request.urlopen(
+            f"{address}/v1/jobs/{job['id']}?wait=30", timeout=60
+        ) as resp:
+            job = json.loads(resp.read())
+    return job
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--clients", type=int, default=8, help="Concurrent submitting clients")
+    parser.add_argument("--workers", type=int, default=2, help="Server job workers (--jobs)")
+    parser.add_argument("--seconds", type=float, default=20.0, help="Test duration")
+    parser.add_argument("--api-latency", type=float, default=0.5,
+                        help="Stand-in API response time in seconds")
+    parser.add_argument("--audio-seconds", type=float, default=2.0, help="Length of each upload")
+    parser.add_argument("--repeat", type=float, default=0.0,
+                        help="Fraction of uploads that repeat earlier audio (cache hits)")
+    args = parser.parse_args()
+
+    samples = [make_wav(args.audio_seconds, seed) for seed in range(16)]
+    latencies = LatencyTracker(window=100000)
+    outcomes = {"done": 0, "failed": 0, "cancelled": 0, "errors": 0}
+    lock = threading.Lock()
+    stop_at = time.monotonic() + args.seconds
+    counter = iter(range(10 ** 9))
+
+    with StandInAPI(latency=args.api_latency) as api:
+        transcriber = MeetingTranscriber(
+            api_key="load-test", base_url=api.base_url, scheduler=APIScheduler()
+        )
+        with TranscriptionServer(
+            port=0, transcriber=transcriber, max_jobs=args.workers, max_queued=10 ** 6
+        ) as server:
+
+            def client(n):
+                rng = random.Random(n)
+                while time.monotonic() < stop_at:
+                    if rng.random() < args.repeat:
+                        body = samples[rng.randrange(len(samples))]
+                    else:
+                        # Unique audio: patch the last bytes so the hash differs
+                        body = samples[0][:-8] + next(counter).to_bytes(8, "little")
+                    started = time.monotonic()
+                    try:
+                        job = run_job(server.address, body)
+                    except Exception:
+                        with lock:
+                            outcomes["errors"] += 1
+                        continue
+                    with lock:
+                        outcomes[job["status"]] += 1
+                        if job["status"] == "done":
+                            latencies.record(time.monotonic() - started)
+
+            began = time.monotonic()
+            threads = [threading.Thread(target=client, args=(n,)) for n in range(args.clients)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.monotonic() - began
+            metrics = server.metrics()
+
+    summary = latencies.summary()
+    print(f"clients={args.clients} workers={args.workers} api_latency={args.api_latency}s "
+          f"audio={args.audio_seconds}s repeat={args.repeat:.0%}")
+    print(f"  jobs done:       {outcomes['done']} in {elapsed:.1f}s "
+          f"({outcomes['failed']} failed, {outcomes['errors']} client errors)")
+    print(f"  sustained rate:  {outcomes['done'] / elapsed * 60:.1f} jobs/min")
+    if summary["count"]:
+        print(f"  job latency:     p50 {summary['p50']:.2f}s  p95 {summary['p95']:.2f}s  "
+              f"p99 {summary['p99']:.2f}s")
+    print(f"  cache hits:      {metrics['cache_hits']}")
+    print(f"  API requests:    {api.request_count}")
+    api_wait = metrics["api"]["wait_seconds"]["background"]
+    if api_wait["count"]:
+        print(f"  scheduler wait:  p50 {api_wait['p50']:.2f}s  p95 {api_wait['p95']:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
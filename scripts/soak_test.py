@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""Soak test the dictation and meeting pipelines headless, on any OS.
+
+Replays WAV audio through AudioRecorder and MeetingRecorder (no microphone
+or ScreenCaptureKit) against a local stand-in for the OpenAI API, and
+reports throughput, latency percentiles, memory growth and dropped audio.
+
+Usage:
+    python scripts/soak_test.py --workers 8 --dictations 50 --meetings 2
+    python scripts/soak_test.py --meeting-minutes 60 --speed 60 --faults 0.05
+"""
+
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.soak import run_soak
+
+
+def _latency(summary):
+    if not summary["count"]:
+        return "n/a"
+    return f"p50 {summary['p50']:.2f}s  p95 {summary['p95']:.2f}s  p99 {summary['p99']:.2f}s"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent dictation users")
+    parser.add_argument("--dictations", type=int, default=25, help="Dictations per user")
+    parser.add_argument("--dictation-seconds", type=float, default=5.0,
+                        help="Length of each dictation")
+    parser.add_argument("--meetings", type=int, default=1, help="Concurrent meetings")
+    parser.add_argument("--meeting-minutes", type=float, default=30.0, help="Meeting length")
+    parser.add_argument("--chunk-seconds", type=float, default=600.0,
+                        help="Meeting chunk limit (max_duration_seconds)")
+    parser.add_argument("--speed", type=float, default=0.0,
+                        help="Replay speed, multiple of real time (0 = unpaced)")
+    parser.add_argument("--api-latency", type=float, default=0.3,
+                        help="Stand-in response time in seconds")
+    parser.add_argument("--faults", type=float, default=0.0,
+                        help="Fraction of requests failed (half 429, half 500)")
+    parser.add_argument("--json", action="store_true", help="Print the raw report as JSON")
+    args = parser.parse_args()
+
+    report = run_soak(
+        dictation_workers=args.workers,
+        dictations_per_worker=args.dictations,
+        dictation_seconds=args.dictation_seconds,
+        meetings=args.meetings,
+        meeting_seconds=args.meeting_minutes * 60,
+        meeting_chunk_seconds=args.chunk_seconds,
+        speed=args.speed,
+        api_latency=args.api_latency,
+        fault_rates={429: args.faults / 2, 500: args.faults / 2} if args.faults else None,
+    )
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    dictation, meeting, memory = report["dictation"], report["meeting"], report["memory"]
+    print(f"workers={args.workers} meetings={args.meetings} speed={args.speed or 'unpaced'} "
+          f"api_latency={args.api_latency}s faults={args.faults:.0%}  ({report['seconds']}s)")
+    print(f"  dictations:      {dictation['completed']} done, {dictation['failed']} failed "
+          f"({dictation['per_minute']}/min)")
+    print(f"  stop -> text:    {_latency(dictation['latency'])}")
+    print(f"  meetings:        {meeting['completed']} done, {meeting['failed']} failed, "
+          f"{meeting['audio_seconds'] / 60:.1f} min of audio")
+    print(f"  stop -> notes:   {_latency(meeting['latency'])}")
+    print(f"  dropped audio:   {dictation['dropped_frames']} dictation frames, "
+          f"{meeting['dropped_seconds']}s of meetings")
+    print(f"  API requests:    {report['api']['requests']} "
+          f"({report['api']['scheduler']['rate_limited']} rate limited)")
+    if memory:
+        print(f"  memory (RSS):    {memory['start_mb']} MB -> {memory['end_mb']} MB "
+              f"(peak {memory['peak_mb']} MB, growth after warm-up {memory['growth_mb']} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+"""Process-wide scheduler for OpenAI API calls.
+
+Dictation and meeting uploads share one API account. Every transcription call
+goes through the scheduler, which grants requests in priority order
+(interactive dictation before background meeting chunks), enforces
+token-bucket limits on request rate and upload bytes, keeps one in-flight
+slot free for interactive work, and pauses dispatch when the API answers
+429 with a Retry-After.
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+from services.request_policy import LatencyTracker
+from utils.cancellation import CancelledError
+from utils.config import (
+    API_REQUESTS_PER_SECOND,
+    API_REQUEST_BURST,
+    API_UPLOAD_BYTES_PER_SECOND,
+    API_UPLOAD_BURST_BYTES,
+    API_MAX_IN_FLIGHT,
+    API_DEFAULT_RETRY_AFTER,
+)
+from utils.settings import add_reload_listener, get_settings
+
+INTERACTIVE = 0
+BACKGROUND = 1
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BACKGROUND: "background"}
+
+
+class TokenBucket:
+    """Classic token bucket: ``rate`` tokens/second, holding at most ``capacity``."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def time_until(self, amount, now):
+        """Seconds until ``amount`` tokens are available (0 if already)."""
+        self._refill(now)
+        # Requests larger than the bucket only need a full bucket
+        amount = min(amount, self.capacity)
+        if self._tokens >= amount:
+            return 0.0
+        return (amount - self._tokens) / self.rate
+
+    def consume(self, amount, now):
+        self._refill(now)
+        self._tokens -= min(amount, self.capacity)
+
+
+def retry_after_seconds(error, default=API_DEFAULT_RETRY_AFTER):
+    """Return the server-requested back-off for a 429 error, else None."""
+    if getattr(error, "status_code", None) != 429:
+        return None
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return float(retry_after_ms) / 1000
+        except ValueError:
+            pass
+
+    retry_after = headers.get("retry-after")
+    if retry_after:
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+            except (TypeError, ValueError):
+                pass
+    return default
+
+
+class _Waiter:
+    __slots__ = ("priority", "nbytes", "enqueued", "cancelled")
+
+    def __init__(self, priority, nbytes):
+        self.priority = priority
+        self.nbytes = nbytes
+        self.enqueued = time.monotonic()
+        self.cancelled = False
+
+
+class APIScheduler:
+    def __init__(
+        self,
+        requests_per_second=API_REQUESTS_PER_SECOND,
+        request_burst=API_REQUEST_BURST,
+        upload_bytes_per_second=API_UPLOAD_BYTES_PER_SECOND,
+        upload_burst_bytes=API_UPLOAD_BURST_BYTES,
+        max_in_flight=API_MAX_IN_FLIGHT,
+    ):
+        self._requests = TokenBucket(requests_per_second, request_burst)
+        self._upload_bytes = TokenBucket(upload_bytes_per_second, upload_burst_bytes)
+        self.max_in_flight = max_in_flight
+
+        self._cond = threading.Condition()
+        self._queue = []  # heap of (priority, seq, waiter)
+        self._seq = itertools.count()
+        self._in_flight = {INTERACTIVE: 0, BACKGROUND: 0}
+        self._paused_until = 0.0
+
+        self._wait_times = {p: LatencyTracker() for p in PRIORITY_NAMES}
+        self._granted = {p: 0 for p in PRIORITY_NAMES}
+        self._cancelled = {p: 0 for p in PRIORITY_NAMES}
+        self._rate_limited = 0
+
+    def configure(self, settings):
+        """Adopt the api_* limits of a Settings snapshot."""
+        with self._cond:
+            self._requests.rate = settings.api_requests_per_second
+            self._requests.capacity = settings.api_request_burst
+            self._upload_bytes.rate = settings.api_upload_bytes_per_second
+            self._upload_bytes.capacity = settings.api_upload_burst_bytes
+            self.max_in_flight = settings.api_max_in_flight
+            self._cond.notify_all()
+
+    def _slot_limit(self, priority):
+        # Background work leaves one slot free so dictation never queues
+        # behind a burst of meeting uploads.
+        if priority == INTERACTIVE or self.max_in_flight <= 1:
+            return self.max_in_flight
+        return self.max_in_flight - 1
+
+    def _head(self):
+        while self._queue and self._queue[0][2].cancelled:
+            heapq.heappop(self._queue)
+        return self._queue[0][2] if self._queue else None
+
+    def _ready_in(self, waiter, now):
+        """Seconds until ``waiter`` may run; None if blocked on a free slot."""
+        if sum(self._in_flight.values()) >= self._slot_limit(waiter.priority):
+            return None
+        return max(
+            self._paused_until - now,
+            self._requests.time_until(1, now),
+            self._upload_bytes.time_until(waiter.nbytes, now),
+            0.0,
+        )
+
+    def acquire(self, priority=INTERACTIVE, nbytes=0, token=None):
+        """Block until a request of ``nbytes`` upload may be sent.
+
+        Returns:
+            float: Seconds spent waiting in the queue
+
+        Raises:
+            CancelledError: If ``token`` is cancelled while waiting
+        """
+        waiter = _Waiter(priority, nbytes)
+        with self._cond:
+            heapq.heappush(self._queue, (priority, next(self._seq), waiter))
+
+        if token is not None:
+            token.add_callback(self._wake)
+
+        with self._cond:
+            while True:
+                if token is not None and token.cancelled:
+                    waiter.cancelled = True
+                    self._cancelled[priority] += 1
+                    self._cond.notify_all()
+                    raise CancelledError()
+
+                now = time.monotonic()
+                delay = None
+                if self._head() is waiter:
+                    delay = self._ready_in(waiter, now)
+                    if delay == 0.0:
+                        heapq.heappop(self._queue)
+                        self._requests.consume(1, now)
+                        self._upload_bytes.consume(nbytes, now)
+                        self._in_flight[priority] += 1
+                        waited = now - waiter.enqueued
+                        self._wait_times[priority].record(waited)
+                        self._granted[priority] += 1
+                        self._cond.notify_all()
+                        return waited
+                self._cond.wait(timeout=delay)
+
+    def release(self, priority=INTERACTIVE):
+        with self._cond:
+            self._in_flight[priority] -= 1
+            self._cond.notify_all()
+
+    def _wake(self):
+        with self._cond:
+            self._cond.notify_all()
+
+    def pause(self, seconds):
+        """Hold all dispatch for ``seconds`` (e.g. after a 429)."""
+        with self._cond:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._cond.notify_all()
+
+    def throttle(self, retry_after):
+        """Count a 429 and hold all dispatch for its Retry-After period."""
+        with self._cond:
+            self._rate_limited += 1
+        self.pause(retry_after)
+
+    def run(self, fn, priority=INTERACTIVE, nbytes=0, token=None):
+        """Run ``fn()`` once the scheduler grants it a slot.
+
+        A 429 from ``fn`` pauses the scheduler for the Retry-After period and
+        is re-raised so the caller's retry policy can try again.
+        """
+        self.acquire(priority, nbytes, token)
+        try:
+            return fn()
+        except Exception as e:
+            retry_after = retry_after_seconds(e)
+            if retry_after is not None:
+                self.throttle(retry_after)
+            raise
+        finally:
+            self.release(priority)
+
+    def metrics(self):
+        """Queue depth, in-flight counts and wait-time percentiles per priority.
+
+        ``cancelled`` counts requests dropped from the queue before dispatch.
+        """
+        with self._cond:
+            depth = {name: 0 for name in PRIORITY_NAMES.values()}
+            for priority, _, waiter in self._queue:
+                if not waiter.cancelled:
+                    depth[PRIORITY_NAMES[priority]] += 1
+            return {
+                "queue_depth": depth,
+                "in_flight": {PRIORITY_NAMES[p]: n for p, n in self._in_flight.items()},
+                "granted": {PRIORITY_NAMES[p]: n for p, n in self._granted.items()},
+                "cancelled": {PRIORITY_NAMES[p]: n for p, n in self._cancelled.items()},
+                "wait_seconds": {
+                    PRIORITY_NAMES[p]: t.summary() for p, t in self._wait_times.items()
+                },
+                "rate_limited": self._rate_limited,
+                "paused_for": max(0.0, self._paused_until - time.monotonic()),
+            }
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    """Return the process-wide scheduler, creating it on first use."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = APIScheduler()
+            _scheduler.configure(get_settings())
+            add_reload_listener(lambda settings, changed: _scheduler.configure(settings))
+        return _scheduler
@@ -0,0 +1,253 @@
+"""Background archive of meeting recordings.
+
+In test mode the raw meeting audio is kept beside the notes. Instead of
+copying the 48 kHz WAV before transcription starts, the recorder hands the
+temporary WAV to the archive once transcription is done. A single worker
+then encodes it (FLAC by default, or Opus) with ffmpeg at low CPU priority,
+skipping recordings whose content was already archived, and evicts the
+oldest recordings when the archive exceeds its size or age budget.
+
+``archive.json`` in the archive directory maps content hashes to files and
+meeting names; a meeting whose audio duplicates an earlier one resolves to
+the earlier file.
+"""
+
+import hashlib
+import json
+import os
+import queue
+import shutil
+import subprocess
+import threading
+import time
+
+from utils.log import get_logger
+from utils.settings import get_settings
+
+log = get_logger("archive")
+
+MANIFEST = "archive.json"
+FORMATS = {
+    "flac": ["-c:a", "flac", "-compression_level", "8"],
+    "opus": ["-c:a", "libopus", "-b:a", "48k", "-application", "voip"],
+}
+
+
+def file_digest(path, block_size=1024 * 1024):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _lower_priority():
+    # Runs in the ffmpeg child: encoding must not compete with dictation
+    os.nice(10)
+
+
+class AudioArchive:
+    def __init__(self, root=None, settings=None):
+        """
+        Args:
+            root: Archive directory (defaults to the meeting_notes_path setting)
+            settings: Fixed settings snapshot (defaults to the live settings
+                at the time each recording is archived)
+        """
+        self._root = root
+        self._settings = settings
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stats = {"archived": 0, "deduplicated": 0, "evicted": 0, "failed": 0}
+
+    @property
+    def root(self):
+        return self._root or (self._settings or get_settings()).meeting_notes_path
+
+    # Queueing
+
+    def submit(self, wav_path, name, delete_source=True, on_done=None):
+        """Archive ``wav_path`` as meeting ``name`` in the background.
+
+        With ``delete_source`` the archive takes ownership of the file: it is
+        removed once encoded, or moved into the archive unencoded if encoding
+        fails. ``on_done`` is called on the archive thread with the name of
+        the file the recording ended up in (an earlier file if its audio was
+        already archived), or None if it was lost.
+        """
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._worker, name="audio-archive", daemon=True
+                )
+                self._thread.start()
+        self._queue.put((wav_path, name, delete_source, on_done))
+
+    def wait(self, timeout=None):
+        """Block until every submitted recording is archived.
+
+        Returns:
+            bool: False if recordings were still pending after ``timeout``
+        """
+        done = self._queue.all_tasks_done
+        with done:
+            return done.wait_for(lambda: not self._queue.unfinished_tasks, timeout)
+
+    def _worker(self):
+        while True:
+            wav_path, name, delete_source, on_done = self._queue.get()
+            archived = None
+            try:
+                archived = self._archive(wav_path, name)
+            except Exception as e:
+                with self._lock:
+                    self._stats["failed"] += 1
+                log.error(f"[bold red]Archiving {name} failed: {e}[/bold red]")
+                if delete_source:
+                    archived = self._keep_raw(wav_path, name)
+            finally:
+                if delete_source and os.path.exists(wav_path):
+                    os.remove(wav_path)
+                if on_done is not None:
+                    try:
+                        on_done(archived)
+                    except Exception as e:
+                        log.error(f"[bold red]After archiving {name}: {e}[/bold red]")
+                self._queue.task_done()
+
+    # Archiving
+
+    def _archive(self, wav_path, name):
+        """Encode ``wav_path`` into the archive; returns the archived file name."""
+        settings = self._settings or get_settings()
+        fmt = settings.archive_format if settings.archive_format in FORMATS else "flac"
+        os.makedirs(self.root, exist_ok=True)
+        digest = file_digest(wav_path)
+
+        manifest = self._load()
+        entry = manifest["recordings"].get(digest)
+        if entry and os.path.exists(os.path.join(self.root, entry["file"])):
+            if name not in entry["names"]:
+                entry["names"].append(name)
+            self._save(manifest)
+            with self._lock:
+                self._stats["deduplicated"] += 1
+            log.info(f"[dim]Audio for {name} already archived as {entry['file']}[/dim]")
+            return entry["file"]
+
+        file_name = f"{name}.{fmt}"
+        path = os.path.join(self.root, file_name)
+        tmp_path = os.path.join(self.root, f".{file_name}.tmp")
+        started = time.monotonic()
+        try:
+            subprocess.run(
+                ["ffmpeg", "-nostdin", "-y", "-loglevel", "error", "-i", wav_path,
+                 *FORMATS[fmt], "-f", "ogg" if fmt == "opus" else fmt, tmp_path],
+                check=True,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+                preexec_fn=_lower_priority if hasattr(os, "nice") else None,
+            )
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        size = os.path.getsize(path)
+        manifest["recordings"][digest] = {
+            "file": file_name,
+            "bytes": size,
+            "created": time.time(),
+            "names": [name],
+        }
+        self._evict(manifest, settings, keep=digest)
+        self._save(manifest)
+        with self._lock:
+            self._stats["archived"] += 1
+        log.info(
+            f"[dim]Audio archived to {path} ({os.path.getsize(wav_path) / 1e6:.0f}MB → "
+            f"{size / 1e6:.1f}MB in {time.monotonic() - started:.1f}s)[/dim]"
+        )
+        return file_name
+
+    def _keep_raw(self, wav_path, name):
+        """Keep the unencoded recording rather than lose it."""
+        try:
+            os.makedirs(self.root, exist_ok=True)
+            path = os.path.join(self.root, f"{name}.wav")
+            shutil.move(wav_path, path)
+            log.info(f"[yellow]Raw audio kept at {path}[/yellow]")
+            return os.path.basename(path)
+        except OSError as e:
+            log.error(f"[bold red]Could not keep raw audio for {name}: {e}[/bold red]")
+            return None
+
+    def _evict(self, manifest, settings, keep=None):
+        """Drop the oldest recordings beyond the age and size budgets."""
+        recordings = manifest["recordings"]
+        oldest_first = sorted(recordings, key=lambda d: recordings[d]["created"])
+        max_age = settings.archive_max_age_days * 86400 if settings.archive_max_age_days else None
+        total = sum(r["bytes"] for r in recordings.values())
+        now = time.time()
+        for digest in oldest_first:
+            if digest == keep:
+                continue
+            entry = recordings[digest]
+            expired = max_age is not None and now - entry["created"] > max_age
+            over_budget = settings.archive_max_bytes and total > settings.archive_max_bytes
+            if not (expired or over_budget):
+                continue
+            try:
+                os.remove(os.path.join(self.root, entry["file"]))
+            except FileNotFoundError:
+                pass
+            total -= entry["bytes"]
+            del recordings[digest]
+            with self._lock:
+                self._stats["evicted"] += 1
+            log.info(f"[dim]Evicted archived audio {entry['file']}[/dim]")
+
+    # Manifest
+
+    def _manifest_path(self):
+        return os.path.join(self.root, MANIFEST)
+
+    def _load(self):
+        try:
+            with open(self._manifest_path(), encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {"version": 1, "recordings": {}}
+
+    def _save(self, manifest):
+        path = self._manifest_path()
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=1)
+        os.replace(path + ".tmp", path)
+
+    def resolve(self, name):
+        """Path of the archived audio for meeting ``name``, or None."""
+        for entry in self._load()["recordings"].values():
+            if name in entry["names"]:
+                return os.path.join(self.root, entry["file"])
+        return None
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats["pending"] = self._queue.unfinished_tasks
+        return stats
+
+
+_archive = None
+_archive_lock = threading.Lock()
+
+
+def get_archive():
+    """Return the process-wide archive, creating it on first use."""
+    global _archive
+    with _archive_lock:
+        if _archive is None:
+            _archive = AudioArchive()
+        return _archive
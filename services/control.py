@@ -0,0 +1,133 @@
+"""Local control socket between the CLI and the running daemon.
+
+The daemon serves a Unix domain socket under ~/.omnivo/. Each request is one
+line of JSON (``{"cmd": "status", ...}``) answered by one line of JSON
+(``{"ok": true, "result": ...}`` or ``{"ok": false, "error": "..."}``), so the
+CLI can query live state without spawning launchctl.
+"""
+
+import json
+import os
+import socket
+import socketserver
+import threading
+
+from services.launchd import DATA_DIR
+
+SOCKET_PATH = os.getenv("OMNIVO_CONTROL_SOCKET", os.path.join(DATA_DIR, "control.sock"))
+MAX_REQUEST_BYTES = 64 * 1024
+
+
+class ControlUnavailable(ConnectionError):
+    """No daemon is listening on the control socket."""
+
+
+class ControlError(RuntimeError):
+    """The daemon rejected or failed a control command."""
+
+
+class ControlServer:
+    """Serve registered commands on a Unix domain socket in a background thread."""
+
+    def __init__(self, path=None):
+        self.path = path or SOCKET_PATH
+        self._handlers = {}
+        self._server = None
+        self._thread = None
+        self.register("ping", lambda: "pong")
+        self.register("help", lambda: sorted(self._handlers))
+
+    def register(self, name, handler):
+        """Expose ``handler(**args)`` as command ``name``."""
+        self._handlers[name] = handler
+
+    def dispatch(self, request):
+        """Run one decoded request and return the response dict."""
+        if not isinstance(request, dict) or "cmd" not in request:
+            return {"ok": False, "error": "request must be an object with 'cmd'"}
+        args = dict(request)
+        name = args.pop("cmd")
+        handler = self._handlers.get(name)
+        if handler is None:
+            return {"ok": False, "error": f"unknown command: {name}"}
+        try:
+            return {"ok": True, "result": handler(**args)}
+        except Exception as e:
+            return {"ok": False, "error": f"{type(e).__name__}: {e}"}
+
+    def start(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._remove_stale_socket()
+
+        control = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    if len(line) > MAX_REQUEST_BYTES:
+                        response = {"ok": False, "error": "request too large"}
+                    else:
+                        try:
+                            response = control.dispatch(json.loads(line))
+                        except ValueError:
+                            response = {"ok": False, "error": "invalid JSON"}
+                    self.wfile.write(_encode(response))
+
+        self._server = socketserver.ThreadingUnixStreamServer(self.path, Handler)
+        self._server.daemon_threads = True
+        os.chmod(self.path, 0o600)
+
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def _remove_stale_socket(self):
+        """Remove a socket file left behind by a crashed daemon."""
+        if not os.path.exists(self.path):
+            return
+        try:
+            request("ping", path=self.path, timeout=0.5)
+        except ControlUnavailable:
+            os.remove(self.path)
+        else:
+            raise RuntimeError(f"Another daemon is already serving {self.path}")
+
+
+def _encode(obj):
+    return (json.dumps(obj, separators=(",", ":"), default=str) + "\n").encode()
+
+
+def request(cmd, path=None, timeout=2.0, **args):
+    """Send one command to the daemon and return its result.
+
+    Raises:
+        ControlUnavailable: No daemon is listening
+        ControlError: The daemon reported an error
+    """
+    path = path or SOCKET_PATH
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        try:
+            sock.connect(path)
+        except (FileNotFoundError, ConnectionRefusedError) as e:
+            raise ControlUnavailable(f"daemon not reachable at {path}") from e
+        sock.sendall(_encode({"cmd": cmd, **args}))
+        with sock.makefile("rb") as f:
+            line = f.readline()
+    finally:
+        sock.close()
+
+    if not line:
+        raise ControlUnavailable("daemon closed the connection")
+    response = json.loads(line)
+    if not response.get("ok"):
+        raise ControlError(response.get("error", "unknown error"))
+    return response.get("result")
@@ -0,0 +1,443 @@
+"""Key capture backends for the keyboard service.
+
+Dictation only needs Caps Lock (on/off), Esc (clear or cancel, only while a
+dictation is recording or can still be cancelled) and the Shift / Control
+modifiers (dictation mode). A backend delivers exactly those, as
+``on_caps_lock(on)``, ``on_escape()`` and ``on_modifier(name)``, and
+subscribes to as little else as the platform allows so ordinary typing
+doesn't wake the daemon:
+
+- ``quartz`` (macOS): a listen-only event tap for flags-changed events, which
+  only fire for modifier keys. A second tap for key-down events is enabled
+  only while Esc is being watched.
+- ``evdev`` (Linux, optional ``evdev`` package): reads the keyboards in
+  /dev/input directly; works without X or Wayland. Needs read access to the
+  devices (the ``input`` group). An event mask (EVIOCSMASK, Linux 4.4+) has
+  the kernel drop every other key, so typing doesn't wake the reader.
+  Where the mask is unsupported, each key event is read and dropped in Python.
+- ``pynput``: the portable fallback. It sees every key press and release.
+- ``simulated``: driven from code, for tests and benchmarks.
+
+``on_caps_lock`` receives the new state, or None when the backend can't know
+it (pynput on macOS, where Bluetooth keyboards only report the release) and
+the service has to read it.
+"""
+
+import ctypes
+import fcntl
+import os
+import platform
+import selectors
+import struct
+import threading
+import time
+
+from utils.log import get_logger
+from utils.settings import get_settings
+
+log = get_logger("keyboard")
+
+BACKENDS = ("auto", "quartz", "evdev", "pynput", "simulated")
+
+# macOS virtual key codes
+_VK_ESCAPE = 53
+_VK_BLUETOOTH_CAPS_LOCK = 255  # some Bluetooth keyboards report Caps Lock as vk 255
+
+# Linux input event codes (linux/input-event-codes.h, a stable kernel ABI)
+_EV_SYN, _EV_KEY = 0x00, 0x01
+_EV_CNT, _KEY_CNT = 0x20, 0x300
+_KEY_ESC, _KEY_CAPSLOCK = 1, 58
+_KEY_LEFTCTRL, _KEY_LEFTSHIFT, _KEY_RIGHTSHIFT, _KEY_RIGHTCTRL = 29, 42, 54, 97
+_LED_CAPSL = 0x01
+# _IOW('E', 0x93, struct input_mask { u32 type; u32 codes_size; u64 codes_ptr; })
+_EVIOCSMASK = (1 << 30) | (16 << 16) | (ord("E") << 8) | 0x93
+
+
+def set_event_mask(fd, event_type, codes, count):
+    """Have the kernel deliver only ``codes`` of ``event_type`` (of ``count``
+    possible) to this reader of an evdev device. With ``_EV_SYN`` as the
+    type, ``codes`` are the event types let through.
+
+    Raises:
+        OSError: The kernel doesn't support EVIOCSMASK
+    """
+    bits = bytearray(count // 8)
+    for code in codes:
+        bits[code // 8] |= 1 << (code % 8)
+    buffer = ctypes.create_string_buffer(bytes(bits), len(bits))
+    fcntl.ioctl(fd, _EVIOCSMASK, struct.pack("IIQ", event_type, len(bits), ctypes.addressof(buffer)))
+
+
+class KeyCapture:
+    """Base class: delivers Caps Lock changes and, while watched, Esc presses."""
+
+    name = None
+
+    def __init__(self):
+        self.on_caps_lock = None
+        self.on_escape = None
+        self.on_modifier = None
+        self.events_handled = 0  # events that reached Python code
+        self._escape = False
+
+    def start(self, on_caps_lock, on_escape, on_modifier=None):
+        self.on_caps_lock = on_caps_lock
+        self.on_escape = on_escape
+        self.on_modifier = on_modifier
+        self._start()
+
+    def _start(self):
+        raise NotImplementedError
+
+    def stop(self):
+        pass
+
+    def watch_escape(self, enabled):
+        """Deliver Esc presses (only needed while a dictation can be cleared
+        or cancelled)."""
+        self._escape = enabled
+
+    def caps_lock_state(self):
+        """Current Caps Lock state, or None if unknown."""
+        return None
+
+    def _caps_lock(self, on):
+        try:
+            self.on_caps_lock(on)
+        except Exception as e:
+            log.error(f"[bold red]Error on Caps Lock:[/bold red] {e}")
+
+    def _escape_pressed(self):
+        try:
+            self.on_escape()
+        except Exception as e:
+            log.error(f"[bold red]Error on Esc:[/bold red] {e}")
+
+    def _modifier_pressed(self, name):
+        if self.on_modifier is None:
+            return
+        try:
+            self.on_modifier(name)
+        except Exception as e:
+            log.error(f"[bold red]Error on {name}:[/bold red] {e}")
+
+
+class QuartzKeyCapture(KeyCapture):
+    """Listen-only CGEventTaps: flags-changed always, key-down while watching Esc."""
+
+    name = "quartz"
+
+    def __init__(self):
+        super().__init__()
+        import Quartz
+
+        self._q = Quartz
+        self._caps = self.caps_lock_state()
+        self._modifiers = {"shift": False, "ctrl": False}
+        self._flags_tap = None
+        self._key_tap = None
+        self._run_loop = None
+        self._ready = threading.Event()
+        self._error = None
+
+    def caps_lock_state(self):
+        q = self._q
+        flags = q.CGEventSourceFlagsState(q.kCGEventSourceStateHIDSystemState)
+        return bool(flags & q.kCGEventFlagMaskAlphaShift)
+
+    def _start(self):
+        threading.Thread(target=self._run, name="key-capture", daemon=True).start()
+        self._ready.wait(timeout=5)
+        if self._error:
+            raise RuntimeError(self._error)
+
+    def _tap(self, event_type):
+        q = self._q
+        tap = q.CGEventTapCreate(
+            q.kCGSessionEventTap,
+            q.kCGHeadInsertEventTap,
+            q.kCGEventTapOptionListenOnly,
+            q.CGEventMaskBit(event_type),
+            self._callback,
+            None,
+        )
+        if tap is None:
+            raise RuntimeError("could not create an event tap (Input Monitoring permission?)")
+        source = q.CFMachPortCreateRunLoopSource(None, tap, 0)
+        q.CFRunLoopAddSource(self._run_loop, source, q.kCFRunLoopCommonModes)
+        return tap
+
+    def _run(self):
+        q = self._q
+        try:
+            self._run_loop = q.CFRunLoopGetCurrent()
+            self._flags_tap = self._tap(q.kCGEventFlagsChanged)
+            self._key_tap = self._tap(q.kCGEventKeyDown)
+            q.CGEventTapEnable(self._key_tap, self._escape)
+        except Exception as e:
+            self._error = str(e)
+            return
+        finally:
+            self._ready.set()
+        q.CFRunLoopRun()
+
+    def _callback(self, proxy, event_type, event, refcon):
+        q = self._q
+        self.events_handled += 1
+        if event_type == q.kCGEventFlagsChanged:
+            flags = q.CGEventGetFlags(event)
+            caps = bool(flags & q.kCGEventFlagMaskAlphaShift)
+            if caps != self._caps:
+                self._caps = caps
+                self._caps_lock(caps)
+            for name, mask in (("shift", q.kCGEventFlagMaskShift), ("ctrl", q.kCGEventFlagMaskControl)):
+                down = bool(flags & mask)
+                if down and not self._modifiers[name]:
+                    self._modifier_pressed(name)
+                self._modifiers[name] = down
+        elif event_type == q.kCGEventKeyDown:
+            keycode = q.CGEventGetIntegerValueField(event, q.kCGKeyboardEventKeycode)
+            if keycode == _VK_ESCAPE and self._escape:
+                self._escape_pressed()
+        elif event_type in (q.kCGEventTapDisabledByTimeout, q.kCGEventTapDisabledByUserInput):
+            # The system turns taps off when a callback is slow; turn them back on
+            q.CGEventTapEnable(self._flags_tap, True)
+            q.CGEventTapEnable(self._key_tap, self._escape)
+        return event
+
+    def watch_escape(self, enabled):
+        super().watch_escape(enabled)
+        if self._key_tap is not None:
+            self._q.CGEventTapEnable(self._key_tap, enabled)
+
+    def stop(self):
+        if self._run_loop is not None:
+            self._q.CFRunLoopStop(self._run_loop)
+
+
+class EvdevKeyCapture(KeyCapture):
+    """Reads Caps Lock and Esc straight from the keyboards in /dev/input."""
+
+    name = "evdev"
+
+    def __init__(self, devices=None):
+        """
+        Args:
+            devices: evdev.InputDevice objects (default: every device with a
+                Caps Lock key)
+        """
+        super().__init__()
+        if devices is None:
+            import evdev
+
+            devices = []
+            for path in evdev.list_devices():
+                try:
+                    device = evdev.InputDevice(path)
+                except OSError:  # not readable by this user
+                    continue
+                if _KEY_CAPSLOCK in device.capabilities().get(_EV_KEY, []):
+                    devices.append(device)
+                else:
+                    device.close()
+        if not devices:
+            raise RuntimeError("no readable keyboard in /dev/input (is the user in the input group?)")
+        self._devices = devices
+        self._caps = self.caps_lock_state()
+        self._modifier_codes = {
+            _KEY_LEFTSHIFT: "shift", _KEY_RIGHTSHIFT: "shift",
+            _KEY_LEFTCTRL: "ctrl", _KEY_RIGHTCTRL: "ctrl",
+        }
+        self._selector = selectors.DefaultSelector()
+        self._wake_r, self._wake_w = os.pipe()
+        self.kernel_filtered = False  # every device has an event mask
+        self.wakeups = 0  # times the reader woke up for keyboard input
+        self.events_read = 0  # events read into Python, needed or not
+        self.busy_seconds = 0.0  # spent reading and dispatching them
+
+    def caps_lock_state(self):
+        return any(_LED_CAPSL in device.leds() for device in self._devices)
+
+    def _set_masks(self):
+        """Ask the kernel for the keys we handle only."""
+        codes = [_KEY_CAPSLOCK, *self._modifier_codes]
+        if self._escape:
+            codes.append(_KEY_ESC)
+        filtered = True
+        for device in self._devices:
+            try:
+                set_event_mask(device.fileno(), _EV_SYN, [_EV_KEY], _EV_CNT)
+                set_event_mask(device.fileno(), _EV_KEY, codes, _KEY_CNT)
+            except OSError as e:
+                if filtered:
+                    log.debug(f"No evdev event mask ({e}); filtering keys in Python")
+                filtered = False
+        self.kernel_filtered = filtered
+
+    def watch_escape(self, enabled):
+        super().watch_escape(enabled)
+        self._set_masks()
+
+    def _start(self):
+        self._set_masks()
+        for device in self._devices:
+            self._selector.register(device, selectors.EVENT_READ)
+        self._selector.register(self._wake_r, selectors.EVENT_READ)
+        threading.Thread(target=self._run, name="key-capture", daemon=True).start()
+
+    def _run(self):
+        while True:
+            for key, _ in self._selector.select():
+                if key.fileobj == self._wake_r:
+                    return
+                started = time.perf_counter()
+                self.wakeups += 1
+                try:
+                    self._read(key.fileobj)
+                finally:
+                    self.busy_seconds += time.perf_counter() - started
+
+    def _read(self, device):
+        try:
+            events = list(device.read())
+        except BlockingIOError:  # nothing left to read
+            return
+        except OSError:  # unplugged
+            self._selector.unregister(device)
+            return
+        self.events_read += len(events)
+        for event in events:
+            # Key presses only (value 1; 0 is release, 2 is autorepeat)
+            if event.type != _EV_KEY or event.value != 1:
+                continue
+            if event.code == _KEY_CAPSLOCK:
+                self.events_handled += 1
+                self._caps = not self._caps
+                self._caps_lock(self._caps)
+            elif event.code == _KEY_ESC and self._escape:
+                self.events_handled += 1
+                self._escape_pressed()
+            elif event.code in self._modifier_codes:
+                self.events_handled += 1
+                self._modifier_pressed(self._modifier_codes[event.code])
+
+    def stop(self):
+        os.write(self._wake_w, b"x")
+
+
+class PynputKeyCapture(KeyCapture):
+    """pynput listener; the fallback, it is called for every key."""
+
+    name = "pynput"
+
+    def __init__(self):
+        super().__init__()
+        from pynput import keyboard
+
+        self._keyboard = keyboard
+        self._listener = None
+        key = keyboard.Key
+        self._modifier_keys = {
+            key.shift: "shift", key.shift_l: "shift", key.shift_r: "shift",
+            key.ctrl: "ctrl", key.ctrl_l: "ctrl", key.ctrl_r: "ctrl",
+        }
+        # pynput can't report the state; outside macOS track presses instead
+        self._caps = False if platform.system() != "Darwin" else None
+
+    def _start(self):
+        self._listener = self._keyboard.Listener(on_press=self._on_press, on_release=self._on_release)
+        self._listener.start()
+
+    def _is_caps_lock(self, key):
+        # Built-in keyboards send Key.caps_lock (vk=57), Bluetooth ones may
+        # send a KeyCode with vk=255 instead
+        return key is self._keyboard.Key.caps_lock or getattr(key, "vk", None) == _VK_BLUETOOTH_CAPS_LOCK
+
+    def _on_press(self, key):
+        self.events_handled += 1
+        if key is self._keyboard.Key.esc:
+            if self._escape:
+                self._escape_pressed()
+        elif self._is_caps_lock(key):
+            if self._caps is None:
+                self._caps_lock(None)
+            else:
+                self._caps = not self._caps
+                self._caps_lock(self._caps)
+        elif key in self._modifier_keys:
+            self._modifier_pressed(self._modifier_keys[key])
+
+    def _on_release(self, key):
+        self.events_handled += 1
+        # Bluetooth keyboards only fire RELEASE for Caps Lock on macOS; the
+        # service reads the real state, so handling both is harmless
+        if self._caps is None and self._is_caps_lock(key):
+            self._caps_lock(None)
+
+    def stop(self):
+        if self._listener:
+            self._listener.stop()
+
+
+class SimulatedKeyCapture(KeyCapture):
+    """Keys pressed from code. Like the OS-level backends, keys nobody
+    subscribed to never reach the handlers."""
+
+    name = "simulated"
+
+    def __init__(self, caps_lock=False):
+        super().__init__()
+        self._caps = caps_lock
+        self.keys_pressed = 0
+
+    def _start(self):
+        pass
+
+    def caps_lock_state(self):
+        return self._caps
+
+    def press(self, key):
+        """Press ``key``: "caps_lock", "esc", "shift", "ctrl", or anything
+        else (e.g. "a")."""
+        self.keys_pressed += 1
+        if key == "caps_lock":
+            self.events_handled += 1
+            self._caps = not self._caps
+            self._caps_lock(self._caps)
+        elif key == "esc" and self._escape:
+            self.events_handled += 1
+            self._escape_pressed()
+        elif key in ("shift", "ctrl"):
+            self.events_handled += 1
+            self._modifier_pressed(key)
+
+    def type(self, text):
+        for char in text:
+            self.press(char)
+
+
+def create_key_capture(backend=None):
+    """Create the configured backend (``key_capture_backend`` setting).
+
+    ``auto`` uses quartz on macOS and evdev on Linux when it can read the
+    keyboards, falling back to pynput.
+    """
+    backend = backend or get_settings().key_capture_backend
+    if backend not in BACKENDS:
+        raise ValueError(f"unknown key capture backend {backend!r} (choose from {', '.join(BACKENDS)})")
+    if backend == "auto":
+        system = platform.system()
+        preferred = "quartz" if system == "Darwin" else "evdev" if system == "Linux" else None
+        if preferred:
+            try:
+                return create_key_capture(preferred)
+            except (ImportError, OSError, RuntimeError) as e:
+                log.warning(f"[yellow]{preferred} key capture unavailable ({e}); using pynput[/yellow]")
+        backend = "pynput"
+    classes = {
+        "quartz": QuartzKeyCapture,
+        "evdev": EvdevKeyCapture,
+        "pynput": PynputKeyCapture,
+        "simulated": SimulatedKeyCapture,
+    }
+    return classes[backend]()
@@ -0,0 +1,175 @@
+"""Per-request choice of the dictation transcription model.
+
+Candidates are ``whisper_model`` followed by the comma-separated
+``dictation_fallback_models``, in order of preference. For every model the
+router keeps a rolling window of (clip seconds, request seconds) and fits
+latency = overhead + per-second cost, so the p95 latency of a request can be
+predicted from the clip length. A request goes to the most preferred model
+whose predicted p95 fits ``dictation_latency_budget``, or to the fastest one
+if none does.
+
+A model that fails ``router_error_threshold`` of its recent requests is
+skipped for ``router_cooldown`` seconds. Retries and hedges of a request go
+to a model it hasn't tried yet, so a failing model fails over at once. Every
+``router_probe_every``-th request goes to the least recently used model so
+its statistics don't go stale.
+"""
+
+import threading
+import time
+from collections import deque
+
+from utils.log import get_logger
+from utils.settings import get_settings
+
+log = get_logger("router")
+
+OUTCOME_WINDOW = 10  # recent outcomes per model the error rate is taken over
+
+
+class ModelStats:
+    """Rolling latency and error statistics of one model."""
+
+    def __init__(self, window):
+        self.samples = deque(maxlen=window)  # (clip seconds, request seconds)
+        self.outcomes = deque(maxlen=OUTCOME_WINDOW)  # True for success
+        self.requests = 0
+        self.failures = 0
+        self.last_used = 0.0
+        self.degraded_until = 0.0
+
+    def record(self, duration, seconds=None, failed=False):
+        self.outcomes.append(not failed)
+        if failed:
+            self.failures += 1
+        else:
+            self.samples.append((duration, seconds))
+
+    def error_rate(self):
+        if not self.outcomes:
+            return 0.0
+        return 1 - sum(self.outcomes) / len(self.outcomes)
+
+    def predict(self, duration, pct=95):
+        """Predicted ``pct`` percentile latency for a clip of ``duration``
+        seconds (the typical clip if None), or None without samples."""
+        samples = list(self.samples)
+        if not samples:
+            return None
+        xs = [x for x, _ in samples]
+        ys = [y for _, y in samples]
+        mean_x, mean_y = sum(xs) / len(xs), sum(ys) / len(ys)
+        spread = sum((x - mean_x) ** 2 for x in xs)
+        slope = 0.0
+        if spread > 1e-9:
+            slope = max(0.0, sum((x - mean_x) * (y - mean_y) for x, y in samples) / spread)
+        intercept = mean_y - slope * mean_x
+        residuals = sorted(y - (intercept + slope * x) for x, y in samples)
+        rank = max(0, min(len(residuals) - 1, int(round(pct / 100 * len(residuals))) - 1))
+        x = mean_x if duration is None else duration
+        return max(0.0, intercept + slope * x + residuals[rank])
+
+
+class ModelRouter:
+    def __init__(self, settings=None):
+        """
+        Args:
+            settings: Fixed settings snapshot (defaults to the live settings)
+        """
+        self._settings = settings
+        self._lock = threading.Lock()
+        self._models = {}  # name -> ModelStats
+        self._requests = 0
+        self._counts = {"probes": 0, "failovers": 0}
+
+    @property
+    def settings(self):
+        return self._settings or get_settings()
+
+    def candidates(self, settings=None):
+        """Model names in order of preference."""
+        settings = settings or self.settings
+        names = [settings.whisper_model]
+        for name in settings.dictation_fallback_models.split(","):
+            name = name.strip()
+            if name and name not in names:
+                names.append(name)
+        return names
+
+    def _stats(self, name, settings):
+        stats = self._models.get(name)
+        if stats is None:
+            stats = self._models[name] = ModelStats(settings.router_window)
+        return stats
+
+    def choose(self, duration=None, tried=()):
+        """Model for a request on a clip of ``duration`` seconds.
+
+        ``tried`` are models this request has already been sent to; they are
+        only chosen again when there is no other candidate.
+        """
+        settings = self.settings
+        now = time.monotonic()
+        with self._lock:
+            names = self.candidates(settings)
+            stats = {name: self._stats(name, settings) for name in names}
+            fresh = [name for name in names if name not in tried] or names
+            healthy = [name for name in fresh if stats[name].degraded_until <= now] or fresh
+
+            if tried:
+                choice = self._best(healthy, stats, duration, settings)
+                if choice not in tried:
+                    self._counts["failovers"] += 1
+            else:
+                self._requests += 1
+                probe = settings.router_probe_every and self._requests % settings.router_probe_every == 0
+                if probe and len(healthy) > 1:
+                    choice = min(healthy, key=lambda name: stats[name].last_used)
+                    self._counts["probes"] += 1
+                else:
+                    choice = self._best(healthy, stats, duration, settings)
+            stats[choice].requests += 1
+            stats[choice].last_used = now
+            return choice
+
+    def _best(self, names, stats, duration, settings):
+        # Models without enough samples yet are tried first, in order of
+        # preference, so the router learns every candidate.
+        for name in names:
+            if len(stats[name].samples) < max(1, settings.router_min_samples):
+                return name
+        predicted = {name: stats[name].predict(duration) for name in names}
+        for name in names:
+            if predicted[name] <= settings.dictation_latency_budget:
+                return name
+        return min(names, key=lambda name: predicted[name])
+
+    def record(self, model, duration, seconds=None, failed=False):
+        """Report how a request to ``model`` went (``seconds`` on success)."""
+        settings = self.settings
+        with self._lock:
+            stats = self._stats(model, settings)
+            stats.record(duration if duration is not None else 0.0, seconds, failed)
+            failures = len(stats.outcomes) - sum(stats.outcomes)
+            if failed and failures >= 2 and stats.error_rate() >= settings.router_error_threshold:
+                stats.degraded_until = time.monotonic() + settings.router_cooldown
+                stats.outcomes.clear()  # a fresh chance after the cooldown
+                log.warning(
+                    f"[yellow]{model} is failing; routing dictations elsewhere "
+                    f"for {settings.router_cooldown:.0f}s[/yellow]"
+                )
+
+    def stats(self):
+        with self._lock:
+            now = time.monotonic()
+            models = {}
+            for name, stats in self._models.items():
+                p95 = stats.predict(None)
+                models[name] = {
+                    "requests": stats.requests,
+                    "failures": stats.failures,
+                    "error_rate": round(stats.error_rate(), 3),
+                    "p95": round(p95, 3) if p95 is not None else None,
+                    "degraded": stats.degraded_until > now,
+                }
+            return {"models": models, **self._counts}
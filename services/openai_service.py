@@ -1,27 +1,235 @@
+import json
+import os
+import threading
+import time
+import wave
+
 import openai
-from utils.config import OPENAI_API_KEY, WHISPER_MODEL
+from services.api_scheduler import INTERACTIVE, get_scheduler
+from services.model_router import ModelRouter
+from services.request_policy import RequestPolicy
+from utils.cancellation import CancelledError
+from utils.config import OPENAI_API_KEY
+from utils.settings import get_settings
+
+MAX_IDLE_CLIENTS = 4
+
+
+def is_retryable_error(error):
+    """Transient API failures worth another attempt."""
+    return isinstance(
+        error,
+        (
+            openai.APIConnectionError,  # includes APITimeoutError
+            openai.RateLimitError,
+            openai.InternalServerError,
+            TimeoutError,
+            ConnectionError,
+        ),
+    )
+
+
+def clip_duration(audio_file_path):
+    """Length of a WAV file in seconds, or None if it can't be read as one."""
+    try:
+        with wave.open(audio_file_path, "rb") as f:
+            return f.getnframes() / f.getframerate()
+    except (wave.Error, EOFError, OSError, ZeroDivisionError):
+        return None
+
 
 class OpenAIService:
-    def __init__(self):
-        """Initialize the OpenAI service with API key."""
-        self.client = openai.OpenAI(api_key=OPENAI_API_KEY)
+    def __init__(self, api_key=None, base_url=None, policy=None, scheduler=None, router=None):
+        """Initialize the OpenAI service with API key.
+
+        Args:
+            api_key (str): Overrides OPENAI_API_KEY from the config
+            base_url (str): Alternative API endpoint (e.g. a local stand-in)
+            policy (RequestPolicy): Timeout/retry/hedging policy
+            scheduler (APIScheduler): Defaults to the process-wide scheduler
+            router (ModelRouter): Picks the transcription model per request
+        """
+        self._api_key = api_key or OPENAI_API_KEY
+        self._base_url = base_url
+        # A default policy follows live config reloads; an explicit one is
+        # left as configured by the caller.
+        self._owns_policy = policy is None
+        self.policy = policy or RequestPolicy(is_retryable=is_retryable_error)
+        self.scheduler = scheduler or get_scheduler()
+        self.router = router or ModelRouter()
 
-    def transcribe_audio(self, audio_file_path):
+        # Every attempt leases its own client so a losing hedge can be
+        # cancelled by closing its connections. Idle clients are kept to
+        # reuse their keep-alive connections.
+        self._idle_clients = []
+        self._clients_lock = threading.Lock()
+        self.client = self._new_client()
+
+        # Cancelled transcriptions: avoided never reached the API, aborted
+        # had their upload cut off mid-request.
+        self._cancel_stats = {"requests_avoided": 0, "requests_aborted": 0}
+
+    def _new_client(self):
+        return openai.OpenAI(
+            api_key=self._api_key,
+            base_url=self._base_url,
+            max_retries=0,  # retries are handled by the request policy
+        )
+
+    def _acquire_client(self):
+        with self._clients_lock:
+            if self._idle_clients:
+                return self._idle_clients.pop()
+        return self._new_client()
+
+    def _release_client(self, client):
+        with self._clients_lock:
+            if len(self._idle_clients) < MAX_IDLE_CLIENTS:
+                self._idle_clients.append(client)
+                return
+        client.close()
+
+    def stats(self):
+        """Request policy stats, counts of cancelled requests and per-model
+        routing stats."""
+        stats = self.policy.stats()
+        with self._clients_lock:
+            stats.update(self._cancel_stats)
+        stats["routing"] = self.router.stats()
+        return stats
+
+    def transcribe_audio(self, audio_file_path, token=None):
         """
         Transcribe audio using OpenAI's Whisper API.
 
+        The model is chosen per attempt by the router from the clip length
+        and each model's recent latency and errors; a retry or hedge goes to
+        a model the request hasn't tried yet.
+
         Args:
             audio_file_path (str): Path to the audio file
+            token (CancelToken): Cancelling it aborts queued and in-flight
+                requests and closes their connections
 
         Returns:
             str: Transcribed text
+
+        Raises:
+            CancelledError: ``token`` was cancelled
+            Exception: The last API error once the request policy gives up
         """
+        settings = get_settings()
+        if self._owns_policy:
+            self.policy.configure(settings)
+        duration = clip_duration(audio_file_path)
+        sent = threading.Event()
+        tried = []
+
+        def attempt(attempt_token, timeout):
+            model = self.router.choose(duration, tuple(tried))
+            tried.append(model)
+            granted = []  # time the scheduler let the request go out
+            try:
+                text = self._transcribe_once(
+                    audio_file_path, attempt_token, timeout, model, sent,
+                    on_grant=lambda: granted.append(time.monotonic()),
+                )
+            except Exception:
+                # A lost hedge or a cancelled dictation says nothing about
+                # the model, nor does time spent queued; running into the
+                # deadline while the request is out does.
+                elapsed = time.monotonic() - granted[0] if granted else 0.0
+                if granted and (not attempt_token.cancelled or elapsed >= timeout):
+                    self.router.record(model, duration, failed=True)
+                raise
+            self.router.record(model, duration, time.monotonic() - granted[0])
+            return text
+
         try:
+            return self.policy.execute(attempt, token=token)
+        except CancelledError:
+            key = "requests_aborted" if sent.is_set() else "requests_avoided"
+            with self._clients_lock:
+                self._cancel_stats[key] += 1
+            raise
+
+    def complete(self, messages, model, token=None, timeout=None):
+        """
+        Chat completion for a dictation (interactive priority).
+
+        Args:
+            messages (list): Chat messages, may include image parts
+            model (str): Chat model
+            token (CancelToken): Cancelling it aborts the request
+            timeout (float): Seconds per attempt, instead of the policy's
+                deadline from past latencies
+
+        Returns:
+            str: The reply text
+        """
+        if self._owns_policy:
+            self.policy.configure(get_settings())
+        policy = self.policy
+        if timeout is not None:
+            policy = policy.derive(min_timeout=timeout, max_timeout=timeout)
+        nbytes = len(json.dumps(messages))
+        response = policy.execute(
+            lambda attempt_token, timeout: self._call_once(
+                lambda client: client.with_options(timeout=timeout).chat.completions.create(
+                    model=model, messages=messages
+                ),
+                attempt_token,
+                nbytes,
+            ),
+            token=token,
+        )
+        return (response.choices[0].message.content or "").strip()
+
+    def _transcribe_once(self, audio_file_path, token, timeout, model, sent=None, on_grant=None):
+        """One transcription attempt on a leased client."""
+
+        def transcribe(client):
             with open(audio_file_path, "rb") as audio_file:
-                response = self.client.audio.transcriptions.create(
-                    model=WHISPER_MODEL,
+                return client.with_options(timeout=timeout).audio.transcriptions.create(
+                    model=model,
                     file=audio_file
                 )
-            return response.text
-        except Exception as e:
-            raise
+
+        response = self._call_once(
+            transcribe, token, os.path.getsize(audio_file_path), sent, on_grant
+        )
+        return response.text
+
+    def _call_once(self, request, token, nbytes, sent=None, on_grant=None):
+        """Run ``request(client)`` on a leased client through the scheduler.
+        Cancelling ``token`` closes the client's connections; ``on_grant``
+        is called once a slot is granted, before the request is sent."""
+        client = self._acquire_client()
+        lock = threading.Lock()
+        finished = [False]
+
+        def abort():
+            with lock:
+                if finished[0]:
+                    return
+                finished[0] = True
+            client.close()
+
+        token.add_callback(abort)
+
+        def call():
+            if on_grant is not None:
+                on_grant()
+            token.raise_if_cancelled()
+            if sent is not None:
+                sent.set()
+            return request(client)
+
+        try:
+            return self.scheduler.run(call, priority=INTERACTIVE, nbytes=nbytes, token=token)
+        finally:
+            with lock:
+                reusable = not finished[0]
+                finished[0] = True
+            if reusable:
+                self._release_client(client)
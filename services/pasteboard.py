@@ -0,0 +1,218 @@
+"""Pasteboard backends for the clipboard manager.
+
+Pasting a dictation writes it to the system pasteboard, sends Cmd+V and,
+unless ``clipboard_restore`` is off, puts back what the user had copied. A
+backend reads and writes the pasteboard and reports its change count. The
+count goes up on every write by anyone, so a write can be confirmed (and
+a restore skipped when the user copied something since) without reading
+the contents back.
+
+- ``appkit`` (macOS): NSPasteboard through PyObjC, in-process. Saves and
+  restores every item in every type (rich text, images, files).
+- ``pyperclip``: the portable fallback. Text only; it starts a pbcopy /
+  pbpaste (or xclip) subprocess per call, and the change count is derived
+  from the contents.
+- ``memory``: an in-process pasteboard, for tests and benchmarks.
+
+Contents marked concealed or transient (https://nspasteboard.org), such as
+passwords copied from a password manager, are never restored. Dictations
+about to be replaced by a restore are marked transient so clipboard history
+tools skip them.
+"""
+
+import platform
+import threading
+
+from utils.log import get_logger
+from utils.settings import get_settings
+
+log = get_logger("clipboard")
+
+BACKENDS = ("auto", "appkit", "pyperclip", "memory")
+
+TEXT_TYPE = "public.utf8-plain-text"
+TRANSIENT_TYPE = "org.nspasteboard.TransientType"
+CONCEALED_TYPE = "org.nspasteboard.ConcealedType"
+
+
+class Pasteboard:
+    """Base class: the system pasteboard, or a stand-in for it."""
+
+    name = None
+
+    def change_count(self):
+        """Counter that changes whenever anyone writes the pasteboard."""
+        raise NotImplementedError
+
+    def write_text(self, text, transient=False):
+        """Replace the contents with ``text``.
+
+        Returns:
+            int: The change count of this write
+        """
+        raise NotImplementedError
+
+    def save(self):
+        """Snapshot of the current contents for restore(), or None if they
+        must not be restored (concealed or transient)."""
+        raise NotImplementedError
+
+    def restore(self, saved):
+        """Put back contents from save()."""
+        raise NotImplementedError
+
+
+class AppKitPasteboard(Pasteboard):
+    """The general NSPasteboard, called in-process."""
+
+    name = "appkit"
+
+    def __init__(self):
+        import AppKit
+
+        self._appkit = AppKit
+        self._pb = AppKit.NSPasteboard.generalPasteboard()
+
+    def change_count(self):
+        return self._pb.changeCount()
+
+    def write_text(self, text, transient=False):
+        pb = self._pb
+        count = pb.clearContents()
+        if not pb.setString_forType_(text, self._appkit.NSPasteboardTypeString):
+            raise RuntimeError("the pasteboard refused the text")
+        if transient:
+            pb.setData_forType_(self._appkit.NSData.data(), TRANSIENT_TYPE)
+        return count
+
+    def save(self):
+        items = []
+        for item in self._pb.pasteboardItems() or []:
+            data = {}
+            for kind in item.types():
+                if kind in (CONCEALED_TYPE, TRANSIENT_TYPE):
+                    return None
+                value = item.dataForType_(kind)
+                if value is not None:
+                    data[kind] = value  # NSData, kept as is: no copy
+            items.append(data)
+        return items
+
+    def restore(self, saved):
+        appkit = self._appkit
+        objects = []
+        for data in saved:
+            item = appkit.NSPasteboardItem.alloc().init()
+            for kind, value in data.items():
+                item.setData_forType_(value, kind)
+            objects.append(item)
+        self._pb.clearContents()
+        if objects:
+            self._pb.writeObjects_(objects)
+
+
+class PyperclipPasteboard(Pasteboard):
+    """pyperclip: a subprocess per call, text only."""
+
+    name = "pyperclip"
+
+    def __init__(self):
+        import pyperclip
+
+        self._pyperclip = pyperclip
+        self._count = 0
+        self._last = None
+
+    def change_count(self):
+        text = self._pyperclip.paste()
+        if text != self._last:
+            self._last = text
+            self._count += 1
+        return self._count
+
+    def write_text(self, text, transient=False):
+        self._pyperclip.copy(text)
+        if self._pyperclip.paste() == text:
+            self._last = text
+            self._count += 1
+        return self._count
+
+    def save(self):
+        return self._pyperclip.paste()
+
+    def restore(self, saved):
+        self._pyperclip.copy(saved)
+        self._last = saved
+        self._count += 1
+
+
+class MemoryPasteboard(Pasteboard):
+    """A pasteboard in this process. ``items`` holds one ``{type: value}``
+    dict per item, like NSPasteboard."""
+
+    name = "memory"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._count = 0
+        self.items = []
+        self.writes = 0
+
+    def change_count(self):
+        with self._lock:
+            return self._count
+
+    def set_items(self, items):
+        """Replace the contents, as another app copying would."""
+        with self._lock:
+            self.items = [dict(item) for item in items]
+            self._count += 1
+            self.writes += 1
+            return self._count
+
+    def write_text(self, text, transient=False):
+        item = {TEXT_TYPE: text}
+        if transient:
+            item[TRANSIENT_TYPE] = b""
+        return self.set_items([item])
+
+    def text(self):
+        """The text contents, as an app handling Cmd+V would read them."""
+        with self._lock:
+            for item in self.items:
+                if TEXT_TYPE in item:
+                    return item[TEXT_TYPE]
+        return None
+
+    def save(self):
+        with self._lock:
+            if any(CONCEALED_TYPE in item or TRANSIENT_TYPE in item for item in self.items):
+                return None
+            return [dict(item) for item in self.items]
+
+    def restore(self, saved):
+        self.set_items(saved)
+
+
+def create_pasteboard(backend=None):
+    """Create the configured backend (``clipboard_backend`` setting).
+
+    ``auto`` uses appkit on macOS when PyObjC is installed, and pyperclip
+    otherwise.
+    """
+    backend = backend or get_settings().clipboard_backend
+    if backend not in BACKENDS:
+        raise ValueError(f"unknown clipboard backend {backend!r} (choose from {', '.join(BACKENDS)})")
+    if backend == "auto":
+        if platform.system() == "Darwin":
+            try:
+                return create_pasteboard("appkit")
+            except ImportError as e:
+                log.warning(f"[yellow]appkit clipboard unavailable ({e}); using pyperclip[/yellow]")
+        backend = "pyperclip"
+    classes = {
+        "appkit": AppKitPasteboard,
+        "pyperclip": PyperclipPasteboard,
+        "memory": MemoryPasteboard,
+    }
+    return classes[backend]()
@@ -0,0 +1,275 @@
+"""Adaptive timeouts, bounded retries and hedged requests for API calls."""
+
+import copy
+import queue
+import threading
+import time
+from collections import deque
+
+from utils.cancellation import CancelToken, CancelledError
+from utils.config import (
+    REQUEST_MAX_RETRIES,
+    REQUEST_RETRY_BACKOFF,
+    REQUEST_HEDGE_PERCENTILE,
+    REQUEST_DEFAULT_HEDGE_DELAY,
+    REQUEST_TIMEOUT_MULTIPLIER,
+    REQUEST_MIN_TIMEOUT,
+    REQUEST_MAX_TIMEOUT,
+    REQUEST_MIN_SAMPLES,
+)
+
+
+class LatencyTracker:
+    """Rolling window of observed request latencies (seconds)."""
+
+    def __init__(self, window=200):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._samples)
+
+    def record(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, pct):
+        """Return the ``pct`` percentile (nearest-rank), or None if empty."""
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        rank = max(0, min(len(samples) - 1, int(round(pct / 100 * len(samples))) - 1))
+        return samples[rank]
+
+    def summary(self):
+        """Return count and p50/p95/p99 latencies for status reporting."""
+        return {
+            "count": len(self),
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+        }
+
+
+def _default_is_retryable(error):
+    return isinstance(error, (TimeoutError, ConnectionError))
+
+
+class RequestPolicy:
+    """Run an idempotent request with adaptive timeouts, retries and hedging.
+
+    The per-attempt deadline and the hedge delay are derived from the latency
+    percentiles of previous successful requests. Once the hedge delay (p95 by
+    default) passes without an answer, a duplicate request is sent; the first
+    answer wins and the other attempt is cancelled.
+    """
+
+    def __init__(
+        self,
+        tracker=None,
+        max_retries=REQUEST_MAX_RETRIES,
+        retry_backoff=REQUEST_RETRY_BACKOFF,
+        hedge_percentile=REQUEST_HEDGE_PERCENTILE,
+        default_hedge_delay=REQUEST_DEFAULT_HEDGE_DELAY,
+        timeout_multiplier=REQUEST_TIMEOUT_MULTIPLIER,
+        min_timeout=REQUEST_MIN_TIMEOUT,
+        max_timeout=REQUEST_MAX_TIMEOUT,
+        min_samples=REQUEST_MIN_SAMPLES,
+        is_retryable=None,
+    ):
+        self.tracker = tracker or LatencyTracker()
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.hedge_percentile = hedge_percentile
+        self.default_hedge_delay = default_hedge_delay
+        self.timeout_multiplier = timeout_multiplier
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.min_samples = min_samples
+        self.is_retryable = is_retryable or _default_is_retryable
+
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "requests": 0,
+            "attempts": 0,
+            "retries": 0,
+            "hedges_sent": 0,
+            "hedges_won": 0,
+            "timeouts": 0,
+            "failures": 0,
+            "cancelled": 0,
+        }
+
+    def configure(self, settings):
+        """Adopt the request_* values of a Settings snapshot."""
+        self.max_retries = settings.request_max_retries
+        self.retry_backoff = settings.request_retry_backoff
+        if self.hedge_percentile is not None:
+            self.hedge_percentile = settings.request_hedge_percentile
+        self.default_hedge_delay = settings.request_default_hedge_delay
+        self.timeout_multiplier = settings.request_timeout_multiplier
+        self.min_timeout = settings.request_min_timeout
+        self.max_timeout = settings.request_max_timeout
+        self.min_samples = settings.request_min_samples
+
+    def derive(self, **values):
+        """A copy with some attributes replaced, e.g. one job's settings.
+
+        The copy shares the latency history and stats, so its requests
+        still count towards this policy's percentiles and ``stats()``, but
+        changing it leaves other jobs' values alone.
+        """
+        policy = copy.copy(self)
+        for name, value in values.items():
+            if not hasattr(policy, name):
+                raise AttributeError(f"RequestPolicy has no attribute {name!r}")
+            setattr(policy, name, value)
+        return policy
+
+    def _warm(self):
+        return len(self.tracker) >= self.min_samples
+
+    def hedge_delay(self):
+        """Seconds to wait for the first attempt before sending a duplicate.
+
+        None disables hedging (``hedge_percentile=None``).
+        """
+        if self.hedge_percentile is None:
+            return None
+        if not self._warm():
+            return self.default_hedge_delay
+        return self.tracker.percentile(self.hedge_percentile)
+
+    def timeout(self):
+        """Deadline for one (possibly hedged) attempt, in seconds."""
+        if not self._warm():
+            return self.max_timeout
+        p99 = self.tracker.percentile(99)
+        return max(self.min_timeout, min(self.max_timeout, p99 * self.timeout_multiplier))
+
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["latency"] = self.tracker.summary()
+        return stats
+
+    def _count(self, key, n=1):
+        with self._stats_lock:
+            self._stats[key] += n
+
+    def execute(self, attempt, token=None):
+        """Run ``attempt(token, timeout)`` under the policy and return its result.
+
+        ``attempt`` must be safe to run concurrently with itself. It receives a
+        CancelToken that is cancelled if the attempt loses a hedge race or
+        outlives its deadline, and the per-attempt timeout in seconds.
+
+        Args:
+            attempt: Callable doing one request
+            token (CancelToken): Cancels the whole request, including
+                in-flight attempts and pending retries
+
+        Raises:
+            CancelledError: ``token`` was cancelled
+            The last error once retries are exhausted, or immediately for
+            errors that ``is_retryable`` rejects.
+        """
+        self._count("requests")
+        for n in range(self.max_retries + 1):
+            try:
+                if n:
+                    self._count("retries")
+                    backoff = self.retry_backoff * (2 ** (n - 1))
+                    if token is not None and token.wait(backoff):
+                        raise CancelledError()
+                    if token is None:
+                        time.sleep(backoff)
+                if token is not None:
+                    token.raise_if_cancelled()
+                return self._run_hedged(attempt, token)
+            except Exception as e:
+                # An attempt whose connection was closed by the cancel fails
+                # with a retryable error; don't mistake that for an outage.
+                if token is not None and token.cancelled:
+                    self._count("cancelled")
+                    if isinstance(e, CancelledError):
+                        raise
+                    raise CancelledError() from e
+                if n == self.max_retries or not self.is_retryable(e):
+                    self._count("failures")
+                    raise
+
+    def _run_hedged(self, attempt, parent=None):
+        timeout = self.timeout()
+        hedge_delay = self.hedge_delay()
+        started = time.monotonic()
+        deadline = started + timeout
+        hedge_at = started + hedge_delay if hedge_delay is not None else None
+        if hedge_at is not None and hedge_at >= deadline:
+            hedge_at = None
+
+        results = queue.Queue()
+        tokens = []
+        if parent is not None:
+            # Wake the wait below as soon as the caller cancels
+            parent.add_callback(lambda: results.put(None))
+
+        def launch():
+            token = CancelToken(parent)
+            tokens.append(token)
+            launched = time.monotonic()
+
+            def run():
+                try:
+                    value = attempt(token, timeout)
+                    results.put((token, None, value, time.monotonic() - launched))
+                except Exception as e:
+                    results.put((token, e, None, None))
+
+            self._count("attempts")
+            threading.Thread(target=run, daemon=True).start()
+
+        launch()
+        pending = 1
+        winner = None
+        first_error = None
+        try:
+            while True:
+                wait_until = min(deadline, hedge_at) if hedge_at else deadline
+                try:
+                    result = results.get(timeout=max(0.0, wait_until - time.monotonic()))
+                except queue.Empty:
+                    if hedge_at and time.monotonic() >= hedge_at:
+                        hedge_at = None
+                        self._count("hedges_sent")
+                        launch()
+                        pending += 1
+                        continue
+                    self._count("timeouts")
+                    # Censored sample: keeps the percentiles from staying
+                    # optimistic while the API is degraded.
+                    self.tracker.record(timeout)
+                    raise TimeoutError(f"Request exceeded {timeout:.1f}s deadline")
+
+                if result is None or (parent is not None and parent.cancelled):
+                    raise CancelledError()
+                token, error, value, elapsed = result
+                pending -= 1
+                if error is None:
+                    winner = token
+                    self.tracker.record(elapsed)
+                    if token is not tokens[0]:
+                        self._count("hedges_won")
+                    return value
+
+                if first_error is None:
+                    first_error = error
+                if not self.is_retryable(error) or pending == 0:
+                    # A fast failure before the hedge point goes to the retry
+                    # loop rather than being hedged.
+                    raise first_error
+        finally:
+            for token in tokens:
+                if token is not winner:
+                    token.cancel()
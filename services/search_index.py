@@ -0,0 +1,251 @@
+"""Full-text search over the meeting notes directory.
+
+Markdown notes are indexed into an SQLite FTS5 table under ~/.omnivo/. The
+index is updated incrementally: a file is re-read only when its mtime or size
+changed, and deleted files are dropped. The daemon indexes each meeting as it
+is saved, and ``omnivo search`` catches up on any other changes before it
+queries.
+"""
+
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from utils.config import SEARCH_INDEX_PATH
+from utils.log import get_logger
+from utils.settings import get_settings
+
+log = get_logger("search")
+
+NOTE_SUFFIX = ".md"
+_TIMESTAMP_RE = re.compile(r"(\d{4}-\d{2}-\d{2})-(\d{2})(\d{2})")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    meeting_time REAL NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS notes USING fts5(
+    title, body, tokenize = 'porter unicode61'
+);
+"""
+
+
+def meeting_time(path, mtime):
+    """Meeting start from a ``YYYY-MM-DD-HHMM`` file name, else the mtime."""
+    match = _TIMESTAMP_RE.search(os.path.basename(path))
+    if match:
+        try:
+            day, hour, minute = match.groups()
+            return datetime.strptime(f"{day} {hour}:{minute}", "%Y-%m-%d %H:%M").timestamp()
+        except ValueError:
+            pass
+    return mtime
+
+
+def to_match_query(text):
+    """Turn free text into an FTS5 query: every word must appear.
+
+    Words are quoted so punctuation and FTS operators in user input are taken
+    literally. A trailing ``*`` keeps prefix matching (``deploy*``).
+    """
+    terms = []
+    for word in text.split():
+        prefix = word.endswith("*")
+        word = word.rstrip("*").replace('"', '""')
+        if word:
+            terms.append(f'"{word}"' + ("*" if prefix else ""))
+    return " ".join(terms)
+
+
+class SearchIndex:
+    def __init__(self, path=None, notes_dir=None):
+        """
+        Args:
+            path: SQLite database file (defaults to ~/.omnivo/search.db)
+            notes_dir: Directory of markdown notes (defaults to the
+                meeting_notes_path setting)
+        """
+        self.path = path or SEARCH_INDEX_PATH
+        self._notes_dir = notes_dir
+        self._lock = threading.Lock()
+        self._conn = None
+
+    @property
+    def notes_dir(self):
+        return self._notes_dir or get_settings().meeting_notes_path
+
+    def _connection(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            # WAL lets the CLI read while the daemon indexes a new meeting
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _scan(self):
+        """Map path -> (mtime_ns, size) for every note on disk."""
+        found = {}
+        for root, dirs, files in os.walk(os.path.abspath(self.notes_dir)):
+            dirs[:] = [d for d in dirs if not d.startswith(".")]
+            for name in files:
+                if not name.endswith(NOTE_SUFFIX) or name.startswith("."):
+                    continue
+                full = os.path.join(root, name)
+                try:
+                    st = os.stat(full)
+                except FileNotFoundError:
+                    continue
+                found[full] = (st.st_mtime_ns, st.st_size)
+        return found
+
+    def _index(self, conn, path, mtime_ns, size, file_id=None):
+        try:
+            with open(path, encoding="utf-8", errors="replace") as f:
+                body = f.read()
+        except FileNotFoundError:
+            return False
+        title = os.path.splitext(os.path.basename(path))[0]
+        when = meeting_time(path, mtime_ns / 1e9)
+        if file_id is None:
+            file_id = conn.execute(
+                "INSERT INTO files (path, mtime_ns, size, meeting_time) VALUES (?, ?, ?, ?)",
+                (path, mtime_ns, size, when),
+            ).lastrowid
+        else:
+            conn.execute(
+                "UPDATE files SET mtime_ns = ?, size = ?, meeting_time = ? WHERE id = ?",
+                (mtime_ns, size, when, file_id),
+            )
+            conn.execute("DELETE FROM notes WHERE rowid = ?", (file_id,))
+        conn.execute(
+            "INSERT INTO notes (rowid, title, body) VALUES (?, ?, ?)", (file_id, title, body)
+        )
+        return True
+
+    def update(self):
+        """Bring the index in line with the notes directory.
+
+        Returns:
+            dict: Counts of ``added``, ``updated`` and ``removed`` notes
+        """
+        counts = {"added": 0, "updated": 0, "removed": 0}
+        on_disk = self._scan()
+        with self._lock:
+            conn = self._connection()
+            known = {
+                path: (file_id, mtime_ns, size)
+                for file_id, path, mtime_ns, size in conn.execute(
+                    "SELECT id, path, mtime_ns, size FROM files"
+                )
+            }
+            with conn:
+                for path, (file_id, _, _) in known.items():
+                    if path not in on_disk:
+                        conn.execute("DELETE FROM notes WHERE rowid = ?", (file_id,))
+                        conn.execute("DELETE FROM files WHERE id = ?", (file_id,))
+                        counts["removed"] += 1
+                for path, (mtime_ns, size) in on_disk.items():
+                    entry = known.get(path)
+                    if entry is None:
+                        if self._index(conn, path, mtime_ns, size):
+                            counts["added"] += 1
+                    elif entry[1:] != (mtime_ns, size):
+                        if self._index(conn, path, mtime_ns, size, file_id=entry[0]):
+                            counts["updated"] += 1
+        if any(counts.values()):
+            log.info(
+                f"[dim]Search index: {counts['added']} added, "
+                f"{counts['updated']} updated, {counts['removed']} removed[/dim]"
+            )
+        return counts
+
+    def index_file(self, path):
+        """Index (or re-index) one note, e.g. right after it was written."""
+        path = os.path.abspath(path)
+        st = os.stat(path)
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute(
+                "SELECT id, mtime_ns, size FROM files WHERE path = ?", (path,)
+            ).fetchone()
+            if row and row[1:] == (st.st_mtime_ns, st.st_size):
+                return False
+            with conn:
+                return self._index(
+                    conn, path, st.st_mtime_ns, st.st_size, file_id=row[0] if row else None
+                )
+
+    def search(self, query, limit=20, refresh=True, raw=False):
+        """Ranked matches for ``query``, best first.
+
+        Args:
+            query: Words that must all appear (or FTS5 syntax if ``raw``)
+            limit: Maximum results
+            refresh: Index new or changed notes before querying
+
+        Returns:
+            list[dict]: ``path``, ``meeting_time`` (epoch seconds),
+            ``snippet`` (matches wrapped in [ ]) and ``score`` (lower is better)
+        """
+        if refresh:
+            self.update()
+        match = query if raw else to_match_query(query)
+        if not match:
+            return []
+        with self._lock:
+            rows = self._connection().execute(
+                """
+                SELECT files.path, files.meeting_time,
+                       snippet(notes, 1, '[', ']', '…', 16), bm25(notes, 5.0, 1.0)
+                FROM notes JOIN files ON files.id = notes.rowid
+                WHERE notes MATCH ?
+                ORDER BY bm25(notes, 5.0, 1.0)
+                LIMIT ?
+                """,
+                (match, limit),
+            ).fetchall()
+        return [
+            {"path": path, "meeting_time": when, "snippet": snippet, "score": score}
+            for path, when, snippet, score in rows
+        ]
+
+    def stats(self):
+        with self._lock:
+            conn = self._connection()
+            (count,) = conn.execute("SELECT COUNT(*) FROM files").fetchone()
+        size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        return {"notes": count, "index_bytes": size}
+
+    def rebuild(self):
+        """Drop everything and index the notes directory from scratch."""
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute("DELETE FROM notes")
+                conn.execute("DELETE FROM files")
+        started = time.monotonic()
+        counts = self.update()
+        counts["seconds"] = round(time.monotonic() - started, 3)
+        return counts
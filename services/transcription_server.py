@@ -0,0 +1,548 @@
+"""Local HTTP server exposing the meeting transcription pipeline.
+
+``omnivo serve`` lets other tools submit audio to the same compression,
+chunking and transcription path the daemon uses for meetings
+(``MeetingTranscriber.transcribe_meeting``):
+
+    POST   /v1/jobs?language=en          upload audio (Content-Length or chunked)
+                                         -> 202 {"id": ..., "status": "queued"}
+    GET    /v1/jobs/<id>?wait=30         job state, long-polling until finished
+    GET    /v1/jobs/<id>/events          NDJSON stream of progress and chunk text
+    DELETE /v1/jobs/<id>                 cancel a queued or running job
+    GET    /v1/health                    queue, cache and API scheduler metrics
+
+Uploads are streamed to disk. A fixed pool of workers runs jobs, and every job
+shares one OpenAI client, the process-wide API scheduler and a result cache
+keyed by the audio's content hash.
+"""
+
+import hashlib
+import json
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from utils.cancellation import CancelledError, CancelToken
+from utils.config import (
+    SERVE_HOST,
+    SERVE_PORT,
+    SERVE_MAX_JOBS,
+    SERVE_MAX_QUEUED,
+    SERVE_MAX_UPLOAD_BYTES,
+    SERVE_CACHE_ENTRIES,
+    SERVE_JOB_TTL,
+)
+from utils.log import get_logger
+from utils.settings import get_settings
+
+log = get_logger("serve")
+
+READ_CHUNK_BYTES = 64 * 1024
+MAX_POLL_WAIT = 60.0  # seconds a single long-poll may block
+
+SUFFIXES = {
+    "audio/wav": ".wav",
+    "audio/x-wav": ".wav",
+    "audio/wave": ".wav",
+    "audio/mpeg": ".mp3",
+    "audio/mp3": ".mp3",
+    "audio/mp4": ".m4a",
+    "audio/x-m4a": ".m4a",
+    "audio/flac": ".flac",
+    "audio/ogg": ".ogg",
+    "audio/webm": ".webm",
+}
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+FINISHED = (DONE, FAILED, CANCELLED)
+
+
+class QueueFull(Exception):
+    """Too many jobs are already waiting."""
+
+
+class UploadError(Exception):
+    """The upload was malformed or too large."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class Job:
+    """One submitted transcription, observable from any thread."""
+
+    def __init__(self, path, digest, language):
+        self.id = uuid.uuid4().hex
+        self.path = path
+        self.digest = digest
+        self.language = language
+        self.status = QUEUED
+        self.text = None
+        self.error = None
+        self.cached = False
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.token = CancelToken()
+        self.events = []
+        self._cond = threading.Condition()
+        self._emit("queued")
+
+    def _emit(self, event, **fields):
+        with self._cond:
+            self.events.append({"event": event, "ts": round(time.time(), 3), **fields})
+            self._cond.notify_all()
+
+    def start(self):
+        with self._cond:
+            if self.status != QUEUED:
+                return False
+            self.status = RUNNING
+            self.started = time.time()
+        self._emit("started")
+        return True
+
+    def add_chunk(self, index, total, text):
+        self._emit("chunk", index=index, total=total, text=text)
+
+    def finish(self, status, text=None, error=None):
+        """Move to a final status. Returns False if already finished."""
+        with self._cond:
+            if self.status in FINISHED:
+                return False
+            self.status = status
+            self.text = text
+            self.error = error
+            self.finished = time.time()
+        fields = {"text": text} if status == DONE else {"error": error}
+        self._emit(status, **fields)
+        return True
+
+    def wait(self, timeout):
+        """Block until the job finishes or ``timeout`` passes."""
+        with self._cond:
+            self._cond.wait_for(lambda: self.status in FINISHED, timeout)
+
+    def events_since(self, index, timeout):
+        """Events after position ``index``, waiting up to ``timeout`` for one."""
+        with self._cond:
+            self._cond.wait_for(lambda: len(self.events) > index, timeout)
+            return self.events[index:]
+
+    def to_dict(self):
+        with self._cond:
+            state = {
+                "id": self.id,
+                "status": self.status,
+                "language": self.language,
+                "cached": self.cached,
+                "created": self.created,
+                "started": self.started,
+                "finished": self.finished,
+            }
+            if self.status == DONE:
+                state["text"] = self.text
+            if self.error:
+                state["error"] = self.error
+            return state
+
+
+class TranscriptionServer:
+    def __init__(
+        self,
+        host=SERVE_HOST,
+        port=SERVE_PORT,
+        transcriber=None,
+        max_jobs=SERVE_MAX_JOBS,
+        max_queued=SERVE_MAX_QUEUED,
+        max_upload_bytes=SERVE_MAX_UPLOAD_BYTES,
+        cache_entries=SERVE_CACHE_ENTRIES,
+        job_ttl=SERVE_JOB_TTL,
+    ):
+        """
+        Args:
+            host, port: Address to listen on (port 0 picks a free port)
+            transcriber: MeetingTranscriber shared by all jobs
+            max_jobs: Jobs transcribed at the same time
+            max_queued: Jobs allowed to wait before uploads are refused
+            max_upload_bytes: Largest accepted upload
+            cache_entries: Finished transcriptions kept by content hash
+            job_ttl: Seconds a finished job can still be polled
+        """
+        if transcriber is None:
+            from core.meeting_transcriber import MeetingTranscriber
+
+            transcriber = MeetingTranscriber()
+        self.transcriber = transcriber
+        self.host = host
+        self.port = port
+        self.max_jobs = max_jobs
+        self.max_queued = max_queued
+        self.max_upload_bytes = max_upload_bytes
+        self.cache_entries = cache_entries
+        self.job_ttl = job_ttl
+
+        self._jobs = {}
+        self._queue = queue.Queue()
+        self._cache = OrderedDict()  # (digest, language, model) -> text
+        self._lock = threading.Lock()
+        self._stats = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "cancelled": 0,
+            "cache_hits": 0,
+        }
+        self._upload_dir = None
+        self._server = None
+        self._threads = []
+
+    @property
+    def address(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Start the HTTP listener and worker threads in the background."""
+        self._upload_dir = tempfile.mkdtemp(prefix="omnivo_serve_")
+        self._server = ThreadingHTTPServer((self.host, self.port), _make_handler(self))
+        self._server.daemon_threads = True
+
+        for i in range(self.max_jobs):
+            worker = threading.Thread(target=self._work, name=f"serve-worker-{i}", daemon=True)
+            worker.start()
+            self._threads.append(worker)
+        http_thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        http_thread.start()
+        self._threads.append(http_thread)
+        log.info(f"[green]Transcription server listening on {self.address}[/green]")
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        with self._lock:
+            jobs = list(self._jobs.values())
+        for job in jobs:
+            job.token.cancel()
+        for _ in range(self.max_jobs):
+            self._queue.put(None)
+        if self._upload_dir:
+            shutil.rmtree(self._upload_dir, ignore_errors=True)
+            self._upload_dir = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # Jobs
+
+    def _cache_key(self, digest, language):
+        return (digest, language, get_settings().transcribe_model)
+
+    def submit(self, read, length=None, chunked=False, language=None, suffix=".wav"):
+        """Stream an upload to disk and queue it.
+
+        Args:
+            read: ``read(n)`` on the request body
+            length: Content-Length, if not chunked
+            chunked: Body uses chunked transfer encoding
+
+        Returns:
+            Job: The queued job (already finished on a cache hit)
+
+        Raises:
+            QueueFull: Too many jobs waiting
+            UploadError: Bad or oversized upload
+        """
+        self._purge_expired()
+        if self._queue.qsize() >= self.max_queued:
+            raise QueueFull()
+
+        fd, path = tempfile.mkstemp(suffix=suffix, dir=self._upload_dir)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                digest = self._receive(read, f, length, chunked)
+        except BaseException:
+            os.remove(path)
+            raise
+
+        job = Job(path, digest, language)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._stats["submitted"] += 1
+            cached = self._cache.get(self._cache_key(digest, language))
+            if cached is not None:
+                self._cache.move_to_end(self._cache_key(digest, language))
+                self._stats["cache_hits"] += 1
+                self._stats["completed"] += 1
+
+        if cached is not None:
+            job.cached = True
+            os.remove(path)
+            job.finish(DONE, text=cached)
+        else:
+            self._queue.put(job)
+        return job
+
+    def _receive(self, read, f, length, chunked):
+        """Copy the body into ``f`` and return its sha256."""
+        digest = hashlib.sha256()
+        received = 0
+
+        def write(data):
+            nonlocal received
+            received += len(data)
+            if received > self.max_upload_bytes:
+                raise UploadError(413, "upload too large")
+            digest.update(data)
+            f.write(data)
+
+        if chunked:
+            while True:
+                size_line = read_line(read)
+                try:
+                    size = int(size_line.split(b";")[0].strip(), 16)
+                except ValueError:
+                    raise UploadError(400, "bad chunk size")
+                if size == 0:
+                    while read_line(read) not in (b"", b"\r\n", b"\n"):
+                        pass  # trailers
+                    break
+                while size:
+                    data = read(min(size, READ_CHUNK_BYTES))
+                    if not data:
+                        raise UploadError(400, "upload ended early")
+                    write(data)
+                    size -= len(data)
+                read_line(read)  # CRLF after each chunk
+        else:
+            if length is None:
+                raise UploadError(411, "Content-Length or chunked encoding required")
+            if length > self.max_upload_bytes:
+                raise UploadError(413, "upload too large")
+            remaining = length
+            while remaining:
+                data = read(min(remaining, READ_CHUNK_BYTES))
+                if not data:
+                    raise UploadError(400, "upload ended early")
+                write(data)
+                remaining -= len(data)
+
+        if received == 0:
+            raise UploadError(400, "empty upload")
+        return digest.hexdigest()
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if job is None:
+            return None
+        job.token.cancel()
+        if job.status == QUEUED:
+            self._finish(job, CANCELLED, error="cancelled")
+        return job
+
+    def _finish(self, job, status, text=None, error=None):
+        if not job.finish(status, text=text, error=error):
+            return
+        with self._lock:
+            self._stats[{DONE: "completed", FAILED: "failed", CANCELLED: "cancelled"}[status]] += 1
+        try:
+            os.remove(job.path)
+        except OSError:
+            pass
+
+    def _purge_expired(self):
+        cutoff = time.time() - self.job_ttl
+        with self._lock:
+            expired = [
+                job_id for job_id, job in self._jobs.items()
+                if job.finished is not None and job.finished < cutoff
+            ]
+            for job_id in expired:
+                del self._jobs[job_id]
+
+    def _work(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            if job.token.cancelled or not job.start():
+                continue
+            try:
+                text = self.transcriber.transcribe_meeting(
+                    job.path, language=job.language, on_chunk=job.add_chunk, token=job.token
+                )
+            except CancelledError:
+                self._finish(job, CANCELLED, error="cancelled")
+            except Exception as e:
+                log.error(f"[bold red]Job {job.id} failed: {e}[/bold red]")
+                self._finish(job, FAILED, error=f"{type(e).__name__}: {e}")
+            else:
+                with self._lock:
+                    self._cache[self._cache_key(job.digest, job.language)] = text
+                    while len(self._cache) > self.cache_entries:
+                        self._cache.popitem(last=False)
+                self._finish(job, DONE, text=text)
+                log.info(
+                    f"[dim]Job {job.id} done in {job.finished - job.started:.1f}s[/dim]"
+                )
+
+    def metrics(self):
+        with self._lock:
+            by_status = {}
+            for job in self._jobs.values():
+                by_status[job.status] = by_status.get(job.status, 0) + 1
+            state = {
+                "jobs": by_status,
+                "queued": self._queue.qsize(),
+                "max_jobs": self.max_jobs,
+                "cache_entries": len(self._cache),
+                **self._stats,
+            }
+        scheduler = getattr(self.transcriber, "scheduler", None)
+        if scheduler is not None:
+            state["api"] = scheduler.metrics()
+        return state
+
+
+def read_line(read, limit=1024):
+    """Read one CRLF-terminated line through ``read``."""
+    line = bytearray()
+    while len(line) < limit:
+        c = read(1)
+        if not c:
+            break
+        line += c
+        if c == b"\n":
+            break
+    return bytes(line)
+
+
+def _make_handler(server):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            log.debug(format % args)
+
+        def _send_json(self, status, payload, headers=None):
+            data = json.dumps(payload, separators=(",", ":")).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _route(self):
+            url = urlsplit(self.path)
+            parts = [p for p in url.path.split("/") if p]
+            query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+            return parts, query
+
+        def _job_or_404(self, job_id):
+            job = server.get(job_id)
+            if job is None:
+                self._send_json(404, {"error": "unknown job"})
+            return job
+
+        def do_POST(self):
+            parts, query = self._route()
+            if parts != ["v1", "jobs"]:
+                self._send_json(404, {"error": "not found"})
+                return
+
+            content_type = (self.headers.get("Content-Type") or "").split(";")[0].strip()
+            suffix = SUFFIXES.get(content_type)
+            if suffix is None:
+                suffix = os.path.splitext(query.get("filename", ""))[1] or ".wav"
+            chunked = "chunked" in (self.headers.get("Transfer-Encoding") or "").lower()
+            length = self.headers.get("Content-Length")
+            try:
+                job = server.submit(
+                    self.rfile.read,
+                    length=int(length) if length and not chunked else None,
+                    chunked=chunked,
+                    language=query.get("language"),
+                    suffix=suffix,
+                )
+            except QueueFull:
+                self._send_json(503, {"error": "too many queued jobs"}, {"Retry-After": "5"})
+                self.close_connection = True
+                return
+            except UploadError as e:
+                self._send_json(e.status, {"error": str(e)})
+                self.close_connection = True
+                return
+            self._send_json(202, job.to_dict(), {"Location": f"/v1/jobs/{job.id}"})
+
+        def do_GET(self):
+            parts, query = self._route()
+            if parts == ["v1", "health"]:
+                self._send_json(200, server.metrics())
+            elif len(parts) == 3 and parts[:2] == ["v1", "jobs"]:
+                job = self._job_or_404(parts[2])
+                if job is None:
+                    return
+                try:
+                    wait = min(float(query.get("wait", 0)), MAX_POLL_WAIT)
+                except ValueError:
+                    wait = 0
+                if wait > 0:
+                    job.wait(wait)
+                self._send_json(200, job.to_dict())
+            elif len(parts) == 4 and parts[:2] == ["v1", "jobs"] and parts[3] == "events":
+                job = self._job_or_404(parts[2])
+                if job is not None:
+                    self._stream_events(job)
+            else:
+                self._send_json(404, {"error": "not found"})
+
+        def _stream_events(self, job):
+            # HTTP/1.0 response delimited by closing the connection
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            index = 0
+            try:
+                while True:
+                    events = job.events_since(index, timeout=MAX_POLL_WAIT)
+                    for event in events:
+                        line = json.dumps(event, separators=(",", ":")) + "\n"
+                        self.wfile.write(line.encode())
+                    self.wfile.flush()
+                    index += len(events)
+                    if events and events[-1]["event"] in FINISHED:
+                        return
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # client went away; the job keeps running
+
+        def do_DELETE(self):
+            parts, _ = self._route()
+            if len(parts) != 3 or parts[:2] != ["v1", "jobs"]:
+                self._send_json(404, {"error": "not found"})
+                return
+            job = server.cancel(parts[2])
+            if job is None:
+                self._send_json(404, {"error": "unknown job"})
+            else:
+                self._send_json(200, job.to_dict())
+
+    return Handler
@@ -0,0 +1,532 @@
+"""Long-lived worker process for CPU-heavy work.
+
+The daemon's real-time threads share one GIL with everything else in the
+process: the sounddevice callback, key capture and the meeting PCM reader.
+The heavy work runs in this worker process instead: meeting preprocessing
+(compression, chunk encoding, the upload pool and parsing API responses)
+and encoding dictations. It can then never hold the GIL while audio or key
+events are waiting.
+
+Each upload from the worker still waits for a slot from the daemon's
+APIScheduler. The worker asks for it over the pipe and hands it back with
+the Retry-After of a 429, if there was one. So meeting uploads keep sharing
+priorities, the reserved interactive slot, the rate limits, 429 pauses and
+the status metrics with dictation.
+
+Dictation frames are handed over in shared memory. The recorder's frames are
+concatenated straight into the block, the worker reads them in place, and
+only the block's name goes through the pipe. Progress callbacks (chunk
+texts, word timings) and the worker's log records come back over the pipe.
+
+If the worker dies it is restarted for the next job; jobs in flight fail
+with WorkerError.
+"""
+
+import itertools
+import logging
+import multiprocessing
+import os
+import signal
+import sys
+import threading
+from multiprocessing import shared_memory
+
+from services.api_scheduler import INTERACTIVE, retry_after_seconds
+from utils.cancellation import CancelToken, CancelledError
+from utils.log import ROOT_LOGGER, get_logger
+
+log = get_logger("worker")
+
+START_TIMEOUT = 30.0  # seconds to wait for a new worker to report ready
+
+
+class WorkerError(RuntimeError):
+    """A job failed in the worker (message: "Type: message"), or the worker died."""
+
+
+class _Job:
+    def __init__(self, on_event=None):
+        self.on_event = on_event
+        self.done = threading.Event()
+        self.result = None
+        self.error = None  # (type name, message)
+
+
+class WorkerProcess:
+    def __init__(self, scheduler=None):
+        """
+        Args:
+            scheduler (APIScheduler): Grants the worker's API requests
+                (defaults to the process-wide scheduler)
+        """
+        self._lock = threading.Lock()
+        self._send_lock = threading.Lock()
+        self._process = None
+        self._conn = None
+        self._jobs = {}  # id -> _Job
+        self._ids = itertools.count(1)
+        self._scheduler = scheduler
+        self._leases = {}  # (pid, request id) -> [priority, CancelToken, granted]
+        self._stats = {"started": 0, "jobs": 0, "failed": 0}
+
+    @property
+    def scheduler(self):
+        if self._scheduler is None:
+            from services.api_scheduler import get_scheduler
+
+            self._scheduler = get_scheduler()
+        return self._scheduler
+
+    @property
+    def pid(self):
+        process = self._process
+        return process.pid if process is not None else None
+
+    def start(self):
+        """Start the worker unless it is running. Returns its pid."""
+        with self._lock:
+            if self._process is not None and self._process.is_alive():
+                return self._process.pid
+            context = multiprocessing.get_context("spawn")
+            parent, child = context.Pipe()
+            process = context.Process(
+                target=_worker_main, args=(child,), name="omnivo-worker", daemon=True
+            )
+            process.start()
+            child.close()
+            if not parent.poll(START_TIMEOUT) or parent.recv() != ("ready",):
+                process.terminate()
+                raise WorkerError("worker process did not start")
+            self._process, self._conn = process, parent
+            self._stats["started"] += 1
+            threading.Thread(
+                target=self._receive, args=(parent, process), name="worker-receiver", daemon=True
+            ).start()
+            log.info(f"[dim]Worker process started (pid {process.pid})[/dim]")
+            return process.pid
+
+    def stop(self, timeout=5.0):
+        with self._lock:
+            process, conn = self._process, self._conn
+            self._process = self._conn = None
+        if process is None:
+            return
+        try:
+            with self._send_lock:
+                conn.send(("stop",))
+        except OSError:
+            pass
+        process.join(timeout)
+        if process.is_alive():
+            process.terminate()
+
+    def _send(self, message, conn=None):
+        with self._send_lock:
+            conn = conn or self._conn
+            if conn is None:
+                raise WorkerError("worker process exited")
+            try:
+                conn.send(message)
+            except OSError as e:
+                raise WorkerError(f"worker process unreachable: {e}") from e
+
+    # API slots for the worker's requests
+
+    def _grant(self, conn, key, lease, nbytes):
+        """Wait for a scheduler slot on the worker's behalf and tell it."""
+        priority, token, _ = lease
+        try:
+            self.scheduler.acquire(priority, nbytes, token)
+        except CancelledError:
+            with self._lock:
+                self._leases.pop(key, None)
+            granted = False
+        else:
+            with self._lock:
+                granted = self._leases.get(key) is lease
+                if granted:
+                    lease[2] = True
+            if not granted:
+                self.scheduler.release(priority)  # the worker died meanwhile
+                return
+        try:
+            self._send(("granted", key[1], granted), conn)
+        except WorkerError:
+            pass  # the worker is gone; _receive releases the slot
+
+    def _release_lease(self, pid, request_id, retry_after):
+        with self._lock:
+            lease = self._leases.pop((pid, request_id), None)
+        if lease is None:
+            return
+        if retry_after is not None:
+            self.scheduler.throttle(retry_after)
+        self.scheduler.release(lease[0])
+
+    def _abandon_lease(self, pid, request_id):
+        with self._lock:
+            lease = self._leases.get((pid, request_id))
+        if lease is not None:
+            lease[1].cancel()
+
+    def _receive(self, conn, process):
+        while True:
+            try:
+                message = conn.recv()
+            except (EOFError, OSError):
+                break
+            kind = message[0]
+            if kind == "log":
+                _, name, level, text = message
+                logging.getLogger(name).log(level, text)
+                continue
+            if kind == "acquire":
+                # Registered here so an "abandon" right behind it finds it
+                _, request_id, priority, nbytes = message
+                key, lease = (process.pid, request_id), [priority, CancelToken(), False]
+                with self._lock:
+                    self._leases[key] = lease
+                threading.Thread(
+                    target=self._grant, args=(conn, key, lease, nbytes),
+                    name="worker-api-slot", daemon=True,
+                ).start()
+                continue
+            if kind == "release":
+                self._release_lease(process.pid, message[1], message[2])
+                continue
+            if kind == "abandon":
+                self._abandon_lease(process.pid, message[1])
+                continue
+            job = self._jobs.get(message[1])
+            if job is None:
+                continue
+            if kind == "event":
+                if job.on_event is not None:
+                    try:
+                        job.on_event(message[2], message[3])
+                    except Exception as e:
+                        log.error(f"[bold red]Worker event handler failed: {e}[/bold red]")
+            elif kind == "done":
+                job.result = message[2]
+                job.done.set()
+            elif kind == "error":
+                job.error = (message[2], message[3])
+                job.done.set()
+
+        # The worker is gone: fail whatever it was doing, and give back the
+        # API slots it held or was waiting for
+        with self._lock:
+            if self._process is process:
+                self._process = self._conn = None
+            orphans = [job for job in self._jobs.values() if not job.done.is_set()]
+            leases = [key for key in self._leases if key[0] == process.pid]
+            leases = [self._leases.pop(key) for key in leases]
+        for priority, token, granted in leases:
+            if granted:
+                self.scheduler.release(priority)
+            else:
+                token.cancel()
+        if orphans or process.exitcode not in (0, None):
+            log.warning(f"[yellow]Worker process exited (code {process.exitcode})[/yellow]")
+        for job in orphans:
+            job.error = ("WorkerError", "worker process exited")
+            job.done.set()
+
+    def call(self, kind, args, on_event=None, token=None):
+        """Run job ``kind`` in the worker and return its result.
+
+        Args:
+            kind: One of the worker's job names (see _JOBS)
+            args: Picklable dict of arguments
+            on_event: ``on_event(name, payload)`` for the job's progress
+                events, called on the receiver thread
+            token: CancelToken that cancels the job in the worker
+
+        Raises:
+            CancelledError: The job was cancelled
+            WorkerError: The job failed or the worker died
+        """
+        self.start()
+        job_id = next(self._ids)
+        job = _Job(on_event)
+        with self._lock:
+            self._jobs[job_id] = job
+            self._stats["jobs"] += 1
+        try:
+            self._send(("job", job_id, kind, args))
+            if token is not None:
+                token.add_callback(lambda: self._cancel(job_id))
+            job.done.wait()
+        finally:
+            with self._lock:
+                self._jobs.pop(job_id, None)
+        if job.error is None:
+            return job.result
+        if job.error[0] == "CancelledError":
+            raise CancelledError()
+        with self._lock:
+            self._stats["failed"] += 1
+        raise WorkerError(f"{job.error[0]}: {job.error[1]}")
+
+    def _cancel(self, job_id):
+        try:
+            self._send(("cancel", job_id))
+        except WorkerError:
+            pass  # the worker is gone, and the job with it
+
+    def encode(self, frames, sample_rate, channels, token=None):
+        """Encode dictation frames to a temporary WAV file in the worker.
+
+        Same contract as utils.audio_utils.save_audio_to_file.
+        """
+        import numpy as np
+
+        if token is not None:
+            token.raise_if_cancelled()
+        if not frames:
+            log.warning("No audio recorded.")
+            return None
+        first = frames[0]
+        shape = (sum(len(frame) for frame in frames),) + first.shape[1:]
+        nbytes = int(np.prod(shape)) * first.dtype.itemsize
+        block = shared_memory.SharedMemory(create=True, size=max(1, nbytes))
+        try:
+            view = np.ndarray(shape, dtype=first.dtype, buffer=block.buf)
+            np.concatenate(frames, axis=0, out=view)
+            del view  # the block can't be closed while a view exists
+            path = self.call("encode", {
+                "block": block.name,
+                "shape": shape,
+                "dtype": first.dtype.str,
+                "sample_rate": sample_rate,
+                "channels": channels,
+            }, token=token)
+        finally:
+            block.close()
+            block.unlink()
+        if token is not None and token.cancelled:
+            os.remove(path)
+            token.raise_if_cancelled()
+        return path
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["in_flight"] = len(self._jobs)
+        stats["pid"] = self.pid
+        return stats
+
+
+class WorkerMeetingTranscriber:
+    """MeetingTranscriber interface, run in the worker process.
+
+    Transcribes in this process instead when ``worker_process`` is off or the
+    worker can't start.
+    """
+
+    def __init__(self, worker=None):
+        self.worker = worker or get_worker()
+        self._local = None
+
+    def transcribe_meeting(self, audio_file_path, language=None, on_chunk=None, token=None,
+                           on_words=None, settings=None):
+        from utils.settings import get_settings
+
+        settings = settings or get_settings()
+        try:
+            if not settings.worker_process:
+                raise WorkerError("disabled in the config")
+            self.worker.start()
+        except (WorkerError, OSError) as e:
+            if settings.worker_process:
+                log.warning(f"[yellow]Worker unavailable, transcribing in-process: {e}[/yellow]")
+            if self._local is None:
+                from core.meeting_transcriber import MeetingTranscriber
+
+                self._local = MeetingTranscriber()
+            return self._local.transcribe_meeting(
+                audio_file_path, language=language, on_chunk=on_chunk, token=token,
+                on_words=on_words, settings=settings,
+            )
+
+        def on_event(name, payload):
+            if name == "chunk" and on_chunk is not None:
+                on_chunk(*payload)
+            elif name == "words" and on_words is not None:
+                on_words(payload)
+
+        return self.worker.call("transcribe_meeting", {
+            "path": audio_file_path,
+            "language": language,
+            "settings": settings.to_dict(),
+            "chunks": on_chunk is not None,
+            "words": on_words is not None,
+        }, on_event=on_event, token=token)
+
+
+# --- Worker side -------------------------------------------------------------
+
+
+class _PipeLogHandler(logging.Handler):
+    """Forward log records to the daemon, which logs them as its own."""
+
+    def __init__(self, send):
+        super().__init__()
+        self._send = send
+
+    def emit(self, record):
+        try:
+            self._send(("log", record.name, record.levelno, record.getMessage()))
+        except Exception:
+            pass
+
+
+def _encode_job(args, emit, token):
+    import numpy as np
+    from utils.audio_utils import new_recording_path, write_wav
+
+    block = shared_memory.SharedMemory(name=args["block"])
+    try:
+        audio = np.ndarray(args["shape"], dtype=np.dtype(args["dtype"]), buffer=block.buf)
+        path = new_recording_path()
+        write_wav(audio, path, args["sample_rate"], args["channels"])
+        del audio
+    finally:
+        block.close()
+    if token.cancelled:
+        os.remove(path)
+        token.raise_if_cancelled()
+    return path
+
+
+class _SchedulerClient:
+    """APIScheduler.run() in the worker, with slots granted by the daemon's
+    scheduler over the pipe."""
+
+    def __init__(self, send):
+        self._send = send
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._waiting = {}  # request id -> (Event, [granted])
+
+    def _grant(self, request_id, granted):
+        """The daemon's answer to an acquire (called by the receive loop)."""
+        with self._lock:
+            event, result = self._waiting.pop(request_id)
+        result.append(granted)
+        event.set()
+
+    def run(self, fn, priority=INTERACTIVE, nbytes=0, token=None):
+        request_id = next(self._ids)
+        event, result = threading.Event(), []
+        with self._lock:
+            self._waiting[request_id] = (event, result)
+        self._send(("acquire", request_id, priority, nbytes))
+        if token is not None:
+            # The daemon answers either way: not granted, or granted if the
+            # slot came first, in which case it is given straight back
+            token.add_callback(lambda: self._send(("abandon", request_id)))
+        event.wait()
+        if not result[0]:
+            raise CancelledError()
+        retry_after = None
+        try:
+            if token is not None:
+                token.raise_if_cancelled()
+            return fn()
+        except Exception as e:
+            retry_after = retry_after_seconds(e)
+            raise
+        finally:
+            self._send(("release", request_id, retry_after))
+
+
+_scheduler_client = None
+_meeting_transcriber = None
+
+
+def _transcribe_meeting_job(args, emit, token):
+    global _meeting_transcriber
+    from utils.settings import Settings
+
+    if _meeting_transcriber is None:
+        from core.meeting_transcriber import MeetingTranscriber
+
+        _meeting_transcriber = MeetingTranscriber(scheduler=_scheduler_client)
+    return _meeting_transcriber.transcribe_meeting(
+        args["path"],
+        language=args["language"],
+        on_chunk=(lambda *chunk: emit("chunk", chunk)) if args["chunks"] else None,
+        on_words=(lambda words: emit("words", words)) if args["words"] else None,
+        token=token,
+        settings=Settings(**args["settings"]),
+    )
+
+
+_JOBS = {
+    "encode": _encode_job,
+    "transcribe_meeting": _transcribe_meeting_job,
+}
+
+
+def _worker_main(conn):
+    global _scheduler_client
+    # Ctrl-C in the terminal is for the daemon; it stops the worker itself
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    send_lock = threading.Lock()
+
+    def send(message):
+        with send_lock:
+            conn.send(message)
+
+    _scheduler_client = _SchedulerClient(send)
+
+    root = logging.getLogger(ROOT_LOGGER)
+    root.handlers[:] = [_PipeLogHandler(send)]
+    root.setLevel(logging.INFO)
+    root.propagate = False
+
+    tokens = {}
+
+    def run(job_id, kind, args, token):
+        try:
+            result = _JOBS[kind](args, lambda name, payload: send(("event", job_id, name, payload)), token)
+            send(("done", job_id, result))
+        except BaseException as e:
+            send(("error", job_id, type(e).__name__, str(e)))
+        finally:
+            tokens.pop(job_id, None)
+
+    send(("ready",))
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            break  # the daemon is gone
+        if message[0] == "stop":
+            break
+        if message[0] == "granted":
+            _scheduler_client._grant(message[1], message[2])
+            continue
+        if message[0] == "cancel":
+            token = tokens.get(message[1])
+            if token is not None:
+                token.cancel()
+            continue
+        _, job_id, kind, args = message
+        token = tokens[job_id] = CancelToken()
+        threading.Thread(target=run, args=(job_id, kind, args, token), daemon=True).start()
+    sys.exit(0)
+
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def get_worker():
+    """Return the process-wide worker, creating it on first use."""
+    global _worker
+    with _worker_lock:
+        if _worker is None:
+            _worker = WorkerProcess()
+        return _worker
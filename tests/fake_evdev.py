@@ -0,0 +1,99 @@
+"""Pipe-backed stand-ins for /dev/input keyboards, for tests and benchmarks.
+
+A FakeKeyboard is read by EvdevKeyCapture like a real device: the reader
+thread selects on its file descriptor and reads raw ``struct input_event``
+records, so each wakeup and each event read is real. Every keystroke is
+sent the way a keyboard sends it: a scan code (EV_MSC), the key and a
+SYN_REPORT, for the press and again for the release.
+
+A pipe can't take an evdev event mask, so by default the reader falls back
+to filtering in Python. Inside ``kernel_masks()`` the keyboards apply the
+masks the reader asks for the way the kernel does: masked events and the
+SYN_REPORTs left empty by them are never written.
+
+Usage:
+    keyboard = FakeKeyboard()
+    capture = EvdevKeyCapture(devices=[keyboard])
+    capture.start(on_caps_lock, on_escape)
+    keyboard.tap(KEY_A)
+"""
+import contextlib
+import os
+import struct
+import time
+from collections import namedtuple
+from unittest import mock
+
+EV_SYN, EV_KEY, EV_MSC = 0x00, 0x01, 0x04
+MSC_SCAN = 0x04
+KEY_ESC, KEY_A, KEY_CAPSLOCK, KEY_LEFTSHIFT, KEY_LEFTCTRL = 1, 30, 58, 42, 29
+LETTER_CODES = [16, 17, 18, 19, 20, 21, 22, 23, 24, 25, 30, 31, 32, 33, 34, 35, 36, 37, 38,
+                44, 45, 46, 47, 48, 49, 50, 57]  # q..p, a..l, z..m, space
+
+_EVENT = struct.Struct("llHHi")  # struct input_event on 64-bit Linux
+InputEvent = namedtuple("InputEvent", "sec usec type code value")
+
+
+class FakeKeyboard:
+    def __init__(self, leds=()):
+        self._r, self._w = os.pipe()
+        os.set_blocking(self._r, False)
+        self._leds = list(leds)
+        self.masks = {}  # event type -> allowed codes, once the reader sets them
+        self.events_written = 0
+
+    # What EvdevKeyCapture uses of evdev.InputDevice
+
+    def fileno(self):
+        return self._r
+
+    def leds(self):
+        return self._leds
+
+    def read(self):
+        data = os.read(self._r, _EVENT.size * 256)  # BlockingIOError when empty
+        for offset in range(0, len(data), _EVENT.size):
+            yield InputEvent(*_EVENT.unpack_from(data, offset))
+
+    def close(self):
+        os.close(self._r)
+        os.close(self._w)
+
+    # The keyboard side
+
+    def _allowed(self, event_type, code):
+        if event_type == EV_SYN:
+            return True
+        if EV_SYN in self.masks and event_type not in self.masks[EV_SYN]:
+            return False
+        return event_type not in self.masks or code in self.masks[event_type]
+
+    def send(self, code, value):
+        """One key event as a keyboard reports it."""
+        events = [(EV_MSC, MSC_SCAN, code), (EV_KEY, code, value)]
+        events = [e for e in events if self._allowed(e[0], e[1])]
+        if not events:
+            return  # the kernel drops the empty SYN_REPORT as well
+        events.append((EV_SYN, 0, 0))
+        now = time.time()
+        sec, usec = int(now), int(now % 1 * 1e6)
+        os.write(self._w, b"".join(_EVENT.pack(sec, usec, *e) for e in events))
+        self.events_written += len(events)
+
+    def tap(self, code, hold=0.0):
+        self.send(code, 1)
+        if hold:
+            time.sleep(hold)
+        self.send(code, 0)
+
+
+@contextlib.contextmanager
+def kernel_masks(keyboards):
+    """Let ``keyboards`` take the evdev event masks the reader sets."""
+    by_fd = {keyboard.fileno(): keyboard for keyboard in keyboards}
+
+    def set_event_mask(fd, event_type, codes, count):
+        by_fd[fd].masks[event_type] = set(codes)
+
+    with mock.patch("services.key_capture.set_event_mask", set_event_mask):
+        yield
@@ -0,0 +1,245 @@
+"""Headless soak test of the dictation and meeting pipelines.
+
+Concurrent dictation workers record a replayed WAV through ``AudioRecorder``
+and transcribe it through ``Transcriber``. Meeting workers record a long
+replayed meeting through ``MeetingRecorder`` and transcribe it in chunks.
+Everything talks to a local ``StandInAPI`` with configurable latency and
+random 429/5xx faults, and shares one API scheduler, as in the daemon.
+
+``run_soak`` returns throughput, latency percentiles, process memory growth
+and dropped audio. It is used by tests/test_soak.py (a short run) and
+scripts/soak_test.py (long runs).
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+import wave
+
+import numpy as np
+
+from core.audio_sources import ReplayCapture, replay_input
+from core.meeting_recorder import MeetingRecorder
+from core.meeting_transcriber import MeetingTranscriber
+from core.recorder import AudioRecorder
+from core.transcriber import Transcriber
+from services.api_scheduler import APIScheduler
+from services.openai_service import OpenAIService
+from services.request_policy import LatencyTracker
+from tests.stand_in_api import StandInAPI
+from utils.memory import current_rss_bytes
+from utils.settings import Settings
+
+
+def write_speech_like_wav(path, seconds, sample_rate, seed=0):
+    """Noise bursts shaped like syllables, so encoders see varied audio."""
+    rng = np.random.default_rng(seed)
+    frames = int(seconds * sample_rate)
+    t = np.arange(frames) / sample_rate
+    envelope = np.clip(np.sin(2 * np.pi * 3.0 * t), 0, None)
+    samples = rng.normal(0, 0.2, frames) * envelope
+    with wave.open(path, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(sample_rate)
+        wf.writeframes((np.clip(samples, -1, 1) * 32767).astype(np.int16).tobytes())
+    return path
+
+
+class _MemorySampler:
+    def __init__(self, interval=0.25):
+        self.interval = interval
+        self.samples = []
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="soak-memory", daemon=True)
+
+    def _run(self):
+        while True:
+            rss = current_rss_bytes()
+            if rss is not None:
+                self.samples.append(rss)
+            if self._stopped.wait(self.interval):
+                return
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stopped.set()
+        self._thread.join()
+
+    def report(self, baseline):
+        if not self.samples:
+            return {}
+        mb = 1024 * 1024
+        return {
+            "start_mb": round(self.samples[0] / mb, 1),
+            "peak_mb": round(max(self.samples) / mb, 1),
+            "end_mb": round(self.samples[-1] / mb, 1),
+            # Growth after the first round of work, when caches and
+            # connection pools are warm
+            "growth_mb": round((self.samples[-1] - (baseline or self.samples[0])) / mb, 1),
+        }
+
+
+def run_soak(
+    dictation_workers=4,
+    dictations_per_worker=10,
+    dictation_seconds=3.0,
+    meetings=1,
+    meeting_seconds=120.0,
+    meeting_chunk_seconds=30.0,
+    speed=0.0,
+    api_latency=0.05,
+    fault_rates=None,
+    retry_after=0,
+):
+    """Run the soak test and return its report.
+
+    Args:
+        dictation_workers: Concurrent dictation users
+        dictations_per_worker: Dictations each user records
+        dictation_seconds: Length of each dictation
+        meetings: Concurrent meetings
+        meeting_seconds: Length of each meeting
+        meeting_chunk_seconds: Chunk limit (max_duration_seconds) for meetings
+        speed: Replay speed as a multiple of real time (0 = as fast as possible)
+        api_latency: Stand-in response time in seconds
+        fault_rates: HTTP status -> probability of a stand-in fault
+        retry_after: Retry-After seconds sent with 429s
+    """
+    work_dir = tempfile.mkdtemp(prefix="omnivo_soak_")
+    dictation_wav = write_speech_like_wav(
+        os.path.join(work_dir, "dictation.wav"), dictation_seconds, 16000, seed=1
+    )
+    meeting_wav = write_speech_like_wav(
+        os.path.join(work_dir, "meeting.wav"), meeting_seconds, 48000, seed=2
+    )
+
+    lock = threading.Lock()
+    dictation_latency = LatencyTracker(window=10 ** 6)
+    meeting_latency = LatencyTracker(window=10 ** 6)
+    results = {
+        "dictations_completed": 0,
+        "dictations_failed": 0,
+        "dropped_frames": 0,
+        "meetings_completed": 0,
+        "meetings_failed": 0,
+        "dropped_meeting_seconds": 0.0,
+        "meeting_audio_seconds": 0.0,
+    }
+    warm = threading.Event()
+    baseline = []
+
+    def dictation_worker(api, scheduler):
+        streams = []
+        recorder = AudioRecorder(
+            input_stream=replay_input(dictation_wav, speed=speed, on_open=streams.append),
+            sounds=False,
+        )
+        transcriber = Transcriber(
+            OpenAIService(api_key="soak", base_url=api.base_url, scheduler=scheduler)
+        )
+        for _ in range(dictations_per_worker):
+            recorder.start_recording()
+            streams[-1].finished.wait()
+            frames, rate, channels = recorder.stop_stream()
+            recorded = sum(len(block) for block in frames)
+            started = time.monotonic()
+            path = recorder.save_recording((frames, rate, channels))
+            text = transcriber.transcribe_audio(path) if path else None
+            with lock:
+                results["dropped_frames"] += streams[-1].frames_delivered - recorded
+                if text:
+                    results["dictations_completed"] += 1
+                    dictation_latency.record(time.monotonic() - started)
+                else:
+                    results["dictations_failed"] += 1
+            if not warm.is_set():
+                warm.set()
+                baseline.append(current_rss_bytes())
+
+    def meeting_worker(n, api, scheduler):
+        notes_dir = os.path.join(work_dir, f"meeting_{n}")
+        capture = ReplayCapture(meeting_wav, speed=speed)
+        recorder = MeetingRecorder(
+            capture=lambda: capture,
+            transcriber=MeetingTranscriber(
+                api_key="soak", base_url=api.base_url, scheduler=scheduler
+            ),
+            settings=Settings(
+                meeting_notes_path=notes_dir,
+                meeting_test_mode=False,
+                max_duration_seconds=meeting_chunk_seconds,
+            ),
+        )
+        recorder.start()
+        while not capture.finished:
+            time.sleep(0.01)
+        started = time.monotonic()
+        recorder.stop()
+        saved = os.path.isdir(notes_dir) and any(
+            name.endswith(".md") for name in os.listdir(notes_dir)
+        )
+        with lock:
+            recorded = recorder.last_recording_seconds or 0.0
+            results["meeting_audio_seconds"] += recorded
+            results["dropped_meeting_seconds"] += meeting_seconds - recorded
+            if saved:
+                results["meetings_completed"] += 1
+                meeting_latency.record(time.monotonic() - started)
+            else:
+                results["meetings_failed"] += 1
+
+    try:
+        with StandInAPI(latency=api_latency, text="soak test transcription") as api:
+            if fault_rates:
+                api.random_faults(fault_rates, retry_after=retry_after)
+            # Stand-in responses are instant to upload; keep the in-flight
+            # limit and 429 handling, lift the rate limits
+            scheduler = APIScheduler(
+                requests_per_second=1000,
+                request_burst=1000,
+                upload_bytes_per_second=10 ** 9,
+                upload_burst_bytes=10 ** 9,
+            )
+            threads = [
+                threading.Thread(target=dictation_worker, args=(api, scheduler))
+                for _ in range(dictation_workers)
+            ] + [
+                threading.Thread(target=meeting_worker, args=(n, api, scheduler))
+                for n in range(meetings)
+            ]
+            began = time.monotonic()
+            with _MemorySampler() as memory:
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+            elapsed = time.monotonic() - began
+            api_requests = api.request_count
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    return {
+        "seconds": round(elapsed, 2),
+        "dictation": {
+            "completed": results["dictations_completed"],
+            "failed": results["dictations_failed"],
+            "per_minute": round(results["dictations_completed"] / elapsed * 60, 1),
+            "latency": dictation_latency.summary(),
+            "dropped_frames": results["dropped_frames"],
+        },
+        "meeting": {
+            "completed": results["meetings_completed"],
+            "failed": results["meetings_failed"],
+            "audio_seconds": round(results["meeting_audio_seconds"], 1),
+            "latency": meeting_latency.summary(),
+            "dropped_seconds": round(results["dropped_meeting_seconds"], 3),
+        },
+        "api": {"requests": api_requests, "scheduler": scheduler.metrics()},
+        "memory": memory.report(baseline[0] if baseline else None),
+    }
@@ -0,0 +1,229 @@
+"""Local OpenAI-compatible stand-in server for tests and benchmarks.
+
+Serves ``POST /v1/audio/transcriptions`` and ``POST /v1/chat/completions``
+with configurable latency and injected errors (including 429 with
+Retry-After) so the request pipeline can be exercised without network access
+or an API key.
+
+Usage:
+    with StandInAPI(latency=0.05) as api:
+        api.fail_next(429, retry_after=1)
+        service = OpenAIService(api_key="test", base_url=api.base_url)
+"""
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_FIELD_RE = re.compile(
+    rb'Content-Disposition: form-data; name="([^"]+)"(?:; filename="[^"]*")?\r\n'
+    rb"(?:[^\r\n]+\r\n)*\r\n",
+)
+
+
+def parse_multipart_fields(body):
+    """Return the non-file form fields of a multipart body as a dict."""
+    fields = {}
+    for match in _FIELD_RE.finditer(body):
+        if b"filename=" in match.group(0):
+            continue
+        start = match.end()
+        end = body.find(b"\r\n--", start)
+        fields[match.group(1).decode()] = body[start:end].decode(errors="replace")
+    return fields
+
+
+def _default_chat_reply(messages):
+    content = messages[-1]["content"] if messages else ""
+    return f"summary of {len(content)} chars"
+
+
+def _verbose_transcription(text, seconds_per_word=0.5):
+    """``verbose_json`` body: every word lasts ``seconds_per_word``."""
+    words = [
+        {"word": word, "start": i * seconds_per_word, "end": (i + 1) * seconds_per_word}
+        for i, word in enumerate(text.split())
+    ]
+    duration = len(words) * seconds_per_word
+    return {
+        "text": text,
+        "language": "english",
+        "duration": duration,
+        "words": words,
+        "segments": [{"id": 0, "start": 0.0, "end": duration, "text": text}],
+    }
+
+
+def _chat_completion(model, content):
+    return {
+        "id": "chatcmpl-stand-in",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop",
+        }],
+        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+    }
+
+
+class StandInAPI:
+    """Threaded HTTP server imitating the OpenAI transcription endpoint.
+
+    Args:
+        latency: Seconds to wait before answering, or a callable
+            ``latency(request_number, fields) -> seconds``.
+        text: Transcription text returned for every request.
+        chat_reply: ``chat_reply(messages) -> str`` answering chat
+            completions. Defaults to a short digest of the last message.
+    """
+
+    def __init__(self, latency=0.0, text="stand-in transcription", chat_reply=None):
+        self.latency = latency
+        self.text = text
+        self.chat_reply = chat_reply or _default_chat_reply
+        self.requests = []
+        self._faults = []
+        self._fault_rates = {}
+        self._fault_retry_after = None
+        self._failing_models = {}
+        self._random = random.Random(0)
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+        self._stopping = threading.Event()
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    @property
+    def request_count(self):
+        with self._lock:
+            return len(self.requests)
+
+    def fail_next(self, status, count=1, retry_after=None):
+        """Answer the next ``count`` requests with HTTP ``status``."""
+        with self._lock:
+            self._faults.extend([(status, retry_after)] * count)
+
+    def random_faults(self, rates, retry_after=None, seed=0):
+        """Fail requests at random: ``rates`` maps HTTP status -> probability,
+        e.g. ``{429: 0.05, 500: 0.02}``. Queued ``fail_next`` faults go first."""
+        with self._lock:
+            self._fault_rates = dict(rates)
+            self._fault_retry_after = retry_after
+            self._random = random.Random(seed)
+
+    def fail_model(self, model, status=500):
+        """Answer every request for ``model`` with HTTP ``status`` (None to stop)."""
+        with self._lock:
+            if status is None:
+                self._failing_models.pop(model, None)
+            else:
+                self._failing_models[model] = status
+
+    def _random_fault(self):
+        roll = self._random.random()
+        for status, rate in self._fault_rates.items():
+            if roll < rate:
+                return status, self._fault_retry_after if status == 429 else None
+            roll -= rate
+        return None
+
+    def start(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = self.rfile.read(length)
+                api._handle(self, body)
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopping.set()
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _delay_for(self, number, fields):
+        if callable(self.latency):
+            return self.latency(number, fields)
+        return self.latency
+
+    def _handle(self, handler, body):
+        if handler.path.endswith("/chat/completions"):
+            fields = json.loads(body or b"{}")
+        else:
+            fields = parse_multipart_fields(body)
+        with self._lock:
+            number = len(self.requests)
+            self.requests.append({"path": handler.path, "fields": fields, "bytes": len(body)})
+            fault = self._faults.pop(0) if self._faults else self._random_fault()
+            if fault is None and fields.get("model") in self._failing_models:
+                fault = (self._failing_models[fields["model"]], None)
+
+        if fault:
+            status, retry_after = fault
+            headers = {"retry-after": str(retry_after)} if retry_after is not None else {}
+            error = {"error": {"message": f"stand-in error {status}", "type": "stand_in"}}
+            self._send(handler, status, json.dumps(error).encode(), "application/json", headers)
+            return
+
+        # Sleep in slices so shutdown is not held up by a slow request.
+        deadline = time.monotonic() + self._delay_for(number, fields)
+        while not self._stopping.is_set() and time.monotonic() < deadline:
+            time.sleep(min(0.01, max(0.0, deadline - time.monotonic())))
+
+        if handler.path.endswith("/chat/completions"):
+            self._send_json(handler, 200, _chat_completion(
+                fields.get("model", ""), self.chat_reply(fields.get("messages", []))
+            ))
+        elif handler.path.endswith("/audio/transcriptions"):
+            if fields.get("response_format") == "text":
+                self._send(handler, 200, self.text.encode(), "text/plain")
+            elif fields.get("response_format") == "verbose_json":
+                self._send_json(handler, 200, _verbose_transcription(self.text))
+            else:
+                self._send_json(handler, 200, {"text": self.text})
+        else:
+            self._send_json(handler, 404, {"error": {"message": "not found"}})
+
+    def _send_json(self, handler, status, payload):
+        self._send(handler, status, json.dumps(payload).encode(), "application/json")
+
+    def _send(self, handler, status, data, content_type, headers=None):
+        try:
+            handler.send_response(status)
+            handler.send_header("Content-Type", content_type)
+            handler.send_header("Content-Length", str(len(data)))
+            for key, value in (headers or {}).items():
+                handler.send_header(key, value)
+            handler.end_headers()
+            handler.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up (e.g. a cancelled hedge); nothing to answer.
+            pass
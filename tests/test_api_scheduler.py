@@ -0,0 +1,199 @@
+"""Tests for the priority-aware API scheduler."""
+import os
+import tempfile
+import threading
+import time
+import wave
+from types import SimpleNamespace
+
+import pytest
+
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.api_scheduler import (
+    APIScheduler,
+    BACKGROUND,
+    INTERACTIVE,
+    TokenBucket,
+    retry_after_seconds,
+)
+from utils.cancellation import CancelledError, CancelToken
+from tests.stand_in_api import StandInAPI
+
+
+def _unlimited(**kwargs):
+    kwargs.setdefault("requests_per_second", 1000.0)
+    kwargs.setdefault("request_burst", 1000)
+    kwargs.setdefault("upload_bytes_per_second", 1e12)
+    kwargs.setdefault("upload_burst_bytes", 1e12)
+    return APIScheduler(**kwargs)
+
+
+def _rate_limit_error(headers):
+    return SimpleNamespace(status_code=429, response=SimpleNamespace(headers=headers))
+
+
+class RateLimited(Exception):
+    status_code = 429
+
+    def __init__(self, retry_after):
+        super().__init__("429")
+        self.response = SimpleNamespace(headers={"retry-after": str(retry_after)})
+
+
+class TestTokenBucket:
+    def test_burst_then_rate(self):
+        bucket = TokenBucket(rate=10.0, capacity=2)
+        now = time.monotonic()
+        assert bucket.time_until(1, now) == 0.0
+        bucket.consume(1, now)
+        bucket.consume(1, now)
+        assert bucket.time_until(1, now) == pytest.approx(0.1, abs=0.01)
+
+    def test_oversized_request_needs_only_full_bucket(self):
+        bucket = TokenBucket(rate=1.0, capacity=5)
+        assert bucket.time_until(100, time.monotonic()) == 0.0
+
+
+class TestRetryAfter:
+    def test_seconds_header(self):
+        assert retry_after_seconds(_rate_limit_error({"retry-after": "3"})) == 3.0
+
+    def test_milliseconds_header_wins(self):
+        error = _rate_limit_error({"retry-after-ms": "250", "retry-after": "3"})
+        assert retry_after_seconds(error) == 0.25
+
+    def test_missing_header_uses_default(self):
+        assert retry_after_seconds(_rate_limit_error({}), default=1.5) == 1.5
+
+    def test_other_errors_are_ignored(self):
+        assert retry_after_seconds(ValueError("x")) is None
+
+
+class TestScheduling:
+    def test_interactive_jumps_queued_background_work(self):
+        scheduler = _unlimited(max_in_flight=1)
+        scheduler.acquire(BACKGROUND)  # occupy the only slot
+        order = []
+
+        def worker(priority, name):
+            scheduler.acquire(priority)
+            order.append(name)
+            scheduler.release(priority)
+
+        threads = [threading.Thread(target=worker, args=(BACKGROUND, "meeting"))]
+        threads[0].start()
+        time.sleep(0.05)
+        threads.append(threading.Thread(target=worker, args=(INTERACTIVE, "dictation")))
+        threads[1].start()
+        time.sleep(0.05)
+
+        assert scheduler.metrics()["queue_depth"] == {"interactive": 1, "background": 1}
+        scheduler.release(BACKGROUND)
+        for t in threads:
+            t.join(timeout=2)
+        assert order == ["dictation", "meeting"]
+
+    def test_background_leaves_a_slot_for_interactive(self):
+        scheduler = _unlimited(max_in_flight=2)
+        scheduler.acquire(BACKGROUND)
+
+        blocked = threading.Event()
+
+        def background():
+            scheduler.acquire(BACKGROUND)
+            blocked.set()
+
+        threading.Thread(target=background, daemon=True).start()
+        time.sleep(0.05)
+        assert not blocked.is_set()
+
+        waited = scheduler.acquire(INTERACTIVE)
+        assert waited < 0.05
+
+    def test_request_rate_is_limited(self):
+        scheduler = _unlimited(requests_per_second=20.0, request_burst=1)
+        started = time.monotonic()
+        for _ in range(3):
+            scheduler.run(lambda: None)
+        assert time.monotonic() - started >= 0.09
+
+    def test_upload_bytes_are_limited(self):
+        scheduler = _unlimited(upload_bytes_per_second=1000.0, upload_burst_bytes=100)
+        scheduler.run(lambda: None, nbytes=100)
+        started = time.monotonic()
+        scheduler.run(lambda: None, nbytes=100)
+        assert time.monotonic() - started >= 0.09
+
+    def test_cancelled_waiter_leaves_queue(self):
+        scheduler = _unlimited(max_in_flight=1)
+        scheduler.acquire(INTERACTIVE)
+        token = CancelToken()
+        errors = []
+
+        def waiter():
+            try:
+                scheduler.acquire(INTERACTIVE, token=token)
+            except CancelledError as e:
+                errors.append(e)
+
+        t = threading.Thread(target=waiter)
+        t.start()
+        time.sleep(0.05)
+        token.cancel()
+        t.join(timeout=2)
+        assert errors
+        assert scheduler.metrics()["queue_depth"]["interactive"] == 0
+
+    def test_429_pauses_dispatch(self):
+        scheduler = _unlimited()
+
+        def rate_limited():
+            raise RateLimited(retry_after=0.2)
+
+        with pytest.raises(RateLimited):
+            scheduler.run(rate_limited)
+        started = time.monotonic()
+        scheduler.run(lambda: None)
+        assert time.monotonic() - started >= 0.15
+        assert scheduler.metrics()["rate_limited"] == 1
+
+    def test_metrics_record_wait_times(self):
+        scheduler = _unlimited()
+        scheduler.run(lambda: None, priority=BACKGROUND)
+        metrics = scheduler.metrics()
+        assert metrics["granted"]["background"] == 1
+        assert metrics["wait_seconds"]["background"]["count"] == 1
+        assert metrics["in_flight"] == {"interactive": 0, "background": 0}
+
+
+class TestRateLimitAgainstStandIn:
+    def test_dictation_waits_out_retry_after(self):
+        from services.openai_service import OpenAIService, is_retryable_error
+        from services.request_policy import RequestPolicy
+
+        path = os.path.join(tempfile.gettempdir(), "omnivo_test_scheduler.wav")
+        with wave.open(path, "wb") as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(16000)
+            wf.writeframes(b"\x00\x00" * 1600)
+
+        try:
+            with StandInAPI(latency=0.01) as api:
+                api.fail_next(429, retry_after=0.3)
+                scheduler = _unlimited()
+                policy = RequestPolicy(retry_backoff=0.0, is_retryable=is_retryable_error)
+                service = OpenAIService(
+                    api_key="test", base_url=api.base_url, policy=policy, scheduler=scheduler
+                )
+                started = time.monotonic()
+                assert service.transcribe_audio(path) == "stand-in transcription"
+                elapsed = time.monotonic() - started
+        finally:
+            os.remove(path)
+
+        assert elapsed >= 0.25
+        assert api.request_count == 2
+        assert scheduler.metrics()["rate_limited"] == 1
@@ -0,0 +1,169 @@
+"""Tests for the background meeting audio archive."""
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+import wave
+
+import pytest
+
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.audio_archive import MANIFEST, AudioArchive
+from utils.settings import Settings
+
+
+@pytest.fixture
+def tmp_dir():
+    path = tempfile.mkdtemp(prefix="omnivo_archive_")
+    yield path
+    shutil.rmtree(path, ignore_errors=True)
+
+
+def _wav(directory, name, seconds=1.0, seed=1):
+    path = os.path.join(directory, name)
+    frames = bytes((i * seed) % 251 for i in range(int(48000 * seconds) * 2))
+    with wave.open(path, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(48000)
+        wf.writeframes(frames)
+    return path, frames
+
+
+def _archive(tmp_dir, **settings):
+    root = os.path.join(tmp_dir, "notes")
+    return AudioArchive(root=root, settings=Settings(**settings)), root
+
+
+class TestArchive:
+    def test_flac_is_lossless_and_source_removed(self, tmp_dir):
+        archive, root = _archive(tmp_dir)
+        wav_path, frames = _wav(tmp_dir, "rec.wav")
+        archive.submit(wav_path, "2026-03-02-0930")
+        archive.wait()
+
+        flac_path = os.path.join(root, "2026-03-02-0930.flac")
+        assert not os.path.exists(wav_path)
+        assert os.path.getsize(flac_path) < len(frames)
+        decoded = os.path.join(tmp_dir, "decoded.wav")
+        subprocess.run(["ffmpeg", "-loglevel", "error", "-i", flac_path, decoded], check=True)
+        with wave.open(decoded) as wf:
+            assert wf.readframes(wf.getnframes()) == frames
+        assert archive.resolve("2026-03-02-0930") == flac_path
+
+    def test_opus(self, tmp_dir):
+        archive, root = _archive(tmp_dir, archive_format="opus")
+        wav_path, _ = _wav(tmp_dir, "rec.wav")
+        archive.submit(wav_path, "m1")
+        archive.wait()
+        assert os.path.exists(os.path.join(root, "m1.opus"))
+
+    def test_duplicate_content_is_stored_once(self, tmp_dir):
+        archive, root = _archive(tmp_dir)
+        first, _ = _wav(tmp_dir, "a.wav")
+        second, _ = _wav(tmp_dir, "b.wav")
+        archive.submit(first, "m1")
+        archive.submit(second, "m2")
+        archive.wait()
+
+        assert sorted(f for f in os.listdir(root) if f.endswith(".flac")) == ["m1.flac"]
+        assert archive.resolve("m2") == os.path.join(root, "m1.flac")
+        assert archive.stats()["deduplicated"] == 1
+        assert not os.path.exists(second)
+
+    def test_on_done_gets_the_archived_file(self, tmp_dir):
+        archive, root = _archive(tmp_dir)
+        archived = []
+        for name in ("m1", "m2"):
+            path, _ = _wav(tmp_dir, f"{name}.wav")  # same audio twice
+            archive.submit(path, name, on_done=archived.append)
+        bad = os.path.join(tmp_dir, "bad.wav")
+        with open(bad, "wb") as f:
+            f.write(b"not audio")
+        archive.submit(bad, "broken", on_done=archived.append)
+        archive.wait()
+        assert archived == ["m1.flac", "m1.flac", "broken.wav"]
+
+    def test_timeline_points_at_the_deduplicated_file(self, tmp_dir):
+        from core.meeting_recorder import MeetingRecorder
+        from core.word_timeline import WordTimeline
+
+        archive, root = _archive(tmp_dir)
+        first, _ = _wav(tmp_dir, "a.wav")
+        archive.submit(first, "m1")
+        timeline_path = os.path.join(tmp_dir, "m2.words")
+        WordTimeline.from_words([("hello", 0.0, 0.5)], audio="m2.flac").save(timeline_path)
+
+        second, _ = _wav(tmp_dir, "b.wav")
+        recorder = MeetingRecorder()
+        archive.submit(
+            second, "m2", on_done=lambda name: recorder._set_timeline_audio(timeline_path, name)
+        )
+        archive.wait()
+        assert WordTimeline.load(timeline_path).audio == "m1.flac"
+
+    def test_wait_with_timeout(self, tmp_dir):
+        archive, root = _archive(tmp_dir)
+        path, _ = _wav(tmp_dir, "long.wav", seconds=20.0)
+        archive.submit(path, "long")
+        assert archive.wait(timeout=0.001) is False
+        assert archive.wait(timeout=30) is True
+
+    def test_oldest_evicted_over_size_budget(self, tmp_dir):
+        archive, root = _archive(tmp_dir)
+        for i in range(3):
+            path, _ = _wav(tmp_dir, f"{i}.wav", seed=i + 2)
+            archive.submit(path, f"m{i}")
+            archive.wait()
+            time.sleep(0.01)
+        sizes = [os.path.getsize(os.path.join(root, f"m{i}.flac")) for i in range(3)]
+
+        # Budget fits the two newest recordings only
+        archive._settings = Settings(archive_max_bytes=sizes[1] + sizes[2] + sizes[2])
+        path, _ = _wav(tmp_dir, "3.wav", seed=5)
+        archive.submit(path, "m3")
+        archive.wait()
+
+        with open(os.path.join(root, MANIFEST)) as f:
+            names = sorted(r["names"][0] for r in json.load(f)["recordings"].values())
+        assert "m0" not in names and "m3" in names
+        assert not os.path.exists(os.path.join(root, "m0.flac"))
+        assert archive.resolve("m0") is None
+        assert archive.stats()["evicted"] >= 1
+
+    def test_age_budget(self, tmp_dir):
+        archive, root = _archive(tmp_dir, archive_max_age_days=1)
+        path, _ = _wav(tmp_dir, "old.wav", seed=2)
+        archive.submit(path, "old")
+        archive.wait()
+        manifest_path = os.path.join(root, MANIFEST)
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        for entry in manifest["recordings"].values():
+            entry["created"] -= 2 * 86400
+        with open(manifest_path, "w") as f:
+            json.dump(manifest, f)
+
+        path, _ = _wav(tmp_dir, "new.wav", seed=3)
+        archive.submit(path, "new")
+        archive.wait()
+        assert archive.resolve("old") is None
+        assert archive.resolve("new")
+
+    def test_failed_encode_keeps_raw_audio(self, tmp_dir):
+        archive, root = _archive(tmp_dir)
+        bad = os.path.join(tmp_dir, "bad.wav")
+        with open(bad, "wb") as f:
+            f.write(b"not audio")
+        archive.submit(bad, "broken")
+        archive.wait()
+
+        assert archive.stats()["failed"] == 1
+        assert not os.path.exists(bad)
+        assert os.path.exists(os.path.join(root, "broken.wav"))
+        assert archive.resolve("broken") is None
+        assert not [f for f in os.listdir(root) if f.endswith(".tmp")]
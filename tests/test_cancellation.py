@@ -0,0 +1,172 @@
+"""Tests for cancelling dictation requests end to end."""
+import os
+import tempfile
+import threading
+import time
+import wave
+
+import pytest
+
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.api_scheduler import APIScheduler, INTERACTIVE
+from services.request_policy import RequestPolicy
+from utils.cancellation import CancelledError, CancelToken
+from tests.stand_in_api import StandInAPI
+
+
+@pytest.fixture
+def short_wav_path():
+    path = os.path.join(tempfile.gettempdir(), "omnivo_test_cancel.wav")
+    with wave.open(path, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(16000)
+        wf.writeframes(b"\x00\x00" * 1600)
+    yield path
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def _cancel_after(token, seconds):
+    timer = threading.Timer(seconds, token.cancel)
+    timer.start()
+    return timer
+
+
+class TestCancelToken:
+    def test_child_is_cancelled_with_parent(self):
+        parent = CancelToken()
+        child = CancelToken(parent)
+        parent.cancel()
+        assert child.cancelled
+
+    def test_child_of_cancelled_parent_starts_cancelled(self):
+        parent = CancelToken()
+        parent.cancel()
+        assert CancelToken(parent).cancelled
+
+    def test_cancelling_child_leaves_parent(self):
+        parent = CancelToken()
+        CancelToken(parent).cancel()
+        assert not parent.cancelled
+
+
+class TestPolicyCancellation:
+    def test_cancel_interrupts_in_flight_attempt(self):
+        policy = RequestPolicy(hedge_percentile=None, max_timeout=10.0)
+        attempt_tokens = []
+
+        def attempt(token, timeout):
+            attempt_tokens.append(token)
+            token.wait(10.0)
+            raise ConnectionError("connection closed")
+
+        token = CancelToken()
+        _cancel_after(token, 0.1)
+        started = time.monotonic()
+        with pytest.raises(CancelledError):
+            policy.execute(attempt, token=token)
+
+        assert time.monotonic() - started < 1.0
+        assert attempt_tokens[0].cancelled
+        stats = policy.stats()
+        assert stats["cancelled"] == 1
+        assert stats["retries"] == 0
+        assert stats["failures"] == 0
+
+    def test_cancel_during_backoff_skips_retry(self):
+        policy = RequestPolicy(hedge_percentile=None, max_retries=3, retry_backoff=5.0)
+        calls = []
+
+        def attempt(token, timeout):
+            calls.append(1)
+            raise ConnectionError("reset")
+
+        token = CancelToken()
+        _cancel_after(token, 0.1)
+        started = time.monotonic()
+        with pytest.raises(CancelledError):
+            policy.execute(attempt, token=token)
+
+        assert time.monotonic() - started < 1.0
+        assert len(calls) == 1
+
+    def test_cancelled_token_never_calls_attempt(self):
+        policy = RequestPolicy()
+        token = CancelToken()
+        token.cancel()
+        with pytest.raises(CancelledError):
+            policy.execute(lambda t, timeout: pytest.fail("attempt ran"), token=token)
+
+
+class TestSchedulerCancellation:
+    def test_cancelled_waiter_is_counted(self):
+        scheduler = APIScheduler(max_in_flight=1)
+        scheduler.acquire(INTERACTIVE)
+
+        token = CancelToken()
+        _cancel_after(token, 0.05)
+        with pytest.raises(CancelledError):
+            scheduler.acquire(INTERACTIVE, token=token)
+        scheduler.release(INTERACTIVE)
+
+        metrics = scheduler.metrics()
+        assert metrics["cancelled"]["interactive"] == 1
+        assert metrics["queue_depth"]["interactive"] == 0
+
+
+class TestServiceCancellation:
+    def test_cancel_aborts_slow_upload(self, short_wav_path):
+        from services.openai_service import OpenAIService
+
+        with StandInAPI(latency=3.0) as api:
+            policy = RequestPolicy(hedge_percentile=None, max_timeout=10.0)
+            service = OpenAIService(
+                api_key="test", base_url=api.base_url, policy=policy, scheduler=APIScheduler()
+            )
+            token = CancelToken()
+            _cancel_after(token, 0.3)
+
+            started = time.monotonic()
+            with pytest.raises(CancelledError):
+                service.transcribe_audio(short_wav_path, token)
+            elapsed = time.monotonic() - started
+
+        assert elapsed < 1.5
+        assert api.request_count == 1
+        stats = service.stats()
+        assert stats["requests_aborted"] == 1
+        assert stats["requests_avoided"] == 0
+
+    def test_cancel_before_dispatch_avoids_request(self, short_wav_path):
+        from services.openai_service import OpenAIService
+
+        with StandInAPI() as api:
+            service = OpenAIService(
+                api_key="test", base_url=api.base_url, scheduler=APIScheduler()
+            )
+            token = CancelToken()
+            token.cancel()
+            with pytest.raises(CancelledError):
+                service.transcribe_audio(short_wav_path, token)
+
+        assert api.request_count == 0
+        assert service.stats()["requests_avoided"] == 1
+
+    def test_transcriber_discards_audio_on_cancel(self, short_wav_path):
+        from core.transcriber import Transcriber
+        from services.openai_service import OpenAIService
+
+        with StandInAPI(latency=3.0) as api:
+            transcriber = Transcriber.__new__(Transcriber)
+            transcriber.openai_service = OpenAIService(
+                api_key="test", base_url=api.base_url, scheduler=APIScheduler()
+            )
+            token = CancelToken()
+            _cancel_after(token, 0.2)
+            with pytest.raises(CancelledError):
+                transcriber.transcribe_audio(short_wav_path, token)
+
+        assert not os.path.exists(short_wav_path)
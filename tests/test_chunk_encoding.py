@@ -0,0 +1,127 @@
+"""Tests for encoding meeting chunks in parallel ahead of their upload."""
+import os
+import shutil
+import subprocess
+import threading
+import time
+import wave
+
+import pytest
+
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import meeting_transcriber
+from core.meeting_transcriber import MeetingTranscriber
+from services.api_scheduler import APIScheduler
+from tests.stand_in_api import StandInAPI
+from utils.settings import Settings
+
+pytestmark = pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="needs ffmpeg")
+
+
+@pytest.fixture
+def wav_path(tmp_path):
+    path = str(tmp_path / "meeting.wav")
+    with wave.open(path, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(16000)
+        wf.writeframes(b"\x00\x00" * 16000 * 10)
+    return path
+
+
+def _wav_duration(path, tmp_path):
+    wav = str(tmp_path / "decoded.wav")
+    subprocess.run(["ffmpeg", "-v", "error", "-y", "-i", path, wav], check=True)
+    with wave.open(wav, "rb") as f:
+        return f.getnframes() / f.getframerate()
+
+
+def _settings(**overrides):
+    overrides.setdefault("max_duration_seconds", 2)
+    overrides.setdefault("safety_margin", 1.0)
+    overrides.setdefault("chunk_overlap_seconds", 0.0)
+    return Settings(**overrides)
+
+
+class SlowEncoder:
+    """Stand-in for encode_chunk that tracks how many encodes overlap."""
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.lock = threading.Lock()
+        self.running = 0
+        self.max_running = 0
+        self.finished = []
+
+    def __call__(self, source_path, start, length, chunk_path, bitrate):
+        with self.lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        time.sleep(self.seconds)
+        with open(chunk_path, "wb") as f:
+            f.write(b"mp3")
+        with self.lock:
+            self.running -= 1
+            self.finished.append(start)
+        return chunk_path
+
+
+class TestPlan:
+    def test_spans_cover_the_recording(self, wav_path):
+        spans = MeetingTranscriber(api_key="test")._plan_chunks(wav_path, 10.0, _settings())
+        assert spans == [(0.0, 2.0), (2.0, 2.0), (4.0, 2.0), (6.0, 2.0), (8.0, 2.0)]
+
+    def test_short_tail_joins_the_last_chunk(self, wav_path):
+        spans = MeetingTranscriber(api_key="test")._plan_chunks(wav_path, 10.5, _settings())
+        assert spans[-1] == (8.0, 2.5)
+        start, length = spans[-1]
+        assert int((start + length) * 1000) == 10500  # ends at total_ms
+
+
+class TestEncodeChunks:
+    def test_real_chunks_in_order(self, wav_path, tmp_path):
+        transcriber = MeetingTranscriber(api_key="test")
+        spans = transcriber._plan_chunks(wav_path, 10.0, _settings())
+        chunk_dir = tmp_path / "chunks"
+        chunk_dir.mkdir()
+        chunks = list(transcriber._encode_chunks(wav_path, spans, str(chunk_dir), _settings()))
+        assert [offset for _, offset in chunks] == [0.0, 2.0, 4.0, 6.0, 8.0]
+        for path, _ in chunks:
+            assert _wav_duration(path, tmp_path) == pytest.approx(2.0, abs=0.1)
+
+    def test_encoding_stays_bounded_ahead(self, wav_path, tmp_path, monkeypatch):
+        encoder = SlowEncoder(0.05)
+        monkeypatch.setattr(meeting_transcriber, "encode_chunk", encoder)
+        settings = _settings(chunk_encode_workers=4, chunk_encode_ahead=2)
+        transcriber = MeetingTranscriber(api_key="test")
+        spans = transcriber._plan_chunks(wav_path, 10.0, settings)
+
+        chunk_dir = tmp_path / "chunks"
+        chunk_dir.mkdir()
+        chunks = transcriber._encode_chunks(wav_path, spans, str(chunk_dir), settings)
+        path, offset = next(chunks)
+        time.sleep(0.2)  # the consumer is uploading
+        assert offset == 0.0
+        assert len(encoder.finished) == 3  # the yielded chunk + 2 ahead
+        assert len(os.listdir(chunk_dir)) == 3
+        chunks.close()
+        assert encoder.max_running <= 2
+
+    def test_encoding_overlaps_upload(self, wav_path, monkeypatch):
+        encoder = SlowEncoder(0.15)
+        monkeypatch.setattr(meeting_transcriber, "encode_chunk", encoder)
+        settings = _settings(chunk_encode_workers=2, chunk_encode_ahead=2)
+
+        with StandInAPI(latency=0.15, text="words") as api:
+            transcriber = MeetingTranscriber(
+                api_key="test", base_url=api.base_url, scheduler=APIScheduler()
+            )
+            started = time.perf_counter()
+            text = transcriber.transcribe_meeting(wav_path, settings=settings)
+            elapsed = time.perf_counter() - started
+
+        assert text == " ".join(["words"] * 5)
+        # Sequential would be 5 x (0.15 encode + 0.15 upload) = 1.5s
+        assert elapsed < 1.2
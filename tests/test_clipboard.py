@@ -0,0 +1,143 @@
+"""Tests for the clipboard manager and its pasteboard backends."""
+import os
+import time
+
+import pytest
+
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("PYNPUT_BACKEND", "dummy")
+
+from core.clipboard import WRITE_ATTEMPTS, ClipboardManager
+from services.pasteboard import (
+    CONCEALED_TYPE,
+    TEXT_TYPE,
+    TRANSIENT_TYPE,
+    MemoryPasteboard,
+    create_pasteboard,
+)
+from utils.settings import Settings
+
+
+def _manager(restore=True, delay=0.05, pasteboard=None):
+    pasteboard = pasteboard or MemoryPasteboard()
+    pasted = []
+    manager = ClipboardManager(
+        pasteboard=pasteboard,
+        # The app receiving Cmd+V reads the pasteboard
+        send_paste=lambda: pasted.append(pasteboard.text()),
+        settings=Settings(clipboard_restore=restore, clipboard_restore_delay=delay),
+    )
+    return manager, pasteboard, pasted
+
+
+def _wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+class TestPaste:
+    def test_paste_sees_the_dictation(self):
+        manager, pasteboard, pasted = _manager(restore=False)
+        assert manager.copy_and_paste("hello") is True
+        assert pasted == ["hello "]
+        assert pasteboard.text() == "hello "
+        assert manager.stats()["pastes"] == 1
+
+    def test_write_retried_when_another_app_writes(self):
+        class RacingPasteboard(MemoryPasteboard):
+            """Another app copies right after our first write."""
+
+            def write_text(self, text, transient=False):
+                count = super().write_text(text, transient)
+                if self.writes == 1:
+                    self.set_items([{TEXT_TYPE: "theirs"}])
+                return count
+
+        manager, pasteboard, pasted = _manager(restore=False, pasteboard=RacingPasteboard())
+        manager.copy_and_paste("mine")
+        assert pasted == ["mine "]
+        assert manager.stats()["write_retries"] == 1
+
+    def test_nothing_pasted_when_write_never_lands(self):
+        class StuckPasteboard(MemoryPasteboard):
+            def write_text(self, text, transient=False):
+                return self.change_count()
+
+        manager, pasteboard, pasted = _manager(pasteboard=StuckPasteboard())
+        assert manager.copy_and_paste("lost") is False
+        assert pasted == []
+        stats = manager.stats()
+        assert stats["unconfirmed"] == 1
+        assert stats["write_retries"] == WRITE_ATTEMPTS - 1
+
+
+class TestRestore:
+    def test_previous_contents_restored(self):
+        manager, pasteboard, pasted = _manager()
+        pasteboard.set_items([{TEXT_TYPE: "copied", "public.rtf": b"{\\rtf copied}"}])
+        manager.copy_and_paste("dictated")
+        assert pasted == ["dictated "]
+        # The dictation is marked so clipboard history tools skip it
+        assert TRANSIENT_TYPE in pasteboard.items[0]
+        assert _wait_for(lambda: manager.stats()["restored"] == 1)
+        assert pasteboard.items == [{TEXT_TYPE: "copied", "public.rtf": b"{\\rtf copied}"}]
+
+    def test_restore_is_asynchronous(self):
+        manager, pasteboard, _ = _manager(delay=0.5)
+        pasteboard.set_items([{TEXT_TYPE: "copied"}])
+        manager.copy_and_paste("dictated")
+        assert pasteboard.text() == "dictated "
+        manager.flush()
+        assert pasteboard.text() == "copied"
+
+    def test_not_restored_over_a_new_copy(self):
+        manager, pasteboard, _ = _manager()
+        pasteboard.set_items([{TEXT_TYPE: "old"}])
+        manager.copy_and_paste("dictated")
+        pasteboard.set_items([{TEXT_TYPE: "new"}])
+        assert _wait_for(lambda: manager.stats()["restore_skipped"] == 1)
+        assert pasteboard.text() == "new"
+
+    def test_back_to_back_pastes_restore_the_original(self):
+        manager, pasteboard, pasted = _manager(delay=0.2)
+        pasteboard.set_items([{TEXT_TYPE: "original"}])
+        manager.copy_and_paste("first")
+        manager.copy_and_paste("second")
+        assert pasted == ["first ", "second "]
+        assert _wait_for(lambda: manager.stats()["restored"] == 1)
+        assert pasteboard.text() == "original"
+
+    def test_concealed_contents_not_restored(self):
+        manager, pasteboard, _ = _manager()
+        pasteboard.set_items([{TEXT_TYPE: "hunter2", CONCEALED_TYPE: b""}])
+        manager.copy_and_paste("dictated")
+        manager.flush()
+        assert pasteboard.text() == "dictated "
+        assert TRANSIENT_TYPE not in pasteboard.items[0]
+
+    def test_restore_off(self):
+        manager, pasteboard, _ = _manager(restore=False)
+        pasteboard.set_items([{TEXT_TYPE: "copied"}])
+        manager.copy_and_paste("dictated")
+        manager.flush()
+        assert pasteboard.text() == "dictated "
+        assert manager.stats()["restored"] == 0
+
+
+class TestBackends:
+    def test_memory(self):
+        assert create_pasteboard("memory").name == "memory"
+
+    def test_unknown(self):
+        with pytest.raises(ValueError):
+            create_pasteboard("carrier-pigeon")
+
+    def test_change_count(self):
+        pasteboard = MemoryPasteboard()
+        before = pasteboard.change_count()
+        count = pasteboard.write_text("a")
+        assert count == pasteboard.change_count() == before + 1
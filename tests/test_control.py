@@ -0,0 +1,159 @@
+"""Tests for the daemon control socket."""
+import os
+import shutil
+import socket
+import tempfile
+import time
+
+import pytest
+
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import control
+
+
+@pytest.fixture
+def socket_path(monkeypatch):
+    # Short path: AF_UNIX paths are limited to ~104 bytes on macOS
+    tmp_dir = tempfile.mkdtemp(prefix="omnivo_ctl_")
+    path = os.path.join(tmp_dir, "control.sock")
+    monkeypatch.setattr(control, "SOCKET_PATH", path)
+    yield path
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+@pytest.fixture
+def server(socket_path):
+    server = control.ControlServer()
+    server.start()
+    yield server
+    server.stop()
+
+
+class TestControlProtocol:
+    def test_ping(self, server):
+        assert control.request("ping") == "pong"
+
+    def test_command_arguments(self, server):
+        server.register("add", lambda a, b: a + b)
+        assert control.request("add", a=2, b=3) == 5
+
+    def test_unknown_command(self, server):
+        with pytest.raises(control.ControlError, match="unknown command"):
+            control.request("nope")
+
+    def test_handler_error_is_reported(self, server):
+        def broken():
+            raise ValueError("boom")
+
+        server.register("broken", broken)
+        with pytest.raises(control.ControlError, match="ValueError: boom"):
+            control.request("broken")
+
+    def test_invalid_json(self, server, socket_path):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(socket_path)
+        sock.sendall(b"not json\n")
+        line = sock.makefile("rb").readline()
+        sock.close()
+        assert b"invalid JSON" in line
+
+    def test_no_daemon(self, socket_path):
+        with pytest.raises(control.ControlUnavailable):
+            control.request("ping")
+
+    def test_socket_is_private(self, server, socket_path):
+        assert os.stat(socket_path).st_mode & 0o077 == 0
+
+    def test_stale_socket_is_replaced(self, socket_path):
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale.bind(socket_path)
+        stale.close()  # file remains, nobody listening
+
+        server = control.ControlServer()
+        server.start()
+        try:
+            assert control.request("ping") == "pong"
+        finally:
+            server.stop()
+        assert not os.path.exists(socket_path)
+
+    def test_round_trip_is_fast(self, server):
+        started = time.perf_counter()
+        for _ in range(50):
+            control.request("ping")
+        per_request = (time.perf_counter() - started) / 50
+        assert per_request < 0.02
+
+
+class TestCliStatus:
+    STATE = {
+        "pid": 4242,
+        "uptime_seconds": 120.0,
+        "dictation": {
+            "recording": False,
+            "in_progress": 1,
+            "requests": {"latency": {"count": 3, "p50": 0.8, "p95": 1.5, "p99": 1.9}},
+        },
+        "meeting": {"recording": True, "transcribing": False},
+        "api": {
+            "in_flight": {"interactive": 1, "background": 2},
+            "queue_depth": {"interactive": 0, "background": 5},
+        },
+        "memory": {"rss_bytes": 150 * 1024 * 1024, "peak_rss_bytes": None},
+    }
+
+    def test_status_reads_live_state(self, server, capsys, monkeypatch):
+        import cli
+
+        def no_launchctl():
+            raise AssertionError("status should not spawn launchctl")
+
+        monkeypatch.setattr(cli, "get_status", no_launchctl)
+        server.register("status", lambda: self.STATE)
+
+        cli.cmd_status()
+        out = capsys.readouterr().out
+        assert "PID:       4242" in out
+        assert "Meeting:   recording" in out
+        assert "queued 0 / 5" in out
+        assert "p95 1.50s" in out
+        assert "RSS 150.0MB" in out
+
+    def test_status_falls_back_to_launchd(self, socket_path, capsys, monkeypatch):
+        import cli
+
+        monkeypatch.setattr(
+            cli, "get_status", lambda: {"loaded": False, "pid": None, "state": None}
+        )
+        cli.cmd_status()
+        assert "not running" in capsys.readouterr().out
+
+    def test_status_reports_a_hung_daemon(self, socket_path, capsys, monkeypatch):
+        import cli
+
+        request = control.request
+        monkeypatch.setattr(control, "request", lambda cmd, **args: request(cmd, timeout=0.1, **args))
+        hung = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        hung.bind(socket_path)
+        hung.listen(1)  # accepts the connection, never answers
+        try:
+            with pytest.raises(SystemExit) as exc:
+                cli.cmd_status()
+        finally:
+            hung.close()
+        assert exc.value.code == 1
+        assert capsys.readouterr().out == "Omnivo daemon did not respond.\n"
+
+    def test_meeting_reports_an_error_reply(self, server, capsys):
+        import cli
+
+        def broken():
+            raise RuntimeError("no microphone")
+
+        server.register("meeting.toggle", broken)
+        with pytest.raises(SystemExit) as exc:
+            cli.cmd_meeting()
+        assert exc.value.code == 1
+        assert "no microphone" in capsys.readouterr().out
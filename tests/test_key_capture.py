@@ -0,0 +1,300 @@
+"""Tests for the key capture backends and the keyboard service on top of them."""
+import contextlib
+import os
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("PYNPUT_BACKEND", "dummy")
+
+from services.key_capture import (
+    EvdevKeyCapture,
+    PynputKeyCapture,
+    SimulatedKeyCapture,
+    create_key_capture,
+)
+from services.keyboard_service import KeyboardService
+from tests.fake_evdev import (
+    KEY_A,
+    KEY_CAPSLOCK,
+    KEY_ESC,
+    KEY_LEFTCTRL,
+    KEY_LEFTSHIFT,
+    LETTER_CODES,
+    FakeKeyboard,
+    kernel_masks,
+)
+
+
+def _app():
+    app = MagicMock()
+    app.is_recording = False
+    app.cancel_dictation.return_value = 0
+
+    def start_recording():
+        app.is_recording = True
+
+    def finish_dictation():
+        app.is_recording = False
+
+    app.start_recording.side_effect = start_recording
+    app.finish_dictation.side_effect = finish_dictation
+    return app
+
+
+def _service(caps_lock=False, capture=None):
+    app = _app()
+    capture = capture or SimulatedKeyCapture(caps_lock=caps_lock)
+    service = KeyboardService(app, capture=capture)
+    service.start_listening()
+    return service, capture, app
+
+
+class TestKeyboardService:
+    def test_caps_lock_starts_and_finishes_dictation(self):
+        service, capture, app = _service()
+        capture.press("caps_lock")
+        assert app.start_recording.call_count == 1
+        capture.press("caps_lock")
+        assert app.finish_dictation.call_count == 1
+        service.stop_listening()
+
+    def test_typing_never_reaches_the_service(self):
+        keyboard = FakeKeyboard()
+        service, capture, app = _service(capture=EvdevKeyCapture(devices=[keyboard]))
+        for code in LETTER_CODES * 4:
+            keyboard.tap(code)
+        keyboard.tap(KEY_CAPSLOCK)
+        assert _wait_for(lambda: app.start_recording.call_count == 1)
+        service.stop_listening()
+        assert capture.events_handled == 1
+        # Without a kernel event mask the reader still reads every key
+        assert capture.events_read == keyboard.events_written
+        assert [call[0] for call in app.method_calls] == ["start_recording"]
+        keyboard.close()
+
+    def test_escape_only_while_recording_or_cancellable(self, monkeypatch):
+        service, capture, app = _service()
+        capture.press("esc")
+        assert capture.events_handled == 0
+
+        capture.press("caps_lock")
+        capture.press("esc")
+        assert app.recorder.clear_buffer.call_count == 1
+
+        monkeypatch.setattr(
+            "services.keyboard_service.get_settings",
+            lambda: MagicMock(dictation_cancel_window=0.05),
+        )
+        capture.press("caps_lock")
+        capture.press("esc")
+        assert app.cancel_dictation.call_count == 1
+
+        time.sleep(0.2)
+        capture.press("esc")
+        assert app.cancel_dictation.call_count == 1
+        service.stop_listening()
+
+    def test_modifiers_switch_mode_only_while_dictating(self):
+        service, capture, app = _service()
+        capture.press("shift")
+        app.set_dictation_mode.assert_not_called()
+        capture.press("caps_lock")
+        capture.press("ctrl")
+        app.set_dictation_mode.assert_called_once_with("explanation")
+        service.stop_listening()
+
+    def test_initial_state_from_backend(self):
+        service, capture, app = _service(caps_lock=True)
+        if sys.platform == "darwin":
+            pytest.skip("macOS reads the real Caps Lock state")
+        assert service.caps_lock_active
+        capture.press("caps_lock")
+        assert app.start_recording.call_count == 0
+
+    def test_falls_back_to_pynput_when_backend_fails(self, monkeypatch):
+        class Broken(SimulatedKeyCapture):
+            name = "broken"
+
+            def _start(self):
+                raise RuntimeError("no permission")
+
+        class FakePynput(SimulatedKeyCapture):
+            name = "pynput"
+
+        monkeypatch.setattr("services.keyboard_service.PynputKeyCapture", FakePynput)
+        service = KeyboardService(MagicMock(), capture=Broken())
+        service.start_listening()
+        assert isinstance(service.capture, FakePynput)
+
+
+class TestPynputBackend:
+    def test_filters_keys(self):
+        from pynput import keyboard
+
+        capture = PynputKeyCapture()
+        caps, escapes = [], []
+        capture.on_caps_lock = caps.append
+        capture.on_escape = lambda: escapes.append(True)
+
+        capture._on_press(keyboard.KeyCode.from_char("a"))
+        capture._on_release(keyboard.KeyCode.from_char("a"))
+        assert caps == [] and escapes == []
+
+        # Bluetooth keyboards: Caps Lock as vk 255
+        capture._on_press(keyboard.KeyCode.from_vk(255))
+        capture._on_release(keyboard.KeyCode.from_vk(255))
+        assert caps == ([None, None] if sys.platform == "darwin" else [True])
+
+        if keyboard.Key.esc is keyboard.Key.caps_lock:
+            pytest.skip("pynput's dummy backend has no distinct special keys")
+        capture._on_press(keyboard.Key.esc)
+        assert escapes == []
+        capture.watch_escape(True)
+        capture._on_press(keyboard.Key.esc)
+        assert escapes == [True]
+
+
+class TestCreate:
+    def test_named_backends(self):
+        assert create_key_capture("simulated").name == "simulated"
+        assert create_key_capture("pynput").name == "pynput"
+        with pytest.raises(ValueError):
+            create_key_capture("x11")
+
+    def test_auto_falls_back(self):
+        # No readable /dev/input keyboards in CI; auto must still work
+        capture = create_key_capture("auto")
+        assert capture.name in ("quartz", "evdev", "pynput")
+
+
+def _wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return condition()
+
+
+def _evdev(keyboard, escape=False):
+    capture = EvdevKeyCapture(devices=[keyboard])
+    caps, escapes, modifiers = [], [], []
+    capture.start(caps.append, lambda: escapes.append(True), modifiers.append)
+    capture.watch_escape(escape)
+    return capture, caps, escapes, modifiers
+
+
+class TestEvdevBackend:
+    def test_delivers_caps_lock_modifiers_and_watched_escape(self):
+        keyboard = FakeKeyboard(leds=[])
+        capture, caps, escapes, modifiers = _evdev(keyboard)
+        try:
+            keyboard.tap(KEY_A)
+            keyboard.tap(KEY_ESC)
+            keyboard.tap(KEY_CAPSLOCK)
+            keyboard.tap(KEY_LEFTSHIFT)
+            keyboard.tap(KEY_LEFTCTRL)
+            assert _wait_for(lambda: modifiers == ["shift", "ctrl"])
+            assert caps == [True] and escapes == []
+
+            capture.watch_escape(True)
+            keyboard.tap(KEY_ESC)
+            assert _wait_for(lambda: escapes == [True])
+            assert capture.events_handled == 4
+            assert not capture.kernel_filtered
+        finally:
+            capture.stop()
+            time.sleep(0.05)
+            keyboard.close()
+
+    def test_initial_caps_lock_from_led(self):
+        keyboard = FakeKeyboard(leds=[0x01])
+        capture, caps, _, _ = _evdev(keyboard)
+        try:
+            assert capture.caps_lock_state() is True
+            keyboard.tap(KEY_CAPSLOCK)
+            assert _wait_for(lambda: caps == [False])
+        finally:
+            capture.stop()
+            time.sleep(0.05)
+            keyboard.close()
+
+    def test_kernel_mask_keeps_typing_out(self):
+        keyboard = FakeKeyboard()
+        with kernel_masks([keyboard]):
+            capture, caps, escapes, _ = _evdev(keyboard)
+            try:
+                assert capture.kernel_filtered
+                assert keyboard.masks[0] == {1}  # EV_KEY events only
+                assert keyboard.masks[1] == {KEY_CAPSLOCK, 29, 42, 54, 97}
+                for code in LETTER_CODES:
+                    keyboard.tap(code)
+                keyboard.tap(KEY_ESC)
+                time.sleep(0.05)
+                assert capture.wakeups == 0 and capture.events_read == 0
+
+                capture.watch_escape(True)
+                assert KEY_ESC in keyboard.masks[1]
+                keyboard.tap(KEY_ESC)
+                keyboard.tap(KEY_CAPSLOCK)
+                assert _wait_for(lambda: caps == [True])
+                assert escapes == [True]
+            finally:
+                capture.stop()
+                time.sleep(0.05)
+                keyboard.close()
+
+
+class TestBenchmark:
+    TEXT_KEYS = LETTER_CODES * 8  # ~200 keystrokes
+
+    def _type(self, masked):
+        """Type at a fast typist's pace through the real evdev reader."""
+        keyboard = FakeKeyboard()
+        masks = kernel_masks([keyboard]) if masked else contextlib.nullcontext()
+        with masks:
+            capture, _, _, _ = _evdev(keyboard)
+            try:
+                for code in self.TEXT_KEYS:
+                    keyboard.tap(code, hold=0.001)
+                    time.sleep(0.001)
+                time.sleep(0.05)
+            finally:
+                capture.stop()
+                time.sleep(0.05)
+                keyboard.close()
+        return capture
+
+    def test_idle_typing_overhead(self):
+        """Per keystroke: how often the reader wakes up, how many events it
+        reads and how long it is busy."""
+        keys = len(self.TEXT_KEYS)
+        unmasked = self._type(masked=False)
+        masked = self._type(masked=True)
+        for label, capture in (("python filter", unmasked), ("kernel mask", masked)):
+            print(
+                f"\nevdev {label:<13}: {capture.wakeups / keys:.2f} wakeups/key, "
+                f"{capture.events_read / keys:.1f} events/key, "
+                f"{capture.busy_seconds / keys * 1e6:.1f}us/key"
+            )
+        # Unmasked, the reader wakes for the press and the release of every
+        # key (sometimes both in one read) and reads scan, key and sync events
+        assert unmasked.wakeups >= keys
+        assert unmasked.events_read == 6 * keys
+        assert unmasked.events_handled == 0
+        # Masked, typing never reaches the process
+        assert masked.wakeups == 0 and masked.events_read == 0
+
+    def test_pynput_runs_python_for_every_event(self):
+        from pynput import keyboard
+
+        keys = [keyboard.KeyCode.from_char(c) for c in "synthetic typing benchmark " * 400]
+        pynput_capture = PynputKeyCapture()
+        pynput_capture.on_caps_lock = pynput_capture.on_escape = lambda *a: None
+        for key in keys:
+            pynput_capture._on_press(key)
+            pynput_capture._on_release(key)
+        assert pynput_capture.events_handled == 2 * len(keys)
@@ -0,0 +1,111 @@
+"""Tests for queue-backed logging and `omnivo log` filtering."""
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+
+import pytest
+
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.log import get_logger, plain_text, setup_logging, shutdown_logging
+
+
+@pytest.fixture
+def log_path():
+    tmp_dir = tempfile.mkdtemp(prefix="omnivo_log_")
+    yield os.path.join(tmp_dir, "omnivo.log")
+    shutdown_logging()
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def _entries(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+class TestLogging:
+    def test_records_are_written_as_json_lines(self, log_path):
+        setup_logging(interactive=False, log_path=log_path)
+        get_logger("meeting").error("[bold red]Transcription failed: boom[/bold red]")
+        shutdown_logging()
+
+        (entry,) = _entries(log_path)
+        assert entry["level"] == "ERROR"
+        assert entry["component"] == "meeting"
+        assert entry["msg"] == "Transcription failed: boom"
+
+    def test_hot_threads_only_enqueue(self, log_path, monkeypatch):
+        setup_logging(interactive=False, log_path=log_path)
+        callers = []
+        original_format = logging.Formatter.format
+
+        def spy(self, record):
+            callers.append(threading.current_thread().name)
+            return original_format(self, record)
+
+        monkeypatch.setattr(logging.Formatter, "format", spy)
+
+        def hot_thread():
+            get_logger("keyboard").info("key event")
+
+        t = threading.Thread(target=hot_thread, name="listener")
+        t.start()
+        t.join()
+        shutdown_logging()
+
+        assert "listener" not in callers
+
+    def test_log_file_is_rotated_by_size(self, log_path):
+        setup_logging(interactive=False, log_path=log_path, max_bytes=2000, backup_count=2)
+        log = get_logger("dictation")
+        for i in range(200):
+            log.info(f"message {i}")
+        shutdown_logging()
+
+        assert os.path.getsize(log_path) <= 2000
+        assert os.path.exists(log_path + ".1")
+        assert os.path.exists(log_path + ".2")
+        assert not os.path.exists(log_path + ".3")
+
+    def test_plain_text_tolerates_bad_markup(self):
+        assert plain_text("[/oops] text") == "[/oops] text"
+
+
+class TestLogCommand:
+    def _write(self, path, entries):
+        with open(path, "w", encoding="utf-8") as f:
+            for entry in entries:
+                f.write(json.dumps(entry) + "\n")
+
+    def test_filters_by_level_and_component(self, log_path, capsys):
+        import cli
+
+        self._write(log_path, [
+            {"ts": "2026-01-01T10:00:00.000", "level": "INFO", "component": "keyboard", "msg": "a"},
+            {"ts": "2026-01-01T10:00:01.000", "level": "ERROR", "component": "meeting", "msg": "b"},
+            {"ts": "2026-01-01T10:00:02.000", "level": "WARNING", "component": "keyboard", "msg": "c"},
+        ])
+
+        cli.follow_log(log_path, cli._log_filter("warning", None), follow=False)
+        out = capsys.readouterr().out
+        assert " a\n" not in out
+        assert "b" in out and "c" in out
+
+        cli.follow_log(log_path, cli._log_filter(None, "keyboard"), follow=False)
+        lines = capsys.readouterr().out.splitlines()
+        assert [line[-1] for line in lines] == ["a", "c"]
+
+    def test_history_limit(self, log_path, capsys):
+        import cli
+
+        self._write(log_path, [
+            {"ts": "", "level": "INFO", "component": "app", "msg": f"m{i}"} for i in range(30)
+        ])
+        cli.follow_log(log_path, cli._log_filter(None, None), history=5, follow=False)
+        lines = capsys.readouterr().out.splitlines()
+        assert len(lines) == 5
+        assert lines[-1].endswith("m29")
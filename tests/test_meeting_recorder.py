@@ -1,6 +1,7 @@
 """Tests for MeetingRecorder file management."""
 import os
 import tempfile
+import time
 
 import pytest
 
@@ -37,3 +38,49 @@ class TestMeetingRecorderFileManagement:
         assert timestamp[4] == "-"
         assert timestamp[7] == "-"
         assert timestamp[10] == "-"
+
+
+class TestFailedTranscription:
+    def test_summary_placeholder_removed(self, tmp_path):
+        import wave
+
+        from core.audio_sources import ReplayCapture
+        from core.meeting_recorder import MeetingRecorder
+        from core.meeting_summarizer import MeetingSummarizer
+        from services.api_scheduler import APIScheduler
+        from tests.stand_in_api import StandInAPI
+        from utils.settings import Settings
+
+        wav_path = str(tmp_path / "meeting.wav")
+        with wave.open(wav_path, "wb") as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(48000)
+            wf.writeframes(b"\x01\x00" * 48000)
+
+        class FailingTranscriber:
+            def transcribe_meeting(self, path, on_chunk=None, on_words=None, settings=None):
+                on_chunk(0, 2, "first half")
+                raise RuntimeError("upload failed")
+
+        notes_dir = tmp_path / "notes"
+        capture = ReplayCapture(wav_path, speed=100.0)
+        recorder = MeetingRecorder(
+            capture=lambda: capture,
+            transcriber=FailingTranscriber(),
+            settings=Settings(
+                meeting_notes_path=str(notes_dir), meeting_summary=True, meeting_test_mode=False
+            ),
+        )
+        with StandInAPI(chat_reply=lambda messages: "summary") as api:
+            recorder._summarizer = MeetingSummarizer(
+                api_key="test", base_url=api.base_url, scheduler=APIScheduler(requests_per_second=1000)
+            )
+            recorder.start()
+            while capture.bytes_delivered < 48000 * 2:
+                time.sleep(0.01)
+            recorder.stop()
+            time.sleep(0.2)  # the map request already submitted completes
+
+        assert os.listdir(notes_dir) == []
+        assert not recorder.is_transcribing
@@ -0,0 +1,151 @@
+"""Tests for map-reduce meeting summaries."""
+import os
+import re
+import shutil
+import tempfile
+import time
+
+import pytest
+
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.meeting_summarizer import (
+    FINAL_PROMPT,
+    MAP_PROMPT,
+    REDUCE_PROMPT,
+    MeetingSummarizer,
+)
+from services.api_scheduler import APIScheduler
+from tests.stand_in_api import StandInAPI
+from utils.settings import Settings
+
+
+def _reply(messages):
+    """Deterministic replies that show how partials were combined."""
+    system, content = messages[0]["content"], messages[-1]["content"]
+    if system == MAP_PROMPT:
+        return "p" + re.match(r"Part (\d+)", content).group(1)
+    parts = content.split("\n\n---\n\n")
+    if system == REDUCE_PROMPT:
+        return "(" + "+".join(parts) + ")"
+    assert system == FINAL_PROMPT
+    return "## Summary\n\nFINAL " + " ".join(parts)
+
+
+@pytest.fixture
+def notes_dir():
+    path = tempfile.mkdtemp(prefix="omnivo_summary_")
+    yield path
+    shutil.rmtree(path, ignore_errors=True)
+
+
+def _session(api, notes_dir, fanin=2, workers=4):
+    summarizer = MeetingSummarizer(
+        api_key="test", base_url=api.base_url, scheduler=APIScheduler(requests_per_second=1000)
+    )
+    settings = Settings(summary_reduce_fanin=fanin, summary_max_workers=workers)
+    path = os.path.join(notes_dir, "meeting.summary.md")
+    return summarizer.session(path, title="2026-01-01-1000", settings=settings), path
+
+
+class TestSummarySession:
+    def test_reduces_in_meeting_order(self, notes_dir):
+        with StandInAPI(chat_reply=_reply) as api:
+            session, path = _session(api, notes_dir, fanin=2)
+            for i in range(5):
+                session.add_chunk(i, 5, f"transcript {i}")
+            notes = session.finish()
+
+        # Groups (p1+p2), (p3+p4) merge while transcribing and then merge
+        # again; the group with the last chunk goes straight to the final.
+        assert notes == "## Summary\n\nFINAL ((p1+p2)+(p3+p4)) p5"
+        assert api.request_count == 5 + 3 + 1
+
+    def test_file_has_summary_first_then_parts(self, notes_dir):
+        with StandInAPI(chat_reply=_reply) as api:
+            session, path = _session(api, notes_dir, fanin=3)
+            for i in range(3):
+                session.add_chunk(i, 3, f"transcript {i}")
+            session.finish()
+
+        with open(path, encoding="utf-8") as f:
+            content = f.read()
+        assert content.index("FINAL") < content.index("### Part 1")
+        assert content.index("### Part 1") < content.index("### Part 2") < content.index("### Part 3")
+
+    def test_parts_stream_into_file_before_finish(self, notes_dir):
+        with StandInAPI(chat_reply=_reply) as api:
+            session, path = _session(api, notes_dir)
+            session.add_chunk(0, 3, "first")
+            deadline = time.monotonic() + 5
+            while time.monotonic() < deadline:
+                with open(path, encoding="utf-8") as f:
+                    if "### Part 1" in f.read():
+                        break
+                time.sleep(0.02)
+            else:
+                pytest.fail("part summary was not streamed")
+            session.add_chunk(1, 3, "second")
+            session.add_chunk(2, 3, "third")
+            session.finish()
+
+    def test_single_chunk_takes_one_request(self, notes_dir):
+        with StandInAPI(chat_reply=_reply) as api:
+            session, _ = _session(api, notes_dir)
+            session.add_chunk(0, 1, "short meeting")
+            notes = session.finish()
+
+        assert api.request_count == 1
+        assert notes.startswith("## Summary")
+
+    def test_latency_after_last_chunk_is_one_reduce(self, notes_dir):
+        latency = 0.15
+        with StandInAPI(latency=latency, chat_reply=_reply) as api:
+            session, _ = _session(api, notes_dir, fanin=2)
+            for i in range(8):
+                session.add_chunk(i, 8, f"transcript {i}")
+                time.sleep(latency * 2)  # transcription of the next chunk
+            started = time.monotonic()
+            session.finish()
+            elapsed = time.monotonic() - started
+
+        # Last chunk's map (already under way) plus the final reduce
+        assert elapsed < latency * 3
+
+    def test_failed_map_keeps_going(self, notes_dir):
+        with StandInAPI(chat_reply=_reply) as api:
+            session, path = _session(api, notes_dir, fanin=4)
+            api.fail_next(400)
+            session.add_chunk(0, 2, "first")
+            time.sleep(0.2)
+            session.add_chunk(1, 2, "second")
+            notes = session.finish()
+
+        assert "could not be summarized" in notes
+        assert "p2" in notes
+
+    def test_sessions_keep_their_own_retry_settings(self, notes_dir):
+        summarizer = MeetingSummarizer(api_key="test", scheduler=APIScheduler())
+        first = summarizer.session(
+            os.path.join(notes_dir, "a.summary.md"), "a", Settings(request_max_retries=5)
+        )
+        second = summarizer.session(
+            os.path.join(notes_dir, "b.summary.md"), "b", Settings(request_max_retries=0)
+        )
+        assert (first.policy.max_retries, second.policy.max_retries) == (5, 0)
+        assert first.policy.tracker is summarizer.policy.tracker
+        first.cancel()
+        second.cancel()
+
+    def test_cancel_removes_the_placeholder(self, notes_dir):
+        with StandInAPI(latency=0.1, chat_reply=_reply) as api:
+            session, path = _session(api, notes_dir, workers=1)
+            assert os.path.exists(path)  # "Summarizing…" placeholder
+            for i in range(4):
+                session.add_chunk(i, 4, f"transcript {i}")
+            session.cancel()
+            time.sleep(0.3)  # the map already under way finishes
+            assert not os.path.exists(path)
+            assert api.request_count <= 1  # queued maps are skipped
+            session.add_chunk(4, 5, "late")  # ignored, not an error
@@ -85,3 +85,29 @@ class TestTranscription:
             word in result_lower
             for word in ["quick", "brown", "fox", "lazy", "dog"]
         ), f"Transcription doesn't match expected content: '{result}'"
+
+
+class TestJobSettings:
+    def test_jobs_keep_their_own_timeouts(self, monkeypatch, tmp_path):
+        """Concurrent jobs don't change each other's (or the shared) policy."""
+        from utils.settings import Settings
+
+        class Scheduler:
+            def run(self, fn, priority=None, nbytes=0, token=None):
+                return fn()
+
+        seen = []
+        monkeypatch.setattr(
+            MeetingTranscriber, "_transcribe_once",
+            lambda self, path, language, timeout, model, timed=False: seen.append(timeout) or "ok",
+        )
+        transcriber = MeetingTranscriber(api_key="test", scheduler=Scheduler())
+        chunk = tmp_path / "chunk.mp3"
+        chunk.write_bytes(b"mp3")
+        before = (transcriber.policy.max_retries, transcriber.policy.max_timeout)
+
+        transcriber._transcribe_file(str(chunk), settings=Settings(meeting_request_timeout=30.0))
+        transcriber._transcribe_file(str(chunk), settings=Settings(meeting_request_timeout=90.0))
+
+        assert seen == [30.0, 90.0]
+        assert (transcriber.policy.max_retries, transcriber.policy.max_timeout) == before
@@ -0,0 +1,170 @@
+"""Tests for the daemon memory telemetry."""
+import os
+import time
+import tracemalloc
+
+import pytest
+
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.memory import MAX_SNAPSHOTS, MemoryMonitor, current_rss_bytes
+from utils.settings import Settings
+
+
+class FakeRSS:
+    def __init__(self, value=100):
+        self.value = value
+
+    def __call__(self):
+        return self.value
+
+
+@pytest.fixture
+def tracing():
+    was_tracing = tracemalloc.is_tracing()
+    yield
+    if not was_tracing:
+        tracemalloc.stop()
+
+
+def _monitor(rss=None, **settings):
+    return MemoryMonitor(settings=Settings(**settings), rss=rss or FakeRSS())
+
+
+class TestSampling:
+    def test_current_rss(self):
+        rss = current_rss_bytes()
+        assert rss is None or rss > 1024 * 1024
+
+    def test_history_is_bounded(self):
+        rss = FakeRSS()
+        monitor = _monitor(rss, memory_history_samples=3)
+        for value in range(5):
+            rss.value = value
+            monitor.sample()
+        assert [r for _, r in monitor.history()] == [2, 3, 4]
+
+    def test_budget_warns_once_per_crossing(self, caplog):
+        rss = FakeRSS(50)
+        monitor = _monitor(rss, memory_budget_bytes=100)
+        for value in (50, 150, 160, 50, 170):
+            rss.value = value
+            monitor.sample()
+        warnings = [r for r in caplog.records if "memory budget" in r.getMessage()]
+        assert len(warnings) == 2
+
+    def test_background_thread_samples(self):
+        monitor = _monitor(memory_sample_interval=0.01)
+        monitor.start()
+        try:
+            deadline = time.monotonic() + 2
+            while len(monitor.history()) < 3 and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            monitor.stop()
+        assert len(monitor.history()) >= 3
+
+
+class TestJobs:
+    def test_job_records_peak(self):
+        rss = FakeRSS(100)
+        monitor = _monitor(rss)
+        with monitor.job("meeting") as job:
+            rss.value = 400
+            monitor.sample()
+            rss.value = 200
+        assert job["rss_start"] == 100
+        assert job["rss_peak"] == 400
+        assert job["rss_end"] == 200
+        assert monitor.jobs("meeting")[0]["kind"] == "meeting"
+        assert monitor.jobs("dictation") == []
+
+    def test_job_recorded_when_it_fails(self):
+        monitor = _monitor()
+        with pytest.raises(ValueError):
+            with monitor.job("dictation"):
+                raise ValueError("boom")
+        assert len(monitor.jobs("dictation")) == 1
+
+    def test_running_job_is_sampled_quickly(self):
+        rss = FakeRSS(100)
+        monitor = _monitor(rss, memory_sample_interval=60)
+        monitor.start()
+        try:
+            with monitor.job("meeting") as job:
+                time.sleep(0.05)
+                rss.value = 900
+                time.sleep(0.6)
+                rss.value = 100
+        finally:
+            monitor.stop()
+        assert job["rss_peak"] == 900
+
+    def test_report(self):
+        rss = FakeRSS(100)
+        monitor = _monitor(rss, memory_budget_bytes=1000)
+        monitor.sample()
+        with monitor.job("dictation"):
+            rss.value = 300
+            monitor.sample()
+        report = monitor.report()
+        assert report["rss_bytes"] == 300
+        assert report["budget_bytes"] == 1000
+        assert report["history"]["1h"] == {"min": 100, "max": 300, "last": 300, "count": 3}
+        assert report["job_peaks"] == {"dictation": 300}
+        assert report["tracing"] in (True, False)
+
+
+class TestTracing:
+    def test_snapshot_requires_tracing(self):
+        monitor = _monitor()
+        if tracemalloc.is_tracing():
+            pytest.skip("tracemalloc already running")
+        with pytest.raises(RuntimeError):
+            monitor.snapshot("a")
+
+    def test_diff_finds_growth(self, tracing):
+        monitor = _monitor()
+        monitor.start_tracing()
+        monitor.snapshot("before")
+        hoard = [bytearray(1024) for _ in range(2000)]
+        result = monitor.diff("before", limit=5)
+
+        assert result["from"] == "before"
+        assert result["size_diff_bytes"] > 1024 * 1024
+        assert os.path.basename(__file__) in result["top"][0]["location"]
+        by_file = monitor.diff("before", limit=5, group_by="filename")
+        assert by_file["top"][0]["location"].startswith(__file__)
+        del hoard
+
+    def test_diff_between_named_snapshots(self, tracing):
+        monitor = _monitor()
+        monitor.start_tracing()
+        monitor.snapshot("a")
+        monitor.snapshot("b")
+        assert monitor.diff("a", "b")["to"] == "b"
+        with pytest.raises(KeyError):
+            monitor.diff("a", "missing")
+        with pytest.raises(ValueError):
+            monitor.snapshot(group_by="function")
+
+    def test_diff_against_now_with_all_snapshots_kept(self, tracing):
+        monitor = _monitor()
+        monitor.start_tracing()
+        labels = [monitor.snapshot(limit=0)["label"] for _ in range(MAX_SNAPSHOTS + 2)]
+
+        assert len(set(labels)) == len(labels)  # default labels never repeat
+        kept = monitor.report()["snapshots"]
+        assert kept == labels[-MAX_SNAPSHOTS:]
+        assert monitor.diff(kept[0])["to"] == "now"
+        assert monitor.report()["snapshots"] == kept  # "now" is not stored
+
+    def test_stop_tracing_drops_snapshots(self, tracing):
+        monitor = _monitor()
+        monitor.start_tracing()
+        monitor.snapshot("a")
+        assert monitor.report()["snapshots"] == ["a"]
+        monitor.stop_tracing()
+        assert monitor.report()["snapshots"] == []
+        assert not tracemalloc.is_tracing()
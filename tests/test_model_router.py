@@ -0,0 +1,179 @@
+"""Tests for routing dictations between transcription models."""
+import os
+import tempfile
+import time
+import wave
+
+import pytest
+
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.api_scheduler import APIScheduler
+from services.model_router import ModelRouter, ModelStats
+from services.openai_service import OpenAIService, clip_duration, is_retryable_error
+from services.request_policy import RequestPolicy
+from tests.stand_in_api import StandInAPI
+from utils.settings import Settings
+
+SLOW, FAST = "whisper-1", "gpt-4o-mini-transcribe"
+
+
+def _settings(**overrides):
+    overrides.setdefault("dictation_fallback_models", FAST)
+    overrides.setdefault("dictation_latency_budget", 0.2)
+    overrides.setdefault("router_probe_every", 0)
+    return Settings(**overrides)
+
+
+@pytest.fixture
+def wav_path():
+    path = os.path.join(tempfile.gettempdir(), "omnivo_test_router.wav")
+    with wave.open(path, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(16000)
+        wf.writeframes(b"\x00\x00" * 16000 * 2)
+    yield path
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def _p95(samples):
+    samples = sorted(samples)
+    return samples[max(0, int(round(0.95 * len(samples))) - 1)]
+
+
+class TestModelStats:
+    def test_predicts_from_clip_length(self):
+        stats = ModelStats(window=50)
+        for duration in (2, 4, 6, 8, 10):
+            stats.record(duration, 0.2 + 0.1 * duration)
+        assert stats.predict(20) == pytest.approx(2.2)
+        assert stats.predict(None) == pytest.approx(0.8)
+
+    def test_error_rate(self):
+        stats = ModelStats(window=50)
+        stats.record(1, 0.1)
+        stats.record(1, failed=True)
+        assert stats.error_rate() == 0.5
+
+
+class TestModelRouter:
+    def _learn(self, router, latencies, duration=5.0):
+        for _ in range(3):
+            for model, seconds in latencies.items():
+                router.record(model, duration, seconds)
+
+    def test_prefers_first_model_within_budget(self):
+        router = ModelRouter(_settings(dictation_latency_budget=1.0))
+        self._learn(router, {SLOW: 0.5, FAST: 0.1})
+        assert router.choose(5.0) == SLOW
+
+    def test_moves_to_faster_model_over_budget(self):
+        router = ModelRouter(_settings())
+        self._learn(router, {SLOW: 0.5, FAST: 0.1})
+        assert router.choose(5.0) == FAST
+
+    def test_clip_length_changes_choice(self):
+        router = ModelRouter(_settings(dictation_latency_budget=1.0))
+        for duration in (2, 4, 6):
+            router.record(SLOW, duration, 0.1 * duration)  # 0.1s per audio second
+            router.record(FAST, duration, 0.3)
+        assert router.choose(5.0) == SLOW
+        assert router.choose(30.0) == FAST
+
+    def test_unmeasured_models_are_tried_first(self):
+        router = ModelRouter(_settings())
+        assert router.choose(1.0) == SLOW
+        self._learn(router, {SLOW: 0.5})
+        assert router.choose(1.0) == FAST
+
+    def test_failing_model_is_skipped(self):
+        router = ModelRouter(_settings(dictation_latency_budget=1.0, router_cooldown=60))
+        self._learn(router, {SLOW: 0.5, FAST: 0.1})
+        for _ in range(3):
+            router.record(SLOW, 5.0, failed=True)
+        assert router.choose(5.0) == FAST
+        assert router.stats()["models"][SLOW]["degraded"]
+
+    def test_retry_goes_elsewhere(self):
+        router = ModelRouter(_settings(dictation_latency_budget=1.0))
+        self._learn(router, {SLOW: 0.5, FAST: 0.1})
+        assert router.choose(5.0, tried=(SLOW,)) == FAST
+        assert router.stats()["failovers"] == 1
+        assert router.choose(5.0, tried=(SLOW, FAST)) == SLOW  # nothing else left
+
+    def test_probes_least_recently_used(self):
+        router = ModelRouter(_settings(router_probe_every=4))
+        self._learn(router, {SLOW: 0.5, FAST: 0.1})
+        chosen = [router.choose(5.0) for _ in range(4)]
+        assert chosen == [FAST, FAST, FAST, SLOW]
+        assert router.stats()["probes"] == 1
+
+
+class TestOpenAIServiceRouting:
+    def _service(self, api, settings):
+        return OpenAIService(
+            api_key="test", base_url=api.base_url,
+            policy=RequestPolicy(
+                hedge_percentile=None, retry_backoff=0.0, max_retries=2,
+                is_retryable=is_retryable_error,
+            ),
+            scheduler=APIScheduler(requests_per_second=100, request_burst=100),
+            router=ModelRouter(settings),
+        )
+
+    def test_clip_duration(self, wav_path):
+        assert clip_duration(wav_path) == pytest.approx(2.0)
+        assert clip_duration(__file__) is None
+
+    def test_lower_p95_with_skewed_model_latency(self, wav_path):
+        """whisper-1 is slow on the stand-in; routing brings p95 down."""
+        latency = {SLOW: 0.15, FAST: 0.01}
+
+        def run(settings, n=40):
+            with StandInAPI(latency=lambda number, fields: latency[fields["model"]]) as api:
+                service = self._service(api, settings)
+                seconds = []
+                for _ in range(n):
+                    started = time.perf_counter()
+                    service.transcribe_audio(wav_path)
+                    seconds.append(time.perf_counter() - started)
+            return _p95(seconds)
+
+        fixed = run(_settings(dictation_fallback_models=""))
+        routed = run(_settings(router_min_samples=1, dictation_latency_budget=0.1))
+        assert routed < fixed / 2
+
+    def test_fails_over_to_working_model(self, wav_path):
+        with StandInAPI(text="hello") as api:
+            api.fail_model(SLOW)
+            service = self._service(api, _settings(dictation_latency_budget=5.0))
+            assert service.transcribe_audio(wav_path) == "hello"
+            models = [r["fields"]["model"] for r in api.requests]
+            assert models == [SLOW, FAST]
+
+            # Once marked failing, whisper-1 isn't tried first any more
+            service.transcribe_audio(wav_path)
+            api.requests.clear()
+            service.transcribe_audio(wav_path)
+            assert [r["fields"]["model"] for r in api.requests] == [FAST]
+        routing = service.stats()["routing"]
+        assert routing["models"][SLOW]["degraded"]
+        assert routing["failovers"] >= 1
+
+    def test_queue_wait_not_counted_as_latency(self, wav_path):
+        class BusyScheduler(APIScheduler):
+            """Every request waits behind other work for its slot."""
+
+            def acquire(self, *args, **kwargs):
+                time.sleep(0.2)
+                return super().acquire(*args, **kwargs)
+
+        with StandInAPI(latency=0.01) as api:
+            service = self._service(api, _settings(dictation_fallback_models=""))
+            service.scheduler = BusyScheduler(requests_per_second=100, request_burst=100)
+            service.transcribe_audio(wav_path)
+        ((_, seconds),) = service.router._models[SLOW].samples
+        assert seconds < 0.15
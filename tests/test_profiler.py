@@ -0,0 +1,176 @@
+"""Tests for the sampling CPU profiler."""
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+import pytest
+
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.profiler import ProfilerControl, SamplingProfiler
+
+
+@pytest.fixture
+def out_dir():
+    path = tempfile.mkdtemp(prefix="omnivo_profile_")
+    yield path
+    shutil.rmtree(path, ignore_errors=True)
+
+
+def burn_cpu(stop):
+    n = 0
+    while not stop.is_set():
+        for i in range(1000):
+            n += i * i
+    return n
+
+
+def idle(stop):
+    stop.wait()
+
+
+def read_pipe(fd):
+    while os.read(fd, 1):
+        pass
+
+
+@pytest.fixture
+def workload():
+    stop = threading.Event()
+    threads = [
+        threading.Thread(target=burn_cpu, args=(stop,), name="busy-worker", daemon=True),
+        threading.Thread(target=idle, args=(stop,), name="idle-worker", daemon=True),
+    ]
+    for thread in threads:
+        thread.start()
+    yield
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+
+@pytest.fixture
+def blocked_reader():
+    """A thread blocked in os.read on a pipe, like the audio and worker readers."""
+    r, w = os.pipe()
+    thread = threading.Thread(target=read_pipe, args=(r,), name="pipe-reader", daemon=True)
+    thread.start()
+    yield
+    os.close(w)
+    thread.join()
+    os.close(r)
+
+
+def _profile(out_dir, seconds=0.5, **kwargs):
+    profiler = SamplingProfiler(interval=0.005, output_dir=out_dir, **kwargs)
+    profiler.start(seconds)
+    profiler.wait()
+    return profiler, profiler.stop()
+
+
+needs_thread_cpu = pytest.mark.skipif(
+    not os.path.isdir("/proc/self/task") and sys.platform != "darwin",
+    reason="needs per-thread CPU time",
+)
+
+
+class TestSamplingProfiler:
+    @needs_thread_cpu
+    def test_cpu_time_finds_busy_thread(self, out_dir, workload, blocked_reader):
+        profiler, result = _profile(out_dir)
+
+        assert result["weighting"] == "cpu"
+        assert result["samples"] > 20
+        assert "burn_cpu" in result["top"][0][0]
+        with open(result["collapsed"]) as f:
+            lines = f.read().splitlines()
+        assert any(line.startswith("busy-worker;") and "burn_cpu" in line for line in lines)
+        assert not any(line.startswith("idle-worker;") for line in lines)
+        assert not any(line.startswith("pipe-reader;") for line in lines)
+
+    @pytest.mark.skipif(sys.platform != "darwin", reason="mach thread_info")
+    def test_mach_thread_cpu(self, workload):
+        from utils.profiler import _MachThreadCPU
+
+        busy = next(t for t in threading.enumerate() if t.name == "busy-worker")
+        idle_thread = next(t for t in threading.enumerate() if t.name == "idle-worker")
+        cpu = _MachThreadCPU()
+        before = cpu.times([busy.native_id, idle_thread.native_id])
+        time.sleep(0.3)
+        after = cpu.times([busy.native_id, idle_thread.native_id])
+        assert after[busy.native_id] - before[busy.native_id] > 0.05
+        assert after[idle_thread.native_id] - before[idle_thread.native_id] < 0.05
+
+    def test_wall_time_drops_idle_stacks(self, out_dir, workload):
+        profiler, result = _profile(out_dir, cpu_time=False)
+
+        assert result["weighting"] == "wall"
+        collapsed = profiler.collapsed()
+        assert "burn_cpu" in collapsed
+        assert "idle-worker" not in collapsed
+
+    def test_wall_time_drops_threads_blocked_in_c(self, out_dir, workload, blocked_reader):
+        profiler, result = _profile(out_dir, cpu_time=False)
+
+        collapsed = profiler.collapsed()
+        assert "burn_cpu" in collapsed
+        assert "pipe-reader" not in collapsed
+
+    def test_collapsed_format(self, out_dir, workload):
+        _, result = _profile(out_dir, seconds=0.3, cpu_time=False)
+        with open(result["collapsed"]) as f:
+            for line in f.read().splitlines():
+                stack, count = line.rsplit(" ", 1)
+                assert int(count) > 0
+                assert len(stack.split(";")) >= 2
+
+    def test_speedscope_document(self, out_dir, workload):
+        _, result = _profile(out_dir, seconds=0.3)
+        with open(result["speedscope"]) as f:
+            doc = json.load(f)
+
+        frames = doc["shared"]["frames"]
+        assert doc["profiles"]
+        for profile in doc["profiles"]:
+            assert profile["type"] == "sampled"
+            assert len(profile["samples"]) == len(profile["weights"])
+            assert all(0 <= i < len(frames) for stack in profile["samples"] for i in stack)
+        assert any(frame["name"] == "burn_cpu" for frame in frames)
+
+    def test_stop_early(self, out_dir):
+        profiler = SamplingProfiler(interval=0.005, output_dir=out_dir)
+        profiler.start(60)
+        time.sleep(0.1)
+        started = time.monotonic()
+        result = profiler.stop()
+        assert time.monotonic() - started < 1
+        assert os.path.exists(result["speedscope"])
+
+    def test_overhead_is_low(self, out_dir, workload):
+        _, result = _profile(out_dir, seconds=1.0)
+        assert result["overhead"] < 0.1
+
+
+class TestProfilerControl:
+    def test_one_profile_at_a_time(self, out_dir):
+        control = ProfilerControl(output_dir=out_dir)
+        control.start(seconds=5, interval=0.005)
+        assert control.status()["running"]
+        with pytest.raises(RuntimeError):
+            control.start(seconds=5)
+        result = control.stop()
+        assert result["samples"] >= 0
+        assert not control.status()["running"]
+        with pytest.raises(RuntimeError):
+            control.stop()
+
+    def test_collects_finished_profile(self, out_dir):
+        control = ProfilerControl(output_dir=out_dir)
+        control.start(seconds=0.1, interval=0.005)
+        time.sleep(0.3)
+        assert not control.status()["running"]
+        assert os.path.exists(control.stop()["collapsed"])
@@ -0,0 +1,181 @@
+"""Tests for adaptive timeouts, retries and hedged transcription requests."""
+import os
+import tempfile
+import time
+import wave
+
+import pytest
+
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.request_policy import LatencyTracker, RequestPolicy
+from tests.stand_in_api import StandInAPI
+
+
+def _warm_policy(latency=0.05, samples=20, **kwargs):
+    tracker = LatencyTracker()
+    for _ in range(samples):
+        tracker.record(latency)
+    kwargs.setdefault("retry_backoff", 0.0)
+    return RequestPolicy(tracker=tracker, **kwargs)
+
+
+@pytest.fixture
+def short_wav_path():
+    path = os.path.join(tempfile.gettempdir(), "omnivo_test_policy.wav")
+    with wave.open(path, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(16000)
+        wf.writeframes(b"\x00\x00" * 1600)
+    yield path
+    if os.path.exists(path):
+        os.remove(path)
+
+
+class TestLatencyTracker:
+    def test_empty_tracker_has_no_percentile(self):
+        assert LatencyTracker().percentile(95) is None
+
+    def test_percentiles(self):
+        tracker = LatencyTracker()
+        for i in range(1, 101):
+            tracker.record(i / 100)
+        assert tracker.percentile(50) == pytest.approx(0.50)
+        assert tracker.percentile(95) == pytest.approx(0.95)
+        assert tracker.summary()["count"] == 100
+
+    def test_window_drops_old_samples(self):
+        tracker = LatencyTracker(window=10)
+        for _ in range(10):
+            tracker.record(5.0)
+        for _ in range(10):
+            tracker.record(0.1)
+        assert tracker.percentile(99) == pytest.approx(0.1)
+
+
+class TestRequestPolicy:
+    def test_cold_policy_uses_defaults(self):
+        policy = RequestPolicy(default_hedge_delay=4.0, max_timeout=30.0)
+        assert policy.hedge_delay() == 4.0
+        assert policy.timeout() == 30.0
+
+    def test_warm_policy_adapts_to_latency(self):
+        policy = _warm_policy(latency=2.0, min_timeout=1.0, max_timeout=60.0)
+        assert policy.hedge_delay() == pytest.approx(2.0)
+        assert policy.timeout() == pytest.approx(6.0)
+
+    def test_derived_policy_shares_history_not_values(self):
+        policy = _warm_policy(latency=2.0, max_retries=2, min_timeout=1.0)
+        job = policy.derive(max_retries=0, min_timeout=10.0)
+
+        assert (policy.max_retries, policy.min_timeout) == (2, 1.0)
+        assert job.timeout() == pytest.approx(10.0)
+        job.execute(lambda token, timeout: "ok")
+        assert len(policy.tracker) == 21
+        assert policy.stats()["requests"] == 1
+        with pytest.raises(AttributeError):
+            policy.derive(max_retry=1)
+
+    def test_retries_transient_errors(self):
+        policy = _warm_policy(max_retries=2)
+        calls = []
+
+        def attempt(token, timeout):
+            calls.append(1)
+            if len(calls) < 3:
+                raise ConnectionError("flaky")
+            return "ok"
+
+        assert policy.execute(attempt) == "ok"
+        assert len(calls) == 3
+        assert policy.stats()["retries"] == 2
+
+    def test_gives_up_after_max_retries(self):
+        policy = _warm_policy(max_retries=1)
+
+        def attempt(token, timeout):
+            raise ConnectionError("down")
+
+        with pytest.raises(ConnectionError):
+            policy.execute(attempt)
+        assert policy.stats()["failures"] == 1
+
+    def test_non_retryable_error_is_raised_immediately(self):
+        policy = _warm_policy(max_retries=3)
+        calls = []
+
+        def attempt(token, timeout):
+            calls.append(1)
+            raise ValueError("bad request")
+
+        with pytest.raises(ValueError):
+            policy.execute(attempt)
+        assert len(calls) == 1
+
+    def test_hedge_wins_and_loser_is_cancelled(self):
+        policy = _warm_policy(latency=0.05, min_timeout=2.0)
+        tokens = []
+
+        def attempt(token, timeout):
+            tokens.append(token)
+            if len(tokens) == 1:
+                token.wait(5.0)  # stuck primary, released by cancellation
+                return "slow"
+            return "fast"
+
+        started = time.monotonic()
+        assert policy.execute(attempt) == "fast"
+        assert time.monotonic() - started < 1.0
+        assert tokens[0].cancelled
+        assert not tokens[1].cancelled
+        assert policy.stats()["hedges_won"] == 1
+
+    def test_deadline_times_out_and_retries(self):
+        policy = _warm_policy(
+            latency=0.05, min_timeout=0.2, max_timeout=0.2, max_retries=1,
+            default_hedge_delay=None, hedge_percentile=100,
+        )
+        calls = []
+
+        def attempt(token, timeout):
+            calls.append(token)
+            if len(calls) <= 2:  # primary and its hedge both hang
+                token.wait(5.0)
+                return "late"
+            return "ok"
+
+        assert policy.execute(attempt) == "ok"
+        assert all(token.cancelled for token in calls[:2])
+        assert policy.stats()["timeouts"] == 1
+
+
+class TestHedgingAgainstStandIn:
+    def test_slow_request_is_hedged(self, short_wav_path):
+        from services.openai_service import OpenAIService
+
+        slow_first = lambda n, fields: 3.0 if n == 0 else 0.05
+        with StandInAPI(latency=slow_first, text="hedged") as api:
+            policy = _warm_policy(latency=0.1, min_timeout=2.0)
+            service = OpenAIService(api_key="test", base_url=api.base_url, policy=policy)
+
+            started = time.monotonic()
+            assert service.transcribe_audio(short_wav_path) == "hedged"
+            elapsed = time.monotonic() - started
+
+        assert elapsed < 1.5
+        assert api.request_count == 2
+        assert policy.stats()["hedges_won"] == 1
+
+    def test_fast_request_is_not_hedged(self, short_wav_path):
+        from services.openai_service import OpenAIService
+
+        with StandInAPI(latency=0.01) as api:
+            policy = _warm_policy(latency=1.0)
+            service = OpenAIService(api_key="test", base_url=api.base_url, policy=policy)
+            for _ in range(3):
+                assert service.transcribe_audio(short_wav_path) == "stand-in transcription"
+
+        assert api.request_count == 3
+        assert policy.stats()["hedges_sent"] == 0
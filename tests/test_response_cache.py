@@ -0,0 +1,122 @@
+"""Tests for the reply cache of the context-aware dictation modes."""
+import os
+import time
+from unittest.mock import MagicMock
+
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.processor import CONTEXT, EXPLANATION, TextProcessor
+from core.response_cache import ResponseCache, cache_key, normalize_prompt
+from core.screen_context import ScreenImage
+from utils.settings import Settings
+
+
+def _screen(png):
+    return ScreenImage(png, 800, 500, 0)
+
+
+class TestKeys:
+    def test_normalization(self):
+        assert normalize_prompt("  Explain   THIS code. ") == "explain this code"
+        assert normalize_prompt("What is this?!") == "what is this"
+
+    def test_key_covers_mode_model_and_context(self):
+        base = cache_key("explain this", EXPLANATION, "gpt-4o", "ab")
+        assert cache_key("Explain this.", EXPLANATION, "gpt-4o", "ab") == base
+        assert cache_key("explain this", CONTEXT, "gpt-4o", "ab") != base
+        assert cache_key("explain this", EXPLANATION, "gpt-4o-mini", "ab") != base
+        assert cache_key("explain this", EXPLANATION, "gpt-4o", "cd") != base
+
+
+class TestResponseCache:
+    def test_memory_lru(self):
+        cache = ResponseCache(":memory:", settings=Settings(response_cache_entries=2))
+        cache.put("a", "1")
+        cache.put("b", "2")
+        assert cache.get("a") == "1"
+        cache.put("c", "3")  # evicts b from memory
+        assert cache.stats()["memory_entries"] == 2
+        assert cache.get("b") == "2"  # still on disk
+        stats = cache.stats()
+        assert (stats["memory_hits"], stats["disk_hits"], stats["misses"]) == (1, 1, 0)
+        assert cache.get("missing") is None
+        assert cache.stats()["hit_rate"] == round(2 / 3, 3)
+
+    def test_disk_tier_survives_restart(self, tmp_path):
+        path = str(tmp_path / "responses.db")
+        cache = ResponseCache(path, settings=Settings())
+        cache.put("key", "reply")
+        cache.close()
+
+        reopened = ResponseCache(path, settings=Settings())
+        assert reopened.get("key") == "reply"
+        assert reopened.stats()["disk_hits"] == 1
+        assert reopened.get("key") == "reply"
+        assert reopened.stats()["memory_hits"] == 1
+
+    def test_disk_entries_bounded(self, tmp_path):
+        cache = ResponseCache(str(tmp_path / "responses.db"),
+                              settings=Settings(response_cache_entries=1, response_cache_disk_entries=3))
+        for i in range(5):
+            cache.put(f"k{i}", str(i))
+            time.sleep(0.001)
+        count = cache._connection().execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        assert count == 3
+        assert cache.get("k0") is None
+        assert cache.get("k4") == "4"
+
+    def test_ttl(self, monkeypatch):
+        cache = ResponseCache(":memory:", settings=Settings(response_cache_ttl=60))
+        cache.put("key", "reply")
+        now = time.time()
+        monkeypatch.setattr(time, "time", lambda: now + 61)
+        assert cache.get("key") is None
+        assert cache.stats()["misses"] == 1
+
+
+class TestProcessorCaching:
+    def _processor(self, monkeypatch, **settings):
+        import core.processor
+
+        monkeypatch.setattr(core.processor, "get_settings", lambda: Settings(**settings))
+        service = MagicMock()
+        service.complete.return_value = "answer"
+        cache = ResponseCache(":memory:", settings=Settings())
+        return TextProcessor(openai_service=service, cache=cache), service
+
+    def test_repeat_on_same_screen_is_cached(self, monkeypatch):
+        processor, service = self._processor(monkeypatch)
+        assert processor.process_transcription("explain this", EXPLANATION, _screen(b"png one")) == "answer"
+        started = time.perf_counter()
+        assert processor.process_transcription("Explain this.", EXPLANATION, _screen(b"png one")) == "answer"
+        assert time.perf_counter() - started < 0.05
+        assert service.complete.call_count == 1
+        assert processor.cache_stats()["hit_rate"] == 0.5
+
+    def test_changed_screen_asks_again(self, monkeypatch):
+        processor, service = self._processor(monkeypatch)
+        processor.process_transcription("explain this", EXPLANATION, _screen(b"png one"))
+        processor.process_transcription("explain this", EXPLANATION, _screen(b"png two"))
+        assert service.complete.call_count == 2
+
+    def test_keyed_on_the_image_sent(self, monkeypatch):
+        """Screens with the same perceptual hash but different pixels differ."""
+        processor, service = self._processor(monkeypatch)
+        processor.process_transcription("explain this", EXPLANATION, ScreenImage(b"png one", 800, 500, 0xAB))
+        processor.process_transcription("explain this", EXPLANATION, ScreenImage(b"png two", 800, 500, 0xAB))
+        assert service.complete.call_count == 2
+
+    def test_disabled(self, monkeypatch):
+        processor, service = self._processor(monkeypatch, response_cache=False)
+        processor.process_transcription("explain this", EXPLANATION)
+        processor.process_transcription("explain this", EXPLANATION)
+        assert service.complete.call_count == 2
+        assert processor.cache_stats()["hit_rate"] is None
+
+    def test_empty_reply_not_cached(self, monkeypatch):
+        processor, service = self._processor(monkeypatch)
+        service.complete.return_value = ""
+        processor.process_transcription("explain this", EXPLANATION)
+        service.complete.return_value = "answer"
+        assert processor.process_transcription("explain this", EXPLANATION) == "answer"
@@ -0,0 +1,231 @@
+"""Tests for screen context capture and the context-aware dictation modes."""
+import base64
+import os
+import struct
+import threading
+import time
+import zlib
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.processor import CONTEXT, EXPLANATION, TRANSCRIPTION, TextProcessor
+from core.response_cache import ResponseCache
+from core.screen_context import ScreenContext, dhash, downscale, encode_png, hamming
+from services.api_scheduler import APIScheduler
+from services.openai_service import OpenAIService
+from tests.stand_in_api import StandInAPI
+from utils.settings import Settings
+
+
+def _screen(seed=0, width=1600, height=1000):
+    """A screen-like frame: flat background with a few text-like blocks."""
+    rng = np.random.default_rng(seed)
+    frame = np.full((height, width, 3), 240, dtype=np.uint8)
+    for _ in range(12):
+        y, x = rng.integers(0, height - 80), rng.integers(0, width - 300)
+        frame[y:y + 60, x:x + 280] = rng.integers(0, 120, 3)
+    return frame
+
+
+class FakeScreen:
+    def __init__(self, frame, delay=0.0):
+        self.frame = frame
+        self.delay = delay
+        self.grabs = 0
+
+    def grab(self):
+        self.grabs += 1
+        time.sleep(self.delay)
+        return self.frame
+
+
+def _decode_png(png):
+    assert png[:8] == b"\x89PNG\r\n\x1a\n"
+    width, height = struct.unpack(">II", png[16:24])
+    pos, idat = 8, b""
+    while pos < len(png):
+        length = struct.unpack(">I", png[pos:pos + 4])[0]
+        if png[pos + 4:pos + 8] == b"IDAT":
+            idat += png[pos + 8:pos + 8 + length]
+        pos += 12 + length
+    rows = np.frombuffer(zlib.decompress(idat), dtype=np.uint8).reshape(height, width * 3 + 1)
+    assert (rows[:, 0] == 1).all()
+    # Undo the Sub filter
+    data = rows[:, 1:].astype(np.uint32)
+    for x in range(3, width * 3):
+        data[:, x] = (data[:, x] + data[:, x - 3]) % 256
+    return data.astype(np.uint8).reshape(height, width, 3)
+
+
+class TestImagePipeline:
+    def test_downscale(self):
+        small = downscale(_screen(), 1280)
+        assert small.shape == (500, 800, 3)
+        assert downscale(_screen(width=800, height=500), 1280).shape == (500, 800, 3)
+
+    def test_png_round_trip(self):
+        frame = downscale(_screen(seed=3), 400)
+        assert (_decode_png(encode_png(frame)) == frame).all()
+
+    def test_dhash_tolerates_noise_but_not_changes(self):
+        frame = _screen(seed=1)
+        noisy = np.clip(frame.astype(int) + np.random.default_rng(9).integers(-3, 4, frame.shape), 0, 255)
+        assert hamming(dhash(frame), dhash(noisy.astype(np.uint8))) <= 6
+        assert hamming(dhash(frame), dhash(_screen(seed=2))) > 20
+
+
+class TestScreenContext:
+    def test_capture_produces_data_url(self):
+        context = ScreenContext(FakeScreen(_screen()), settings=Settings())
+        image = context.capture().result(timeout=5)
+        assert (image.width, image.height) == (800, 500)
+        assert image.image_url.startswith("data:image/png;base64,")
+        assert base64.b64decode(image.image_url.split(",", 1)[1]) == image.png
+
+    def test_unchanged_screen_is_not_reencoded(self):
+        source = FakeScreen(_screen(seed=1))
+        context = ScreenContext(source, settings=Settings())
+        first = context.capture().result(timeout=5)
+        second = context.capture().result(timeout=5)
+        assert second is first
+        assert context.stats()["reused"] == 1
+
+        source.frame = _screen(seed=2)
+        third = context.capture().result(timeout=5)
+        assert third is not first
+        assert context.stats()["captures"] == 3
+
+    def test_one_changed_line_is_not_reused(self):
+        frame = _screen(seed=1)
+        edited = frame.copy()
+        edited[700:712, 100:400] = 30  # one more line of text
+        assert hamming(dhash(downscale(frame, 1280)), dhash(downscale(edited, 1280))) <= 6
+
+        source = FakeScreen(frame)
+        context = ScreenContext(source, settings=Settings())
+        first = context.capture().result(timeout=5)
+        source.frame = edited
+        second = context.capture().result(timeout=5)
+        assert second is not first
+        assert second.png != first.png
+        assert context.stats()["reused"] == 0
+
+    @pytest.mark.skipif(sys.platform == "darwin", reason="macOS has a screen source")
+    def test_no_source(self):
+        context = ScreenContext(source=None)
+        assert not context.available
+        assert context.capture() is None
+
+    def test_failed_grab(self):
+        source = MagicMock()
+        source.grab.side_effect = RuntimeError("no permission")
+        context = ScreenContext(source, settings=Settings())
+        with pytest.raises(RuntimeError):
+            context.capture().result(timeout=5)
+        assert context.stats()["failed"] == 1
+
+
+class TestProcessor:
+    def _processor(self, api):
+        service = OpenAIService(
+            api_key="test", base_url=api.base_url,
+            scheduler=APIScheduler(requests_per_second=100, request_burst=100),
+        )
+        return TextProcessor(openai_service=service, cache=ResponseCache(":memory:", settings=Settings()))
+
+    def test_transcription_mode_is_passthrough(self):
+        processor = TextProcessor(openai_service=MagicMock())
+        assert processor.process_transcription("hello") == "hello"
+        processor.openai_service.complete.assert_not_called()
+
+    def test_context_mode_sends_screenshot(self):
+        seen = []
+
+        def reply(messages):
+            seen.append(messages)
+            return "answer"
+
+        with StandInAPI(chat_reply=reply) as api:
+            processor = self._processor(api)
+            image = ScreenContext(FakeScreen(_screen()), settings=Settings()).capture().result(timeout=5)
+            result = processor.process_transcription("reply to this email", CONTEXT, image)
+
+        assert result == "answer"
+        system, user = seen[0]
+        assert system["role"] == "system"
+        parts = {part["type"]: part for part in user["content"]}
+        assert parts["text"]["text"] == "reply to this email"
+        assert parts["image_url"]["image_url"]["url"] == image.image_url
+
+    def test_replies_are_not_hedged(self, monkeypatch):
+        from services import openai_service
+
+        monkeypatch.setattr(openai_service, "OPENAI_API_KEY", "test")
+        processor = TextProcessor(cache=ResponseCache(":memory:", settings=Settings()))
+        assert processor.openai_service.policy.hedge_delay() is None
+
+    def test_reply_timeout_comes_from_settings(self, monkeypatch):
+        import core.processor
+
+        monkeypatch.setattr(core.processor, "get_settings", lambda: Settings(
+            context_request_timeout=42.0, response_cache=False, vocabulary=False,
+        ))
+        processor = TextProcessor(openai_service=MagicMock())
+        processor.openai_service.complete.return_value = "answer"
+        processor.process_transcription("what is this", EXPLANATION)
+        assert processor.openai_service.complete.call_args.kwargs["timeout"] == 42.0
+
+    def test_explanation_without_screenshot(self):
+        with StandInAPI(chat_reply=lambda messages: "explained") as api:
+            processor = self._processor(api)
+            assert processor.process_transcription("what is this", EXPLANATION) == "explained"
+
+
+class TestDictationFlow:
+    def test_screenshot_is_ready_when_dictation_stops(self, monkeypatch):
+        """The capture starts at Caps Lock ON and runs while recording."""
+        import main
+
+        monkeypatch.setattr(main, "get_settings", lambda: Settings(dictation_mode=CONTEXT))
+        app = main.OmnivoApp.__new__(main.OmnivoApp)
+        app._components = {
+            "recorder": MagicMock(),
+            "screen_context": ScreenContext(FakeScreen(_screen(), delay=0.2), settings=Settings()),
+        }
+        app._component_locks = {}
+        app._state_lock = threading.Lock()
+        app._dictation_jobs = []
+        app._cancel_stats = {"cancelled": 0, "superseded": 0, "encodes_skipped": 0}
+        app._dictation_mode = TRANSCRIPTION
+        app._screen_capture = None
+
+        app.start_recording()
+        capture = app._screen_capture
+        assert capture is not None and not capture.done()
+        time.sleep(0.4)  # the user speaks
+        assert capture.done()
+        assert app._screenshot(capture).width == 800
+
+    def test_failed_reply_is_logged_not_raised(self):
+        import main
+
+        app = main.OmnivoApp.__new__(main.OmnivoApp)
+        processor = MagicMock()
+        processor.process_transcription.side_effect = RuntimeError("model unavailable")
+        app._components = {
+            "transcriber": MagicMock(**{"transcribe_audio.return_value": "explain this"}),
+            "processor": processor,
+            "clipboard": MagicMock(),
+        }
+        app._component_locks = {}
+        app._state_lock = threading.Lock()
+        app.dictations_in_progress = 0
+
+        app._process_dictation("dictation.wav", mode=EXPLANATION)
+        app.clipboard.copy_and_paste.assert_not_called()
+        assert app.dictations_in_progress == 0
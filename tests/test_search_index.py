@@ -0,0 +1,127 @@
+"""Tests for the incremental meeting notes search index."""
+import os
+import shutil
+import tempfile
+import time
+from datetime import datetime
+
+import pytest
+
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.search_index import SearchIndex, meeting_time, to_match_query
+
+
+@pytest.fixture
+def notes_dir():
+    path = tempfile.mkdtemp(prefix="omnivo_notes_")
+    yield path
+    shutil.rmtree(path, ignore_errors=True)
+
+
+@pytest.fixture
+def index(notes_dir):
+    db_dir = tempfile.mkdtemp(prefix="omnivo_index_")
+    index = SearchIndex(path=os.path.join(db_dir, "search.db"), notes_dir=notes_dir)
+    yield index
+    index.close()
+    shutil.rmtree(db_dir, ignore_errors=True)
+
+
+def _write(notes_dir, name, text):
+    path = os.path.join(notes_dir, name)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    return path
+
+
+class TestIncrementalUpdate:
+    def test_indexes_new_files_once(self, index, notes_dir):
+        _write(notes_dir, "2026-03-02-0930.md", "We agreed on the quarterly budget.")
+        _write(notes_dir, "2026-03-03-1400.md", "Hiring plan for the platform team.")
+
+        assert index.update() == {"added": 2, "updated": 0, "removed": 0}
+        assert index.update() == {"added": 0, "updated": 0, "removed": 0}
+
+    def test_changed_file_is_reindexed(self, index, notes_dir):
+        path = _write(notes_dir, "2026-03-02-0930.md", "first draft")
+        index.update()
+        _write(notes_dir, "2026-03-02-0930.md", "rewritten with migration details")
+        os.utime(path, ns=(time.time_ns(), time.time_ns() + 10 ** 9))
+
+        assert index.update()["updated"] == 1
+        assert index.search("migration", refresh=False)
+        assert not index.search("draft", refresh=False)
+
+    def test_deleted_file_is_removed(self, index, notes_dir):
+        path = _write(notes_dir, "2026-03-02-0930.md", "roadmap review")
+        index.update()
+        os.remove(path)
+
+        assert index.update()["removed"] == 1
+        assert index.search("roadmap") == []
+
+    def test_index_file_after_save(self, index, notes_dir):
+        path = _write(notes_dir, "2026-03-04-1000.md", "incident retrospective")
+        assert index.index_file(path) is True
+        assert index.index_file(path) is False  # unchanged
+        assert index.search("retrospective", refresh=False)[0]["path"] == path
+
+
+class TestSearch:
+    def test_ranked_snippets_with_meeting_time(self, index, notes_dir):
+        _write(notes_dir, "2026-03-02-0930.md", "Budget budget budget. The budget is final.")
+        _write(notes_dir, "2026-03-03-1400.md", "Short mention of the budget among other topics "
+                                                 "like hiring, offsites and tooling.")
+
+        results = index.search("budget")
+        assert [os.path.basename(r["path"]) for r in results] == [
+            "2026-03-02-0930.md",
+            "2026-03-03-1400.md",
+        ]
+        assert "[budget]" in results[0]["snippet"].lower()
+        assert results[0]["meeting_time"] == datetime(2026, 3, 2, 9, 30).timestamp()
+
+    def test_all_words_must_match(self, index, notes_dir):
+        _write(notes_dir, "a.md", "deploy the billing service")
+        _write(notes_dir, "b.md", "deploy the search service")
+
+        results = index.search("deploy billing")
+        assert [os.path.basename(r["path"]) for r in results] == ["a.md"]
+
+    def test_stemming_and_prefix(self, index, notes_dir):
+        _write(notes_dir, "a.md", "We are deploying on Friday")
+        assert index.search("deploy")
+        assert index.search("fri*")
+
+    def test_operators_in_input_are_literal(self, index, notes_dir):
+        _write(notes_dir, "a.md", "notes")
+        assert index.search('NOT "unbalanced ( AND') == []
+
+    def test_thousands_of_notes_query_in_milliseconds(self, index, notes_dir):
+        words = ["budget", "hiring", "roadmap", "incident", "launch", "pricing", "design"]
+        for i in range(2000):
+            topic = words[i % len(words)]
+            _write(
+                notes_dir,
+                f"2025-{1 + i % 12:02d}-{1 + i % 28:02d}-{i % 24:02d}{i % 60:02d}-{i}.md",
+                f"Meeting {i} about {topic}. " + "General discussion of the week. " * 50,
+            )
+        index.update()
+
+        started = time.perf_counter()
+        results = index.search("pricing", limit=20)
+        elapsed = time.perf_counter() - started
+
+        assert len(results) == 20
+        assert elapsed < 0.2  # includes the mtime/size scan of every note
+
+
+class TestHelpers:
+    def test_meeting_time_from_file_name(self):
+        assert meeting_time("/x/2026-01-05-0815.md", 0) == datetime(2026, 1, 5, 8, 15).timestamp()
+        assert meeting_time("/x/notes.md", 123.0) == 123.0
+
+    def test_match_query_quotes_words(self):
+        assert to_match_query('budget "q3" deploy*') == '"budget" """q3""" "deploy"*'
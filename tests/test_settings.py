@@ -0,0 +1,151 @@
+"""Tests for live-reloadable settings."""
+import json
+import os
+import shutil
+import tempfile
+
+import pytest
+
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import settings as settings_module
+from utils.settings import (
+    Settings,
+    SettingsWatcher,
+    get_settings,
+    parse_settings,
+    reload_settings,
+)
+
+
+@pytest.fixture
+def config_path(monkeypatch):
+    tmp_dir = tempfile.mkdtemp(prefix="omnivo_cfg_")
+    path = os.path.join(tmp_dir, "config.json")
+    monkeypatch.setattr(settings_module, "CONFIG_PATH", path)
+    monkeypatch.setattr(settings_module, "_current", None)
+    monkeypatch.setattr(settings_module, "_listeners", [])
+    yield path
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def _write(path, data):
+    with open(path, "w") as f:
+        f.write(data if isinstance(data, str) else json.dumps(data))
+
+
+class TestParsing:
+    def test_defaults_match_config_constants(self):
+        from utils import config
+
+        defaults = Settings()
+        assert defaults.sample_rate == config.SAMPLE_RATE
+        assert defaults.compressed_bitrate == config.COMPRESSED_BITRATE
+        assert defaults.whisper_model == config.WHISPER_MODEL
+
+    def test_overrides_are_typed(self):
+        settings = parse_settings({"safety_margin": 1, "compressed_bitrate": "48k"})
+        assert settings.safety_margin == 1.0
+        assert isinstance(settings.safety_margin, float)
+        assert settings.compressed_bitrate == "48k"
+
+    def test_wrong_type_is_rejected(self):
+        with pytest.raises(ValueError, match="sample_rate"):
+            parse_settings({"sample_rate": "fast"})
+        with pytest.raises(ValueError):
+            parse_settings({"meeting_test_mode": 1})
+
+    @pytest.mark.parametrize("overrides", [
+        {"max_duration_seconds": 0},
+        {"api_requests_per_second": 0},
+        {"memory_sample_interval": 0},
+        {"chunk_upload_workers": 0},
+        {"safety_margin": 1.5},
+        {"safety_margin": 0},
+        {"router_probe_every": -1},
+    ])
+    def test_out_of_range_is_rejected(self, overrides):
+        (name,) = overrides
+        with pytest.raises(ValueError, match=name):
+            parse_settings(overrides)
+
+    def test_range_limits_are_allowed(self):
+        settings = parse_settings({"safety_margin": 1, "router_probe_every": 0})
+        assert (settings.safety_margin, settings.router_probe_every) == (1.0, 0)
+
+    def test_unknown_keys_are_ignored(self):
+        assert parse_settings({"no_such_knob": 3}) == Settings()
+
+    def test_paths_are_expanded(self):
+        settings = parse_settings({"meeting_notes_path": "~/elsewhere"})
+        assert settings.meeting_notes_path == os.path.expanduser("~/elsewhere")
+
+
+class TestReload:
+    def test_missing_file_gives_defaults(self, config_path):
+        assert get_settings() == Settings()
+
+    def test_reload_swaps_snapshot_and_reports_changes(self, config_path):
+        before = get_settings()
+        _write(config_path, {"compressed_bitrate": "32k", "request_max_retries": 4})
+
+        changed = reload_settings()
+
+        assert sorted(changed) == ["compressed_bitrate", "request_max_retries"]
+        assert get_settings().compressed_bitrate == "32k"
+        # The old snapshot is untouched, so in-flight jobs keep their values
+        assert before.compressed_bitrate == Settings().compressed_bitrate
+
+    def test_invalid_file_keeps_previous_settings(self, config_path):
+        _write(config_path, {"compressed_bitrate": "32k"})
+        reload_settings()
+        _write(config_path, '{"compressed_bitrate": ')  # half-written
+
+        with pytest.raises(ValueError):
+            reload_settings()
+        assert get_settings().compressed_bitrate == "32k"
+
+    def test_out_of_range_file_keeps_previous_settings(self, config_path):
+        _write(config_path, {"max_duration_seconds": 300})
+        reload_settings()
+        _write(config_path, {"max_duration_seconds": 0})
+
+        watcher = SettingsWatcher(config_path)
+        watcher._last = None
+        assert not watcher.check()
+        assert get_settings().max_duration_seconds == 300
+
+    def test_sighup_with_invalid_file_keeps_daemon_running(self, config_path):
+        import main
+
+        app = main.OmnivoApp.__new__(main.OmnivoApp)
+        _write(config_path, '{"compressed_bitrate": ')
+        app._reload_on_signal(1, None)  # must not raise into the main loop
+        assert get_settings() == Settings()
+
+    def test_listeners_are_notified(self, config_path):
+        seen = []
+        settings_module.add_reload_listener(lambda s, changed: seen.append(changed))
+        _write(config_path, {"api_max_in_flight": 2})
+        reload_settings()
+        reload_settings()  # no change, no notification
+        assert seen == [["api_max_in_flight"]]
+
+    def test_watcher_reloads_on_file_change(self, config_path):
+        watcher = SettingsWatcher()
+        assert not watcher.check()
+
+        _write(config_path, {"transcribe_model": "whisper-1"})
+        assert watcher.check()
+        assert get_settings().transcribe_model == "whisper-1"
+        assert not watcher.check()
+
+    def test_scheduler_follows_reload(self, config_path):
+        from services.api_scheduler import APIScheduler
+
+        scheduler = APIScheduler()
+        settings_module.add_reload_listener(lambda s, changed: scheduler.configure(s))
+        _write(config_path, {"api_max_in_flight": 7})
+        reload_settings()
+        assert scheduler.max_in_flight == 7
@@ -0,0 +1,37 @@
+"""Short soak run of the dictation and meeting pipelines (headless).
+
+Longer runs: python scripts/soak_test.py --help
+"""
+import os
+
+import pytest
+
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.soak import run_soak
+
+
+@pytest.mark.soak
+class TestSoak:
+    def test_concurrent_dictations_and_meeting_under_faults(self):
+        report = run_soak(
+            dictation_workers=4,
+            dictations_per_worker=8,
+            meetings=1,
+            meeting_seconds=60,
+            meeting_chunk_seconds=20,
+            fault_rates={429: 0.05, 500: 0.05},
+        )
+
+        dictation, meeting = report["dictation"], report["meeting"]
+        assert dictation["completed"] == 32 and dictation["failed"] == 0
+        assert dictation["dropped_frames"] == 0
+        assert dictation["latency"]["p99"] < 5
+        assert meeting["completed"] == 1
+        assert meeting["dropped_seconds"] == 0
+        assert meeting["audio_seconds"] == 60
+        # Three chunks plus retries of injected faults
+        assert report["api"]["requests"] >= 32 + 3
+        if report["memory"]:
+            assert report["memory"]["growth_mb"] < 100
@@ -0,0 +1,85 @@
+"""Tests for lazy daemon startup and the startup profiler."""
+import json
+import os
+import subprocess
+import threading
+import time
+
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.startup_profile import StartupProfiler
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ["openai", "pydub", "numpy", "sounddevice", "core.meeting_transcriber"]
+
+
+def _loaded_after_import(module):
+    """Import ``module`` in a fresh interpreter and report which heavy modules it loaded."""
+    code = (
+        f"import json, sys; import {module}; "
+        f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))"
+    )
+    # The dummy backend lets pynput import without a display
+    env = dict(os.environ, PYNPUT_BACKEND="dummy")
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=REPO_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+    assert result.returncode == 0, result.stderr
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+class TestLazyImports:
+    def test_main_defers_audio_and_openai(self):
+        assert _loaded_after_import("main") == []
+
+    def test_meeting_recorder_defers_transcriber(self):
+        assert _loaded_after_import("core.meeting_recorder") == []
+
+
+class TestStartupProfiler:
+    def test_records_phases_in_order(self):
+        profiler = StartupProfiler()
+        profiler.mark("first")
+        time.sleep(0.01)
+        profiler.mark("second")
+
+        names = [name for name, _, _ in profiler.phases]
+        assert names == ["first", "second"]
+        assert profiler.phases[1][1] > profiler.phases[0][1]
+
+    def test_phase_records_thread(self):
+        profiler = StartupProfiler()
+        thread = threading.Thread(target=profiler.mark, args=("bg",), name="warm-up")
+        thread.start()
+        thread.join()
+
+        assert profiler.phases[0][2] == "warm-up"
+        assert "[warm-up]" in profiler.report()
+
+    def test_times_first_imports(self):
+        profiler = StartupProfiler()
+        sys.modules.pop("colorsys", None)
+        profiler.install()
+        try:
+            import colorsys  # noqa: F401
+        finally:
+            profiler.uninstall()
+
+        assert "colorsys" in profiler.import_times
+        assert "colorsys" in profiler.report()
+
+    def test_uninstall_restores_import(self):
+        import builtins
+
+        original = builtins.__import__
+        profiler = StartupProfiler()
+        profiler.install()
+        assert builtins.__import__ is not original
+        profiler.uninstall()
+        assert builtins.__import__ is original
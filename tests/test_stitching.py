@@ -0,0 +1,179 @@
+"""Tests for overlapping meeting chunks and stitching their transcripts."""
+import os
+import threading
+import time
+import wave
+
+import pytest
+
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import meeting_transcriber
+from core.meeting_transcriber import MeetingTranscriber
+from core.stitching import TranscriptStitcher, find_seam, window_for
+from utils.settings import Settings
+
+SECONDS_PER_WORD = 0.5
+WORDS = [f"word{i}" for i in range(200)]  # 100 s of speech
+
+
+def _spoken(start, length):
+    """What a chunk's transcript would say: the words it fully contains,
+    with the words cut at either edge garbled."""
+    words = []
+    for i, word in enumerate(WORDS):
+        w_start, w_end = i * SECONDS_PER_WORD, (i + 1) * SECONDS_PER_WORD
+        if w_end <= start or w_start >= start + length:
+            continue
+        if w_start < start or w_end > start + length:
+            word = "mumble"
+        words.append((word, w_start - start, w_end - start))
+    return words
+
+
+class TestSeam:
+    def test_finds_overlap_between_garbled_edges(self):
+        prev = "the budget review is due on friday mum".split()
+        nxt = "ay is due on friday so please send".split()
+        keep, drop = find_seam(prev, nxt, window=8)
+        assert " ".join(prev[:keep] + nxt[drop:]) == "the budget review is due on friday so please send"
+
+    def test_ignores_case_and_punctuation(self):
+        keep, drop = find_seam("we ship on Friday.".split(), "friday, then rest".split(), 8)
+        assert (keep, drop) == (4, 0)  # a single word is not enough
+        keep, drop = find_seam("we ship on Friday.".split(), "on friday, then rest".split(), 8)
+        assert (keep, drop) == (4, 2)
+
+    def test_repeated_phrase_does_not_beat_the_overlap(self):
+        prev = ("we should ship it today I think the release notes are ready "
+                "and QA signed off on the build so").split()
+        nxt = "build so yesterday I think the release went badly".split()
+        keep, drop = find_seam(prev, nxt, window_for(2.0))
+        assert " ".join(prev[:keep] + nxt[drop:]) == " ".join(prev + nxt[2:])
+
+    def test_run_must_fit_in_the_overlap(self):
+        prev = "alpha beta one two three four five six".split()
+        nxt = "seven eight alpha beta gamma".split()
+        assert find_seam(prev, nxt, 8) == (8, 0)
+
+    def test_ambiguous_seam_keeps_both_sides(self):
+        # "it works" said twice or three times: don't guess
+        prev = "she said it works it works".split()
+        nxt = "it works it works fine".split()
+        assert find_seam(prev, nxt, 8) == (6, 0)
+
+    def test_no_overlap_joins(self):
+        assert find_seam("a b c".split(), "d e f".split(), 8) == (3, 0)
+
+    def test_window(self):
+        assert window_for(0) == 0
+        assert window_for(2.0) == 16
+
+
+class TestStitcher:
+    def test_returned_text_is_final(self):
+        stitcher = TranscriptStitcher(window=4)
+        first = stitcher.add("one two three four five six seven")
+        assert first == "one two three"
+        second = stitcher.add("six seven eight nine")
+        assert second == "four five"
+        assert stitcher.finish() == "six seven eight nine"
+
+    def test_many_chunks_reconstruct_the_transcript(self):
+        stitcher = TranscriptStitcher(window_for(2.0))
+        parts = []
+        for start in range(0, 100, 8):  # 10 s chunks, 2 s overlap
+            text = " ".join(word for word, _, _ in _spoken(start, 10))
+            parts.append(stitcher.add(text))
+        parts.append(stitcher.finish())
+        assert " ".join(p for p in parts if p).split() == WORDS
+
+
+class TestPlan:
+    def test_chunks_overlap(self, tmp_path):
+        path = tmp_path / "meeting.wav"
+        path.write_bytes(b"\0" * 1000)
+        settings = Settings(max_duration_seconds=10, safety_margin=1.0, chunk_overlap_seconds=2.0)
+        spans = MeetingTranscriber(api_key="test")._plan_chunks(str(path), 30.0, settings)
+        assert spans == [(0.0, 10.0), (8.0, 10.0), (16.0, 10.0), (24.0, 6.0)]
+
+    def test_overlap_is_at_most_half_a_chunk(self, tmp_path):
+        path = tmp_path / "meeting.wav"
+        path.write_bytes(b"\0" * 1000)
+        settings = Settings(max_duration_seconds=2, safety_margin=1.0, chunk_overlap_seconds=5.0)
+        spans = MeetingTranscriber(api_key="test")._plan_chunks(str(path), 4.0, settings)
+        assert spans == [(0.0, 2.0), (1.0, 2.0), (2.0, 2.0)]
+
+    def test_chunks_under_a_second_are_refused(self, tmp_path):
+        path = tmp_path / "meeting.wav"
+        path.write_bytes(b"\0" * 1000)
+        settings = Settings(max_file_size_bytes=1, safety_margin=1.0)
+        with pytest.raises(ValueError, match="max_file_size_bytes"):
+            MeetingTranscriber(api_key="test")._plan_chunks(str(path), 30.0, settings)
+
+    def test_last_chunk_ends_at_the_end(self, tmp_path):
+        path = tmp_path / "meeting.wav"
+        path.write_bytes(b"\0" * 1000)
+        settings = Settings(max_duration_seconds=10, safety_margin=1.0, chunk_overlap_seconds=2.0)
+        spans = MeetingTranscriber(api_key="test")._plan_chunks(str(path), 26.7, settings)
+        assert spans == [(0.0, 10.0), (8.0, 10.0), (16.0, 10.7)]
+        start, length = spans[-1]
+        assert round((start + length) * 1000) == 26700
+
+
+class TestMeeting:
+    @pytest.fixture
+    def wav_path(self, tmp_path):
+        path = str(tmp_path / "meeting.wav")
+        with wave.open(path, "wb") as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(8000)
+            wf.writeframes(b"\x00\x00" * 8000 * 100)
+        return path
+
+    @pytest.fixture
+    def fake_api(self, monkeypatch):
+        """Chunks record their span; 'transcribing' one returns the words in it."""
+        spans = {}
+        calls = {"running": 0, "max_running": 0}
+        lock = threading.Lock()
+
+        def encode(source_path, start, length, chunk_path, bitrate):
+            spans[chunk_path] = (start, length)
+            with open(chunk_path, "wb") as f:
+                f.write(b"mp3")
+            return chunk_path
+
+        def transcribe(self, file_path, language=None, settings=None, token=None, timed=False):
+            with lock:
+                calls["running"] += 1
+                calls["max_running"] = max(calls["max_running"], calls["running"])
+            time.sleep(0.05)
+            with lock:
+                calls["running"] -= 1
+            words = _spoken(*spans[file_path])
+            text = " ".join(word for word, _, _ in words)
+            return (text, words) if timed else text
+
+        monkeypatch.setattr(meeting_transcriber, "encode_chunk", encode)
+        monkeypatch.setattr(MeetingTranscriber, "_transcribe_file", transcribe)
+        monkeypatch.setattr(MeetingTranscriber, "_check_ffmpeg", lambda self: None)
+        return calls
+
+    def test_stitched_transcript_has_no_seams(self, wav_path, fake_api):
+        settings = Settings(
+            max_duration_seconds=10, safety_margin=1.0, chunk_overlap_seconds=2.0,
+            chunk_upload_workers=3,
+        )
+        chunks, words = [], []
+        text = MeetingTranscriber(api_key="test").transcribe_meeting(
+            wav_path, settings=settings, on_chunk=lambda i, n, t: chunks.append((i, t)),
+            on_words=words.extend,
+        )
+        assert text.split() == WORDS
+        assert [i for i, _ in chunks] == list(range(len(chunks)))
+        assert " ".join(t for _, t in chunks if t) == text
+        assert [word for word, _, _ in words] == WORDS
+        assert fake_api["max_running"] > 1
@@ -0,0 +1,99 @@
+"""Tests for uploading meetings time-compressed (meeting_speedup)."""
+import os
+import shutil
+import subprocess
+import wave
+
+import numpy as np
+import pytest
+
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.meeting_transcriber import MeetingTranscriber, speed_up, speedup_factor
+from services.api_scheduler import APIScheduler
+from tests.stand_in_api import StandInAPI
+from utils.settings import Settings
+
+pytestmark = pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="needs ffmpeg")
+
+
+@pytest.fixture
+def wav_path(tmp_path):
+    path = str(tmp_path / "meeting.wav")
+    t = np.arange(16000 * 10) / 16000
+    samples = 0.3 * np.sin(2 * np.pi * 220 * t)
+    with wave.open(path, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(16000)
+        wf.writeframes((samples * 32767).astype(np.int16).tobytes())
+    return path
+
+
+@pytest.fixture
+def api():
+    with StandInAPI(text="one two three four") as api:
+        yield api
+
+
+def _wav_duration(path, tmp_path):
+    wav = str(tmp_path / "decoded.wav")
+    subprocess.run(["ffmpeg", "-v", "error", "-y", "-i", path, wav], check=True)
+    with wave.open(wav, "rb") as f:
+        return f.getnframes() / f.getframerate()
+
+
+def _settings(**overrides):
+    overrides.setdefault("max_duration_seconds", 2)
+    overrides.setdefault("safety_margin", 1.0)
+    overrides.setdefault("chunk_overlap_seconds", 0.0)
+    return Settings(**overrides)
+
+
+def _transcriber(api):
+    return MeetingTranscriber(api_key="test", base_url=api.base_url, scheduler=APIScheduler())
+
+
+class TestSpeedUp:
+    def test_shortens_audio(self, wav_path, tmp_path):
+        out = speed_up(wav_path, 1.5, str(tmp_path / "fast.mp3"), "64k")
+        assert _wav_duration(out, tmp_path) == pytest.approx(10 / 1.5, abs=0.1)
+
+    def test_factor_is_clamped(self):
+        assert speedup_factor(Settings(meeting_speedup=1.25)) == 1.25
+        assert speedup_factor(Settings(meeting_speedup=0.5)) == 1.0
+        assert speedup_factor(Settings(meeting_speedup=3.0)) == 2.0
+
+
+class TestTranscription:
+    def test_fewer_chunks(self, wav_path, api):
+        _transcriber(api).transcribe_meeting(wav_path, settings=_settings())
+        normal = api.request_count
+        _transcriber(api).transcribe_meeting(wav_path, settings=_settings(meeting_speedup=2.0))
+        assert normal == 5
+        assert api.request_count - normal == 3
+
+    def test_short_meeting_is_sped_up(self, wav_path, api):
+        # Under the limits, but still uploaded time-compressed
+        chunks = []
+        _transcriber(api).transcribe_meeting(
+            wav_path,
+            on_chunk=lambda *chunk: chunks.append(chunk),
+            settings=Settings(meeting_speedup=1.5),
+        )
+        assert len(chunks) == 1
+        assert api.requests[-1]["bytes"] < os.path.getsize(wav_path) / 4  # MP3, not the WAV
+
+    def test_word_timings_scaled_back(self, wav_path, api):
+        words = []
+        _transcriber(api).transcribe_meeting(
+            wav_path, on_words=words.extend, settings=_settings(meeting_speedup=2.0)
+        )
+        # The stand-in gives every word 0.5s of the uploaded (2x) audio
+        first_chunk = words[:4]
+        assert [(start, end) for _, start, end in first_chunk] == [
+            (0.0, 1.0), (1.0, 2.0), (2.0, 3.0), (3.0, 4.0)
+        ]
+        # Later chunks are offset by where they start in the original audio
+        assert words[4][1] == pytest.approx(4.0, abs=0.01)
@@ -0,0 +1,178 @@
+"""Tests for the `omnivo serve` transcription HTTP server."""
+import http.client
+import io
+import json
+import os
+import time
+import urllib.error
+import urllib.request
+import wave
+
+import pytest
+
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.api_scheduler import APIScheduler
+from services.transcription_server import TranscriptionServer, read_line
+from tests.stand_in_api import StandInAPI
+
+
+def _wav_bytes(seconds=0.2, seed=0):
+    """A short silent WAV; ``seed`` varies the content (and its hash)."""
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(16000)
+        wf.writeframes(seed.to_bytes(2, "little") * int(16000 * seconds))
+    return buf.getvalue()
+
+
+def _request(method, url, body=None, headers=None):
+    req = urllib.request.Request(url, data=body, method=method, headers=headers or {})
+    try:
+        with urllib.request.urlopen(req, timeout=10) as resp:
+            return resp.status, json.loads(resp.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def _submit(server, body, **query):
+    url = f"{server.address}/v1/jobs"
+    if query:
+        url += "?" + "&".join(f"{k}={v}" for k, v in query.items())
+    return _request("POST", url, body, {"Content-Type": "audio/wav"})
+
+
+@pytest.fixture
+def stand_in():
+    with StandInAPI(text="served transcription") as api:
+        yield api
+
+
+@pytest.fixture
+def make_server(stand_in):
+    from core.meeting_transcriber import MeetingTranscriber
+
+    servers = []
+
+    def make(**kwargs):
+        transcriber = MeetingTranscriber(
+            api_key="test", base_url=stand_in.base_url, scheduler=APIScheduler()
+        )
+        server = TranscriptionServer(host="127.0.0.1", port=0, transcriber=transcriber, **kwargs)
+        server.start()
+        servers.append(server)
+        return server
+
+    yield make
+    for server in servers:
+        server.stop()
+
+
+class TestJobs:
+    def test_submit_and_poll(self, make_server, stand_in):
+        server = make_server()
+        status, job = _submit(server, _wav_bytes(), language="en")
+        assert status == 202
+        assert job["status"] in ("queued", "running")
+
+        status, job = _request("GET", f"{server.address}/v1/jobs/{job['id']}?wait=10")
+        assert status == 200
+        assert job["status"] == "done"
+        assert job["text"] == "served transcription"
+        assert stand_in.requests[0]["fields"]["language"] == "en"
+
+    def test_identical_upload_is_served_from_cache(self, make_server, stand_in):
+        server = make_server()
+        body = _wav_bytes(seed=7)
+        _, first = _submit(server, body)
+        _request("GET", f"{server.address}/v1/jobs/{first['id']}?wait=10")
+
+        status, second = _submit(server, body)
+        assert status == 202
+        assert second["status"] == "done"
+        assert second["cached"] is True
+        assert stand_in.request_count == 1
+        assert server.metrics()["cache_hits"] == 1
+
+    def test_chunked_upload(self, make_server):
+        server = make_server()
+        body = _wav_bytes(seed=3)
+        host, port = server._server.server_address[:2]
+        conn = http.client.HTTPConnection(host, port, timeout=10)
+        conn.putrequest("POST", "/v1/jobs")
+        conn.putheader("Transfer-Encoding", "chunked")
+        conn.putheader("Content-Type", "audio/wav")
+        conn.endheaders()
+        for i in range(0, len(body), 1000):
+            part = body[i:i + 1000]
+            conn.send(f"{len(part):x}\r\n".encode() + part + b"\r\n")
+        conn.send(b"0\r\n\r\n")
+        resp = conn.getresponse()
+        job = json.loads(resp.read())
+        conn.close()
+        assert resp.status == 202
+
+        _, job = _request("GET", f"{server.address}/v1/jobs/{job['id']}?wait=10")
+        assert job["status"] == "done"
+
+    def test_events_stream_until_done(self, make_server):
+        server = make_server()
+        _, job = _submit(server, _wav_bytes(seed=5))
+        with urllib.request.urlopen(
+            f"{server.address}/v1/jobs/{job['id']}/events", timeout=10
+        ) as resp:
+            events = [json.loads(line) for line in resp]
+
+        names = [e["event"] for e in events]
+        assert names[0] == "queued"
+        assert names[-1] == "done"
+        assert any(e["event"] == "chunk" and e["text"] for e in events)
+
+    def test_unknown_job_is_404(self, make_server):
+        server = make_server()
+        status, _ = _request("GET", f"{server.address}/v1/jobs/nope")
+        assert status == 404
+
+    def test_empty_upload_is_rejected(self, make_server):
+        server = make_server()
+        status, body = _submit(server, b"")
+        assert status == 400
+
+
+class TestLimits:
+    def test_queue_full_returns_503(self, make_server, stand_in):
+        stand_in.latency = 1.0
+        server = make_server(max_jobs=1, max_queued=1)
+        statuses = [_submit(server, _wav_bytes(seed=i))[0] for i in range(4)]
+        assert statuses[:2] == [202, 202]
+        assert 503 in statuses
+
+    def test_running_jobs_are_capped(self, make_server, stand_in):
+        stand_in.latency = 0.3
+        server = make_server(max_jobs=2)
+        jobs = [_submit(server, _wav_bytes(seed=i))[1] for i in range(4)]
+        time.sleep(0.1)
+        assert server.metrics()["jobs"].get("running", 0) <= 2
+        for job in jobs:
+            _, job = _request("GET", f"{server.address}/v1/jobs/{job['id']}?wait=10")
+            assert job["status"] == "done"
+
+    def test_cancel_queued_job(self, make_server, stand_in):
+        stand_in.latency = 1.0
+        server = make_server(max_jobs=1)
+        _submit(server, _wav_bytes(seed=1))
+        _, queued = _submit(server, _wav_bytes(seed=2))
+
+        status, job = _request("DELETE", f"{server.address}/v1/jobs/{queued['id']}")
+        assert status == 200
+        assert job["status"] == "cancelled"
+
+
+class TestReadLine:
+    def test_reads_up_to_newline(self):
+        stream = io.BytesIO(b"1a\r\nrest")
+        assert read_line(stream.read) == b"1a\r\n"
+        assert stream.read() == b"rest"
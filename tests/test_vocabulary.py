@@ -0,0 +1,142 @@
+"""Tests for the custom vocabulary post-processor."""
+import os
+import time
+
+import pytest
+
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import vocabulary as vocabulary_module
+from core.processor import TextProcessor
+from core.vocabulary import Automaton, Vocabulary, parse_rules
+
+
+def _write(directory, name, text):
+    path = directory / name
+    path.write_text(text, encoding="utf-8")
+    return path
+
+
+@pytest.fixture
+def vocab_dir(tmp_path):
+    directory = tmp_path / "vocabulary"
+    directory.mkdir()
+    _write(directory, "terms.txt", "# company terms\nopen ai\tOpenAI\nomnivo\tOmnivo\nk8s\tKubernetes\n")
+    _write(directory, "fillers.txt", "um\nuh\nyou know\n")
+    _write(directory, "snippets.txt", "sig\tBest,\\nEmil\n")
+    return directory
+
+
+class TestAutomaton:
+    def test_replacements(self):
+        automaton = Automaton({"open ai": "OpenAI", "k8s": "Kubernetes"})
+        assert automaton.replace("We run open AI on k8s.") == ("We run OpenAI on Kubernetes.", 2)
+
+    def test_whole_words_only(self):
+        automaton = Automaton({"um": "", "sig": "SIGNATURE"})
+        assert automaton.replace("drum signal") == ("drum signal", 0)
+
+    def test_leftmost_longest(self):
+        automaton = Automaton({"new": "N", "new york": "NYC", "york city": "X"})
+        assert automaton.replace("new york city") == ("NYC city", 1)
+        assert automaton.replace("new yorker") == ("N yorker", 1)
+
+    def test_overlapping_suffixes(self):
+        automaton = Automaton({"he": "1", "she": "2", "hers": "3", "his": "4"})
+        assert automaton.replace("she sells his hers") == ("2 sells 4 3", 3)
+
+    def test_filler_removal_keeps_punctuation_and_case(self):
+        automaton = Automaton({"um": "", "you know": ""})
+        assert automaton.replace("Um, so we ship, you know, today um.")[0] == "So we ship, today."
+
+    def test_filler_removed_before_sentence_punctuation(self):
+        automaton = Automaton({"um": ""})
+        assert automaton.replace("Um. Hello")[0] == "Hello"
+        assert automaton.replace("Um! ok")[0] == "Ok"
+        assert automaton.replace("Hi. Um. Next")[0] == "Hi. Next"
+
+    def test_unicode(self):
+        automaton = Automaton({"göteborg": "Gothenburg"})
+        assert automaton.replace("İ live in Göteborg")[0] == "İ live in Gothenburg"
+
+
+class TestVocabulary:
+    def test_files(self, vocab_dir):
+        vocabulary = Vocabulary(str(vocab_dir))
+        assert vocabulary.apply("um, sig") == "Best,\nEmil"
+        assert vocabulary.apply("Deploy omnivo to k8s, you know.") == "Deploy Omnivo to Kubernetes."
+        stats = vocabulary.stats()
+        assert stats["rules"] == 7
+        assert stats["replacements"] == 5
+
+    def test_later_file_wins(self, vocab_dir):
+        _write(vocab_dir, "zz_override.txt", "k8s\tK8s\n")
+        assert Vocabulary(str(vocab_dir)).apply("k8s") == "K8s"
+
+    def test_parse_rules(self, vocab_dir):
+        rules = parse_rules(str(vocab_dir / "terms.txt"))
+        assert rules == {"open ai": "OpenAI", "omnivo": "Omnivo", "k8s": "Kubernetes"}
+
+    def test_missing_directory(self, tmp_path):
+        assert Vocabulary(str(tmp_path / "none")).apply("hello um") == "hello um"
+
+    def test_compiled_automaton_is_cached(self, vocab_dir, tmp_path):
+        cache_path = str(tmp_path / "vocabulary.cache")
+        Vocabulary(str(vocab_dir), cache_path).load()
+        assert os.path.exists(cache_path)
+
+        cached = Vocabulary(str(vocab_dir), cache_path)
+        assert cached.apply("k8s") == "Kubernetes"
+        assert cached.stats()["cache_hits"] == 1
+
+        _write(vocab_dir, "terms.txt", "k8s\tK8S\n")
+        stale = Vocabulary(str(vocab_dir), cache_path)
+        assert stale.apply("k8s") == "K8S"
+        assert stale.stats()["cache_hits"] == 0
+
+    def test_reloads_when_files_change(self, vocab_dir, monkeypatch):
+        monkeypatch.setattr(vocabulary_module, "CHECK_INTERVAL", 0.0)
+        vocabulary = Vocabulary(str(vocab_dir))
+        assert vocabulary.apply("k8s") == "Kubernetes"
+
+        _write(vocab_dir, "terms.txt", "k8s\tK8S\n")
+        deadline = time.monotonic() + 5
+        while vocabulary.apply("k8s") != "K8S":
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+        assert vocabulary.stats()["reloads"] == 1
+
+
+class TestLargeDictionary:
+    def test_tens_of_thousands_of_rules(self, tmp_path):
+        directory = tmp_path / "vocabulary"
+        directory.mkdir()
+        lines = [f"term{i} alpha\tTerm{i}-Alpha" for i in range(40000)]
+        lines += [f"acr{i}\tAcronym Number {i}" for i in range(10000)]
+        _write(directory, "big.txt", "\n".join(lines) + "\n")
+        text = " ".join(
+            f"we discussed term{i} alpha and acr{i} today" for i in range(0, 40000, 1000)
+        )
+
+        cache_path = str(tmp_path / "vocabulary.cache")
+        vocabulary = Vocabulary(str(directory), cache_path)
+        vocabulary.load()
+        started = time.perf_counter()
+        result = vocabulary.apply(text)
+        elapsed = time.perf_counter() - started
+
+        assert "Term39000-Alpha" in result and "Acronym Number 9000" in result
+        assert vocabulary.stats()["replacements"] == 50  # acr10000+ have no rule
+        assert elapsed < 0.05  # one scan, independent of the number of rules
+
+        started = time.perf_counter()
+        Vocabulary(str(directory), cache_path).load()
+        assert time.perf_counter() - started < vocabulary.stats()["compile_seconds"]
+
+
+class TestProcessor:
+    def test_applied_in_transcription_mode(self, vocab_dir):
+        processor = TextProcessor(vocabulary=Vocabulary(str(vocab_dir)))
+        assert processor.process_transcription("um, open ai") == "OpenAI"
+        assert processor.vocabulary_stats()["applied"] == 1
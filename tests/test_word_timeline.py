@@ -0,0 +1,129 @@
+"""Tests for word-timestamp transcripts and the .words seek index."""
+import os
+import shutil
+import tempfile
+import wave
+
+import pytest
+
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import meeting_transcriber
+from core.meeting_transcriber import MeetingTranscriber
+from core.word_timeline import SORT_DEPTH, WordTimeline, normalize, sidecar_path
+from services.api_scheduler import APIScheduler
+from tests.stand_in_api import StandInAPI
+from utils.settings import Settings
+
+
+@pytest.fixture
+def tmp_dir():
+    path = tempfile.mkdtemp(prefix="omnivo_words_")
+    yield path
+    shutil.rmtree(path, ignore_errors=True)
+
+
+def _timeline(text, seconds_per_word=1.0, audio=None):
+    words = [
+        (word, i * seconds_per_word, (i + 1) * seconds_per_word)
+        for i, word in enumerate(text.split())
+    ]
+    return WordTimeline.from_words(words, audio=audio)
+
+
+class TestLookup:
+    def test_finds_every_occurrence_in_time_order(self):
+        timeline = _timeline("the budget review is done and the budget review passed")
+        assert timeline.find("budget review") == [(1.0, 3.0), (7.0, 9.0)]
+
+    def test_normalizes_case_and_punctuation(self):
+        timeline = _timeline("We shipped it. Budget, Review! Don't worry")
+        assert timeline.find("budget review") == [(3.0, 5.0)]
+        assert timeline.find("DON'T") == [(5.0, 6.0)]
+        assert normalize("Q3, (draft)") == ["q3", "draft"]
+
+    def test_missing_phrase(self):
+        timeline = _timeline("alpha beta gamma")
+        assert timeline.find("beta alpha") == []
+        assert timeline.find("gamma delta") == []  # runs past the last word
+        assert timeline.find("...") == []
+
+    def test_phrase_longer_than_sort_depth(self):
+        base = " ".join(f"w{i}" for i in range(SORT_DEPTH))
+        timeline = _timeline(f"{base} yes {base} no")
+        assert timeline.find(f"{base} no") == [(SORT_DEPTH + 1.0, 2 * SORT_DEPTH + 2.0)]
+
+    def test_text_between(self):
+        timeline = _timeline("one two three four five")
+        assert timeline.text_between(1.0, 3.0) == "two three four"
+
+    def test_lookup_matches_linear_scan(self):
+        words = [f"w{(i * 7) % 13}" for i in range(2000)]
+        timeline = _timeline(" ".join(words))
+        phrase = ["w7", "w1", "w8"]
+        expected = [
+            (float(i), float(i + 3))
+            for i in range(len(words) - 2)
+            if words[i:i + 3] == phrase
+        ]
+        assert expected
+        assert timeline.find(" ".join(phrase)) == expected
+
+
+class TestSidecar:
+    def test_round_trip(self, tmp_dir):
+        timeline = _timeline("résumé review and the budget review", 0.25, audio="m.wav")
+        path = sidecar_path(os.path.join(tmp_dir, "2026-03-02-0930.md"))
+        timeline.save(path)
+
+        loaded = WordTimeline.load(path)
+        assert path.endswith("2026-03-02-0930.words")
+        assert loaded.audio == "m.wav"
+        assert len(loaded) == len(timeline)
+        assert loaded.find("review") == [(0.25, 0.5), (1.25, 1.5)]
+        assert loaded.find("résumé") == [(0.0, 0.25)]
+
+    def test_sidecar_is_compact(self, tmp_dir):
+        timeline = _timeline(" ".join(["so", "the", "plan", "is", "fine"] * 2000))
+        path = os.path.join(tmp_dir, "m.words")
+        timeline.save(path)
+        # 16 bytes per word plus a tiny vocabulary and header
+        assert os.path.getsize(path) < 16 * len(timeline) + 200
+
+    def test_empty_timeline(self, tmp_dir):
+        path = os.path.join(tmp_dir, "empty.words")
+        WordTimeline.from_words([]).save(path)
+        loaded = WordTimeline.load(path)
+        assert len(loaded) == 0
+        assert loaded.find("anything") == []
+
+
+class TestTimedTranscription:
+    def test_chunk_offsets_are_added(self, tmp_dir, monkeypatch):
+        wav_path = os.path.join(tmp_dir, "meeting.wav")
+        with wave.open(wav_path, "wb") as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(16000)
+            wf.writeframes(b"\x00\x00" * 16000 * 5)
+        monkeypatch.setattr(
+            meeting_transcriber, "get_settings",
+            lambda: Settings(max_duration_seconds=2, safety_margin=1.0, chunk_overlap_seconds=0.0),
+        )
+
+        words = []
+        with StandInAPI(text="alpha beta") as api:
+            transcriber = MeetingTranscriber(
+                api_key="test", base_url=api.base_url, scheduler=APIScheduler()
+            )
+            text = transcriber.transcribe_meeting(wav_path, on_words=words.extend)
+
+        assert text == "alpha beta alpha beta alpha beta"
+        assert [round(start, 3) for _, start, _ in words] == [0.0, 0.5, 2.0, 2.5, 4.0, 4.5]
+        fields = [r["fields"] for r in api.requests]
+        assert all(f["response_format"] == "verbose_json" for f in fields)
+        assert all(f["model"] == "whisper-1" for f in fields)
+
+        timeline = WordTimeline.from_words(words)
+        assert timeline.find("beta alpha") == [(0.5, 2.5), (2.5, 4.5)]
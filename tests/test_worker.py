@@ -0,0 +1,245 @@
+"""Tests for the worker process that runs encoding and meeting transcription."""
+import logging
+import os
+import shutil
+import signal
+import threading
+import time
+import wave
+
+import numpy as np
+import pytest
+
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.recorder import AudioRecorder
+from services.api_scheduler import APIScheduler
+from services.worker import WorkerError, WorkerMeetingTranscriber, WorkerProcess
+from tests.stand_in_api import StandInAPI
+from utils.cancellation import CancelledError, CancelToken
+from utils.settings import Settings
+
+
+@pytest.fixture(scope="module")
+def api():
+    # The worker inherits the environment, and the OpenAI client in it
+    # picks the stand-in up from OPENAI_BASE_URL
+    latency = {"seconds": 0.01}
+    with StandInAPI(latency=lambda number, fields: latency["seconds"], text="hello from the worker") as api:
+        saved = {name: os.environ.get(name) for name in ("OPENAI_API_KEY", "OPENAI_BASE_URL")}
+        os.environ["OPENAI_API_KEY"] = "test"
+        os.environ["OPENAI_BASE_URL"] = api.base_url
+        api.latency_control = latency
+        try:
+            yield api
+        finally:
+            for name, value in saved.items():
+                if value is None:
+                    os.environ.pop(name, None)
+                else:
+                    os.environ[name] = value
+
+
+@pytest.fixture(scope="module")
+def scheduler():
+    return APIScheduler(requests_per_second=100, request_burst=100)
+
+
+@pytest.fixture(scope="module")
+def worker(api, scheduler):
+    worker = WorkerProcess(scheduler=scheduler)
+    worker.start()
+    yield worker
+    worker.stop()
+
+
+@pytest.fixture
+def wav_path(tmp_path):
+    path = str(tmp_path / "meeting.wav")
+    with wave.open(path, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(16000)
+        wf.writeframes(b"\x00\x00" * 16000 * 3)
+    return path
+
+
+def _frames(seconds=1.0, sample_rate=16000, block=1024):
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    audio = (0.25 * np.sin(2 * np.pi * 440 * t)).astype(np.float32).reshape(-1, 1)
+    return [audio[i:i + block] for i in range(0, len(audio), block)]
+
+
+class TestEncode:
+    def test_round_trip(self, worker):
+        frames = _frames()
+        path = worker.encode(frames, 16000, 1)
+        try:
+            with wave.open(path, "rb") as f:
+                assert f.getframerate() == 16000
+                assert f.getnchannels() == 1
+                samples = np.frombuffer(f.readframes(f.getnframes()), dtype=np.int16)
+        finally:
+            os.remove(path)
+        assert len(samples) == sum(len(frame) for frame in frames)
+        # Normalized to full scale, like save_audio_to_file
+        assert np.abs(samples).max() == 32767
+
+    def test_no_frames(self, worker):
+        assert worker.encode([], 16000, 1) is None
+
+    def test_cancelled_before(self, worker):
+        token = CancelToken()
+        token.cancel()
+        with pytest.raises(CancelledError):
+            worker.encode(_frames(), 16000, 1, token=token)
+
+    def test_recorder_uses_encoder(self, worker):
+        recorder = AudioRecorder(sounds=False, encoder=worker)
+        jobs = worker.stats()["jobs"]
+        path = recorder.save_recording((_frames(0.2), 16000, 1))
+        try:
+            assert os.path.exists(path)
+        finally:
+            os.remove(path)
+        assert worker.stats()["jobs"] == jobs + 1
+
+    def test_recorder_falls_back_in_process(self):
+        class BrokenWorker:
+            def encode(self, *args, **kwargs):
+                raise WorkerError("worker process exited")
+
+        recorder = AudioRecorder(sounds=False, encoder=BrokenWorker())
+        path = recorder.save_recording((_frames(0.2), 16000, 1))
+        try:
+            assert os.path.exists(path)
+        finally:
+            os.remove(path)
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="needs ffmpeg")
+class TestMeetingJob:
+    def test_events_and_result(self, worker, wav_path):
+        chunks = []
+        text = WorkerMeetingTranscriber(worker).transcribe_meeting(
+            wav_path,
+            on_chunk=lambda *chunk: chunks.append(chunk),
+            settings=Settings(max_duration_seconds=2, safety_margin=1.0, chunk_overlap_seconds=0.0),
+        )
+        assert "hello from the worker" in text
+        assert len(chunks) == 2
+        assert [chunk[:2] for chunk in chunks] == [(0, 2), (1, 2)]
+
+    def test_logs_are_forwarded(self, worker, wav_path):
+        records = []
+        handler = logging.Handler()
+        handler.emit = records.append
+        logger = logging.getLogger("omnivo.transcriber")
+        level = logger.level
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        try:
+            WorkerMeetingTranscriber(worker).transcribe_meeting(
+                wav_path, settings=Settings(max_duration_seconds=2, safety_margin=1.0)
+            )
+        finally:
+            logger.removeHandler(handler)
+            logger.setLevel(level)
+        assert records
+        assert all(record.process == os.getpid() for record in records)
+
+    def test_cancel(self, worker, api, wav_path):
+        api.latency_control["seconds"] = 5.0
+        token = CancelToken()
+        threading.Timer(0.5, token.cancel).start()
+        started = time.monotonic()
+        try:
+            with pytest.raises(CancelledError):
+                WorkerMeetingTranscriber(worker).transcribe_meeting(
+                    wav_path, token=token, settings=Settings()
+                )
+        finally:
+            api.latency_control["seconds"] = 0.01
+        assert time.monotonic() - started < 4.0
+        # The slot of the aborted upload was given back
+        deadline = time.monotonic() + 5
+        while worker.scheduler.metrics()["in_flight"]["background"]:
+            assert time.monotonic() < deadline
+            time.sleep(0.02)
+
+    def test_uploads_use_the_daemon_scheduler(self, worker, scheduler, wav_path):
+        granted = scheduler.metrics()["granted"]["background"]
+        WorkerMeetingTranscriber(worker).transcribe_meeting(
+            wav_path,
+            settings=Settings(max_duration_seconds=2, safety_margin=1.0, chunk_overlap_seconds=0.0),
+        )
+        metrics = scheduler.metrics()
+        assert metrics["granted"]["background"] == granted + 2
+        assert metrics["in_flight"]["background"] == 0
+
+    def test_slot_held_while_uploading(self, worker, scheduler, api, wav_path):
+        api.latency_control["seconds"] = 1.0
+        thread = threading.Thread(
+            target=WorkerMeetingTranscriber(worker).transcribe_meeting,
+            args=(wav_path,), kwargs={"settings": Settings()},
+        )
+        try:
+            thread.start()
+            deadline = time.monotonic() + 5
+            while scheduler.metrics()["in_flight"]["background"] == 0:
+                assert time.monotonic() < deadline
+                time.sleep(0.02)
+        finally:
+            thread.join(10)
+            api.latency_control["seconds"] = 0.01
+        assert scheduler.metrics()["in_flight"]["background"] == 0
+
+    def test_rate_limit_pauses_the_daemon_scheduler(self, worker, scheduler, api, wav_path):
+        rate_limited = scheduler.metrics()["rate_limited"]
+        api.fail_next(429, retry_after=1)
+        text = WorkerMeetingTranscriber(worker).transcribe_meeting(wav_path, settings=Settings())
+        assert "hello from the worker" in text
+        assert scheduler.metrics()["rate_limited"] == rate_limited + 1
+
+    def test_local_when_disabled(self, api, wav_path):
+        unused = WorkerProcess()
+        text = WorkerMeetingTranscriber(unused).transcribe_meeting(
+            wav_path, settings=Settings(worker_process=False)
+        )
+        assert "hello from the worker" in text
+        assert unused.pid is None
+
+
+class TestRestart:
+    def test_restarted_after_crash(self, api, wav_path):
+        scheduler = APIScheduler(requests_per_second=100, request_burst=100)
+        worker = WorkerProcess(scheduler=scheduler)
+        try:
+            first = worker.start()
+            api.latency_control["seconds"] = 5.0
+            failure = []
+
+            def transcribe():
+                try:
+                    WorkerMeetingTranscriber(worker).transcribe_meeting(wav_path, settings=Settings())
+                except Exception as e:
+                    failure.append(e)
+
+            thread = threading.Thread(target=transcribe)
+            thread.start()
+            time.sleep(1.0)
+            os.kill(first, signal.SIGKILL)
+            thread.join(10)
+            api.latency_control["seconds"] = 0.01
+            assert not thread.is_alive()
+            assert isinstance(failure[0], WorkerError)
+            assert scheduler.metrics()["in_flight"]["background"] == 0
+
+            path = worker.encode(_frames(0.2), 16000, 1)
+            os.remove(path)
+            assert worker.pid != first
+            assert worker.stats()["started"] == 2
+        finally:
+            api.latency_control["seconds"] = 0.01
+            worker.stop()
@@ -1,15 +1,20 @@
 import numpy as np
-import simpleaudio as sa
 import wave
 import tempfile
 from datetime import datetime
 import os
 from utils.config import SAMPLE_RATE, CHANNELS
+from utils.log import get_logger
+
+log = get_logger("dictation")
 
 def play_click_sound():
     """
     Play a click sound to indicate recording start/stop.
     """
+    # Imported on first use: saving recordings doesn't need an audio output
+    import simpleaudio as sa
+
     # Get the path to the click.wav file
     script_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     click_wav_path = os.path.join(script_dir, 'resources', 'sounds', 'click.wav')
@@ -49,6 +54,8 @@ def play_click_sound():
 
 def play_clear_sound():
     """Play a short descending tone to indicate buffer was cleared."""
+    import simpleaudio as sa
+
     sample_rate = SAMPLE_RATE
     duration = 0.15
     t = np.linspace(0, duration, int(sample_rate * duration), False)
@@ -67,39 +74,55 @@ def play_clear_sound():
     sa.play_buffer(audio, 1, 2, sample_rate)
 
 
-def save_audio_to_file(recorded_frames):
+def new_recording_path():
+    """Create an empty temporary WAV file for a dictation and return its path."""
+    # Unique: dictations can overlap within a second
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    fd, path = tempfile.mkstemp(prefix=f"recording_{timestamp}_", suffix=".wav")
+    os.close(fd)
+    return path
+
+
+def write_wav(audio_data, path, sample_rate=SAMPLE_RATE, channels=CHANNELS):
+    """Normalize float audio (to prevent clipping) and write it as 16-bit WAV."""
+    peak = np.max(np.abs(audio_data)) if len(audio_data) else 0
+    if peak > 0:
+        audio_data = audio_data / peak
+    with wave.open(path, 'wb') as wf:
+        wf.setnchannels(channels)
+        wf.setsampwidth(2)  # 2 bytes for 16-bit audio
+        wf.setframerate(sample_rate)
+        wf.writeframes((audio_data * 32767).astype(np.int16).tobytes())
+
+
+def save_audio_to_file(recorded_frames, sample_rate=SAMPLE_RATE, channels=CHANNELS, token=None):
     """
     Save recorded audio frames to a temporary WAV file.
     
     Args:
         recorded_frames (list): List of audio frames recorded
+        sample_rate (int): Sample rate the frames were recorded at
+        channels (int): Number of channels in the frames
+        token (CancelToken): Checked before and after encoding
         
     Returns:
         str: Path to the saved audio file, or None if no audio was recorded
+
+    Raises:
+        CancelledError: ``token`` was cancelled; no file is left behind
     """
+    if token is not None:
+        token.raise_if_cancelled()
     if not recorded_frames:
-        print("No audio recorded.")
+        log.warning("No audio recorded.")
         return None
 
-    # Create a temporary file
-    temp_dir = tempfile.gettempdir()
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    temp_file_path = os.path.join(temp_dir, f"recording_{timestamp}.wav")
-    
-    # Convert the recorded frames to a NumPy array
-    audio_data = np.concatenate(recorded_frames, axis=0)
-    
-    # Normalize the audio data to prevent clipping
-    audio_data = audio_data / np.max(np.abs(audio_data)) if np.max(np.abs(audio_data)) > 0 else audio_data
-    
-    # Save as WAV file
-    with wave.open(temp_file_path, 'wb') as wf:
-        wf.setnchannels(CHANNELS)
-        wf.setsampwidth(2)  # 2 bytes for 16-bit audio
-        wf.setframerate(SAMPLE_RATE)
-        # Convert float to int16
-        audio_data_int = (audio_data * 32767).astype(np.int16)
-        wf.writeframes(audio_data_int.tobytes())
+    temp_file_path = new_recording_path()
+    write_wav(np.concatenate(recorded_frames, axis=0), temp_file_path, sample_rate, channels)
+
+    if token is not None and token.cancelled:
+        os.remove(temp_file_path)
+        token.raise_if_cancelled()
     
     #print(f"Audio saved to {temp_file_path}")
     return temp_file_path 
\ No newline at end of file
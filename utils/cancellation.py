@@ -0,0 +1,59 @@
+"""Cooperative cancellation shared across threads."""
+
+import threading
+
+
+class CancelledError(Exception):
+    """Raised when work is abandoned because its token was cancelled."""
+
+
+class CancelToken:
+    """Signal that in-flight work should stop.
+
+    Code doing the work either polls ``cancelled`` / ``raise_if_cancelled()``
+    between steps, or registers a callback (e.g. closing an HTTP client) that
+    runs as soon as ``cancel()`` is called.
+
+    A token created with a ``parent`` is cancelled along with it, so one
+    token per dictation can reach every request attempt made on its behalf.
+    """
+
+    def __init__(self, parent=None):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks = []
+        if parent is not None:
+            parent.add_callback(self.cancel)
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def cancel(self):
+        """Cancel the token and run registered callbacks (once)."""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                pass
+
+    def add_callback(self, callback):
+        """Run ``callback`` on cancel. Runs immediately if already cancelled."""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def raise_if_cancelled(self):
+        if self._event.is_set():
+            raise CancelledError()
+
+    def wait(self, timeout=None):
+        """Block until cancelled or ``timeout`` elapses. Returns True if cancelled."""
+        return self._event.wait(timeout)
@@ -14,10 +14,56 @@ CHANNELS = 1  # Number of audio channels (1 for mono, 2 for stereo)
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 WHISPER_MODEL = "whisper-1"
 
+# Dictation model routing: whisper_model is preferred, the fallbacks are used
+# when it is predicted to miss the latency budget for the clip or is failing
+DICTATION_FALLBACK_MODELS = "gpt-4o-mini-transcribe"  # comma-separated, in order of preference
+DICTATION_LATENCY_BUDGET = 3.0          # seconds; predicted p95 a model must fit
+ROUTER_WINDOW = 50                      # latency samples kept per model
+ROUTER_MIN_SAMPLES = 3                  # samples before a model's latency is predicted
+ROUTER_ERROR_THRESHOLD = 0.5            # recent error rate that marks a model as failing
+ROUTER_COOLDOWN = 60.0                  # seconds a failing model is skipped
+ROUTER_PROBE_EVERY = 20                 # every Nth dictation goes to the least recently used model
+
+# Dictation modes: transcription, context (answer with the screen as
+# context) or explanation (explain what is on screen). Shift / Control while
+# dictating switch to context / explanation for that dictation.
+DICTATION_MODE = "transcription"
+CONTEXT_MODEL = "gpt-4o"
+CONTEXT_REQUEST_TIMEOUT = 60.0          # seconds per chat reply attempt (replies are never hedged)
+SCREEN_MAX_WIDTH = 1280                 # screenshots are downscaled to at most this width
+SCREEN_HASH_THRESHOLD = 6               # dHash bits (of 256) within which the pixels are compared
+
+# Cache of chat replies for those modes (memory LRU + SQLite under ~/.omnivo/)
+RESPONSE_CACHE = True
+RESPONSE_CACHE_PATH = os.path.expanduser("~/.omnivo/responses.db")
+RESPONSE_CACHE_TTL = 24 * 3600          # seconds a reply stays valid
+RESPONSE_CACHE_ENTRIES = 256            # replies kept in memory
+RESPONSE_CACHE_DISK_ENTRIES = 5000      # replies kept on disk
+
+# Custom vocabulary: term corrections, expansions, filler removal and snippets
+# from ~/.omnivo/vocabulary/*.txt, applied to every dictation
+VOCABULARY = True
+VOCABULARY_DIR = os.path.expanduser("~/.omnivo/vocabulary")
+VOCABULARY_CACHE_PATH = os.path.expanduser("~/.omnivo/vocabulary.cache")
+
 # Meeting recording
 MEETING_NOTES_PATH = os.path.expanduser("~/notes/meetings")
 MEETING_TEST_MODE = True  # Save raw audio files alongside transcriptions
 TRANSCRIBE_MODEL = "gpt-4o-transcribe"
+MEETING_TIMESTAMPS = False  # Write a <timestamp>.words seek index beside the transcript
+TIMESTAMP_MODEL = "whisper-1"  # word timings need verbose_json, which only whisper-1 returns
+
+# Meeting summaries (written beside the transcript as <timestamp>.summary.md)
+MEETING_SUMMARY = False                 # summarize meetings after transcription
+SUMMARY_MODEL = "gpt-4o-mini"
+SUMMARY_MAX_WORKERS = 4                 # summary requests in parallel
+SUMMARY_REDUCE_FANIN = 6                # partial summaries merged per reduce step
+SUMMARY_REQUEST_TIMEOUT = 180.0         # seconds per summary request attempt
+
+# Archived meeting audio (test mode), encoded in the background
+ARCHIVE_FORMAT = "flac"                 # "flac" (lossless) or "opus"
+ARCHIVE_MAX_BYTES = 10 * 1024 ** 3      # oldest recordings are evicted beyond this
+ARCHIVE_MAX_AGE_DAYS = 0                # evict recordings older than this (0 = keep)
 
 # Swift helper binary path
 AUDIO_CAPTURE_BINARY = os.path.join(
@@ -30,3 +76,67 @@ MAX_FILE_SIZE_BYTES = 25 * 1024 * 1024  # 25 MB
 MAX_DURATION_SECONDS = 600              # ~10 min
 COMPRESSED_BITRATE = "64k"              # mono mp3
 SAFETY_MARGIN = 0.95
+CHUNK_ENCODE_WORKERS = 0                # ffmpeg processes encoding chunks in parallel (0 = one per core)
+CHUNK_ENCODE_AHEAD = 4                  # chunks encoded ahead of the upload (bounds temp files)
+CHUNK_OVERLAP_SECONDS = 2.0             # audio shared by consecutive chunks, de-duplicated when stitching
+CHUNK_UPLOAD_WORKERS = 3                # chunks transcribed in parallel
+MEETING_SPEEDUP = 1.0                   # upload meetings time-compressed by this factor (1-2, pitch kept)
+
+# Worker process: meeting transcription and dictation encoding run there, so
+# they never hold the GIL while the audio and key capture threads need it
+WORKER_PROCESS = True
+
+# Dictation request policy (adaptive timeouts, retries, hedging)
+REQUEST_MAX_RETRIES = 2                 # retries after the first attempt
+REQUEST_RETRY_BACKOFF = 0.5             # seconds, doubled per retry
+REQUEST_HEDGE_PERCENTILE = 95           # send a duplicate request after this latency percentile
+REQUEST_DEFAULT_HEDGE_DELAY = 5.0       # seconds, until enough latency samples exist
+REQUEST_TIMEOUT_MULTIPLIER = 3.0        # attempt deadline = p99 * multiplier
+REQUEST_MIN_TIMEOUT = 5.0               # seconds
+REQUEST_MAX_TIMEOUT = 60.0              # seconds, also used until warmed up
+REQUEST_MIN_SAMPLES = 10                # latency samples before percentiles are trusted
+DICTATION_CANCEL_WINDOW = 5.0           # seconds after Caps Lock off that Esc (or a new dictation) cancels
+
+# API scheduler (shared by dictation and meeting uploads)
+API_REQUESTS_PER_SECOND = 5.0           # sustained request rate
+API_REQUEST_BURST = 10                  # requests allowed back-to-back
+API_UPLOAD_BYTES_PER_SECOND = 4 * 1024 * 1024
+API_UPLOAD_BURST_BYTES = 50 * 1024 * 1024
+API_MAX_IN_FLIGHT = 4                   # background work may use all but one slot
+API_DEFAULT_RETRY_AFTER = 2.0           # seconds, when a 429 has no Retry-After
+MEETING_REQUEST_TIMEOUT = 900.0         # seconds per meeting chunk attempt
+
+# `omnivo serve` (local transcription HTTP server)
+SERVE_HOST = "127.0.0.1"
+SERVE_PORT = 8765
+SERVE_MAX_JOBS = 2                      # jobs transcribed concurrently
+SERVE_MAX_QUEUED = 32                   # jobs waiting; beyond this uploads get 503
+SERVE_MAX_UPLOAD_BYTES = 1024 * 1024 * 1024
+SERVE_CACHE_ENTRIES = 256               # finished transcriptions kept by content hash
+SERVE_JOB_TTL = 3600                    # seconds a finished job stays pollable
+
+# Key capture: auto (quartz on macOS, evdev on Linux), quartz, evdev or pynput
+KEY_CAPTURE_BACKEND = "auto"
+
+# Clipboard: auto (appkit on macOS, else pyperclip), appkit, pyperclip or memory
+CLIPBOARD_BACKEND = "auto"
+CLIPBOARD_RESTORE = True                # put back what was copied before a dictation was pasted
+CLIPBOARD_RESTORE_DELAY = 0.5           # seconds after Cmd+V, so the app has read the dictation
+
+# Logging (JSON lines, rotated by size; read with `omnivo log`)
+LOG_PATH = os.path.expanduser("~/.omnivo/omnivo.log")
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUP_COUNT = 3
+
+# Memory telemetry (`omnivo memory`)
+MEMORY_SAMPLE_INTERVAL = 60.0           # seconds between RSS samples when idle
+MEMORY_HISTORY_SAMPLES = 1440           # RSS samples kept (24 h at the default interval)
+MEMORY_BUDGET_BYTES = 0                 # warn in the log when RSS exceeds this (0 = off)
+MEMORY_TRACE_FRAMES = 1                 # tracemalloc frames stored per allocation
+
+# Sampling CPU profiler (`omnivo profile`)
+PROFILE_DIR = os.path.expanduser("~/.omnivo/profiles")
+PROFILE_INTERVAL = 0.01                 # seconds between stack samples
+
+# Full-text index of the meeting notes (`omnivo search`)
+SEARCH_INDEX_PATH = os.path.expanduser("~/.omnivo/search.db")
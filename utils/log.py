@@ -0,0 +1,166 @@
+"""Queue-backed logging that keeps formatting and I/O off hot threads.
+
+Keyboard, audio and processing threads only enqueue log records. A single
+background listener thread formats them: rich markup on a TTY, and compact
+JSON lines in a size-rotated file under ~/.omnivo/ (read by ``omnivo log``).
+
+Usage:
+    from utils.log import get_logger
+    log = get_logger("meeting")
+    log.info("[bold magenta]MEETING RECORDING STARTED[/bold magenta]")
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+from datetime import datetime
+
+from utils.config import LOG_PATH, LOG_MAX_BYTES, LOG_BACKUP_COUNT
+
+ROOT_LOGGER = "omnivo"
+
+_listener = None
+
+
+def get_logger(component):
+    """Return the logger for a component (e.g. 'keyboard', 'meeting')."""
+    return logging.getLogger(f"{ROOT_LOGGER}.{component}")
+
+
+def plain_text(message):
+    """Strip rich markup from a message."""
+    if "[" not in message:
+        return message
+    from rich.errors import MarkupError
+    from rich.text import Text
+
+    try:
+        return Text.from_markup(message).plain
+    except MarkupError:
+        return message
+
+
+def component_of(record):
+    name = record.name
+    if name.startswith(ROOT_LOGGER + "."):
+        return name[len(ROOT_LOGGER) + 1:]
+    return name
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """One compact JSON object per record."""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "component": component_of(record),
+            "msg": plain_text(record.getMessage()),
+            "thread": record.threadName,
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, separators=(",", ":"), ensure_ascii=False)
+
+
+class ConsoleHandler(logging.Handler):
+    """Print records through a rich console, keeping their markup."""
+
+    def __init__(self, console=None):
+        super().__init__()
+        if console is None:
+            from rich.console import Console
+
+            console = Console()
+        self.console = console
+
+    def emit(self, record):
+        try:
+            self.console.print(record.getMessage())
+            if record.exc_info:
+                self.console.print(
+                    logging.Formatter().formatException(record.exc_info), markup=False
+                )
+        except Exception:
+            self.handleError(record)
+
+
+class _EnqueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that defers all formatting to the listener thread."""
+
+    def prepare(self, record):
+        return record
+
+
+def setup_logging(
+    interactive=None,
+    log_path=LOG_PATH,
+    level=logging.INFO,
+    max_bytes=LOG_MAX_BYTES,
+    backup_count=LOG_BACKUP_COUNT,
+):
+    """Route all omnivo loggers through a queue to a background thread.
+
+    Args:
+        interactive: Also print to the terminal. Defaults to stdout.isatty().
+        log_path: Rotated JSON-lines log file.
+        level: Minimum level recorded.
+        max_bytes: Rotate the log file once it reaches this size.
+        backup_count: Rotated files to keep.
+
+    Returns:
+        logging.handlers.QueueListener: The running listener
+    """
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    if interactive is None:
+        interactive = sys.stdout.isatty()
+
+    handlers = []
+    if log_path:
+        os.makedirs(os.path.dirname(log_path), exist_ok=True)
+        file_handler = logging.handlers.RotatingFileHandler(
+            log_path,
+            maxBytes=max_bytes,
+            backupCount=backup_count,
+            encoding="utf-8",
+        )
+        file_handler.setFormatter(JsonLinesFormatter())
+        handlers.append(file_handler)
+    if interactive:
+        handlers.append(ConsoleHandler())
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger(ROOT_LOGGER)
+    root.setLevel(level)
+    root.propagate = False
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_EnqueueHandler(log_queue))
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers)
+    _listener.start()
+    atexit.register(shutdown_logging)
+    return _listener
+
+
+def shutdown_logging():
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    _listener = None
+
+    root = logging.getLogger(ROOT_LOGGER)
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.propagate = True
@@ -0,0 +1,318 @@
+"""Process memory readings and telemetry for the long-running daemon.
+
+``MemoryMonitor`` samples RSS in the background (every
+``memory_sample_interval`` seconds, faster while a dictation or meeting is
+running), records the peak of each job, and takes tracemalloc snapshots on
+demand so two points in time can be diffed by allocation site. Everything is
+read over the control socket (``omnivo memory``) without restarting.
+"""
+
+import os
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+
+from utils.log import get_logger
+from utils.settings import get_settings
+
+log = get_logger("memory")
+
+JOB_SAMPLE_INTERVAL = 0.25  # seconds between RSS samples while a job runs
+MAX_SNAPSHOTS = 8           # named tracemalloc snapshots kept
+MAX_JOBS = 100              # finished jobs kept
+GROUP_BY = ("lineno", "filename")
+
+
+def current_rss_bytes():
+    """Current resident set size, or None where it can't be read cheaply."""
+    if sys.platform == "darwin":
+        return _mach_rss_bytes()
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+_mach = None
+
+
+def _mach_rss_bytes():
+    """resident_size from task_info(MACH_TASK_BASIC_INFO) on macOS."""
+    global _mach
+    import ctypes
+
+    class TaskBasicInfo(ctypes.Structure):
+        _fields_ = [
+            ("virtual_size", ctypes.c_uint64),
+            ("resident_size", ctypes.c_uint64),
+            ("resident_size_max", ctypes.c_uint64),
+            ("user_time", ctypes.c_int32 * 2),
+            ("system_time", ctypes.c_int32 * 2),
+            ("policy", ctypes.c_int32),
+            ("suspend_count", ctypes.c_int32),
+        ]
+
+    try:
+        if _mach is None:
+            libc = ctypes.CDLL("/usr/lib/libSystem.B.dylib")
+            _mach = (libc, ctypes.c_uint32.in_dll(libc, "mach_task_self_").value)
+        libc, task = _mach
+        info = TaskBasicInfo()
+        count = ctypes.c_uint32(ctypes.sizeof(info) // 4)
+        MACH_TASK_BASIC_INFO = 20
+        if libc.task_info(task, MACH_TASK_BASIC_INFO, ctypes.byref(info), ctypes.byref(count)):
+            return None
+        return info.resident_size
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def peak_rss_bytes():
+    """Peak resident set size since the process started."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and kilobytes on Linux
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _stat_dict(stat):
+    frame = stat.traceback[0]
+    return {
+        "location": f"{frame.filename}:{frame.lineno}",
+        "size_bytes": stat.size,
+        "count": stat.count,
+    }
+
+
+def _diff_dict(stat):
+    frame = stat.traceback[0]
+    return {
+        "location": f"{frame.filename}:{frame.lineno}",
+        "size_bytes": stat.size,
+        "size_diff_bytes": stat.size_diff,
+        "count_diff": stat.count_diff,
+    }
+
+
+class MemoryMonitor:
+    def __init__(self, settings=None, rss=current_rss_bytes):
+        """
+        Args:
+            settings: Fixed settings snapshot (defaults to the live settings)
+            rss: RSS reader, replaceable in tests
+        """
+        self._settings = settings
+        self._rss = rss
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+        self._history = deque(maxlen=self.settings.memory_history_samples)
+        self._active = {}  # job id -> running job record
+        self._jobs = deque(maxlen=MAX_JOBS)
+        self._job_ids = iter(range(1, 10 ** 12))
+        self._snapshots = {}  # label -> (taken_at, tracemalloc.Snapshot)
+        self._snapshot_ids = iter(range(1, 10 ** 12))  # default labels s1, s2, ...
+        self._over_budget = False
+
+    @property
+    def settings(self):
+        return self._settings or get_settings()
+
+    # Sampling
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="memory-monitor", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self.sample()
+            self._wake.clear()  # before checking, so a job starting now wakes us
+            with self._lock:
+                busy = bool(self._active)
+            interval = JOB_SAMPLE_INTERVAL if busy else self.settings.memory_sample_interval
+            self._wake.wait(interval)
+
+    def sample(self):
+        """Take one RSS reading; updates running jobs and checks the budget."""
+        rss = self._rss()
+        if rss is None:
+            return None
+        budget = self.settings.memory_budget_bytes
+        with self._lock:
+            if self._history.maxlen != self.settings.memory_history_samples:
+                self._history = deque(self._history, maxlen=self.settings.memory_history_samples)
+            self._history.append((time.time(), rss))
+            for job in self._active.values():
+                job["rss_peak"] = max(job["rss_peak"], rss)
+            crossed = bool(budget) and rss > budget and not self._over_budget
+            self._over_budget = bool(budget) and rss > budget
+        if crossed:
+            log.warning(
+                f"[yellow]RSS {rss / 2 ** 20:.0f}MB is over the memory budget "
+                f"({budget / 2 ** 20:.0f}MB)[/yellow]"
+            )
+        return rss
+
+    def history(self, since=None):
+        """RSS samples as ``(epoch seconds, bytes)``, oldest first."""
+        with self._lock:
+            return [s for s in self._history if since is None or s[0] >= since]
+
+    # Jobs
+
+    @contextmanager
+    def job(self, kind):
+        """Track the RSS peak of one dictation or meeting while it runs."""
+        rss = self._rss()
+        record = {
+            "kind": kind,
+            "started_at": time.time(),
+            "rss_start": rss,
+            "rss_peak": rss or 0,
+            "traced_peak": None,
+        }
+        tracing = tracemalloc.is_tracing()
+        if tracing and hasattr(tracemalloc, "reset_peak"):  # Python 3.9+
+            tracemalloc.reset_peak()
+        with self._lock:
+            job_id = next(self._job_ids)
+            self._active[job_id] = record
+        self._wake.set()  # switch to job-rate sampling
+        started = time.monotonic()
+        try:
+            yield record
+        finally:
+            end = self.sample()
+            with self._lock:
+                self._active.pop(job_id, None)
+                record["seconds"] = round(time.monotonic() - started, 3)
+                record["rss_end"] = end
+                if tracing and tracemalloc.is_tracing():
+                    # Process-wide: includes jobs running at the same time
+                    record["traced_peak"] = tracemalloc.get_traced_memory()[1]
+                self._jobs.append(record)
+
+    def jobs(self, kind=None):
+        with self._lock:
+            return [dict(j) for j in self._jobs if kind is None or j["kind"] == kind]
+
+    # tracemalloc
+
+    def start_tracing(self, frames=None):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames or self.settings.memory_trace_frames)
+            log.info("[dim]Memory tracing started[/dim]")
+        return True
+
+    def stop_tracing(self):
+        """Stop tracing and drop the snapshots it produced."""
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+            log.info("[dim]Memory tracing stopped[/dim]")
+        with self._lock:
+            self._snapshots.clear()
+        return False
+
+    def snapshot(self, label=None, limit=15, group_by="lineno"):
+        """Take a named tracemalloc snapshot.
+
+        Returns:
+            dict: ``label``, traced bytes and the top allocation sites,
+            grouped by source line or by file
+        """
+        if group_by not in GROUP_BY:
+            raise ValueError(f"group_by must be one of {', '.join(GROUP_BY)}")
+        taken_at, snapshot = self._take()
+        with self._lock:
+            label = label or f"s{next(self._snapshot_ids)}"
+            self._snapshots.pop(label, None)
+            self._snapshots[label] = (taken_at, snapshot)
+            while len(self._snapshots) > MAX_SNAPSHOTS:
+                self._snapshots.pop(next(iter(self._snapshots)))
+        stats = snapshot.statistics(group_by)
+        return {
+            "label": label,
+            "taken_at": taken_at,
+            "traced_bytes": sum(s.size for s in stats),
+            "top": [_stat_dict(s) for s in stats[:limit]],
+        }
+
+    @staticmethod
+    def _take():
+        if not tracemalloc.is_tracing():
+            raise RuntimeError("memory tracing is off (start it with `omnivo memory trace on`)")
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            (tracemalloc.Filter(False, tracemalloc.__file__),)
+        )
+        return time.time(), snapshot
+
+    def diff(self, first, second=None, limit=15, group_by="lineno"):
+        """Top allocation changes from snapshot ``first`` to ``second``
+        (default: a snapshot taken now, which is not kept)."""
+        if group_by not in GROUP_BY:
+            raise ValueError(f"group_by must be one of {', '.join(GROUP_BY)}")
+        with self._lock:
+            snapshots = dict(self._snapshots)
+        if first not in snapshots:
+            raise KeyError(f"no snapshot named {first!r} (have: {', '.join(snapshots) or 'none'})")
+        if second is None:
+            second, (end, new) = "now", self._take()
+        elif second in snapshots:
+            end, new = snapshots[second]
+        else:
+            raise KeyError(f"no snapshot named {second!r}")
+        start, old = snapshots[first]
+        stats = new.compare_to(old, group_by)
+        return {
+            "from": first,
+            "to": second,
+            "seconds": round(end - start, 1),
+            "size_diff_bytes": sum(s.size_diff for s in stats),
+            "top": [_diff_dict(s) for s in stats[:limit]],
+        }
+
+    # Report
+
+    def report(self):
+        """Everything ``omnivo memory`` shows."""
+        history = self.history()
+        now = time.time()
+        with self._lock:
+            snapshots = list(self._snapshots)
+        peaks = {}
+        for job in self.jobs():
+            peaks[job["kind"]] = max(peaks.get(job["kind"], 0), job["rss_peak"] or 0)
+        return {
+            "rss_bytes": self._rss(),
+            "peak_rss_bytes": peak_rss_bytes(),
+            "budget_bytes": self.settings.memory_budget_bytes or None,
+            "history": {
+                window: _summarize([rss for t, rss in history if t >= now - seconds])
+                for window, seconds in (("1h", 3600), ("24h", 86400))
+            },
+            "first_sample": history[0] if history else None,
+            "job_peaks": peaks,
+            "recent_jobs": self.jobs()[-10:],
+            "tracing": tracemalloc.is_tracing(),
+            "traced_bytes": tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None,
+            "snapshots": snapshots,
+        }
+
+
+def _summarize(values):
+    if not values:
+        return None
+    return {"min": min(values), "max": max(values), "last": values[-1], "count": len(values)}
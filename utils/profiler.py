@@ -0,0 +1,423 @@
+"""Sampling CPU profiler for the running daemon.
+
+A background thread reads the stack of every other thread with
+``sys._current_frames()`` every ``profile_interval`` seconds. Stacks are
+aggregated in memory and written, when the profile stops, as collapsed
+stacks (``.collapsed``, for flamegraph.pl / speedscope / inferno) and as a
+speedscope document (``.speedscope.json``, one profile per thread).
+
+Each sample is weighted by the CPU time the thread used since the previous
+sample, read from ``/proc/self/task/<tid>/stat`` on Linux and from mach
+``thread_info`` on macOS, so threads blocked in a read, a lock or
+``time.sleep`` cost nothing. Elsewhere samples are weighted by wall time, and
+a thread is taken to be blocked, and dropped, when its stack ends in a known
+blocking call (``Event.wait``, ``Queue.get``, ...) or is still inside the same
+call it was in at the previous sample (a C call such as ``os.read`` that
+hasn't returned). That is a guess: a loop of short C calls is undercounted.
+
+Started and stopped with ``omnivo profile``.
+"""
+
+import dis
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+from utils.config import PROFILE_DIR
+from utils.log import get_logger
+from utils.settings import get_settings
+
+log = get_logger("profiler")
+
+MAX_SECONDS = 600  # a profile left running stops itself after this
+
+# (file name, function) of Python frames that only ever wait
+IDLE_LEAVES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    ("selectors.py", "select"),
+    ("socket.py", "accept"),
+    ("socket.py", "readinto"),
+    ("subprocess.py", "wait"),
+    ("subprocess.py", "_try_wait"),
+}
+
+# Opcodes a frame is suspended on while a function it called runs
+_CALL_OPS = frozenset(
+    op for name, op in dis.opmap.items() if name.startswith("CALL") or name == "PRECALL"
+)
+
+_TASK_DIR = "/proc/self/task"
+_CLK_TCK = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+
+class _ThreadCPU:
+    """Per-thread CPU seconds from /proc, with one open file per thread."""
+
+    def __init__(self):
+        self._fds = {}  # native id -> fd
+
+    def seconds(self, native_id):
+        fd = self._fds.get(native_id)
+        try:
+            if fd is None:
+                fd = self._fds[native_id] = os.open(f"{_TASK_DIR}/{native_id}/stat", os.O_RDONLY)
+            stat = os.pread(fd, 1024, 0)
+        except OSError:
+            self.forget(native_id)
+            return None
+        # Fields after "(comm)": state, ppid, ... utime is the 12th, stime the 13th
+        fields = stat[stat.rfind(b")") + 2:].split()
+        return (int(fields[11]) + int(fields[12])) / _CLK_TCK
+
+    def forget(self, native_id):
+        fd = self._fds.pop(native_id, None)
+        if fd is not None:
+            os.close(fd)
+
+    def times(self, native_ids):
+        """CPU seconds of the threads that could be read, by native id."""
+        used = {}
+        for native_id in native_ids:
+            seconds = self.seconds(native_id)
+            if seconds is not None:
+                used[native_id] = seconds
+        self.retain(native_ids)
+        return used
+
+    def retain(self, native_ids):
+        for native_id in set(self._fds) - set(native_ids):
+            self.forget(native_id)
+
+    def close(self):
+        self.retain(())
+
+
+class _MachThreadCPU:
+    """Per-thread CPU seconds from mach ``task_threads`` / ``thread_info`` (macOS).
+
+    Native ids are the ids ``pthread_threadid_np`` returns, which mach reports
+    as THREAD_IDENTIFIER_INFO.
+    """
+
+    THREAD_BASIC_INFO = 3
+    THREAD_IDENTIFIER_INFO = 4
+
+    def __init__(self):
+        import ctypes
+
+        class TimeValue(ctypes.Structure):
+            _fields_ = [("seconds", ctypes.c_int32), ("microseconds", ctypes.c_int32)]
+
+        class ThreadBasicInfo(ctypes.Structure):
+            _fields_ = [
+                ("user_time", TimeValue),
+                ("system_time", TimeValue),
+                ("cpu_usage", ctypes.c_int32),
+                ("policy", ctypes.c_int32),
+                ("run_state", ctypes.c_int32),
+                ("flags", ctypes.c_int32),
+                ("suspend_count", ctypes.c_int32),
+                ("sleep_time", ctypes.c_int32),
+            ]
+
+        class ThreadIdentifierInfo(ctypes.Structure):
+            _fields_ = [
+                ("thread_id", ctypes.c_uint64),
+                ("thread_handle", ctypes.c_uint64),
+                ("dispatch_qaddr", ctypes.c_uint64),
+            ]
+
+        self._ctypes = ctypes
+        self._basic, self._identifier = ThreadBasicInfo, ThreadIdentifierInfo
+        self._libc = ctypes.CDLL("/usr/lib/libSystem.B.dylib")
+        self._task = ctypes.c_uint32.in_dll(self._libc, "mach_task_self_").value
+        self._libc.vm_deallocate.argtypes = [ctypes.c_uint32, ctypes.c_size_t, ctypes.c_size_t]
+
+    def _info(self, port, flavor, info):
+        ctypes = self._ctypes
+        count = ctypes.c_uint32(ctypes.sizeof(info) // 4)
+        return self._libc.thread_info(port, flavor, ctypes.byref(info), ctypes.byref(count)) == 0
+
+    def times(self, native_ids):
+        """CPU seconds of the threads that could be read, by native id."""
+        ctypes, libc = self._ctypes, self._libc
+        ports = ctypes.POINTER(ctypes.c_uint32)()
+        count = ctypes.c_uint32()
+        if libc.task_threads(self._task, ctypes.byref(ports), ctypes.byref(count)):
+            return {}
+        wanted, used = set(native_ids), {}
+        try:
+            for i in range(count.value):
+                port = ports[i]
+                identifier, basic = self._identifier(), self._basic()
+                if (self._info(port, self.THREAD_IDENTIFIER_INFO, identifier)
+                        and identifier.thread_id in wanted
+                        and self._info(port, self.THREAD_BASIC_INFO, basic)):
+                    used[identifier.thread_id] = (
+                        basic.user_time.seconds + basic.system_time.seconds
+                        + (basic.user_time.microseconds + basic.system_time.microseconds) / 1e6
+                    )
+                libc.mach_port_deallocate(self._task, port)
+        finally:
+            libc.vm_deallocate(
+                self._task,
+                ctypes.cast(ports, ctypes.c_void_p).value,
+                count.value * ctypes.sizeof(ctypes.c_uint32),
+            )
+        return used
+
+    def close(self):
+        pass
+
+
+def _thread_cpu():
+    """The per-thread CPU time reader for this platform, or None."""
+    if os.path.isdir(_TASK_DIR):
+        return _ThreadCPU()
+    if sys.platform == "darwin":
+        try:
+            return _MachThreadCPU()
+        except (OSError, ValueError, AttributeError) as e:
+            log.warning(f"[yellow]No per-thread CPU time, profiling wall time: {e}[/yellow]")
+    return None
+
+
+class SamplingProfiler:
+    def __init__(self, interval=None, output_dir=None, cpu_time=None):
+        """
+        Args:
+            interval: Seconds between samples (defaults to the profile_interval setting)
+            output_dir: Where profiles are written (defaults to ~/.omnivo/profiles)
+            cpu_time: Weight samples by per-thread CPU time (default: where
+                it can be read, Linux and macOS)
+        """
+        self.interval = interval or get_settings().profile_interval
+        self.output_dir = output_dir or PROFILE_DIR
+        if cpu_time is None:
+            cpu_time = os.path.isdir(_TASK_DIR) or sys.platform == "darwin"
+        self.cpu_time = cpu_time
+        self._stacks = Counter()  # (thread name, frame index, ...) -> seconds
+        self._frames = []  # frame index -> (function, file, line)
+        self._frame_index = {}  # code object -> frame index
+        self._stopped = threading.Event()
+        self._thread = None
+        self._started_at = None
+        self._samples = 0
+        self._overhead = 0.0
+        self.result = None  # summary, once written
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, seconds=None):
+        """Sample for ``seconds`` (at most MAX_SECONDS) or until ``stop()``."""
+        if self.running:
+            raise RuntimeError("a profile is already running")
+        self._stopped.clear()
+        self._started_at = time.time()
+        duration = min(seconds or MAX_SECONDS, MAX_SECONDS)
+        self._thread = threading.Thread(
+            target=self._run, args=(duration,), name="profiler", daemon=True
+        )
+        self._thread.start()
+        log.info(f"[dim]Profiling every {self.interval * 1000:.0f}ms for up to {duration:.0f}s[/dim]")
+
+    def stop(self):
+        """Stop sampling. Returns the summary of the written profile."""
+        self._stopped.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join()
+        return self.result
+
+    def wait(self, timeout=None):
+        if self._thread:
+            self._thread.join(timeout)
+
+    # Sampling
+
+    def _run(self, duration):
+        cpu = _thread_cpu() if self.cpu_time else None
+        self.cpu_time = cpu is not None
+        previous = {}  # per thread: CPU seconds, or where its stack was, at the last sample
+        deadline = time.monotonic() + duration
+        last = time.monotonic()
+        try:
+            while not self._stopped.wait(self.interval) and time.monotonic() < deadline:
+                began = time.thread_time()
+                now = time.monotonic()
+                self._sample(now - last, cpu, previous)
+                last = now
+                self._samples += 1
+                self._overhead += time.thread_time() - began
+        finally:
+            if cpu:
+                cpu.close()
+            try:
+                self.result = self.write()
+            except OSError as e:
+                log.error(f"[bold red]Could not write profile: {e}[/bold red]")
+
+    def _sample(self, elapsed, cpu, previous):
+        me = threading.get_ident()
+        threads = {t.ident: t for t in threading.enumerate()}
+        used_by_id = cpu.times([t.native_id for t in threads.values()]) if cpu else None
+        for ident, frame in sys._current_frames().items():
+            thread = threads.get(ident)
+            if ident == me or thread is None:
+                continue
+            if cpu:
+                used = used_by_id.get(thread.native_id)
+                if used is None:
+                    continue
+                weight = used - previous.get(thread.native_id, used)
+                previous[thread.native_id] = used
+            else:
+                where = (id(frame), frame.f_code, frame.f_lasti)
+                weight = 0 if self._blocked(frame, previous.get(ident), where) else elapsed
+                previous[ident] = where
+            if weight > 0:
+                self._record(thread.name, frame, weight, idle_filter=not cpu)
+
+    @staticmethod
+    def _blocked(frame, before, where):
+        """Still in the C call it was in at the previous sample (wall time only)."""
+        if before is not None and before != where:
+            return False
+        lasti = frame.f_lasti
+        return lasti >= 0 and frame.f_code.co_code[lasti] in _CALL_OPS
+
+    def _record(self, thread_name, frame, weight, idle_filter=False):
+        code = frame.f_code
+        if idle_filter and (os.path.basename(code.co_filename), code.co_name) in IDLE_LEAVES:
+            return
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            index = self._frame_index.get(code)
+            if index is None:
+                index = self._frame_index[code] = len(self._frames)
+                self._frames.append((code.co_name, code.co_filename, code.co_firstlineno))
+            stack.append(index)
+            frame = frame.f_back
+        stack.append(thread_name)
+        self._stacks[tuple(reversed(stack))] += weight
+
+    # Output
+
+    def _label(self, index):
+        name, filename, line = self._frames[index]
+        short = os.path.join(*filename.split(os.sep)[-2:]) if filename else "?"
+        return f"{name} ({short}:{line})".replace(";", ",")
+
+    def collapsed(self):
+        """Stacks as ``thread;outer;...;inner <milliseconds>`` lines."""
+        lines = []
+        for stack, seconds in sorted(self._stacks.items(), key=lambda item: -item[1]):
+            ms = round(seconds * 1000)
+            if ms:
+                frames = ";".join(self._label(i) for i in stack[1:])
+                lines.append(f"{stack[0].replace(';', ',')};{frames} {ms}")
+        return "\n".join(lines) + "\n"
+
+    def speedscope(self, name="omnivo"):
+        """The profile as a speedscope document (one sampled profile per thread)."""
+        by_thread = {}
+        for stack, seconds in self._stacks.items():
+            samples, weights = by_thread.setdefault(stack[0], ([], []))
+            samples.append(list(stack[1:]))
+            weights.append(round(seconds * 1000, 3))
+        profiles = [
+            {
+                "type": "sampled",
+                "name": thread,
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": round(sum(weights), 3),
+                "samples": samples,
+                "weights": weights,
+            }
+            for thread, (samples, weights) in sorted(by_thread.items())
+        ]
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "omnivo",
+            "shared": {
+                "frames": [
+                    {"name": fn, "file": filename, "line": line}
+                    for fn, filename, line in self._frames
+                ]
+            },
+            "profiles": profiles,
+        }
+
+    def top(self, limit=10):
+        """Functions with the most self time, as ``(label, seconds)``."""
+        self_time = Counter()
+        for stack, seconds in self._stacks.items():
+            if len(stack) > 1:
+                self_time[stack[-1]] += seconds
+        return [(self._label(i), round(s, 3)) for i, s in self_time.most_common(limit)]
+
+    def write(self):
+        """Write both output files and return a summary of the profile."""
+        name = time.strftime("%Y-%m-%d-%H%M%S", time.localtime(self._started_at or time.time()))
+        os.makedirs(self.output_dir, exist_ok=True)
+        base = os.path.join(self.output_dir, name)
+        with open(base + ".collapsed", "w", encoding="utf-8") as f:
+            f.write(self.collapsed())
+        with open(base + ".speedscope.json", "w", encoding="utf-8") as f:
+            json.dump(self.speedscope(name=f"omnivo {name}"), f)
+
+        elapsed = time.time() - self._started_at if self._started_at else 0.0
+        summary = {
+            "collapsed": base + ".collapsed",
+            "speedscope": base + ".speedscope.json",
+            "seconds": round(elapsed, 1),
+            "samples": self._samples,
+            "weighting": "cpu" if self.cpu_time else "wall",
+            "profiled_seconds": round(sum(self._stacks.values()), 3),
+            "overhead": round(self._overhead / elapsed, 4) if elapsed else 0.0,
+            "top": self.top(),
+        }
+        log.info(
+            f"[dim]Profile written to {base}.speedscope.json "
+            f"({self._samples} samples, {summary['overhead']:.1%} overhead)[/dim]"
+        )
+        return summary
+
+
+class ProfilerControl:
+    """One profile at a time for the control socket."""
+
+    def __init__(self, output_dir=None):
+        self.output_dir = output_dir
+        self._lock = threading.Lock()
+        self._profiler = None
+
+    def start(self, seconds=30, interval=None):
+        with self._lock:
+            if self._profiler and self._profiler.running:
+                raise RuntimeError("a profile is already running")
+            self._profiler = SamplingProfiler(interval=interval, output_dir=self.output_dir)
+            self._profiler.start(seconds)
+        return {"seconds": min(seconds or MAX_SECONDS, MAX_SECONDS)}
+
+    def stop(self):
+        """Stop the current profile (or collect one that already finished)."""
+        with self._lock:
+            profiler, self._profiler = self._profiler, None
+        if profiler is None:
+            raise RuntimeError("no profile is running")
+        return profiler.stop()
+
+    def status(self):
+        with self._lock:
+            profiler = self._profiler
+        return {"running": bool(profiler and profiler.running)}
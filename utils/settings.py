@@ -0,0 +1,330 @@
+"""Live-reloadable tuning settings.
+
+The constants in utils/config.py are the defaults. Any of them can be
+overridden in ~/.omnivo/config.json using the lower-case field names below,
+e.g. ``{"compressed_bitrate": "48k", "request_max_retries": 3}``.
+
+The file is re-read on SIGHUP, on ``omnivo reload`` and whenever it changes
+on disk. A reload swaps the whole Settings object at once; components read
+``get_settings()`` when they start a job, so an in-flight recording or
+transcription keeps the values it started with.
+"""
+
+import dataclasses
+import json
+import os
+import threading
+import typing
+
+from utils import config
+from utils.log import get_logger
+
+CONFIG_PATH = os.path.expanduser("~/.omnivo/config.json")
+POLL_INTERVAL = 2.0  # seconds between config file checks
+
+log = get_logger("config")
+
+
+@dataclasses.dataclass(frozen=True)
+class Settings:
+    # Dictation audio
+    sample_rate: int = config.SAMPLE_RATE
+    channels: int = config.CHANNELS
+
+    # Models
+    whisper_model: str = config.WHISPER_MODEL
+    transcribe_model: str = config.TRANSCRIBE_MODEL
+
+    # Dictation model routing
+    dictation_fallback_models: str = config.DICTATION_FALLBACK_MODELS
+    dictation_latency_budget: float = config.DICTATION_LATENCY_BUDGET
+    router_window: int = config.ROUTER_WINDOW
+    router_min_samples: int = config.ROUTER_MIN_SAMPLES
+    router_error_threshold: float = config.ROUTER_ERROR_THRESHOLD
+    router_cooldown: float = config.ROUTER_COOLDOWN
+    router_probe_every: int = config.ROUTER_PROBE_EVERY
+
+    # Dictation modes and screen context
+    dictation_mode: str = config.DICTATION_MODE
+    context_model: str = config.CONTEXT_MODEL
+    context_request_timeout: float = config.CONTEXT_REQUEST_TIMEOUT
+    screen_max_width: int = config.SCREEN_MAX_WIDTH
+    screen_hash_threshold: int = config.SCREEN_HASH_THRESHOLD
+    response_cache: bool = config.RESPONSE_CACHE
+    response_cache_ttl: float = config.RESPONSE_CACHE_TTL
+    response_cache_entries: int = config.RESPONSE_CACHE_ENTRIES
+    response_cache_disk_entries: int = config.RESPONSE_CACHE_DISK_ENTRIES
+    vocabulary: bool = config.VOCABULARY
+
+    # Meeting recording
+    meeting_notes_path: str = config.MEETING_NOTES_PATH
+    meeting_test_mode: bool = config.MEETING_TEST_MODE
+    meeting_timestamps: bool = config.MEETING_TIMESTAMPS
+    timestamp_model: str = config.TIMESTAMP_MODEL
+
+    # Archived meeting audio
+    archive_format: str = config.ARCHIVE_FORMAT
+    archive_max_bytes: int = config.ARCHIVE_MAX_BYTES
+    archive_max_age_days: float = config.ARCHIVE_MAX_AGE_DAYS
+
+    # Meeting summaries
+    meeting_summary: bool = config.MEETING_SUMMARY
+    summary_model: str = config.SUMMARY_MODEL
+    summary_max_workers: int = config.SUMMARY_MAX_WORKERS
+    summary_reduce_fanin: int = config.SUMMARY_REDUCE_FANIN
+
+    # Transcription pipeline
+    max_file_size_bytes: int = config.MAX_FILE_SIZE_BYTES
+    max_duration_seconds: float = config.MAX_DURATION_SECONDS
+    compressed_bitrate: str = config.COMPRESSED_BITRATE
+    safety_margin: float = config.SAFETY_MARGIN
+    chunk_encode_workers: int = config.CHUNK_ENCODE_WORKERS
+    chunk_encode_ahead: int = config.CHUNK_ENCODE_AHEAD
+    chunk_overlap_seconds: float = config.CHUNK_OVERLAP_SECONDS
+    chunk_upload_workers: int = config.CHUNK_UPLOAD_WORKERS
+    meeting_speedup: float = config.MEETING_SPEEDUP
+    worker_process: bool = config.WORKER_PROCESS
+
+    # Dictation request policy
+    request_max_retries: int = config.REQUEST_MAX_RETRIES
+    request_retry_backoff: float = config.REQUEST_RETRY_BACKOFF
+    request_hedge_percentile: float = config.REQUEST_HEDGE_PERCENTILE
+    request_default_hedge_delay: float = config.REQUEST_DEFAULT_HEDGE_DELAY
+    request_timeout_multiplier: float = config.REQUEST_TIMEOUT_MULTIPLIER
+    request_min_timeout: float = config.REQUEST_MIN_TIMEOUT
+    request_max_timeout: float = config.REQUEST_MAX_TIMEOUT
+    request_min_samples: int = config.REQUEST_MIN_SAMPLES
+    dictation_cancel_window: float = config.DICTATION_CANCEL_WINDOW
+    key_capture_backend: str = config.KEY_CAPTURE_BACKEND
+    clipboard_backend: str = config.CLIPBOARD_BACKEND
+    clipboard_restore: bool = config.CLIPBOARD_RESTORE
+    clipboard_restore_delay: float = config.CLIPBOARD_RESTORE_DELAY
+
+    # API scheduler
+    api_requests_per_second: float = config.API_REQUESTS_PER_SECOND
+    api_request_burst: float = config.API_REQUEST_BURST
+    api_upload_bytes_per_second: float = config.API_UPLOAD_BYTES_PER_SECOND
+    api_upload_burst_bytes: float = config.API_UPLOAD_BURST_BYTES
+    api_max_in_flight: int = config.API_MAX_IN_FLIGHT
+    meeting_request_timeout: float = config.MEETING_REQUEST_TIMEOUT
+
+    # Memory telemetry
+    memory_sample_interval: float = config.MEMORY_SAMPLE_INTERVAL
+    memory_history_samples: int = config.MEMORY_HISTORY_SAMPLES
+    memory_budget_bytes: int = config.MEMORY_BUDGET_BYTES
+    memory_trace_frames: int = config.MEMORY_TRACE_FRAMES
+    profile_interval: float = config.PROFILE_INTERVAL
+
+    def to_dict(self):
+        return dataclasses.asdict(self)
+
+
+# Allowed ranges, as (minimum, maximum, whether the minimum itself is
+# allowed); None is unbounded. Rates, intervals, durations and worker counts
+# must be positive: a zero would divide by zero or spin a loop that never
+# advances in the running daemon.
+_POSITIVE = (0, None, False)
+_NON_NEGATIVE = (0, None, True)
+_FRACTION = (0, 1, False)
+
+_RANGES = {
+    "sample_rate": _POSITIVE,
+    "channels": _POSITIVE,
+    "dictation_latency_budget": _POSITIVE,
+    "router_window": _POSITIVE,
+    "router_min_samples": _NON_NEGATIVE,
+    "router_error_threshold": _FRACTION,
+    "router_cooldown": _NON_NEGATIVE,
+    "router_probe_every": _NON_NEGATIVE,
+    "context_request_timeout": _POSITIVE,
+    "screen_max_width": _POSITIVE,
+    "screen_hash_threshold": _NON_NEGATIVE,
+    "response_cache_ttl": _NON_NEGATIVE,
+    "response_cache_entries": _NON_NEGATIVE,
+    "response_cache_disk_entries": _NON_NEGATIVE,
+    "archive_max_bytes": _NON_NEGATIVE,
+    "archive_max_age_days": _NON_NEGATIVE,
+    "summary_max_workers": _POSITIVE,
+    "summary_reduce_fanin": (2, None, True),
+    "max_file_size_bytes": _POSITIVE,
+    "max_duration_seconds": (1, None, True),
+    "safety_margin": _FRACTION,
+    "chunk_encode_workers": _NON_NEGATIVE,
+    "chunk_encode_ahead": _POSITIVE,
+    "chunk_overlap_seconds": _NON_NEGATIVE,
+    "chunk_upload_workers": _POSITIVE,
+    "meeting_speedup": _POSITIVE,
+    "request_max_retries": _NON_NEGATIVE,
+    "request_retry_backoff": _NON_NEGATIVE,
+    "request_hedge_percentile": (0, 100, False),
+    "request_default_hedge_delay": _POSITIVE,
+    "request_timeout_multiplier": _POSITIVE,
+    "request_min_timeout": _POSITIVE,
+    "request_max_timeout": _POSITIVE,
+    "request_min_samples": _POSITIVE,
+    "dictation_cancel_window": _NON_NEGATIVE,
+    "clipboard_restore_delay": _NON_NEGATIVE,
+    "api_requests_per_second": _POSITIVE,
+    "api_request_burst": _POSITIVE,
+    "api_upload_bytes_per_second": _POSITIVE,
+    "api_upload_burst_bytes": _POSITIVE,
+    "api_max_in_flight": _POSITIVE,
+    "meeting_request_timeout": _POSITIVE,
+    "memory_sample_interval": _POSITIVE,
+    "memory_history_samples": _POSITIVE,
+    "memory_budget_bytes": _NON_NEGATIVE,
+    "memory_trace_frames": _POSITIVE,
+    "profile_interval": _POSITIVE,
+}
+
+
+def _check_range(name, value):
+    if name not in _RANGES:
+        return value
+    low, high, inclusive = _RANGES[name]
+    if value < low or (value == low and not inclusive):
+        raise ValueError(f"{name}: must be {'>=' if inclusive else '>'} {low}, got {value!r}")
+    if high is not None and value > high:
+        raise ValueError(f"{name}: must be <= {high}, got {value!r}")
+    return value
+
+
+def _coerce(name, expected, value):
+    """Check ``value`` against a field type; ints are accepted for floats."""
+    if expected is bool:
+        if isinstance(value, bool):
+            return value
+    elif expected is int:
+        if isinstance(value, int) and not isinstance(value, bool):
+            return value
+    elif expected is float:
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return float(value)
+    elif expected is str:
+        if isinstance(value, str):
+            return os.path.expanduser(value) if name.endswith("_path") else value
+    raise ValueError(f"{name}: expected {expected.__name__}, got {value!r}")
+
+
+def parse_settings(overrides, base=None):
+    """Build Settings from a dict of overrides on top of ``base``.
+
+    Unknown keys are logged and ignored. Raises ValueError on a bad value,
+    of the wrong type or out of range, so a half-edited file never replaces a
+    working configuration.
+    """
+    if not isinstance(overrides, dict):
+        raise ValueError("config must be a JSON object")
+    base = base or Settings()
+    types = typing.get_type_hints(Settings)
+    values = {}
+    for name, value in overrides.items():
+        if name not in types:
+            log.warning(f"[yellow]Ignoring unknown config key '{name}'[/yellow]")
+            continue
+        values[name] = _check_range(name, _coerce(name, types[name], value))
+    return dataclasses.replace(base, **values)
+
+
+def load_settings(path=None):
+    """Read Settings from ``path`` (defaults only if the file doesn't exist)."""
+    path = path or CONFIG_PATH
+    if not os.path.exists(path):
+        return Settings()
+    with open(path, encoding="utf-8") as f:
+        return parse_settings(json.load(f))
+
+
+_current = None
+_lock = threading.Lock()
+_listeners = []
+
+
+def get_settings():
+    """Return the current Settings snapshot, loading the file on first use."""
+    global _current
+    if _current is None:
+        with _lock:
+            if _current is None:
+                try:
+                    _current = load_settings()
+                except (OSError, ValueError) as e:
+                    log.error(f"[bold red]Invalid config, using defaults: {e}[/bold red]")
+                    _current = Settings()
+    return _current
+
+
+def add_reload_listener(callback):
+    """Call ``callback(settings, changed_keys)`` after each successful reload."""
+    with _lock:
+        _listeners.append(callback)
+
+
+def reload_settings(path=None):
+    """Reload the config file and swap it in.
+
+    Returns:
+        list: Names of the settings that changed
+
+    Raises:
+        ValueError, OSError: The file is invalid; current settings are kept
+    """
+    global _current
+    new = load_settings(path)
+    with _lock:
+        old = _current or Settings()
+        _current = new
+        listeners = list(_listeners)
+
+    old_values, new_values = old.to_dict(), new.to_dict()
+    changed = [k for k in new_values if new_values[k] != old_values[k]]
+    if changed:
+        log.info(f"[dim]Config reloaded: {', '.join(changed)}[/dim]")
+        for callback in listeners:
+            try:
+                callback(new, changed)
+            except Exception as e:
+                log.error(f"[bold red]Config listener failed: {e}[/bold red]")
+    return changed
+
+
+class SettingsWatcher:
+    """Reload settings when the config file changes on disk."""
+
+    def __init__(self, path=None, interval=POLL_INTERVAL):
+        self.path = path or CONFIG_PATH
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+        self._last = self._signature()
+
+    def _signature(self):
+        try:
+            st = os.stat(self.path)
+            return (st.st_mtime_ns, st.st_size, st.st_ino)
+        except FileNotFoundError:
+            return None
+
+    def check(self):
+        """Reload if the file changed since the last check."""
+        signature = self._signature()
+        if signature == self._last:
+            return False
+        self._last = signature
+        try:
+            reload_settings(self.path)
+        except (OSError, ValueError) as e:
+            log.error(f"[bold red]Config not reloaded, keeping previous values: {e}[/bold red]")
+            return False
+        return True
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.check()
@@ -0,0 +1,76 @@
+"""Startup timing for `python main.py --profile-startup`.
+
+Records named phases relative to the start of main.py and the self time of
+every first-time import, so slow startup can be traced to a module.
+"""
+
+import builtins
+import sys
+import threading
+import time
+from collections import defaultdict
+
+
+class StartupProfiler:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = []  # (name, seconds since start, thread name)
+        self.import_times = defaultdict(float)  # top-level package -> self time
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._original_import = None
+
+    def install(self):
+        """Start timing imports made through the import statement."""
+        if self._original_import is None:
+            self._original_import = builtins.__import__
+            builtins.__import__ = self._timed_import
+
+    def uninstall(self):
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        original = self._original_import
+        if level or name in sys.modules:
+            return original(name, globals, locals, fromlist, level)
+
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            return original(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - start
+            children = stack.pop()
+            if stack:
+                stack[-1] += elapsed
+            with self._lock:
+                self.import_times[name.partition(".")[0]] += elapsed - children
+
+    def mark(self, phase):
+        """Record that ``phase`` finished now."""
+        with self._lock:
+            self.phases.append(
+                (phase, time.perf_counter() - self.started, threading.current_thread().name)
+            )
+
+    def report(self, top=15):
+        """Return the phase timeline and slowest imports as text."""
+        lines = ["Startup profile (ms since main.py started):"]
+        with self._lock:
+            phases = sorted(self.phases, key=lambda p: p[1])
+            imports = sorted(self.import_times.items(), key=lambda kv: -kv[1])[:top]
+        for name, seconds, thread in phases:
+            where = "" if thread == "MainThread" else f"  [{thread}]"
+            lines.append(f"  {seconds * 1000:9.1f}  {name}{where}")
+        lines.append("Slowest imports (self time, ms):")
+        for package, seconds in imports:
+            lines.append(f"  {seconds * 1000:9.1f}  {package}")
+        return "\n".join(lines)
+
+
+profiler = StartupProfiler()